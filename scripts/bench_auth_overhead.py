@@ -0,0 +1,57 @@
+"""
+Latency benchmark: per-request cost of ``verify_token_jwt``.
+
+Seeds one user in a scratch database, issues an access token and times the
+dependency with the verification cache disabled (JWT decode + users lookup on
+every call, the previous behaviour) and enabled (cached claims and user
+existence).
+
+Usage:
+    cd hacking-health-api
+    python -m scripts.bench_auth_overhead
+    python -m scripts.bench_auth_overhead --runs 2000
+"""
+import argparse
+import asyncio
+
+from bson import ObjectId
+
+from scripts.bench_utils import bench_database, print_row, time_async
+from src._config.settings import settings
+from src.core.auth_cache import token_cache
+from src.core.jwt import create_access_token
+from src.domains.auth.routes import verify_token_jwt
+
+
+async def run(runs: int) -> None:
+    client, db = bench_database()
+    settings.DEBUG = False
+    try:
+        user_id = ObjectId()
+        await db.users.insert_one({"_id": user_id, "email": "bench@example.com", "name": "Bench"})
+        header = f"Bearer {create_access_token(str(user_id))}"
+
+        async def _verify():
+            await verify_token_jwt(authorization=header, db=db)
+
+        print(f"verify_token_jwt, {runs} runs")
+        token_cache.enabled = False
+        print_row("no cache (decode + find_one)", await time_async(_verify, runs=runs))
+        token_cache.enabled = True
+        token_cache.clear()
+        print_row("verification cache", await time_async(_verify, runs=runs))
+        print(f"  cache stats: {token_cache.stats()}")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark access-token verification overhead")
+    parser.add_argument("--runs", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.runs))
+
+
+if __name__ == "__main__":
+    main()
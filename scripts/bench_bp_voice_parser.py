@@ -0,0 +1,95 @@
+"""
+Benchmark: share of BP transcriptions answered by the local grammar.
+
+Runs the phrase corpus (src/tests/test_health/bp_phrase_corpus.json, or
+``--corpus``) through `VoiceParsingService.parse_transcription` with the
+chat model replaced by a stub that answers after ``--llm-ms``, and reports:
+
+- how many phrases were resolved locally vs sent to the LLM
+- local parse latency and total wall time, with and without the grammar
+- the `bp_voice_parser` counters (as exposed at GET /metrics/cache)
+
+No API server, database or OpenAI key is needed.
+
+Usage:
+    cd hacking-health-api
+    python -m scripts.bench_bp_voice_parser
+    python -m scripts.bench_bp_voice_parser --llm-ms 900 --rounds 5
+"""
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import List
+
+from src.domains.health import voice_parsing
+from src.domains.health.bp_grammar import bp_parse_stats
+from src.domains.health.voice_cache import extraction_cache
+from src.domains.health.voice_parsing import VoiceParsingService
+
+_DEFAULT_CORPUS = Path(__file__).resolve().parent.parent / "src/tests/test_health/bp_phrase_corpus.json"
+
+
+class _StubCompletions:
+    def __init__(self, delay_ms: float):
+        self.delay = delay_ms / 1000
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.delay)
+        message = type("Message", (), {"content": json.dumps({
+            "systolic": 120, "diastolic": 80, "pulse": None,
+            "device_classification": None, "confidence": "low",
+        })})()
+        return type("Response", (), {"choices": [type("Choice", (), {"message": message})()]})()
+
+
+class _StubClient:
+    def __init__(self, delay_ms: float):
+        self.chat = type("Chat", (), {"completions": _StubCompletions(delay_ms)})()
+
+
+async def _run_phrases(service: VoiceParsingService, phrases: List[str], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        extraction_cache.clear()  # Measure the grammar, not the extraction cache
+        for text in phrases:
+            await service.parse_transcription(text)
+    return (time.perf_counter() - start) * 1000
+
+
+async def run(corpus_path: Path, llm_ms: float, rounds: int) -> None:
+    with open(corpus_path, encoding="utf-8") as f:
+        corpus = json.load(f)
+    phrases = [c["text"] for c in corpus["local"] + corpus["llm"]]
+    service = VoiceParsingService()
+    service.client = _StubClient(llm_ms)
+
+    print(f"{len(phrases)} phrases x {rounds} rounds, stub LLM {llm_ms:.0f}ms")
+    voice_parsing.settings.VOICE_LOCAL_BP_PARSER_ENABLED = False
+    llm_only_ms = await _run_phrases(service, phrases, rounds)
+    print(f"  LLM only        {llm_only_ms:9.0f}ms")
+
+    bp_parse_stats.clear()
+    voice_parsing.settings.VOICE_LOCAL_BP_PARSER_ENABLED = True
+    grammar_ms = await _run_phrases(service, phrases, rounds)
+    stats = bp_parse_stats.stats()
+    print(
+        f"  grammar + LLM   {grammar_ms:9.0f}ms | resolved locally {stats['resolved_locally']}/"
+        f"{stats['requests']} ({stats['local_rate']:.0%}), avg local parse {stats['avg_local_ms']:.3f}ms"
+    )
+    print(f"  wall time saved {llm_only_ms - grammar_ms:9.0f}ms")
+    print(f"  bp_voice_parser: {stats}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure how many BP phrases skip the LLM")
+    parser.add_argument("--corpus", type=Path, default=_DEFAULT_CORPUS)
+    parser.add_argument("--llm-ms", type=float, default=700.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.corpus, args.llm_ms, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: offline drug index build time, footprint and lookup latency.
+
+Generates a synthetic registry (``--products`` rows combining ingredient
+stems, brand names, strengths and forms, about the size of the CUM
+"Vigente" set by default), builds the index into a temp file, then reports:
+
+- build time and file size
+- memory allocated by opening the index (tracemalloc; the mmap'd pages are
+  shared, file-backed and not counted)
+- lookup latency for exact, prefix and misspelled names
+
+No network or database is needed.
+
+Usage:
+    cd hacking-health-api
+    python -m scripts.bench_drug_index
+    python -m scripts.bench_drug_index --products 100000 --runs 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from src.domains.medications.drug_index import DrugIndex, build_index
+
+_STEMS = [
+    "losart", "metform", "atorvast", "amlodip", "enalapr", "omepraz", "levotirox",
+    "salbutam", "ibupro", "paracet", "clopidogr", "simvast", "valsart", "furosem",
+    "hidroclorotiaz", "carvedil", "bisoprol", "insul", "warfar", "gabapent",
+    "sertral", "fluoxet", "escitalopr", "quetiap", "risperid", "lorazep", "diazep",
+    "prednis", "dexametas", "amoxicil", "azitromic", "ciprofloxac", "doxicicl",
+]
+_SUFFIXES = ["an", "ina", "ato", "ol", "ida", "ona", "eno", "ilo", "ico", "ino"]
+_FORMS = ["tabletas", "capsulas", "jarabe", "solucion inyectable", "suspension"]
+
+
+def _synthetic(products: int, rng: random.Random):
+    ingredients = [f"{stem}{suffix}" for stem in _STEMS for suffix in _SUFFIXES]
+    for i in range(products):
+        ingredient = rng.choice(ingredients)
+        brand = "".join(rng.choice("bcdfglmnprstvz") + rng.choice("aeiou") for _ in range(rng.randint(2, 4)))
+        yield {
+            "name": f"{brand.upper()} {rng.choice([5, 10, 20, 50, 100, 500, 850])} MG {rng.choice(_FORMS)}",
+            "active_ingredient": ingredient.upper(),
+            "source": "co" if i % 3 else "es",
+        }
+
+
+def _misspell(word: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def _time(index: DrugIndex, queries, runs: int):
+    samples = []
+    for i in range(runs):
+        start = time.perf_counter()
+        index.search(queries[i % len(queries)])
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95)], statistics.fmean(samples)
+
+
+def run(products: int, runs: int) -> None:
+    rng = random.Random(11)
+    entries = list(_synthetic(products, rng))
+    path = os.path.join(tempfile.mkdtemp(), "drug_index.bin")
+    try:
+        start = time.perf_counter()
+        count = build_index(entries, path)
+        build_s = time.perf_counter() - start
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        index = DrugIndex(path)
+        open_ms = (time.perf_counter() - start) * 1000
+        opened = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        ingredients = sorted({e["active_ingredient"].lower() for e in entries})
+        brands = [e["name"].split()[0].lower() for e in entries[:500]]
+        query_sets = {
+            "exact ingredient": ingredients,
+            "brand prefix": [b[:max(3, len(b) - 2)] for b in brands],
+            "misspelled ingredient": [_misspell(w, rng) for w in ingredients],
+        }
+
+        print(f"Offline drug index, {count} products")
+        print(f"  build                   {build_s:8.2f} s")
+        print(f"  file size               {os.path.getsize(path) / 1024 / 1024:8.2f} MiB "
+              f"({index.term_count} terms, {index.trigram_count} trigrams)")
+        print(f"  open (mmap)             {open_ms:8.2f} ms, {opened / 1024:.1f} KiB heap")
+        for label, queries in query_sets.items():
+            p50, p95, mean = _time(index, queries, runs)
+            print(f"  {label:<24}p50={p50:6.3f}ms  p95={p95:6.3f}ms  mean={mean:6.3f}ms")
+        index.close()
+    finally:
+        os.remove(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the offline drug index")
+    parser.add_argument("--products", type=int, default=25000)
+    parser.add_argument("--runs", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.products, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Latency benchmark: patient health summary, sequential vs. concurrent reads.
+
+Seeds a scratch database with 24h of heart rate, steps, sleep and blood
+pressure for one patient, then times
+``PatientDataService.get_patient_health_summary`` with the fan-out capped to
+1 (equivalent to the old sequential awaits) and to ``--concurrency``.
+
+Every Mongo call goes through a proxy that sleeps ``--latency-ms`` first, to
+simulate a remote cluster against a local mongod. With N independent reads
+the sequential path costs ~N x latency; the concurrent one approaches
+ceil(N / concurrency) x latency.
+
+Usage:
+    cd hacking-health-api
+    python -m scripts.bench_health_summary
+    python -m scripts.bench_health_summary --latency-ms 25 --concurrency 8 --runs 50
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from scripts.bench_utils import bench_database, print_row, time_async
+from src._config.settings import settings
+from src.domains.health.service_modules import PatientDataService
+
+
+class _SlowCursor:
+    def __init__(self, cursor, delay: float):
+        self._cursor = cursor
+        self._delay = delay
+
+    async def to_list(self, *args, **kwargs):
+        await asyncio.sleep(self._delay)
+        return await self._cursor.to_list(*args, **kwargs)
+
+
+class _SlowCollection:
+    """Adds a fixed delay before every awaited collection operation."""
+
+    def __init__(self, collection, delay: float):
+        self._collection = collection
+        self._delay = delay
+
+    def find(self, *args, **kwargs):
+        return _SlowCursor(self._collection.find(*args, **kwargs), self._delay)
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+
+        async def _call(*args, **kwargs):
+            await asyncio.sleep(self._delay)
+            return await attr(*args, **kwargs)
+        return _call
+
+
+class _SlowDatabase:
+    def __init__(self, db, delay: float):
+        self._db = db
+        self._delay = delay
+
+    def __getattr__(self, name):
+        return _SlowCollection(getattr(self._db, name), self._delay)
+
+    def __getitem__(self, name):
+        return _SlowCollection(self._db[name], self._delay)
+
+
+async def _seed(db, patient_id: str) -> None:
+    now = datetime.now(timezone.utc)
+    ts_ms = int(now.timestamp() * 1000)
+    await db.users.insert_one({"_id": ObjectId(patient_id), "name": "Bench"})
+    await db.health_metrics.insert_many([
+        {"userId": patient_id, "type": "heart_rate", "average": 72, "min": 60, "max": 110, "timestamp": ts_ms},
+        {"userId": patient_id, "type": "steps", "value": 5400, "timestamp": ts_ms},
+        {"userId": patient_id, "type": "sleep", "value": 420, "timestamp": ts_ms},
+    ])
+    await db.blood_pressure_readings.insert_many([
+        {
+            "userId": patient_id, "systolic": 120 + i, "diastolic": 80,
+            "timestamp": (now - timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+        for i in range(12)
+    ])
+
+
+async def run(latency_ms: float, concurrency: int, runs: int) -> None:
+    client, db = bench_database()
+    patient_id = str(ObjectId())
+    try:
+        await _seed(db, patient_id)
+        service = PatientDataService(_SlowDatabase(db, latency_ms / 1000))
+
+        print(f"Health summary, injected latency {latency_ms:.0f}ms per round trip, {runs} runs")
+        for label, cap in (("sequential (cap=1)", 1), (f"concurrent (cap={concurrency})", concurrency)):
+            settings.HEALTH_SUMMARY_MAX_CONCURRENCY = cap
+            stats = await time_async(
+                lambda: service.get_patient_health_summary(patient_id), runs=runs
+            )
+            print_row(label, stats)
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the patient health summary fan-out")
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="Injected delay per Mongo call")
+    parser.add_argument("--concurrency", type=int, default=settings.HEALTH_SUMMARY_MAX_CONCURRENCY)
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(args.latency_ms, args.concurrency, args.runs))
+
+
+if __name__ == "__main__":
+    main()
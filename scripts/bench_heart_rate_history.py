@@ -0,0 +1,88 @@
+"""
+Latency benchmark: heart-rate history, per-day queries vs. one aggregation.
+
+Seeds a scratch database with ``--days`` of daily ``heart_rate`` aggregates and
+``--samples`` raw ``heart_rate_sample`` docs per day for one patient, then
+times the legacy loop (find_one + count_documents per day) against
+``BloodPressureService.get_patient_heart_rate_history``.
+
+Usage:
+    cd hacking-health-api
+    python -m scripts.bench_heart_rate_history
+    python -m scripts.bench_heart_rate_history --days 90 --samples 200 --runs 100
+"""
+import argparse
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from scripts.bench_utils import bench_database, print_row, time_async
+from src.domains.health.service_modules import BloodPressureService
+
+
+async def _seed(db, patient_id: str, days: int, samples: int) -> None:
+    today = datetime.now(timezone.utc).date()
+    docs = []
+    for i in range(days):
+        date_str = (today - timedelta(days=i)).isoformat()
+        docs.append({
+            "userId": patient_id, "type": "heart_rate", "date": date_str,
+            "average": random.randint(60, 90), "min": 55, "max": 120,
+        })
+        docs.extend(
+            {"userId": patient_id, "type": "heart_rate_sample", "date": date_str,
+             "bpm": random.randint(55, 120)}
+            for _ in range(samples)
+        )
+    await db.users.insert_one({"_id": ObjectId(patient_id), "name": "Bench"})
+    await db.health_metrics.insert_many(docs)
+    await db.health_metrics.create_index([("userId", 1), ("type", 1), ("date", 1)])
+
+
+async def _legacy_history(db, patient_id: str, days: int) -> list:
+    """The pre-aggregation implementation: two round trips per day."""
+    today = datetime.now(timezone.utc).date()
+    start_date = today - timedelta(days=days - 1)
+    points = []
+    for i in range(days):
+        date_str = (start_date + timedelta(days=i)).isoformat()
+        hr = await db.health_metrics.find_one(
+            {"userId": patient_id, "type": "heart_rate", "date": date_str}
+        )
+        count = await db.health_metrics.count_documents(
+            {"userId": patient_id, "type": "heart_rate_sample", "date": date_str}
+        )
+        points.append((date_str, hr.get("average") if hr else None, count))
+    return points
+
+
+async def run(days: int, samples: int, runs: int) -> None:
+    client, db = bench_database()
+    patient_id = str(ObjectId())
+    try:
+        await _seed(db, patient_id, days, samples)
+        service = BloodPressureService(db)
+
+        print(f"\n=== heart-rate history: {days} days x {samples} samples/day, {runs} runs ===")
+        print_row("legacy per-day queries", await time_async(
+            lambda: _legacy_history(db, patient_id, days), runs=runs))
+        print_row("single aggregation", await time_async(
+            lambda: service.get_patient_heart_rate_history(patient_id, days), runs=runs))
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark heart-rate history queries")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--samples", type=int, default=96, help="HR samples per day")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.days, args.samples, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark: database writes per location report, before and after coalescing.
+
+Simulates ``--users`` phones reporting every ``--interval`` seconds for
+``--hours``, a ``--moving`` share of them walking (~1.4 m/s) and the rest
+standing still with GPS jitter (up to ``--jitter-m``), through
+`LocationService.update_location` on a counting fake database, and reports:
+
+- writes without coalescing (one users update + one history insert per report)
+- users updates, history points and insert_many batches with coalescing
+- the `location_ingest` counters (as exposed at GET /metrics/cache)
+
+Report times are simulated, so the run takes seconds; no database is needed.
+
+Usage:
+    cd hacking-health-api
+    python -m scripts.bench_location_ingest
+    python -m scripts.bench_location_ingest --users 2000 --moving 0.1 --interval 15
+"""
+import argparse
+import asyncio
+import math
+import random
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from bson import ObjectId
+
+from src.domains.location.ingest import last_positions, location_history_writer
+from src.domains.location.services import LocationService
+
+_METERS_PER_DEGREE = 111_320.0
+
+
+class _Collection:
+    def __init__(self):
+        self.update_one_calls = 0
+        self.insert_many_calls = 0
+        self.documents = 0
+
+    async def update_one(self, *args, **kwargs):
+        self.update_one_calls += 1
+
+    async def insert_many(self, documents, **kwargs):
+        self.insert_many_calls += 1
+        self.documents += len(documents)
+
+
+class _Database:
+    def __init__(self):
+        self.users = _Collection()
+        self.locations = _Collection()
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+class _Clock:
+    now = datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc)
+
+    @classmethod
+    def now_utc(cls, tz=None):
+        return cls.now
+
+
+async def run(users: int, hours: float, interval: float, moving: float, jitter_m: float) -> dict:
+    rng = random.Random(7)
+    db = _Database()
+    service = LocationService(db)
+    phones = [
+        {
+            "id": str(ObjectId()),
+            "lat": 6.2 + rng.random() * 0.1,
+            "lng": -75.6 + rng.random() * 0.1,
+            "heading": rng.random() * 2 * math.pi,
+            "moving": rng.random() < moving,
+        }
+        for _ in range(users)
+    ]
+    steps = int(hours * 3600 / interval)
+    fake_datetime = type("datetime", (datetime,), {"now": staticmethod(_Clock.now_utc)})
+    start = _Clock.now
+    with patch("src.domains.location.services.datetime", fake_datetime):
+        for step in range(steps):
+            _Clock.now = start + timedelta(seconds=step * interval)
+            for phone in phones:
+                if phone["moving"]:
+                    meters = 1.4 * interval
+                    phone["lat"] += meters * math.cos(phone["heading"]) / _METERS_PER_DEGREE
+                    phone["lng"] += meters * math.sin(phone["heading"]) / _METERS_PER_DEGREE
+                noise = rng.uniform(0, jitter_m) / _METERS_PER_DEGREE
+                await service.update_location(
+                    phone["id"], phone["lat"] + noise, phone["lng"] - noise, accuracy=jitter_m
+                )
+    await location_history_writer.flush()
+    return {
+        "reports": users * steps,
+        "users_updates": db.users.update_one_calls,
+        "history_points": db.locations.documents,
+        "insert_many_calls": db.locations.insert_many_calls,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Count location writes with and without coalescing")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--hours", type=float, default=2.0)
+    parser.add_argument("--interval", type=float, default=30.0, help="Seconds between reports")
+    parser.add_argument("--moving", type=float, default=0.2, help="Share of phones that are walking")
+    parser.add_argument("--jitter-m", type=float, default=10.0)
+    args = parser.parse_args()
+
+    last_positions.clear()
+    location_history_writer.reset()
+    result = asyncio.run(run(args.users, args.hours, args.interval, args.moving, args.jitter_m))
+
+    before = 2 * result["reports"]
+    after = result["users_updates"] + result["insert_many_calls"]
+    print(
+        f"{result['reports']} reports from {args.users} phones "
+        f"({args.moving:.0%} moving, every {args.interval:.0f}s for {args.hours}h)"
+    )
+    print(f"  without coalescing: {before} writes ({result['reports']} update_one + {result['reports']} insert_one)")
+    print(
+        f"  with coalescing:    {after} writes ({result['users_updates']} update_one + "
+        f"{result['insert_many_calls']} insert_many of {result['history_points']} points) "
+        f"-> {1 - after / before:.1%} fewer"
+    )
+    print(f"  location_ingest: {last_positions.stats()} | writer {location_history_writer.stats()}")
+
+
+if __name__ == "__main__":
+    main()
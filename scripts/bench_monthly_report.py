@@ -0,0 +1,112 @@
+"""
+Latency benchmark: monthly adherence report, streamed takes vs. one aggregation.
+
+Seeds a scratch database with ``--meds`` medications taken ``--doses`` times a
+day for one patient over last month and the current month, then times the
+legacy report (every take document streamed and grouped in Python) against
+``MedicationService.get_monthly_report`` with the month cache disabled
+(aggregation only) and enabled (past month served from memory, current month
+within its TTL).
+
+Usage:
+    cd hacking-health-api
+    python -m scripts.bench_monthly_report
+    python -m scripts.bench_monthly_report --meds 15 --doses 4 --runs 100
+"""
+import argparse
+import asyncio
+import calendar
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from scripts.bench_utils import bench_database, print_row, time_async
+from src.domains.medications.adherence import monthly_takes
+from src.domains.medications.models import MedicationDB, MedicationTakeDB
+from src.domains.medications.services import MedicationService
+
+
+def _months():
+    today = datetime.utcnow().date()
+    last_month = today.replace(day=1) - timedelta(days=1)
+    return (last_month.year, last_month.month), (today.year, today.month)
+
+
+async def _seed(db, patient_id: str, meds: int, doses: int) -> None:
+    times = [f"{8 + i * (12 // max(doses, 1)):02d}:00" for i in range(doses)]
+    med_ids = []
+    for i in range(meds):
+        doc = MedicationDB.create_document(
+            medication_id=str(uuid4()), user_id=patient_id, name=f"Med {i}",
+            dosage="1", times=times, instructions="", medication_type="pill",
+        )
+        med_ids.append(doc["_id"])
+        await db.medications.insert_one(doc)
+
+    takes = []
+    for year, month in _months():
+        _, days = calendar.monthrange(year, month)
+        for day in range(1, days + 1):
+            for med_id in med_ids:
+                for t in times:
+                    taken_at = datetime(year, month, day, int(t[:2]), 5)
+                    takes.append(MedicationTakeDB.create_document(
+                        take_id=str(uuid4()), medication_id=med_id, user_id=patient_id,
+                        taken_at=taken_at, date=taken_at.strftime("%Y-%m-%d"), scheduled_time=t,
+                    ))
+    await db.medication_takes.insert_many(takes)
+    await db.medication_takes.create_index([("userId", 1), ("date", 1)])
+    await db.medications.create_index([("userId", 1), ("isActive", 1)])
+    print(f"  seeded {len(med_ids)} medications, {len(takes)} takes")
+
+
+async def _legacy_report(service: MedicationService, user_id: str, year: int, month: int) -> dict:
+    """The pre-aggregation implementation: stream and group every take."""
+    _, days_in_month = calendar.monthrange(year, month)
+    medications = await service.get_medications(user_id, include_inactive=True)
+    cursor = service.medication_takes.find({
+        "userId": user_id,
+        "date": {"$gte": f"{year:04d}-{month:02d}-01", "$lte": f"{year:04d}-{month:02d}-{days_in_month:02d}"},
+    })
+    takes_by_med = {}
+    async for doc in cursor:
+        take = MedicationTakeDB.to_response(doc)
+        daily = takes_by_med.setdefault(take["medicationId"], {})
+        daily[take["date"]] = daily.get(take["date"], 0) + 1
+    return {m["id"]: len(takes_by_med.get(m["id"], {})) for m in medications}
+
+
+async def run(meds: int, doses: int, runs: int) -> None:
+    client, db = bench_database()
+    patient_id = str(uuid4())
+    try:
+        await _seed(db, patient_id, meds, doses)
+        service = MedicationService(db)
+
+        for label, (year, month) in zip(("past month", "current month"), _months()):
+            print(f"\n=== monthly report, {label} {year}-{month:02d}: {meds} meds x {doses} doses/day, {runs} runs ===")
+            print_row("legacy streamed takes", await time_async(
+                lambda: _legacy_report(service, patient_id, year, month), runs=runs))
+            monthly_takes.enabled = False
+            print_row("aggregation", await time_async(
+                lambda: service.get_monthly_report(patient_id, year, month), runs=runs))
+            monthly_takes.enabled = True
+            monthly_takes.clear()
+            print_row("aggregation + month cache", await time_async(
+                lambda: service.get_monthly_report(patient_id, year, month), runs=runs))
+        print(f"  cache stats: {monthly_takes.stats()}")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the monthly adherence report")
+    parser.add_argument("--meds", type=int, default=12)
+    parser.add_argument("--doses", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.meds, args.doses, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Small helpers shared by the ``scripts.bench_*`` latency benchmarks.
+
+Every benchmark seeds its own scratch database (``<MONGO_DB>_bench`` by
+default, dropped at the end) on the mongod pointed to by MONGO_URI, so it never
+touches real patient data.
+"""
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src._config.settings import settings
+
+
+def bench_database(name: str = None):
+    """Return (client, db) for the scratch benchmark database."""
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    return client, client[name or f"{settings.MONGO_DB}_bench"]
+
+
+async def time_async(fn: Callable[[], Awaitable], runs: int = 50, warmup: int = 3) -> Dict[str, float]:
+    """Run ``fn`` ``runs`` times and return p50/p95/max/mean latency in ms."""
+    for _ in range(warmup):
+        await fn()
+    samples: List[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50": samples[len(samples) // 2],
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "max": samples[-1],
+        "mean": statistics.fmean(samples),
+    }
+
+
+def print_row(label: str, stats: Dict[str, float]) -> None:
+    print(
+        f"  {label:<28} p50={stats['p50']:8.2f}ms  p95={stats['p95']:8.2f}ms  "
+        f"max={stats['max']:8.2f}ms  mean={stats['mean']:8.2f}ms"
+    )
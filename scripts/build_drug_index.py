@@ -0,0 +1,93 @@
+"""
+Build the offline drug registry index used by DrugCatalogService.
+
+Reads registry snapshots from local files and writes the memory-mapped index
+(src/domains/medications/drug_index.py). Point DRUG_INDEX_PATH at the output
+and restart the API to use it.
+
+Inputs:
+    --cum   INVIMA CUM export from datos.gov.co (JSON array as returned by the
+            Socrata API, or the CSV download). Only "Vigente" registrations
+            are kept.
+    --cima  CIMA / AEMPS medicamentos export (JSON: a list of rows or the
+            API's {"resultados": [...]} page; several files may be given).
+
+Usage:
+    cd hacking-health-api
+    python -m scripts.build_drug_index --cum data/cum.json --out data/drug_index.bin
+    python -m scripts.build_drug_index --cum data/cum.csv --cima data/cima_*.json --out data/drug_index.bin
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from typing import Dict, Iterator, List
+
+from src.domains.medications.drug_index import DrugIndex, build_index
+
+
+def _read_rows(path: str) -> List[dict]:
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return list(csv.DictReader(f))
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("resultados") or []
+    return data
+
+
+def cum_entries(path: str) -> Iterator[Dict[str, str]]:
+    for row in _read_rows(path):
+        if str(row.get("estadoregistro", "")).strip().lower() != "vigente":
+            continue
+        yield {
+            "name": row.get("producto") or "",
+            "active_ingredient": row.get("principioactivo") or "",
+            "source": "co",
+        }
+
+
+def cima_entries(path: str) -> Iterator[Dict[str, str]]:
+    for row in _read_rows(path):
+        yield {
+            "name": row.get("nombre") or "",
+            "active_ingredient": row.get("pactivos") or "",
+            "source": "es",
+        }
+
+
+def run(cum: List[str], cima: List[str], out: str) -> None:
+    def entries():
+        for path in cum:
+            yield from cum_entries(path)
+        for path in cima:
+            yield from cima_entries(path)
+
+    start = time.perf_counter()
+    count = build_index(entries(), out)
+    elapsed = time.perf_counter() - start
+
+    index = DrugIndex(out)
+    print(
+        f"Wrote {out}: {count} products, {index.term_count} terms, "
+        f"{index.trigram_count} trigrams, {os.path.getsize(out) / 1024:.0f} KiB "
+        f"in {elapsed:.2f}s"
+    )
+    index.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the offline drug registry index")
+    parser.add_argument("--cum", nargs="*", default=[], help="CUM snapshot(s), JSON or CSV")
+    parser.add_argument("--cima", nargs="*", default=[], help="CIMA snapshot(s), JSON")
+    parser.add_argument("--out", required=True, help="Index file to write")
+    args = parser.parse_args()
+    if not args.cum and not args.cima:
+        parser.error("give at least one --cum or --cima file")
+    run(args.cum, args.cima, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Nightly compaction of the materialized health rollups (`health_rollups`).
+
+Each patient's rollup keeps one entry per day; ingestion only ever adds or
+overwrites days, so without this job the documents would grow forever. The
+job drops every day older than the rolling 30-day window in a single
+server-side pipeline update. Optionally rebuilds rollups from the raw
+collections (repair after a bug or a manual data fix).
+
+Schedule it once a day (cron / Fly scheduled machine), e.g. at 03:30 UTC.
+
+Usage:
+    cd hacking-health-api
+    python -m scripts.compact_health_rollups                         # compact all rollups
+    python -m scripts.compact_health_rollups --rebuild <patient_id>  # recompute one patient
+    python -m scripts.compact_health_rollups --rebuild-all           # recompute every rollup
+
+Reads MONGO_URI / MONGO_DB from src._config.settings (same env as the API).
+"""
+import argparse
+import asyncio
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src._config.settings import settings
+from src.domains.health.service_modules.rollup_service import HealthRollupService
+
+
+async def run(rebuild: Optional[str], rebuild_all: bool) -> None:
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    db = client[settings.MONGO_DB]
+    rollups = HealthRollupService(db)
+
+    try:
+        if rebuild_all:
+            user_ids = await db.health_rollups.distinct("_id")
+            for user_id in user_ids:
+                await rollups.rebuild(user_id)
+            print(f"Rebuilt {len(user_ids)} rollup(s)")
+        elif rebuild:
+            days = await rollups.rebuild(rebuild)
+            print(f"Rebuilt rollup for {rebuild}: {len(days)} day(s)")
+
+        modified = await rollups.compact()
+        print(f"Compacted {modified} rollup document(s)")
+    finally:
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rebuild", metavar="PATIENT_ID", help="Recompute one patient's rollup first")
+    parser.add_argument("--rebuild-all", action="store_true", help="Recompute every existing rollup first")
+    args = parser.parse_args()
+    asyncio.run(run(args.rebuild, args.rebuild_all))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Load test: footprint of idle live-location subscribers.
+
+Starts a uvicorn server (separate process) with the live-location channel
+(`LiveLocationHub` + `serve_subscriber`, src/domains/location/live.py, no
+auth or database), opens ``--subscribers`` idle WebSockets spread over
+``--patients`` patients, and reports:
+
+- the server's RSS before and after the connections (VmRSS from /proc,
+  Linux only) and the cost per idle subscriber
+- the hub counters (as exposed at GET /metrics/cache under `live_locations`)
+- the time for one burst of ``--burst`` positions per patient to reach every
+  subscriber; with the throttle each subscriber receives one message per
+  patient, not the whole burst
+
+Usage:
+    cd hacking-health-api
+    python -m scripts.load_test_live_location
+    python -m scripts.load_test_live_location --subscribers 3000 --patients 300
+"""
+import argparse
+import asyncio
+import resource
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+import websockets
+from fastapi import FastAPI, WebSocket
+
+from src.domains.location.live import LiveLocationHub, location_message, serve_subscriber
+
+hub = LiveLocationHub(max_subscribers=100_000, min_interval_seconds=2.0)
+app = FastAPI()
+
+
+@app.websocket("/live/{patient_id}")
+async def _live(websocket: WebSocket, patient_id: str):
+    await websocket.accept()
+    subscriber = hub.subscribe(f"caregiver-{id(websocket)}", [patient_id])
+    await serve_subscriber(websocket, hub, subscriber)
+
+
+@app.post("/publish")
+async def _publish(patients: int, burst: int):
+    now = datetime.now(timezone.utc)
+    for i in range(burst):
+        for p in range(patients):
+            hub.publish(f"p{p}", location_message(f"p{p}", 6.24 + i * 1e-4, -75.58, 5.0, now))
+    return hub.stats()
+
+
+@app.get("/stats")
+async def _stats():
+    return hub.stats()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _proc_status_kib(pid: int, key: str) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(key + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+async def _run(server_pid: int, port: int, subscribers: int, patients: int, burst: int) -> None:
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        base_kib = _proc_status_kib(server_pid, "VmRSS")
+        sockets = []
+        for i in range(subscribers):
+            sockets.append(await websockets.connect(f"ws://127.0.0.1:{port}/live/p{i % patients}"))
+        await asyncio.sleep(1.0)
+        idle_kib = _proc_status_kib(server_pid, "VmRSS")
+        stats = (await client.get("/stats")).json()
+        print(
+            f"  idle: {stats['subscribers']} subscribers | RSS {base_kib / 1024:.0f} -> {idle_kib / 1024:.0f} MiB "
+            f"(+{(idle_kib - base_kib) / subscribers:.1f} KiB per subscriber)"
+        )
+
+        start = time.perf_counter()
+        await client.post("/publish", params={"patients": patients, "burst": burst})
+        await asyncio.gather(*[ws.recv() for ws in sockets])
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0.5)
+        extra = 0
+        for ws in sockets:
+            try:
+                await asyncio.wait_for(ws.recv(), 0.001)
+                extra += 1
+            except asyncio.TimeoutError:
+                pass
+        stats = (await client.get("/stats")).json()
+        print(
+            f"  burst of {burst} positions x {patients} patients reached all subscribers in "
+            f"{elapsed * 1000:.0f} ms | extra messages within the interval: {extra} | "
+            f"RSS {_proc_status_kib(server_pid, 'VmRSS') / 1024:.0f} MiB"
+        )
+
+        await asyncio.gather(*[ws.close() for ws in sockets])
+        await asyncio.sleep(1.0)
+        stats = (await client.get("/stats")).json()
+        print(f"  after disconnect: {stats}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure idle live-location subscribers per process")
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--patients", type=int, default=100)
+    parser.add_argument("--burst", type=int, default=20, help="Positions published per patient at once")
+    args = parser.parse_args()
+
+    # Client and server each hold one descriptor per connection
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = args.subscribers + 256
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "scripts.load_test_live_location:app",
+         "--port", str(port), "--log-level", "warning"],
+    )
+    try:
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                    break
+            except OSError:
+                time.sleep(0.1)
+        print(f"{args.subscribers} idle subscribers over {args.patients} patients")
+        asyncio.run(_run(server.pid, port, args.subscribers, args.patients, args.burst))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Load test: latency of unrelated endpoints during a burst of logins.
+
+Fires ``--logins`` concurrent POST /login requests (argon2 verify each) at a
+running API while a probe loop keeps calling a cheap endpoint (GET / by
+default), then reports p50/p95/p99 of the probe requests during the burst
+and the login outcome counts (200/201, 503 busy, errors).
+
+With argon2 on the event loop the probe p99 grows with the whole burst; with
+the bounded worker pool it should stay close to the idle latency.
+
+Usage:
+    uvicorn src.main:app --port 8000 &
+    python -m scripts.load_test_login --base-url http://localhost:8000
+    python -m scripts.load_test_login --logins 50 --probe-path / --rounds 3
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+from typing import List
+
+import httpx
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def _probe(client: httpx.AsyncClient, path: str, stop: asyncio.Event, samples: List[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(path)
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.005)
+
+
+async def run(base_url: str, logins: int, probe_path: str, rounds: int) -> None:
+    username = f"loadtest-{uuid.uuid4().hex[:8]}"
+    credentials = {"username": username, "password": "load-test-password"}
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+        # First login registers the user
+        resp = await client.post("/login", json=credentials)
+        resp.raise_for_status()
+
+        idle: List[float] = []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(client, probe_path, stop, idle))
+        await asyncio.sleep(1.0)
+        stop.set()
+        await probe
+        print(f"Idle {probe_path}: p50={_percentile(idle, 0.5):.1f}ms p99={_percentile(idle, 0.99):.1f}ms")
+
+        for round_no in range(1, rounds + 1):
+            samples: List[float] = []
+            stop = asyncio.Event()
+            probe = asyncio.create_task(_probe(client, probe_path, stop, samples))
+
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(client.post("/login", json=credentials) for _ in range(logins)),
+                return_exceptions=True,
+            )
+            burst_ms = (time.perf_counter() - start) * 1000
+            stop.set()
+            await probe
+
+            outcomes = Counter(
+                r.status_code if isinstance(r, httpx.Response) else type(r).__name__
+                for r in results
+            )
+            print(
+                f"Round {round_no}: {logins} logins in {burst_ms:.0f}ms {dict(outcomes)} | "
+                f"{probe_path} during burst: n={len(samples)} "
+                f"p50={_percentile(samples, 0.5):.1f}ms p95={_percentile(samples, 0.95):.1f}ms "
+                f"p99={_percentile(samples, 0.99):.1f}ms"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure endpoint latency during a login burst")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--probe-path", default="/")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.logins, args.probe_path, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
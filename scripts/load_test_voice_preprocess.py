@@ -0,0 +1,148 @@
+"""
+Load test: event-loop lag while the voice endpoints preprocess uploads.
+
+Runs ``--uploads`` concurrent `VoiceParsingService.transcribe_audio` calls
+(Whisper is replaced by a stub that answers after ``--whisper-ms``) on
+synthetic recordings with a long silent prefix, while a probe coroutine
+measures how late its 5 ms sleeps wake up. Two modes are compared:
+
+- inline: decode/trim/encode run inside the coroutine (the previous behavior)
+- pool:   the same work runs in the audio preprocessing process pool
+
+With inline preprocessing the lag grows with the whole burst; with the pool
+it should stay flat near the idle value. Also reports how many uploads were
+trimmed and how many fell back to the original audio (pool saturated, timed
+out or failed).
+
+No API server, database or OpenAI key is needed; ffmpeg must be in PATH.
+
+Usage:
+    cd hacking-health-api
+    python -m scripts.load_test_voice_preprocess
+    python -m scripts.load_test_voice_preprocess --uploads 20 --workers 2 --max-pending 20
+"""
+import argparse
+import asyncio
+import math
+import time
+from array import array
+from typing import List
+
+from src.domains.health import audio_preprocessing, voice_parsing
+from src.domains.health.audio_preprocessing import AudioPreprocessPool, encode_for_whisper, preprocess_audio
+from src.domains.health.voice_parsing import VoiceParsingService
+
+
+class _StubTranscriptions:
+    def __init__(self, delay_ms: float):
+        self.delay = delay_ms / 1000
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.delay)
+        return "ciento veinte sobre ochenta"
+
+
+class _StubClient:
+    def __init__(self, delay_ms: float):
+        self.audio = type("Audio", (), {"transcriptions": _StubTranscriptions(delay_ms)})()
+
+
+class _InlinePool:
+    """Runs the preprocessing on the event loop, like the handlers used to."""
+
+    def __init__(self):
+        self.failures = 0
+
+    async def run(self, file_bytes: bytes):
+        try:
+            return preprocess_audio(file_bytes)
+        except Exception:
+            self.failures += 1
+            return None
+
+
+def _recording(silence_ms: int, voice_ms: int) -> bytes:
+    """Opus-encoded upload: `silence_ms` of silence, then a 440 Hz tone."""
+    rate = audio_preprocessing.SAMPLE_RATE
+    tone = array("h", (
+        int(10000 * math.sin(2 * math.pi * 440 * i / rate)) for i in range(rate * voice_ms // 1000)
+    ))
+    return encode_for_whisper(bytes(rate * silence_ms // 1000 * 2) + tone.tobytes())[0]
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def _probe(stop: asyncio.Event, samples: List[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        samples.append((time.perf_counter() - start) * 1000 - 5)
+
+
+async def _burst(service: VoiceParsingService, upload: bytes, uploads: int):
+    samples: List[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(stop, samples))
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(service.transcribe_audio(upload, "rec.ogg", "audio/ogg") for _ in range(uploads))
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    stop.set()
+    await probe
+    trimmed = sum(1 for _, meta in results if meta["silence_removed_ms"] > 0)
+    return elapsed_ms, samples, trimmed
+
+
+async def run(uploads: int, workers: int, max_pending: int, timeout: float, whisper_ms: float) -> None:
+    upload = _recording(silence_ms=6000, voice_ms=4000)
+    service = VoiceParsingService()
+    service.client = _StubClient(whisper_ms)
+
+    idle: List[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(stop, idle))
+    await asyncio.sleep(1.0)
+    stop.set()
+    await probe
+    print(f"{uploads} uploads of {len(upload) / 1024:.0f} KiB, stub Whisper {whisper_ms:.0f}ms")
+    print(f"  idle loop lag      p50={_percentile(idle, 0.5):6.1f}ms  max={max(idle):7.1f}ms")
+
+    pool = AudioPreprocessPool(workers, max_pending, timeout)
+    pool_warm = pool.run(upload)  # Spawn the workers before measuring
+    modes = [("inline", _InlinePool()), ("pool", pool)]
+    try:
+        voice_parsing.audio_pool = pool
+        await pool_warm
+        for label, runner in modes:
+            voice_parsing.audio_pool = runner
+            failures_before = runner.failures
+            elapsed_ms, lag, trimmed = await _burst(service, upload, uploads)
+            fallback = uploads - trimmed
+            print(
+                f"  {label:<6} burst {elapsed_ms:7.0f}ms | loop lag p50={_percentile(lag, 0.5):6.1f}ms "
+                f"p99={_percentile(lag, 0.99):7.1f}ms max={max(lag):7.1f}ms | "
+                f"trimmed={trimmed} original={fallback} (failures={runner.failures - failures_before})"
+            )
+        print(f"  pool stats: {pool.stats()}")
+    finally:
+        voice_parsing.audio_pool = audio_preprocessing.audio_pool
+        pool.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure event-loop lag during voice uploads")
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--whisper-ms", type=float, default=300.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.uploads, args.workers, args.max_pending, args.timeout, args.whisper_ms))
+
+
+if __name__ == "__main__":
+    main()
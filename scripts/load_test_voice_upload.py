@@ -0,0 +1,139 @@
+"""
+Load test: server peak RSS under concurrent 10 MB voice uploads.
+
+Starts a uvicorn server (separate process) for each mode, sends ``--uploads``
+concurrent multipart uploads of ``--size-mb`` plus ``--oversized`` uploads of
+``--oversized-mb`` (over the limit), and reports the server's peak RSS
+(VmHWM from /proc, Linux only) and the status codes:
+
+- buffered: `audio: UploadFile = File(...)` + `await audio.read()` and a
+  size check afterwards (what the voice endpoints used to do)
+- streamed: `read_audio_upload(request)` (src/domains/health/audio_upload.py)
+
+Neither mode calls OpenAI or the database; only the upload handling is
+measured.
+
+Usage:
+    cd hacking-health-api
+    python -m scripts.load_test_voice_upload
+    python -m scripts.load_test_voice_upload --uploads 20 --oversized 10 --oversized-mb 200
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+
+from src.domains.health.audio_upload import read_audio_upload
+
+_LIMIT = 10 * 1024 * 1024
+
+buffered_app = FastAPI()
+streamed_app = FastAPI()
+
+
+@buffered_app.post("/upload")
+async def _buffered(audio: UploadFile = File(...)):
+    data = await audio.read()
+    if len(data) > _LIMIT:
+        raise HTTPException(status_code=413, detail="too large")
+    return {"bytes": len(data)}
+
+
+@streamed_app.post("/upload")
+async def _streamed(request: Request):
+    upload = await read_audio_upload(request, max_bytes=_LIMIT)
+    return {"bytes": len(upload.data)}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _proc_status_kib(pid: int, key: str) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(key + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _recording(size: int) -> bytes:
+    """MP4 header followed by filler, so content sniffing accepts it."""
+    head = b"\x00\x00\x00\x1cftypM4A \x00\x00\x00\x00"
+    return head + os.urandom(1024) * ((size - len(head)) // 1024)
+
+
+async def _burst(port: int, uploads: int, size: int, oversized: int, oversized_size: int):
+    payload = _recording(size)
+    big = _recording(oversized_size) if oversized else b""
+    timeout = httpx.Timeout(120.0)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+        async def send(data: bytes):
+            try:
+                response = await client.post("/upload", files={"audio": ("rec.m4a", data, "audio/mp4")})
+                return response.status_code
+            except httpx.HTTPError as e:
+                return type(e).__name__  # Server closed the connection mid-upload
+        return await asyncio.gather(
+            *[send(payload) for _ in range(uploads)], *[send(big) for _ in range(oversized)]
+        )
+
+
+def _run_mode(app: str, uploads: int, size: int, oversized: int, oversized_size: int) -> None:
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"scripts.load_test_voice_upload:{app}",
+         "--port", str(port), "--log-level", "warning"],
+    )
+    try:
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                    break
+            except OSError:
+                time.sleep(0.1)
+        idle_kib = _proc_status_kib(server.pid, "VmRSS")
+        start = time.perf_counter()
+        statuses = asyncio.run(_burst(port, uploads, size, oversized, oversized_size))
+        elapsed = time.perf_counter() - start
+        peak_kib = _proc_status_kib(server.pid, "VmHWM")
+        counts = {}
+        for status in statuses:
+            counts[status] = counts.get(status, 0) + 1
+        print(
+            f"  {app:<13} idle RSS {idle_kib / 1024:6.0f} MiB | peak RSS {peak_kib / 1024:6.0f} MiB "
+            f"(+{(peak_kib - idle_kib) / 1024:.0f}) | {elapsed:5.1f}s | status {counts}"
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure server peak RSS during concurrent voice uploads")
+    parser.add_argument("--uploads", type=int, default=10)
+    parser.add_argument("--size-mb", type=float, default=9.5)
+    parser.add_argument("--oversized", type=int, default=5)
+    parser.add_argument("--oversized-mb", type=float, default=50.0)
+    args = parser.parse_args()
+    size = int(args.size_mb * 1024 * 1024)
+    oversized_size = int(args.oversized_mb * 1024 * 1024)
+    print(
+        f"{args.uploads} uploads of {args.size_mb} MiB + {args.oversized} of "
+        f"{args.oversized_mb} MiB, limit {_LIMIT // (1024 * 1024)} MiB"
+    )
+    for app in ("buffered_app", "streamed_app"):
+        _run_mode(app, args.uploads, size, args.oversized, oversized_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,13 +16,105 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 10080  # 7 days
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30  # 30 days
     
+    # Password hashing (argon2, src/core/security.py)
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST_KIB: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 2  # Worker threads / concurrent hashes
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5.0  # Wait for a slot before 503
+    
+    # Access-token verification cache (src/core/auth_cache.py)
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_TTL_SECONDS: float = 60.0  # Max staleness of a cached user/token check
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Caregiver → patients access index (src/core/pairing_access.py)
+    PAIRING_ACCESS_TTL_SECONDS: float = 300.0
+    PAIRING_ACCESS_MAX_CAREGIVERS: int = 10000
+    
+    # Health summary fan-out (GET /health/patient/{id}/summary)
+    HEALTH_SUMMARY_MAX_CONCURRENCY: int = 4  # Concurrent Mongo reads per request
+    HEALTH_SUMMARY_SECTION_TIMEOUT_SECONDS: float = 2.0  # Per-section deadline
+    
+    # Missed-dose sweeper (src/domains/medications/sweeper.py)
+    MISSED_DOSE_SWEEP_ENABLED: bool = True
+    MISSED_DOSE_SWEEP_INTERVAL_SECONDS: float = 60.0
+    MISSED_DOSE_GRACE_MINUTES: int = 30  # Minutes after a slot before it counts as missed
+    MISSED_DOSE_SWEEP_BATCH_SIZE: int = 500  # Medications processed per sweep
+    MISSED_DOSE_MAX_DELAY_MINUTES: int = 180  # Slots whose grace ended longer ago (downtime) are not notified
+    
+    # Dose reminder scheduler (src/domains/medications/scheduler.py)
+    DOSE_SCHEDULER_ENABLED: bool = True  # Also drives the missed-dose sweeper
+    DOSE_SCHEDULER_LEASE_SECONDS: float = 90.0  # Leader lease; renewed after every fired minute
+    DOSE_SCHEDULER_PUSH_CONCURRENCY: int = 16  # Reminder pushes in flight at once
+    DOSE_SCHEDULER_MAX_CATCHUP_MINUTES: int = 5  # Minutes replayed after a leader change
+    
+    # Monthly take counts for adherence report/calendar (src/domains/medications/adherence.py)
+    MEDICATION_MONTH_CACHE_ENABLED: bool = True
+    MEDICATION_MONTH_CACHE_MAX_ENTRIES: int = 20000  # (patient, month) pairs per tier
+    MEDICATION_MONTH_CACHE_CURRENT_TTL_SECONDS: float = 60.0  # Past months never expire
+    
+    # Drug registry validation (src/domains/medications/drug_catalog.py)
+    DRUG_CATALOG_HEDGE: bool = False  # Query CUM and CIMA concurrently, first match wins
+    DRUG_CATALOG_CACHE_MAX_ENTRIES: int = 5000  # In-process tier
+    DRUG_CATALOG_CACHE_TTL_SECONDS: float = 7 * 24 * 3600.0
+    DRUG_CATALOG_NEGATIVE_TTL_SECONDS: float = 24 * 3600.0  # "No match" answers
+    DRUG_INDEX_PATH: Optional[str] = None  # Offline snapshot (scripts/build_drug_index.py)
+    DRUG_INDEX_MIN_SCORE: float = 0.6  # Local match accepted without a network lookup
+    
+    # Audio uploads of the voice endpoints (src/domains/health/audio_upload.py)
+    VOICE_UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+    VOICE_UPLOAD_MIN_BYTES: int = 1000
+
+    # Audio preprocessing for the voice endpoints (src/domains/health/audio_preprocessing.py)
+    AUDIO_PREPROCESS_WORKERS: int = 2  # Worker processes; 0 sends uploads to Whisper untrimmed
+    AUDIO_PREPROCESS_MAX_PENDING: int = 8  # Queued + running jobs before falling back to untrimmed audio
+    AUDIO_PREPROCESS_TIMEOUT_SECONDS: float = 5.0
+    AUDIO_WHISPER_REENCODE: bool = True  # Send mono 16 kHz Opus whenever it is smaller than the upload
+    AUDIO_WHISPER_BITRATE: str = "16k"  # Opus bitrate of the Whisper upload
+    AUDIO_MIN_SPEECH_MS: int = 200  # Less speech-level audio than this: Whisper is not called
+    AUDIO_SKIP_SILENT_UPLOADS: bool = True
+
+    # Voice transcription / LLM extraction caches (src/domains/health/voice_cache.py)
+    VOICE_CACHE_ENABLED: bool = True
+    VOICE_CACHE_MAX_ENTRIES: int = 2000  # In-process tier, per cache
+    VOICE_TRANSCRIPTION_CACHE_TTL_SECONDS: float = 24 * 3600.0  # Upload retries
+    VOICE_EXTRACTION_CACHE_TTL_SECONDS: float = 7 * 24 * 3600.0  # Repeated phrases
+    VOICE_LOCAL_BP_PARSER_ENABLED: bool = True  # Answer unambiguous BP phrases without the LLM (bp_grammar.py)
+
+    # Location report write coalescing (src/domains/location/ingest.py)
+    LOCATION_MIN_DISTANCE_METERS: float = 25.0  # Smaller moves count as "not moved" (GPS jitter)
+    LOCATION_HISTORY_INTERVAL_SECONDS: float = 300.0  # One history point per window while not moving
+    LOCATION_UPDATED_AT_GRANULARITY_SECONDS: float = 60.0  # users.lastLocation.updatedAt refresh while not moving
+    LOCATION_HISTORY_BATCH_SIZE: int = 200
+    LOCATION_HISTORY_FLUSH_SECONDS: float = 2.0
+    LOCATION_POSITION_CACHE_MAX_USERS: int = 50_000
+    LOCATION_PAIRED_CACHE_TTL_SECONDS: float = 5.0  # GET /api/location/paired responses; 0 disables
+    LOCATION_PAIRED_CACHE_MAX_BYTES: int = 4 * 1024 * 1024
+    LOCATION_LIVE_MIN_INTERVAL_SECONDS: float = 2.0  # Per WebSocket subscriber (src/domains/location/live.py)
+    LOCATION_LIVE_MAX_SUBSCRIBERS: int = 5000  # Open live-location WebSockets per process
+
+    # Read-through response cache for patient read endpoints (src/core/cache.py)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: float = 300.0
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024  # Approx. serialized size
+    RESPONSE_CACHE_MAX_VERSIONS: int = 100_000  # Patients invalidated within one TTL
+    
     # OAuth Providers
     GOOGLE_OAUTH_CLIENT_ID: Optional[str] = None
     GITHUB_OAUTH_CLIENT_ID: Optional[str] = None
     GITHUB_OAUTH_CLIENT_SECRET: Optional[str] = None
     
-    # OpenAI
+    # OpenAI (shared client and gateway, src/utils/openai_gateway.py)
     OPENAI_API_KEY: Optional[str] = None
+    OPENAI_BASE_URL: Optional[str] = None  # e.g. a local stub server for load tests
+    OPENAI_MAX_CONCURRENCY: int = 8  # Whisper + chat calls in flight per process
+    OPENAI_QUEUE_TIMEOUT_SECONDS: float = 2.0  # Waiting for a slot before 503
+    OPENAI_CALL_TIMEOUT_SECONDS: float = 15.0  # Per call, SDK retries included
+    OPENAI_MAX_RETRIES: int = 1
+    OPENAI_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive provider failures that open the breaker
+    OPENAI_BREAKER_RESET_SECONDS: float = 30.0  # Fail fast this long before probing again
+    VOICE_REQUEST_DEADLINE_SECONDS: float = 25.0  # Total OpenAI budget of one voice request
     
     # OpenWearables Server
     OPENWEARABLES_HOST: str = "http://localhost:8000"
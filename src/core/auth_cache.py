@@ -0,0 +1,127 @@
+"""
+Fast path for access-token verification.
+
+`verify_token_jwt` runs on every authenticated request. Without caching that
+means an HMAC check, claim validation and a `users.find_one` per call. This
+module keeps, in process:
+
+- Verified claims per token, keyed by the token's `jti`. An entry lives until
+  the token expires or AUTH_CACHE_TTL_SECONDS elapse, whichever is first. The
+  full token string is stored too and compared on lookup, so a token that only
+  reuses a cached `jti` never hits the cache.
+- Per-user existence, for AUTH_CACHE_TTL_SECONDS.
+
+`invalidate_user()` drops both for a user. It is called from
+`delete_user_and_data` and `/auth/revoke`, so those take effect on the next
+request. Other changes (e.g. a user removed straight from the database) are
+picked up within AUTH_CACHE_TTL_SECONDS.
+"""
+import base64
+import hmac
+import json
+import time
+from typing import Any, Dict, Optional
+
+from cachetools import TLRUCache, TTLCache
+
+from src._config.settings import settings
+from src.core.cache import register_cache_stats
+
+
+def _unverified_jti(token: str) -> Optional[str]:
+    """Read `jti` from the payload segment without checking the signature."""
+    try:
+        segment = token.split(".")[1]
+        segment += "=" * (-len(segment) % 4)
+        return json.loads(base64.urlsafe_b64decode(segment)).get("jti")
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+
+class TokenVerificationCache:
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        enabled: bool = True,
+        timer=time.time,
+    ):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        # (token, payload) by jti; expires at min(now + ttl, token exp)
+        self._claims = TLRUCache(
+            maxsize=max_entries,
+            ttu=lambda _key, value, now: min(now + ttl_seconds, value[1].get("exp", now)),
+            timer=timer,
+        )
+        self._users = TTLCache(maxsize=max_entries, ttl=ttl_seconds, timer=timer)
+        self.hits = 0
+        self.misses = 0
+        self.user_hits = 0
+        self.user_misses = 0
+
+    def get_user_id(self, token: str) -> Optional[str]:
+        """Return the cached `sub` for an already-verified token, if any."""
+        if not self.enabled:
+            return None
+        jti = _unverified_jti(token)
+        entry = self._claims.get(jti) if jti else None
+        if entry is None or not hmac.compare_digest(entry[0], token):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]["sub"]
+
+    def remember_token(self, token: str, payload: Dict[str, Any]) -> None:
+        if self.enabled and payload.get("jti"):
+            self._claims[payload["jti"]] = (token, payload)
+
+    def user_exists(self, user_id: str) -> bool:
+        if self.enabled and user_id in self._users:
+            self.user_hits += 1
+            return True
+        self.user_misses += 1
+        return False
+
+    def remember_user(self, user_id: str) -> None:
+        if self.enabled:
+            self._users[user_id] = True
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Forget the user and every cached token issued to them."""
+        self._users.pop(user_id, None)
+        for jti, (_, payload) in list(self._claims.items()):
+            if payload.get("sub") == user_id:
+                self._claims.pop(jti, None)
+
+    def clear(self) -> None:
+        self._claims.clear()
+        self._users.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "user_hits": self.user_hits,
+            "user_misses": self.user_misses,
+            "tokens": len(self._claims),
+            "users": len(self._users),
+            "max_entries": self._claims.maxsize,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+token_cache = TokenVerificationCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    enabled=settings.AUTH_CACHE_ENABLED,
+)
+register_cache_stats("auth_tokens", token_cache.stats)
+
+
+def invalidate_user(user_id: Optional[str]) -> None:
+    """Called when a user is deleted or revokes their tokens."""
+    if user_id:
+        token_cache.invalidate_user(user_id)
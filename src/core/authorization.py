@@ -14,6 +14,8 @@ from bson.errors import InvalidId
 from src.core.repositories.pairing_repository import IPairingRepository
 from src.core.exceptions import PatientAccessDeniedException
 from src.core.database import get_database
+from src.core.pairing_access import pairing_access
+from src.core.user_loader import UserLoader
 
 
 logger = logging.getLogger(__name__)
@@ -155,15 +157,6 @@ async def require_patient_access_dependency(
 #
 
 
-async def _query_active_pairing(db, caregiver_id: str, patient_id: str) -> Optional[Dict[str, Any]]:
-    """Return the active pairing doc between caregiver and patient, or None."""
-    return await db.pairings.find_one({
-        "caregiverId": caregiver_id,
-        "patientId": patient_id,
-        "status": "active",
-    })
-
-
 async def assert_data_access(db, requester_id: str, target_patient_id: str) -> None:
     """
     Authorization rule applied to all patient-data endpoints.
@@ -179,12 +172,8 @@ async def assert_data_access(db, requester_id: str, target_patient_id: str) -> N
     abstraction so existing routes that already hold a `db` handle can adopt
     it without DI changes.
     """
-    if requester_id == target_patient_id:
-        return  # Own data
-
-    pairing = await _query_active_pairing(db, requester_id, target_patient_id)
-    if pairing is not None:
-        return  # Active caregiver pairing
+    if await pairing_access.has_access(db, requester_id, target_patient_id):
+        return  # Own data or active caregiver pairing
 
     logger.warning(
         f"Access denied: requester={requester_id} attempted to access "
@@ -212,6 +201,7 @@ async def require_caregiver_access(
     patient_id: str,
     requester_id: str,
     db,
+    users: Optional[UserLoader] = None,
 ) -> Dict[str, Any]:
     """
     FastAPI-friendly authorization for /caregiver/ endpoints.
@@ -236,6 +226,9 @@ async def require_caregiver_access(
             db = Depends(get_database),
         ):
             patient = await require_caregiver_access(patient_id, user_id, db)
+
+    Pass the request's UserLoader as `users` so services called afterwards
+    reuse the patient document instead of loading it again.
     """
     # Validate patient exists
     try:
@@ -243,7 +236,7 @@ async def require_caregiver_access(
     except (InvalidId, TypeError):
         raise HTTPException(status_code=404, detail="Paciente no encontrado")
 
-    patient = await db.users.find_one({"_id": patient_oid})
+    patient = await (users or UserLoader(db)).load(patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Paciente no encontrado")
 
@@ -255,8 +248,7 @@ async def require_caregiver_access(
         )
 
     # Active pairing required
-    pairing = await _query_active_pairing(db, requester_id, patient_id)
-    if not pairing:
+    if patient_id not in await pairing_access.patients_of(db, requester_id):
         logger.warning(
             f"Caregiver access denied: caregiver={requester_id} has no "
             f"active pairing with patient={patient_id}"
@@ -0,0 +1,201 @@
+"""
+In-process read-through caches.
+
+`response_cache` memoizes read endpoints per patient. Entries are keyed by
+(namespace, patient, params, patient version, UTC day). Every write path for
+a patient calls `invalidate_patient()`, which bumps that patient's version so
+all of their cached responses become unreachable at once; the orphaned
+entries age out through the TTL/LRU policy. Versions are forgotten once no
+live entry can depend on them (see `_VersionTable`), so both maps stay
+bounded.
+
+The cache is process-local (the API runs a single uvicorn worker). The TTL
+bounds how stale a response can get if a write ever bypasses the services.
+
+Cached values are shared between requests: callers must treat them as
+read-only.
+
+Every cache registers itself for `cache_stats()` (hits, misses, evictions,
+size), exposed at GET /metrics/cache.
+"""
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from cachetools import TTLCache
+
+from src._config.logger import get_logger
+from src._config.settings import settings
+
+logger = get_logger(__name__)
+
+_STATS_PROVIDERS: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_cache_stats(name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """Expose a cache's counters under `name` in `cache_stats()`."""
+    _STATS_PROVIDERS[name] = provider
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every registered cache's counters."""
+    return {name: provider() for name, provider in _STATS_PROVIDERS.items()}
+
+
+def approx_size(value: Any) -> int:
+    """Approximate memory footprint of a JSON-like value (serialized length)."""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class MeteredTTLCache(TTLCache):
+    """TTLCache that counts capacity evictions (expired entries are not counted)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.evictions = 0
+
+    def popitem(self):
+        key, value = super().popitem()
+        self.evictions += 1
+        return key, value
+
+
+class _VersionTable(TTLCache):
+    """
+    Per-patient cache versions, forgotten after the entry TTL.
+
+    Versions come from one increasing counter, so a value is never reused. A
+    patient without a live version gets `floor`, which only ever goes up:
+    - TTL expiry: every entry stored under the patient's older versions has
+      expired too (the table's TTL is the entry TTL).
+    - Capacity eviction: entries may still be live, so `floor` is raised
+      past the evicted version, which orphans every entry stored under it.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, timer: Callable[[], float]):
+        super().__init__(maxsize=maxsize, ttl=ttl, timer=timer)
+        self.floor = 0
+        self.counter = 0
+
+    def popitem(self):
+        key, value = super().popitem()
+        self.counter += 1
+        self.floor = self.counter
+        return key, value
+
+
+class ResponseCache:
+    """
+    Read-through cache for per-patient read endpoints.
+
+    Args:
+        max_bytes: Memory bound (sum of approximate entry sizes)
+        ttl_seconds: Maximum age of an entry
+        max_versions: Patients whose invalidation is remembered at once
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        enabled: bool = True,
+        timer: Callable[[], float] = time.monotonic,
+        max_versions: Optional[int] = None,
+    ):
+        self.enabled = enabled
+        self._entries = MeteredTTLCache(
+            maxsize=max_bytes, ttl=ttl_seconds, timer=timer, getsizeof=approx_size
+        )
+        self._versions = _VersionTable(
+            maxsize=max_versions or settings.RESPONSE_CACHE_MAX_VERSIONS, ttl=ttl_seconds, timer=timer
+        )
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.uncacheable = 0
+
+    def version(self, patient_id: str) -> int:
+        return self._versions.get(patient_id, self._versions.floor)
+
+    def invalidate(self, patient_id: str) -> None:
+        """Make every cached response for `patient_id` unreachable."""
+        self._versions.counter += 1
+        self._versions[patient_id] = self._versions.counter
+        self.invalidations += 1
+
+    def _key(self, namespace: str, patient_id: str, params: Tuple[Hashable, ...]) -> Tuple:
+        today = time.strftime("%Y-%m-%d", time.gmtime())
+        return (namespace, patient_id, params, self.version(patient_id), today)
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        patient_id: str,
+        params: Tuple[Hashable, ...],
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Return the cached value for (namespace, patient_id, params) or compute
+        and store it. The version is captured before computing, so a write that
+        lands mid-computation leaves the result under an already stale key.
+        Results for which `cacheable(value)` is False (e.g. partial responses
+        after a failed read) are returned without being stored.
+        """
+        if not self.enabled:
+            return await compute()
+
+        key = self._key(namespace, patient_id, params)
+        try:
+            value = self._entries[key]
+            self.hits += 1
+            return value
+        except KeyError:
+            self.misses += 1
+
+        value = await compute()
+        if cacheable is not None and not cacheable(value):
+            self.uncacheable += 1
+            return value
+        try:
+            self._entries[key] = value
+        except ValueError:
+            # Larger than the whole cache: serve it uncached
+            logger.debug(f"Response for {namespace} too large to cache")
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._versions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self._entries.evictions,
+            "invalidations": self.invalidations,
+            "uncacheable": self.uncacheable,
+            "entries": len(self._entries),
+            "versions": len(self._versions),
+            "bytes": self._entries.currsize,
+            "max_bytes": self._entries.maxsize,
+        }
+
+
+response_cache = ResponseCache(
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+)
+register_cache_stats("responses", response_cache.stats)
+
+
+def invalidate_patient(patient_id: Optional[str]) -> None:
+    """Called from every write path that changes a patient's readable data."""
+    if patient_id:
+        response_cache.invalidate(patient_id)
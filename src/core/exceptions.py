@@ -65,3 +65,12 @@ class DuplicateResourceException(DomainException):
 class BusinessRuleException(DomainException):
     """Raised when a business rule is violated."""
     pass
+
+
+class ServiceBusyException(DomainException):
+    """Raised when a bounded resource (worker pool, upstream API) is saturated."""
+    
+    def __init__(self, resource: str, retry_after_seconds: int = 1):
+        message = f"{resource} is busy, retry later"
+        super().__init__(message, {"resource": resource, "retry_after": retry_after_seconds})
+        self.retry_after_seconds = retry_after_seconds
@@ -0,0 +1,74 @@
+"""
+Mongo-backed leases for single-leader background jobs.
+
+When the API runs several workers, jobs that must happen once per cluster
+(e.g. the dose reminder scheduler) take a lease first. The lease is one
+document in the `leases` collection:
+
+    {"_id": "<name>", "owner": "<host:pid:nonce>", "expiresAt": datetime, ...}
+
+Acquiring is a single conditional upsert that only matches when the lease is
+free, expired, or already ours; a competing worker that loses the race gets
+a duplicate-key error and stays a follower. The holder renews before
+`ttl_seconds` elapse; if it dies, another worker takes over after expiry.
+Extra fields (e.g. a progress watermark) can be stored on the lease so the
+next holder resumes where the previous one stopped.
+
+Assumes worker clocks are roughly in sync (well under `ttl_seconds`).
+"""
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from src._config.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class MongoLease:
+    def __init__(self, db, name: str, ttl_seconds: float, owner: Optional[str] = None):
+        self.collection = db.leases
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+    async def acquire(self, **fields: Any) -> Optional[Dict[str, Any]]:
+        """
+        Take or extend the lease. Returns the lease document when we hold it,
+        None when another owner does. `fields` are stored on the lease.
+        """
+        now = datetime.now(timezone.utc)
+        try:
+            return await self.collection.find_one_and_update(
+                {
+                    "_id": self.name,
+                    "$or": [{"owner": self.owner}, {"expiresAt": {"$lte": now}}],
+                },
+                {"$set": {
+                    **fields,
+                    "owner": self.owner,
+                    "expiresAt": now + timedelta(seconds=self.ttl_seconds),
+                }},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            return None
+
+    async def renew(self, **fields: Any) -> bool:
+        return await self.acquire(**fields) is not None
+
+    async def release(self) -> None:
+        """Expire the lease now (only if we still hold it)."""
+        try:
+            await self.collection.update_one(
+                {"_id": self.name, "owner": self.owner},
+                {"$set": {"expiresAt": datetime.now(timezone.utc)}},
+            )
+        except Exception as e:
+            logger.warning(f"Could not release lease {self.name}: {e}")
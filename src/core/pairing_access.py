@@ -0,0 +1,129 @@
+"""
+In-memory index of active caregiver → patient pairings.
+
+Every patient-data endpoint checks "is the requester the patient, or an active
+caregiver of the patient?". Instead of one `pairings.find_one` per check, the
+set of active patients of a caregiver is loaded once (one query, lazily) and
+access checks become a set lookup.
+
+Consistency:
+- PairingService invalidates the caregiver's entry on validate, revoke and
+  `_end_other_caregiver_pairings`; account deletion clears the index. Those
+  changes are visible to the very next check.
+- A generation counter prevents a load that raced with an invalidation from
+  caching the pre-change set.
+- Entries also expire after PAIRING_ACCESS_TTL_SECONDS, bounding staleness
+  for pairings changed outside the services (scripts, manual fixes).
+
+`active_pairing(db, user_id)` caches, per user on either side, the active
+pairing itself (ids and display names), for lookups that need the partner
+rather than an access check (the location map). Any pairing change drops all
+of those entries: changes are rare and the patient side of a change is not
+always known to the caller.
+"""
+from typing import Any, Dict, FrozenSet, Optional
+
+from cachetools import TTLCache
+
+from src._config.logger import get_logger
+from src._config.settings import settings
+from src.core.cache import register_cache_stats
+
+logger = get_logger(__name__)
+
+_NOT_LOADED = object()  # "No active pairing" (None) is cached too
+
+
+class PairingAccessIndex:
+    def __init__(self, max_caregivers: int, ttl_seconds: float):
+        self._patients = TTLCache(maxsize=max_caregivers, ttl=ttl_seconds)
+        self._pairings = TTLCache(maxsize=max_caregivers, ttl=ttl_seconds)
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.pairing_hits = 0
+        self.pairing_misses = 0
+
+    async def patients_of(self, db, caregiver_id: str) -> FrozenSet[str]:
+        """Active patient ids of a caregiver (loaded on first use)."""
+        patients = self._patients.get(caregiver_id)
+        if patients is not None:
+            self.hits += 1
+            return patients
+        self.misses += 1
+
+        generation = self._generation
+        cursor = db.pairings.find(
+            {"caregiverId": caregiver_id, "status": "active"},
+            {"patientId": 1},
+        )
+        docs = await cursor.to_list(length=None)
+        patients = frozenset(d["patientId"] for d in docs if d.get("patientId"))
+
+        if generation == self._generation:
+            self._patients[caregiver_id] = patients
+        return patients
+
+    async def has_access(self, db, requester_id: str, patient_id: str) -> bool:
+        """Own data, or an active caregiver pairing with the patient."""
+        if requester_id == patient_id:
+            return True
+        return patient_id in await self.patients_of(db, requester_id)
+
+    async def active_pairing(self, db, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        The user's active pairing, as patient or caregiver (loaded on first
+        use): patientId, caregiverId, patientName, caregiverName. None when
+        there is none. The returned dict is shared: treat it as read-only.
+        """
+        pairing = self._pairings.get(user_id, _NOT_LOADED)
+        if pairing is not _NOT_LOADED:
+            self.pairing_hits += 1
+            return pairing
+        self.pairing_misses += 1
+
+        generation = self._generation
+        pairing = await db.pairings.find_one(
+            {
+                "$or": [
+                    {"patientId": user_id, "status": "active"},
+                    {"caregiverId": user_id, "status": "active"},
+                ]
+            },
+            {"patientId": 1, "caregiverId": 1, "patientName": 1, "caregiverName": 1},
+        )
+
+        if generation == self._generation:
+            self._pairings[user_id] = pairing
+        return pairing
+
+    def invalidate_caregiver(self, caregiver_id: Optional[str]) -> None:
+        self._generation += 1
+        self._pairings.clear()
+        if caregiver_id:
+            self._patients.pop(caregiver_id, None)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._patients.clear()
+        self._pairings.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "caregivers": len(self._patients),
+            "max_caregivers": self._patients.maxsize,
+            "pairing_hits": self.pairing_hits,
+            "pairing_misses": self.pairing_misses,
+            "pairings": len(self._pairings),
+        }
+
+
+pairing_access = PairingAccessIndex(
+    max_caregivers=settings.PAIRING_ACCESS_MAX_CAREGIVERS,
+    ttl_seconds=settings.PAIRING_ACCESS_TTL_SECONDS,
+)
+register_cache_stats("pairing_access", pairing_access.stats)
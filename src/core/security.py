@@ -1,10 +1,40 @@
+"""
+Password hashing (argon2) and opaque token helpers.
+
+argon2 is deliberately CPU- and memory-hard (tens of ms per call), so the
+async helpers run it in a dedicated thread pool (argon2-cffi releases the GIL
+while hashing). At most PASSWORD_HASH_MAX_CONCURRENCY operations run at once;
+a caller that cannot get a slot within PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS
+gets ServiceBusyException instead of queueing without bound.
+
+Hash parameters come from settings. Hashes created with older parameters
+are detected on successful login and transparently re-hashed
+(`verify_and_rehash`).
+"""
+import asyncio
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
 from argon2 import PasswordHasher
-from datetime import datetime, timedelta
-from typing import Optional
+from argon2.exceptions import InvalidHashError, VerificationError
+
 from src._config.settings import settings
-import secrets
+from src.core.exceptions import ServiceBusyException
+
+ph = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST_KIB,
+    parallelism=settings.ARGON2_PARALLELISM,
+)
+
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_MAX_CONCURRENCY,
+    thread_name_prefix="argon2",
+)
+_limiter: Optional[asyncio.Semaphore] = None
+_limiter_loop: Optional[asyncio.AbstractEventLoop] = None
 
-ph = PasswordHasher()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
@@ -17,3 +47,58 @@ def get_password_hash(password: str) -> str:
 
 def create_token() -> str:
     return secrets.token_urlsafe(32)
+
+
+def _get_limiter() -> asyncio.Semaphore:
+    """Semaphore bound to the running loop (recreated if the loop changes)."""
+    global _limiter, _limiter_loop
+    loop = asyncio.get_running_loop()
+    if _limiter is None or _limiter_loop is not loop:
+        _limiter = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_CONCURRENCY)
+        _limiter_loop = loop
+    return _limiter
+
+
+async def _run_in_pool(fn, *args):
+    limiter = _get_limiter()
+    try:
+        await asyncio.wait_for(
+            limiter.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        raise ServiceBusyException("password hashing")
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        limiter.release()
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password off the event loop."""
+    return await _run_in_pool(ph.hash, password)
+
+
+def _verify_and_check(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    try:
+        ph.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False, None
+    if ph.check_needs_rehash(hashed_password):
+        return True, ph.hash(plain_password)
+    return True, None
+
+
+async def verify_and_rehash(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password off the event loop.
+
+    Returns:
+        (valid, new_hash). new_hash is set when the stored hash used older
+        argon2 parameters and should replace it.
+    """
+    return await _run_in_pool(_verify_and_check, plain_password, hashed_password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    valid, _ = await verify_and_rehash(plain_password, hashed_password)
+    return valid
@@ -0,0 +1,145 @@
+"""
+Request-scoped identity map for `users` documents (dataloader pattern).
+
+A single request used to load the same user several times: the caregiver
+authorization loads the patient, the service loads the patient's name again,
+and the alert/event fan-out loads the patient plus one document per
+caregiver — always the full document, password hash and tokens included.
+
+`UserLoader` collects every `load()` issued in the same event-loop tick into
+one `users.find({"_id": {"$in": [...]}}, USER_FIELDS)` query and memoizes
+the result (including misses) for the rest of the request. Routes get one
+instance per request through the `get_user_loader` dependency (FastAPI
+caches dependencies within a request) and hand it to the services; services
+built without one (background jobs, scripts) create their own.
+
+Loaded documents are shared between callers: treat them as read-only.
+
+Totals across requests are exposed under "user_loader" at GET /metrics/cache.
+"""
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from fastapi import Depends
+
+from src.core.cache import register_cache_stats
+from src.core.database import get_database
+
+# Every field a request path reads from another user's document. Never
+# includes password, OAuth/refresh tokens or email.
+USER_FIELDS = {
+    "name": 1,
+    "role": 1,
+    "profile_picture": 1,
+    "profilePicture": 1,
+    "fcmToken": 1,
+}
+
+_totals = {"loaders": 0, "loads": 0, "queries": 0}
+
+
+class UserLoader:
+    def __init__(self, db, projection: Optional[Dict[str, int]] = None):
+        self._users = db.users
+        self._projection = projection or USER_FIELDS
+        self._docs: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._dispatch_task: Optional[asyncio.Task] = None
+        self.loads = 0
+        self.queries = 0
+        _totals["loaders"] += 1
+
+    def _future_for(self, user_id: str) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if user_id in self._docs:
+            future = loop.create_future()
+            future.set_result(self._docs[user_id])
+            return future
+
+        future = self._pending.get(user_id) or self._inflight.get(user_id)
+        if future is None:
+            future = loop.create_future()
+            self._pending[user_id] = future
+            if len(self._pending) == 1:
+                # First key of this tick: dispatch once the tick's loads are queued
+                loop.call_soon(self._schedule_dispatch)
+        return future
+
+    def _schedule_dispatch(self) -> None:
+        self._dispatch_task = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        batch, self._pending = self._pending, {}
+        self._inflight.update(batch)
+
+        object_ids = []
+        for user_id in batch:
+            try:
+                object_ids.append(ObjectId(user_id))
+            except (InvalidId, TypeError):
+                pass
+
+        docs: Dict[str, Dict[str, Any]] = {}
+        if object_ids:
+            self.queries += 1
+            _totals["queries"] += 1
+            try:
+                cursor = self._users.find({"_id": {"$in": object_ids}}, self._projection)
+                for doc in await cursor.to_list(length=len(object_ids)):
+                    docs[str(doc["_id"])] = doc
+            except Exception as e:
+                for user_id, future in batch.items():
+                    self._inflight.pop(user_id, None)
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        for user_id, future in batch.items():
+            doc = docs.get(user_id)
+            self._docs[user_id] = doc
+            self._inflight.pop(user_id, None)
+            if not future.done():
+                future.set_result(doc)
+
+    async def load(self, user_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The user's document (USER_FIELDS only), or None if it does not exist."""
+        if not user_id:
+            return None
+        self.loads += 1
+        _totals["loads"] += 1
+        return await self._future_for(str(user_id))
+
+    async def load_many(self, user_ids: Iterable[Optional[str]]) -> List[Optional[Dict[str, Any]]]:
+        """Documents for `user_ids` in order (None for unknown ids), one query at most."""
+        futures = []
+        for user_id in user_ids:
+            if not user_id:
+                futures.append(None)
+                continue
+            self.loads += 1
+            _totals["loads"] += 1
+            futures.append(self._future_for(str(user_id)))
+        pending = [f for f in futures if f is not None]
+        if pending:
+            await asyncio.gather(*pending)
+        return [f.result() if f is not None else None for f in futures]
+
+
+def get_user_loader(db=Depends(get_database)) -> UserLoader:
+    """FastAPI dependency: one UserLoader per request."""
+    return UserLoader(db)
+
+
+def _stats() -> Dict[str, Any]:
+    loaders = _totals["loaders"]
+    return {
+        **_totals,
+        "queries_per_loader": round(_totals["queries"] / loaders, 4) if loaders else None,
+        "loads_per_query": round(_totals["loads"] / _totals["queries"], 4) if _totals["queries"] else None,
+    }
+
+
+register_cache_stats("user_loader", _stats)
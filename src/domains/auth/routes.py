@@ -4,7 +4,8 @@ from src.domains.auth.schemas import (
     OAuthTokenRequest, JWTTokenResponse, ErrorResponse, OpenWearablesCredentials
 )
 from src.core.database import get_database
-from src.core.security import verify_password, get_password_hash, create_token
+from src.core.security import create_token, hash_password_async, verify_and_rehash
+from src.core.auth_cache import token_cache, invalidate_user
 from src.core.jwt import (
     create_access_token, create_refresh_token, verify_access_token,
     verify_refresh_token, TokenExpiredError, TokenInvalidError,
@@ -149,7 +150,7 @@ async def verify_token_jwt(
             return str(test_user['_id'])
         
         # Create a test user if none exists
-        hashed_password = get_password_hash('dev')
+        hashed_password = await hash_password_async('dev')
         new_user_result = await db.users.insert_one({
             'username': 'dev-test-user',
             'password': hashed_password,
@@ -176,18 +177,26 @@ async def verify_token_jwt(
     
     token = authorization[7:]  # Remove "Bearer " prefix
     
+    # Fast path: token already verified recently (bounded by AUTH_CACHE_TTL_SECONDS)
+    cached_user_id = token_cache.get_user_id(token)
+    if cached_user_id:
+        return cached_user_id
+    
     try:
         payload = verify_access_token(token)
         user_id = payload["sub"]
         
         # Verify user still exists
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail={"error": "user_not_found", "description": "User no longer exists"}
-            )
+        if not token_cache.user_exists(user_id):
+            user = await db.users.find_one({"_id": ObjectId(user_id)}, {"_id": 1})
+            if not user:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail={"error": "user_not_found", "description": "User no longer exists"}
+                )
+            token_cache.remember_user(user_id)
         
+        token_cache.remember_token(token, payload)
         return user_id
         
     except TokenExpiredError:
@@ -219,7 +228,7 @@ async def verify_token(
             logger.debug(f"[DEV MODE] Using test user: {test_user['_id']}")
             return str(test_user['_id'])
         
-        hashed_password = get_password_hash('dev')
+        hashed_password = await hash_password_async('dev')
         new_user_result = await db.users.insert_one({
             'username': 'dev-test-user',
             'password': hashed_password,
@@ -447,7 +456,7 @@ async def login(request: LoginRequest, db=Depends(get_database)):
 
     if not user:
         # Registration logic for new user
-        hashed_password = get_password_hash(password)
+        hashed_password = await hash_password_async(password)
         new_user_doc = {
             'username': username, 
             'password': hashed_password,
@@ -485,8 +494,12 @@ async def login(request: LoginRequest, db=Depends(get_database)):
             detail='This account uses social login. Please sign in with Google.'
         )
     
-    if not verify_password(password, user['password']):
+    valid, rehashed = await verify_and_rehash(password, user['password'])
+    if not valid:
         raise HTTPException(status_code=403, detail='invalid password')
+    if rehashed:
+        # Stored hash used older argon2 parameters: upgrade it transparently
+        await db.users.update_one({'_id': user['_id']}, {"$set": {'password': rehashed}})
    
     if fcmToken:
         try:
@@ -637,5 +650,6 @@ async def revoke(user_id: str = Depends(verify_token), db=Depends(get_database))
             'refresh_token_expiry': 1
         }}
     )
+    invalidate_user(user_id)
 
     return SuccessResponse(success=True)
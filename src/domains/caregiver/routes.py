@@ -13,18 +13,19 @@ The actual data fetching delegates to existing services (HealthService,
 PairingService) — this module is a thin authorization + projection layer.
 """
 
-from datetime import date
+from datetime import date, datetime, timezone
 from typing import Optional, List, Dict, Any
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from bson.objectid import ObjectId
-from bson.errors import InvalidId
 
 from src._config.logger import get_logger
 from src.core.database import get_database
 from src.core.authorization import require_caregiver_access
+from src.core.user_loader import UserLoader, get_user_loader
 from src.domains.auth.routes import verify_token_jwt
 from src.domains.health.services import HealthService
+from src.domains.health.service_modules import PatientSnapshotService
+from src.domains.health.classification import classify_heart_rate
 from src.domains.pairing.services import PairingService
 
 logger = get_logger(__name__)
@@ -32,6 +33,15 @@ logger = get_logger(__name__)
 router = APIRouter(prefix="/caregiver", tags=["caregiver"])
 
 
+async def _load_patient_profiles(
+    users: UserLoader, patient_ids: List[Optional[str]]
+) -> Dict[str, Dict[str, Any]]:
+    """Fetch name/profile_picture for several patients with one batched lookup."""
+    ids = [pid for pid in patient_ids if pid]
+    docs = await users.load_many(ids)
+    return {pid: doc for pid, doc in zip(ids, docs) if doc}
+
+
 # =============================================================================
 # GET /caregiver/patients
 # =============================================================================
@@ -40,6 +50,7 @@ router = APIRouter(prefix="/caregiver", tags=["caregiver"])
 async def list_my_patients(
     user_id: str = Depends(verify_token_jwt),
     db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader),
 ) -> Dict[str, Any]:
     """
     List patients actively paired with the authenticated caregiver.
@@ -50,26 +61,16 @@ async def list_my_patients(
     pairing_service = PairingService(db)
     pairings = await pairing_service.get_user_pairings(user_id, role="caregiver")
 
+    # Best-effort enrich with profile_picture (not stored on pairing doc)
+    profiles = await _load_patient_profiles(users, [p.get("patientId") for p in pairings])
+
     patients: List[Dict[str, Any]] = []
     for p in pairings:
         patient_id = p.get("patientId")
-        # Best-effort enrich with profile_picture (not stored on pairing doc)
-        profile_picture = None
-        if patient_id:
-            try:
-                patient_doc = await db.users.find_one(
-                    {"_id": ObjectId(patient_id)},
-                    {"profile_picture": 1, "name": 1},
-                )
-                if patient_doc:
-                    profile_picture = patient_doc.get("profile_picture")
-            except (InvalidId, TypeError):
-                pass
-
         patients.append({
             "patient_id": patient_id,
             "name": p.get("patientName"),
-            "profile_picture": profile_picture,
+            "profile_picture": profiles.get(patient_id, {}).get("profile_picture"),
             "pairing_id": str(p.get("_id")) if p.get("_id") else None,
             "activated_at": p.get("activatedAt"),
         })
@@ -77,6 +78,74 @@ async def list_my_patients(
     return {"patients": patients, "count": len(patients)}
 
 
+# =============================================================================
+# GET /caregiver/dashboard
+# =============================================================================
+
+@router.get("/dashboard")
+async def get_dashboard(
+    user_id: str = Depends(verify_token_jwt),
+    db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader),
+) -> Dict[str, Any]:
+    """
+    Home-screen overview of every patient paired with the caregiver.
+
+    Served from the per-patient `patient_snapshots` documents (maintained on
+    write by the ingestion paths), so the cost is constant in the number of
+    patients: active pairings, one `$in` over snapshots and one over users.
+
+    Per patient: latest BP, latest heart rate, steps today, last sync and
+    this caregiver's unread alert count.
+    """
+    pairing_service = PairingService(db)
+    pairings = await pairing_service.get_user_pairings(user_id, role="caregiver")
+    patient_ids = [p["patientId"] for p in pairings if p.get("patientId")]
+
+    snapshots = await PatientSnapshotService(db).get_snapshots(patient_ids)
+    profiles = await _load_patient_profiles(users, patient_ids)
+    today = datetime.now(timezone.utc).date().isoformat()
+
+    patients: List[Dict[str, Any]] = []
+    for p in pairings:
+        patient_id = p.get("patientId")
+        if not patient_id:
+            continue
+        snap = snapshots.get(patient_id) or {}
+        profile = profiles.get(patient_id, {})
+
+        bp = snap.get("latest_bp")
+        hr = snap.get("latest_hr")
+        steps = snap.get("steps")
+
+        patients.append({
+            "patient_id": patient_id,
+            "name": p.get("patientName") or profile.get("name"),
+            "profile_picture": profile.get("profile_picture"),
+            "blood_pressure": {
+                "available": True,
+                "systolic": bp["systolic"],
+                "diastolic": bp["diastolic"],
+                "pulse": bp.get("pulse"),
+                "stage": bp.get("stage"),
+                "reading_time": bp.get("timestamp_ms"),
+            } if bp else {"available": False},
+            "heart_rate": {
+                "available": True,
+                "average": hr["average"],
+                "min": hr.get("min"),
+                "max": hr.get("max"),
+                "category": classify_heart_rate(hr["average"])["category"],
+                "reading_time": hr.get("timestamp_ms"),
+            } if hr else {"available": False},
+            "steps_today": steps.get("value", 0) if steps and steps.get("date") == today else 0,
+            "last_sync": snap.get("last_sync"),
+            "unread_alerts": (snap.get("unread_alerts") or {}).get(user_id, 0),
+        })
+
+    return {"patients": patients, "count": len(patients)}
+
+
 # =============================================================================
 # GET /caregiver/patients/{patient_id}/history/bp
 # =============================================================================
@@ -89,9 +158,10 @@ async def get_patient_bp_history(
     limit: int = Query(default=30, ge=1, le=100),
     user_id: str = Depends(verify_token_jwt),
     db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader),
 ) -> Dict[str, Any]:
     """Blood pressure raw readings for a paired patient."""
-    patient = await require_caregiver_access(patient_id, user_id, db)
+    patient = await require_caregiver_access(patient_id, user_id, db, users)
 
     # Translate date_from/date_to to a `days` window for the existing BP service.
     if date_from and date_to:
@@ -101,7 +171,7 @@ async def get_patient_bp_history(
     else:
         days = 30
 
-    service = HealthService(db)
+    service = HealthService(db, users)
     bp_result = await service.get_patient_blood_pressure_readings(
         patient_id=patient_id, days=days, limit=limit
     )
@@ -130,11 +200,12 @@ async def get_patient_steps_history(
     limit: int = Query(default=30, ge=1, le=100),
     user_id: str = Depends(verify_token_jwt),
     db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader),
 ) -> Dict[str, Any]:
     """Daily steps history for a paired patient."""
-    patient = await require_caregiver_access(patient_id, user_id, db)
+    patient = await require_caregiver_access(patient_id, user_id, db, users)
 
-    service = HealthService(db)
+    service = HealthService(db, users)
     history = await service.get_steps_history(
         patient_id=patient_id,
         date_from=date_from,
@@ -157,11 +228,12 @@ async def get_patient_sleep_history(
     limit: int = Query(default=30, ge=1, le=100),
     user_id: str = Depends(verify_token_jwt),
     db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader),
 ) -> Dict[str, Any]:
     """Daily sleep history for a paired patient (value in minutes)."""
-    patient = await require_caregiver_access(patient_id, user_id, db)
+    patient = await require_caregiver_access(patient_id, user_id, db, users)
 
-    service = HealthService(db)
+    service = HealthService(db, users)
     history = await service.get_sleep_history(
         patient_id=patient_id,
         date_from=date_from,
@@ -181,6 +253,7 @@ async def get_patient_summary(
     patient_id: str,
     user_id: str = Depends(verify_token_jwt),
     db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader),
 ) -> Dict[str, Any]:
     """
     30-day rolling aggregated summary for a paired patient:
@@ -188,9 +261,9 @@ async def get_patient_summary(
       - Total steps + daily average
       - Average sleep (minutes/hours)
     """
-    patient = await require_caregiver_access(patient_id, user_id, db)
+    patient = await require_caregiver_access(patient_id, user_id, db, users)
 
-    service = HealthService(db)
+    service = HealthService(db, users)
     summary = await service.get_30day_summary(patient_id)
 
     return {"patient": patient, **summary}
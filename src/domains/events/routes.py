@@ -11,6 +11,7 @@ from src.domains.events.schemas import (
 from src.domains.events.services import BiometricEventService
 from src.domains.auth.routes import verify_token_jwt
 from src.core.database import get_database
+from src.core.user_loader import UserLoader, get_user_loader
 from src._config.logger import get_logger
 
 logger = get_logger(__name__)
@@ -26,7 +27,8 @@ async def get_my_events(
     limit: int = Query(default=20, ge=1, le=100, description="Events per page"),
     page: int = Query(default=1, ge=1, description="Page number"),
     user_id: str = Depends(verify_token_jwt),
-    db=Depends(get_database)
+    db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader)
 ):
     """
     Get biometric events for the authenticated user.
@@ -40,7 +42,7 @@ async def get_my_events(
     - If user is the caregiver: readByCaregiver is set to true
     """
     try:
-        service = BiometricEventService(db)
+        service = BiometricEventService(db, users)
         result = await service.get_events_for_user(
             user_id=user_id,
             limit=limit,
@@ -85,7 +87,8 @@ async def get_unread_count(
 async def create_manual_alert(
     body: ManualAlertRequest,
     user_id: str = Depends(verify_token_jwt),
-    db=Depends(get_database)
+    db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader)
 ):
     """
     Patient-triggered manual/emergency alert (the "Urgencia" button).
@@ -95,7 +98,7 @@ async def create_manual_alert(
     to the caregiver automatically.
     """
     try:
-        service = BiometricEventService(db)
+        service = BiometricEventService(db, users)
         message = body.message or "🚨 Solicitó ayuda urgente"
         event = await service.register_biometric_event(
             patient_id=user_id,
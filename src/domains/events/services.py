@@ -4,12 +4,13 @@ Business logic for biometric events domain.
 import asyncio
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone
-from bson import ObjectId
 from src._config.logger import get_logger
 from src.domains.events.models import BiometricEventDB
 from src.domains.events.schemas import BiometricEventType, EventSeverity
 from src.domains.pairing.services import PairingService
+from src.domains.health.service_modules.snapshot_service import PatientSnapshotService
 from src.utils.fcm_client import send_health_alert_push
+from src.core.user_loader import UserLoader
 
 logger = get_logger(__name__)
 
@@ -240,9 +241,10 @@ def _is_caregiver_view(event: dict, user_id: str) -> bool:
 class BiometricEventService:
     """Service for managing biometric events."""
     
-    def __init__(self, db):
+    def __init__(self, db, users: Optional[UserLoader] = None):
         self.db = db
         self.collection = db[COLLECTION_NAME]
+        self.users = users or UserLoader(db)
     
     async def register_biometric_event(
         self,
@@ -274,25 +276,19 @@ class BiometricEventService:
         patient_name = None
 
         try:
-            # Get patient info for notifications
-            patient = await self.db.users.find_one({"_id": ObjectId(patient_id)})
+            # All active caregivers linked to this patient (not just the first).
+            caregiver_ids = await PairingService(self.db).get_patient_caregivers(patient_id)
+            logger.info(f"[PUSH] Active caregivers for patient {patient_id}: {len(caregiver_ids)}")
+
+            # Patient and caregivers in one batched lookup
+            patient, *caregivers = await self.users.load_many([patient_id, *caregiver_ids])
             if patient:
                 patient_name = patient.get("name", "Tu persona cuidada")
                 logger.info(f"[PUSH] Patient found: {patient_id}, name: {patient_name}")
             else:
                 logger.warning(f"[PUSH] Patient NOT found in users: {patient_id}")
 
-            # All active caregivers linked to this patient (not just the first).
-            caregiver_ids = await PairingService(self.db).get_patient_caregivers(patient_id)
-            logger.info(f"[PUSH] Active caregivers for patient {patient_id}: {len(caregiver_ids)}")
-            for cg_id in caregiver_ids:
-                try:
-                    caregiver = await self.db.users.find_one({"_id": ObjectId(cg_id)})
-                    token = caregiver.get("fcmToken") if caregiver else None
-                    if token:
-                        caregiver_tokens.append(token)
-                except Exception as ce:
-                    logger.warning(f"[PUSH] Error reading caregiver {cg_id}: {ce}")
+            caregiver_tokens = [c["fcmToken"] for c in caregivers if c and c.get("fcmToken")]
 
         except Exception as e:
             logger.warning(f"[PUSH] Error resolving caregivers for patient {patient_id}: {e}")
@@ -320,6 +316,12 @@ class BiometricEventService:
             f"Created biometric event: type={event_type}, severity={severity}, "
             f"patient={patient_id}, caregivers={len(caregiver_ids)}"
         )
+
+        # Unread badge on the caregiver dashboard snapshot
+        try:
+            await PatientSnapshotService(self.db).record_alert(patient_id, caregiver_ids)
+        except Exception as e:
+            logger.warning(f"Failed to update patient snapshot for {patient_id}: {e}")
         
         # 5. Send push notification to caregiver (fire-and-forget, runs concurrently
         #    so the HTTP response returns immediately and the caregiver gets the
@@ -419,14 +421,13 @@ class BiometricEventService:
         # Fetch patient info in batch
         patient_info_map = {}
         if patient_ids_to_fetch:
-            patients_cursor = self.db.users.find({
-                "_id": {"$in": [ObjectId(pid) for pid in patient_ids_to_fetch]}
-            })
-            async for patient in patients_cursor:
-                patient_info_map[str(patient["_id"])] = {
-                    "name": patient.get("name"),
-                    "profile_picture": patient.get("profile_picture")
-                }
+            patient_ids = list(patient_ids_to_fetch)
+            for pid, patient in zip(patient_ids, await self.users.load_many(patient_ids)):
+                if patient:
+                    patient_info_map[pid] = {
+                        "name": patient.get("name"),
+                        "profile_picture": patient.get("profile_picture")
+                    }
         
         # Format events
         for event in events_raw:
@@ -459,12 +460,16 @@ class BiometricEventService:
         # Separate events by role
         patient_event_ids = []
         caregiver_event_ids = []
+        caregiver_read_per_patient: Dict[str, int] = {}
         
         for event in events:
             if event.get("patientId") == user_id and not event.get("readByPatient"):
                 patient_event_ids.append(event["_id"])
             elif _is_caregiver_view(event, user_id) and user_id not in (event.get("readByCaregivers") or []):
                 caregiver_event_ids.append(event["_id"])
+                if user_id in (event.get("caregiverIds") or []):
+                    pid = event["patientId"]
+                    caregiver_read_per_patient[pid] = caregiver_read_per_patient.get(pid, 0) + 1
         
         # Bulk update for patient reads
         if patient_event_ids:
@@ -482,6 +487,10 @@ class BiometricEventService:
                 {"$addToSet": {"readByCaregivers": user_id}}
             )
             logger.debug(f"Marked {len(caregiver_event_ids)} events as read by caregiver {user_id}")
+            try:
+                await PatientSnapshotService(self.db).mark_alerts_read(user_id, caregiver_read_per_patient)
+            except Exception as e:
+                logger.warning(f"Failed to update unread snapshot counters for {user_id}: {e}")
     
     async def get_unread_count(self, user_id: str) -> int:
         """
@@ -15,6 +15,7 @@ from bson import ObjectId
 import uuid
 
 from src._config.logger import get_logger
+from src.core.user_loader import UserLoader
 from src.domains.health.adapters import now_iso
 from src.utils.fcm_client import send_health_alert_push, is_fcm_available
 
@@ -131,8 +132,9 @@ class AlertGenerator:
     except for hypertensive_crisis which always generates.
     """
     
-    def __init__(self, db):
+    def __init__(self, db, users: Optional[UserLoader] = None):
         self.db = db
+        self.users = users or UserLoader(db)
     
     async def can_generate_alert(
         self,
@@ -274,7 +276,7 @@ class AlertGenerator:
             from src.domains.pairing.services import PairingService
             
             # Get patient info
-            patient = await self.db.users.find_one({"_id": ObjectId(user_id)})
+            patient = await self.users.load(user_id)
             if not patient:
                 logger.warning(f"Patient {user_id} not found for push notification")
                 return
@@ -302,15 +304,13 @@ class AlertGenerator:
                 logger.debug(f"No caregivers found for patient {user_id}")
                 return
             
-            # Get FCM tokens for all caregivers
+            # Get FCM tokens for all caregivers (one batched lookup)
             caregiver_tokens = []
-            for caregiver_id in caregiver_ids:
-                try:
-                    caregiver = await self.db.users.find_one({"_id": ObjectId(caregiver_id)})
-                    if caregiver and caregiver.get("fcmToken"):
-                        caregiver_tokens.append(caregiver["fcmToken"])
-                except Exception as e:
-                    logger.error(f"Error getting caregiver {caregiver_id}: {e}")
+            try:
+                caregivers = await self.users.load_many(caregiver_ids)
+                caregiver_tokens = [c["fcmToken"] for c in caregivers if c and c.get("fcmToken")]
+            except Exception as e:
+                logger.error(f"Error getting caregivers of patient {user_id}: {e}")
             
             # Send to all caregivers
             if caregiver_tokens:
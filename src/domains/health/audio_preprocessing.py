@@ -0,0 +1,546 @@
+"""
+Audio preprocessing for the voice endpoints, kept off the event loop.
+
+Before an upload goes to Whisper we decode it, trim the silence at both ends
+and re-encode what is left:
+
+- ffmpeg is driven over pipes: the upload goes in on stdin and 16 kHz mono
+  16-bit PCM comes out on stdout, with no temp files. MP4/3GP recordings
+  whose index (moov box) is stored after the audio cannot be demuxed from a
+  pipe; those are handed to ffmpeg as an in-memory file (memfd), or a temp
+  file where memfd does not exist.
+- Noise floor and speech onset are computed on the PCM buffer as RMS per
+  10 ms frame, vectorized with NumPy when it is installed (audioop
+  otherwise).
+- The trimmed PCM is encoded straight to mono 16 kHz Opus in Ogg at
+  AUDIO_WHISPER_BITRATE, which Whisper accepts and which is several times
+  smaller than the phone's AAC/AMR recording. With AUDIO_WHISPER_REENCODE
+  this happens even when nothing was trimmed, as long as the result is
+  smaller than the upload; otherwise only trimmed audio is re-encoded.
+- A recording in which no frame reaches speech level (pocket recording,
+  muted mic) is flagged `speech_detected=False` and is not sent to Whisper
+  at all (AUDIO_SKIP_SILENT_UPLOADS).
+
+`whisper_upload_stats` counts the bytes uploaded by clients against the
+bytes actually sent to Whisper ("whisper_uploads" at GET /metrics/cache).
+
+That work is CPU-bound and takes hundreds of milliseconds per recording, so
+`AudioPreprocessPool` runs it in a small process pool instead of inside the
+request handler:
+
+- At most AUDIO_PREPROCESS_MAX_PENDING jobs are queued or running. When the
+  pool is saturated, the upload goes to Whisper untrimmed rather than
+  waiting for a slot.
+- Each job gets AUDIO_PREPROCESS_TIMEOUT_SECONDS. On timeout the request
+  also falls back to the untrimmed audio. A job that is already running
+  cannot be interrupted, so it keeps its slot until the worker finishes and
+  the cap always reflects real pool occupancy.
+- A pool whose worker died is replaced on the next job.
+
+Workers use the "spawn" start method so they do not inherit the parent's
+event loop, Motor client or threads.
+"""
+import asyncio
+import hashlib
+import math
+import multiprocessing
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src._config.logger import get_logger
+from src._config.settings import settings
+from src.core.cache import register_cache_stats
+
+logger = get_logger(__name__)
+
+# Optional: vectorized frame RMS. Without NumPy, audioop computes each
+# frame's RMS in C (one Python call per 10 ms frame).
+try:
+    import numpy as _np
+except ImportError:  # pragma: no cover - depends on the environment
+    _np = None
+try:
+    import audioop as _audioop
+except ImportError:  # pragma: no cover - removed in Python 3.13
+    _audioop = None
+
+_FFMPEG = shutil.which("ffmpeg")
+_FFMPEG_AVAILABLE = _FFMPEG is not None
+if not _FFMPEG_AVAILABLE:
+    logger.warning("ffmpeg not found in PATH - audio trimming disabled")
+
+SAMPLE_RATE = 16000
+FRAME_MS = 10
+_BYTES_PER_MS = SAMPLE_RATE * 2 // 1000
+_FULL_SCALE = 32768.0
+_FFMPEG_TIMEOUT_SECONDS = 30.0
+
+# Whisper upload encoding: Opus in Ogg, tuned for speech
+_SPEECH_FILENAME = "audio.ogg"
+# Frames at or above this level always count as speech, whatever the noise
+# floor estimate (a recording that starts mid-word has a high floor)
+_SPEECH_DBFS = -40.0
+
+
+class PreprocessedAudio(NamedTuple):
+    """Result of `preprocess_audio` (returned from the worker process)."""
+    audio: Optional[bytes]  # None: send the original upload
+    filename: Optional[str]
+    metadata: Dict[str, int]
+    threshold_dbfs: float
+    digest: str  # SHA-256 of the trimmed PCM (transcription cache key)
+    speech_detected: bool = True
+
+
+# ----------------------------------------------------------------------
+# Decoding / encoding (ffmpeg over pipes, run inside the worker process)
+# ----------------------------------------------------------------------
+
+def _needs_seekable_input(file_bytes: bytes) -> bool:
+    """True for MP4/3GP files whose moov box comes after mdat (not pipeable)."""
+    if file_bytes[4:8] != b"ftyp":
+        return False
+    offset = 0
+    while offset + 8 <= len(file_bytes):
+        size, box = struct.unpack_from(">I4s", file_bytes, offset)
+        if box == b"moov":
+            return False
+        if box == b"mdat":
+            return True
+        if size == 1 and offset + 16 <= len(file_bytes):
+            size = struct.unpack_from(">Q", file_bytes, offset + 8)[0]
+        if size < 8:
+            break
+        offset += size
+    return True
+
+
+def _run_ffmpeg(input_args: List[str], output_args: List[str], data: bytes, seekable: bool = False) -> bytes:
+    """Run ffmpeg on `data` and return what it writes to stdout."""
+    base = [_FFMPEG or "ffmpeg", "-hide_banner", "-loglevel", "error"]
+    output = output_args + ["pipe:1"]
+    kwargs = {"capture_output": True, "timeout": _FFMPEG_TIMEOUT_SECONDS}
+    if not seekable:
+        proc = subprocess.run(base + input_args + ["-i", "pipe:0"] + output, input=data, **kwargs)
+    elif hasattr(os, "memfd_create"):
+        fd = os.memfd_create("voice-upload")
+        try:
+            os.write(fd, data)
+            proc = subprocess.run(
+                base + input_args + ["-i", f"/dev/fd/{fd}"] + output,
+                pass_fds=(fd,), stdin=subprocess.DEVNULL, **kwargs,
+            )
+        finally:
+            os.close(fd)
+    else:  # pragma: no cover - non-Linux hosts
+        with tempfile.NamedTemporaryFile() as tmp:
+            tmp.write(data)
+            tmp.flush()
+            proc = subprocess.run(
+                base + input_args + ["-i", tmp.name] + output,
+                stdin=subprocess.DEVNULL, **kwargs,
+            )
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg exited with {proc.returncode}: "
+            f"{proc.stderr.decode('utf-8', 'replace').strip()[-300:]}"
+        )
+    return proc.stdout
+
+
+def decode_pcm(file_bytes: bytes) -> bytes:
+    """Decode an upload (M4A/3GP/MP3/...) to 16 kHz mono s16le PCM."""
+    return _run_ffmpeg(
+        [],
+        ["-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le"],
+        file_bytes,
+        seekable=_needs_seekable_input(file_bytes),
+    )
+
+
+def encode_for_whisper(pcm: bytes, bitrate: Optional[str] = None) -> Tuple[bytes, str]:
+    """
+    Encode 16 kHz mono PCM for the Whisper upload.
+
+    Returns:
+        (audio_bytes, filename) where filename carries the extension
+        Whisper uses to detect the format from the multipart upload.
+    """
+    encoded = _run_ffmpeg(
+        ["-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1"],
+        [
+            "-c:a", "libopus", "-b:a", bitrate or settings.AUDIO_WHISPER_BITRATE,
+            "-application", "voip", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "ogg",
+        ],
+        pcm,
+    )
+    return encoded, _SPEECH_FILENAME
+
+
+# ----------------------------------------------------------------------
+# PCM analysis
+# ----------------------------------------------------------------------
+
+def duration_ms(pcm: bytes) -> int:
+    return len(pcm) // _BYTES_PER_MS
+
+
+def _dbfs_to_rms(dbfs: float) -> float:
+    return _FULL_SCALE * 10 ** (dbfs / 20)
+
+
+def _rms(pcm: bytes) -> float:
+    if not pcm:
+        return 0.0
+    if _np is not None:
+        samples = _np.frombuffer(pcm, dtype="<i2").astype(_np.float64)
+        return float(_np.sqrt(_np.mean(samples * samples)))
+    return float(_audioop.rms(pcm, 2))
+
+
+def frame_rms(pcm: bytes, frame_ms: int = FRAME_MS) -> Sequence[float]:
+    """RMS amplitude of each full `frame_ms` frame of the PCM buffer."""
+    frame_bytes = frame_ms * _BYTES_PER_MS
+    frames = len(pcm) // frame_bytes
+    if _np is not None:
+        samples = _np.frombuffer(pcm, dtype="<i2", count=frames * frame_bytes // 2)
+        squares = samples.astype(_np.float64).reshape(frames, -1) ** 2
+        return _np.sqrt(squares.mean(axis=1))
+    return [_audioop.rms(pcm[i:i + frame_bytes], 2) for i in range(0, frames * frame_bytes, frame_bytes)]
+
+
+def detect_noise_floor(pcm: bytes, sample_ms: int = 500) -> float:
+    """
+    Estimate background noise level by measuring dBFS of the first
+    `sample_ms` of audio (assumed to be silence/noise while the user
+    waits for the BP cuff to finish). Returns a dynamic silence
+    threshold = noise_floor + 6 dB, clamped to [-55.0, -25.0] dBFS.
+
+    For absolute silence, returns a very sensitive default of -50.0 dBFS
+    so that any voice will be detected.
+    """
+    rms = _rms(pcm[:sample_ms * _BYTES_PER_MS])
+    if rms == 0:
+        return -50.0
+    threshold = 20 * math.log10(rms / _FULL_SCALE) + 6.0
+    # Clamp to reasonable speech-detection bounds
+    return max(-55.0, min(-25.0, threshold))
+
+
+def detect_onset_ms(pcm: bytes, silence_threshold_dbfs: float, frame_ms: int = FRAME_MS) -> int:
+    """Start of the first frame at or above the threshold (the duration if none)."""
+    rms = frame_rms(pcm, frame_ms)
+    threshold = _dbfs_to_rms(silence_threshold_dbfs)
+    if _np is not None:
+        loud = _np.flatnonzero(rms >= threshold)
+        first = int(loud[0]) if loud.size else None
+    else:
+        first = next((i for i, value in enumerate(rms) if value >= threshold), None)
+    if first is None:
+        return duration_ms(pcm)
+    return first * frame_ms
+
+
+def detect_offset_ms(pcm: bytes, silence_threshold_dbfs: float, frame_ms: int = FRAME_MS) -> int:
+    """End of the last frame at or above the threshold (0 if none)."""
+    rms = frame_rms(pcm, frame_ms)
+    threshold = _dbfs_to_rms(silence_threshold_dbfs)
+    if _np is not None:
+        loud = _np.flatnonzero(rms >= threshold)
+        last = int(loud[-1]) if loud.size else None
+    else:
+        last = next((i for i in range(len(rms) - 1, -1, -1) if rms[i] >= threshold), None)
+    if last is None:
+        return 0
+    return (last + 1) * frame_ms
+
+
+def speech_ms(pcm: bytes, silence_threshold_dbfs: float, frame_ms: int = FRAME_MS) -> int:
+    """
+    Total duration of the frames that count as speech: at or above the
+    silence threshold, or above -40 dBFS when the threshold is higher than
+    that. Errs on the side of "speech", since a false "no speech" loses
+    the reading.
+    """
+    rms = frame_rms(pcm, frame_ms)
+    threshold = _dbfs_to_rms(min(silence_threshold_dbfs, _SPEECH_DBFS))
+    if _np is not None:
+        return int(_np.count_nonzero(rms >= threshold)) * frame_ms
+    return sum(1 for value in rms if value >= threshold) * frame_ms
+
+
+def trim_leading_silence(
+    pcm: bytes,
+    silence_threshold_dbfs: float = -40.0,
+    safety_margin_ms: int = 300,
+    min_output_duration_ms: int = 1500,
+) -> Tuple[bytes, int]:
+    """
+    Trim leading silence from 16 kHz mono PCM.
+
+    Args:
+        pcm: full decoded audio
+        silence_threshold_dbfs: dBFS level below which audio is silence.
+            More negative = more aggressive (trims more).
+        safety_margin_ms: ms preserved before the detected onset, so the
+            attack of the first word is not cut.
+        min_output_duration_ms: if trimming would yield audio shorter
+            than this, return the original instead.
+
+    Returns:
+        (trimmed_pcm, ms_removed). ms_removed == 0 when no trim was applied.
+    """
+    start_trim_ms = detect_onset_ms(pcm, silence_threshold_dbfs)
+    start_trim_ms = max(0, start_trim_ms - safety_margin_ms)
+    if start_trim_ms == 0:
+        return pcm, 0
+
+    trimmed = pcm[start_trim_ms * _BYTES_PER_MS:]
+    if duration_ms(trimmed) < min_output_duration_ms:
+        return pcm, 0
+
+    return trimmed, start_trim_ms
+
+
+def trim_silence(
+    pcm: bytes,
+    silence_threshold_dbfs: float = -40.0,
+    safety_margin_ms: int = 300,
+    trailing_margin_ms: int = 500,
+    min_output_duration_ms: int = 1500,
+) -> Tuple[bytes, int, int]:
+    """
+    Trim leading and trailing silence from 16 kHz mono PCM.
+
+    Same rules as `trim_leading_silence` for the start; at the end,
+    `trailing_margin_ms` is kept after the last loud frame so that a
+    trailing unvoiced syllable ("...ochenta") is not clipped. Audio with no
+    loud frame at all, or that would be shorter than
+    `min_output_duration_ms` once trimmed, is returned unchanged.
+
+    Returns:
+        (trimmed_pcm, leading_ms_removed, trailing_ms_removed)
+    """
+    total_ms = duration_ms(pcm)
+    onset = detect_onset_ms(pcm, silence_threshold_dbfs)
+    if onset >= total_ms:
+        return pcm, 0, 0
+    start_ms = max(0, onset - safety_margin_ms)
+    end_ms = min(total_ms, detect_offset_ms(pcm, silence_threshold_dbfs) + trailing_margin_ms)
+    if end_ms - start_ms < min_output_duration_ms:
+        return pcm, 0, 0
+    trailing_ms = total_ms - end_ms
+    if start_ms == 0 and trailing_ms == 0:
+        return pcm, 0, 0
+    end = len(pcm) if trailing_ms == 0 else end_ms * _BYTES_PER_MS
+    return pcm[start_ms * _BYTES_PER_MS:end], start_ms, trailing_ms
+
+
+def preprocess_audio(
+    file_bytes: bytes,
+    reencode: Optional[bool] = None,
+    min_speech_ms: Optional[int] = None,
+) -> PreprocessedAudio:
+    """
+    Decode, check for speech, trim both ends and re-encode.
+
+    The Opus encoding replaces the upload when something was trimmed or,
+    with `reencode` (AUDIO_WHISPER_REENCODE), whenever it is smaller.
+    Recordings with less than `min_speech_ms` (AUDIO_MIN_SPEECH_MS) of
+    speech-level frames are not encoded and come back with
+    `speech_detected=False`.
+    """
+    reencode = settings.AUDIO_WHISPER_REENCODE if reencode is None else reencode
+    min_speech_ms = settings.AUDIO_MIN_SPEECH_MS if min_speech_ms is None else min_speech_ms
+
+    pcm = decode_pcm(file_bytes)
+    threshold = detect_noise_floor(pcm)
+    speech_detected = speech_ms(pcm, threshold) >= min_speech_ms
+    trimmed, leading_ms, trailing_ms = (
+        trim_silence(pcm, silence_threshold_dbfs=threshold) if speech_detected else (pcm, 0, 0)
+    )
+
+    send_bytes: Optional[bytes] = None
+    send_filename: Optional[str] = None
+    if speech_detected and (reencode or leading_ms or trailing_ms):
+        encoded, filename = encode_for_whisper(trimmed)
+        if leading_ms or trailing_ms or len(encoded) < len(file_bytes):
+            send_bytes, send_filename = encoded, filename
+    return PreprocessedAudio(
+        audio=send_bytes,
+        filename=send_filename,
+        metadata={
+            "audio_original_duration_ms": duration_ms(pcm),
+            "audio_trimmed_duration_ms": duration_ms(trimmed),
+            "silence_removed_ms": leading_ms + trailing_ms,
+            "trailing_silence_removed_ms": trailing_ms,
+        },
+        threshold_dbfs=threshold,
+        digest=hashlib.sha256(trimmed).hexdigest(),
+        speech_detected=speech_detected,
+    )
+
+
+class WhisperUploadStats:
+    """Bytes received from clients vs bytes sent to Whisper."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self.requests = 0
+        self.reencoded = 0
+        self.skipped_silent = 0
+        self.upload_bytes = 0
+        self.whisper_bytes = 0
+
+    def record(self, upload_bytes: int, whisper_bytes: int, reencoded: bool, skipped: bool) -> None:
+        self.requests += 1
+        self.upload_bytes += upload_bytes
+        self.whisper_bytes += whisper_bytes
+        self.reencoded += int(reencoded)
+        self.skipped_silent += int(skipped)
+
+    def stats(self) -> Dict[str, Any]:
+        saved = self.upload_bytes - self.whisper_bytes
+        return {
+            "requests": self.requests,
+            "reencoded": self.reencoded,
+            "skipped_silent": self.skipped_silent,
+            "upload_bytes": self.upload_bytes,
+            "whisper_bytes": self.whisper_bytes,
+            "bytes_saved": saved,
+            "saved_rate": round(saved / self.upload_bytes, 4) if self.upload_bytes else None,
+            "avg_bytes_saved": round(saved / self.requests) if self.requests else None,
+        }
+
+
+def _spawn_executor(workers: int) -> Executor:
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+# ----------------------------------------------------------------------
+# Pool
+# ----------------------------------------------------------------------
+
+class AudioPreprocessPool:
+    """Bounded, timed-out `preprocess_audio` jobs on a lazily started pool."""
+
+    def __init__(
+        self,
+        workers: int,
+        max_pending: int,
+        timeout_seconds: float,
+        job: Callable[[bytes], PreprocessedAudio] = preprocess_audio,
+        executor_factory: Callable[[int], Executor] = _spawn_executor,
+    ):
+        self.workers = workers
+        self.max_pending = max(max_pending, 1)
+        self.timeout_seconds = timeout_seconds
+        self._job = job
+        self._executor_factory = executor_factory
+        self._executor: Optional[Executor] = None
+        self.pending = 0
+        self.jobs = 0
+        self.saturated = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0 and _FFMPEG_AVAILABLE and (_np is not None or _audioop is not None)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._executor_factory(self.workers)
+        return self._executor
+
+    def _discard_executor(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, future: "asyncio.Future") -> None:
+        self.pending -= 1
+        if not future.cancelled():
+            future.exception()  # Consumed here when the caller timed out
+
+    async def run(self, file_bytes: bytes) -> Optional[PreprocessedAudio]:
+        """
+        Preprocess an upload in the pool.
+
+        Returns None when the upload should be sent untrimmed: pool disabled
+        or saturated, job timed out or failed.
+        """
+        if not self.enabled:
+            return None
+        if self.pending >= self.max_pending:
+            self.saturated += 1
+            logger.warning(
+                f"Audio preprocessing pool saturated ({self.pending} jobs), "
+                f"sending original audio to Whisper"
+            )
+            return None
+
+        try:
+            future = self._get_executor().submit(self._job, file_bytes)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self.failures += 1
+            logger.warning(f"Audio preprocessing pool unavailable, sending original audio: {e}")
+            self._discard_executor()
+            return None
+
+        self.jobs += 1
+        self.pending += 1
+        wrapped = asyncio.wrap_future(future)
+        wrapped.add_done_callback(self._release)
+        try:
+            # shield: a timeout must not mark the job done while the worker
+            # is still busy with it (it keeps its slot until it finishes)
+            return await asyncio.wait_for(asyncio.shield(wrapped), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            future.cancel()  # Only succeeds if the job had not started yet
+            logger.warning(
+                f"Audio preprocessing timed out after {self.timeout_seconds}s, "
+                f"sending original audio to Whisper"
+            )
+        except BrokenProcessPool as e:
+            self.failures += 1
+            logger.warning(f"Audio preprocessing worker died, sending original audio: {e}")
+            self._discard_executor()
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Audio trim failed, sending original audio to Whisper: {e}")
+        return None
+
+    def shutdown(self) -> None:
+        self._discard_executor()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "jobs": self.jobs,
+            "saturated": self.saturated,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+        }
+
+
+audio_pool = AudioPreprocessPool(
+    workers=settings.AUDIO_PREPROCESS_WORKERS,
+    max_pending=settings.AUDIO_PREPROCESS_MAX_PENDING,
+    timeout_seconds=settings.AUDIO_PREPROCESS_TIMEOUT_SECONDS,
+)
+whisper_upload_stats = WhisperUploadStats()
+register_cache_stats("whisper_uploads", whisper_upload_stats.stats)
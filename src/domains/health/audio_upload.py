@@ -0,0 +1,220 @@
+"""
+Streaming reader for the audio uploads of the voice endpoints.
+
+`UploadFile` parameters make Starlette parse the whole multipart body into a
+spooled temp file before the handler runs, and `await audio.read()` then
+copies it into memory; the size limit was only checked after both. On the
+1 GB VM a few concurrent oversized uploads are enough to run out of memory.
+
+`read_audio_upload(request)` instead feeds `request.stream()` chunk by chunk
+to python-multipart's push parser and:
+
+- rejects with 413 before reading anything when Content-Length already
+  exceeds the limit, and as soon as the streamed file part crosses it
+  otherwise (the rest of the body is never read)
+- detects the container from the first bytes (`detect_audio_format`) and
+  rejects anything that is not audio with 415, without waiting for the rest
+- keeps the file part in a single bytearray that is handed to the
+  preprocessing pool/Whisper as is (no spool file, no second copy)
+
+The endpoints keep the same multipart contract (one file field named
+"audio"); `AUDIO_UPLOAD_OPENAPI` documents it since FastAPI no longer sees a
+File parameter.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from src._config.settings import settings
+
+# Multipart boundaries, part headers and any small text fields
+_ENVELOPE_BYTES = 64 * 1024
+_SNIFF_BYTES = 12
+
+AUDIO_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["audio"],
+                    "properties": {"audio": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413, detail=f"Audio demasiado grande (máx {max_bytes // (1024 * 1024)}MB)"
+    )
+
+
+def detect_audio_format(head: bytes) -> Optional[Tuple[str, str]]:
+    """
+    (container, file extension) from the first bytes of an upload, or None
+    if it is not a supported audio container. The extension is what
+    Whisper is told when the original upload is forwarded.
+    """
+    if head[4:8] == b"ftyp":  # MP4 family: M4A (iOS), 3GP (Android)
+        return "mp4", "m4a"
+    if head[:4] == b"OggS":
+        return "ogg", "ogg"
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav", "wav"
+    if head[:4] == b"\x1a\x45\xdf\xa3":  # EBML (Android MediaRecorder WebM)
+        return "webm", "webm"
+    if head[:4] == b"fLaC":
+        return "flac", "flac"
+    if head[:5] == b"#!AMR":
+        return "amr", "amr"
+    if head[:4] == b"caff":
+        return "caf", "caf"
+    if head[:3] == b"ID3":
+        return "mp3", "mp3"
+    if len(head) >= 2 and head[0] == 0xFF:
+        if head[1] & 0xF6 == 0xF0:  # ADTS (raw AAC)
+            return "aac", "aac"
+        if head[1] & 0xE0 == 0xE0:  # MPEG audio frame sync
+            return "mp3", "mp3"
+    return None
+
+
+@dataclass
+class AudioUpload:
+    data: bytearray
+    filename: str  # "audio.<ext>" from the detected container, not the client's name
+    format: str
+    client_filename: Optional[str] = None
+    content_type: Optional[str] = None  # As declared by the client (logged only)
+
+
+class _AudioPartCollector:
+    """python-multipart callbacks: keep the `field` file part, enforce the limits."""
+
+    def __init__(self, field: str, max_bytes: int):
+        self.field = field
+        self.max_bytes = max_bytes
+        self.data = bytearray()
+        self.found = False
+        self.format: Optional[Tuple[str, str]] = None
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self._collecting = False
+        self._header_name = b""
+        self._header_value = b""
+        self._headers = {}
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+        self._collecting = False
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if name == self.field and b"filename" in options and not self.found:
+            self.found = True
+            self._collecting = True
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+            content_type = self._headers.get(b"content-type")
+            self.content_type = content_type.decode("latin-1") if content_type else None
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._collecting:
+            return
+        if len(self.data) + (end - start) > self.max_bytes:
+            raise _too_large(self.max_bytes)
+        self.data += data[start:end]
+        if self.format is None and len(self.data) >= _SNIFF_BYTES:
+            self.check_format()
+
+    def on_part_end(self) -> None:
+        self._collecting = False
+
+    def check_format(self) -> None:
+        self.format = detect_audio_format(bytes(self.data[:_SNIFF_BYTES]))
+        if self.format is None:
+            raise HTTPException(status_code=415, detail="Formato de audio no soportado")
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+
+async def read_audio_upload(
+    request: Request,
+    field: str = "audio",
+    max_bytes: Optional[int] = None,
+    min_bytes: Optional[int] = None,
+) -> AudioUpload:
+    """
+    Stream the multipart body of `request` and return its `field` file part.
+
+    Raises:
+        HTTPException: 413 over the size limit, 415 not an audio container,
+            400 malformed body, missing part or too small
+    """
+    max_bytes = settings.VOICE_UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    min_bytes = settings.VOICE_UPLOAD_MIN_BYTES if min_bytes is None else min_bytes
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type.lower() != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Se esperaba multipart/form-data con el campo 'audio'")
+
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes + _ENVELOPE_BYTES:
+        raise _too_large(max_bytes)
+
+    collector = _AudioPartCollector(field, max_bytes)
+    parser = MultipartParser(boundary, collector.callbacks())
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes + _ENVELOPE_BYTES:
+                raise _too_large(max_bytes)  # Large non-audio parts
+            parser.write(chunk)
+        parser.finalize()
+    except MultipartParseError as e:
+        raise HTTPException(status_code=400, detail=f"Cuerpo multipart inválido: {e}")
+
+    if not collector.found:
+        raise HTTPException(status_code=400, detail="Falta el archivo de audio (campo 'audio')")
+    if len(collector.data) < min_bytes:
+        raise HTTPException(status_code=400, detail="Audio vacío o demasiado corto")
+    if collector.format is None:
+        collector.check_format()
+
+    container, extension = collector.format
+    return AudioUpload(
+        data=collector.data,
+        filename=f"audio.{extension}",
+        format=container,
+        client_filename=collector.filename,
+        content_type=collector.content_type,
+    )
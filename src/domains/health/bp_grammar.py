@@ -0,0 +1,266 @@
+"""
+Local parser for spoken blood pressure readings in Spanish.
+
+Most BP dictations follow a handful of shapes: "ciento veinte sobre ochenta",
+"120/80 con pulso de 72", "ciento treinta y cinco, ochenta y cinco". For
+those, a small grammar for Spanish cardinals (0-999, written out or as
+digits) plus the "sobre" / "con pulso de" structure gives the same answer as
+the LLM in microseconds. `parse_bp_phrase` returns the same JSON as
+`BP_EXTRACTION_PROMPT`; "high" confidence is only claimed when the phrase is
+unambiguous, everything else is left to the LLM:
+
+- exactly two pressure numbers, joined by a separator ("sobre", "/", "con",
+  "y", "la baja", ...) or nothing, physiologically plausible
+- at most one pulse number, introduced or followed by a pulse word
+  ("pulso", "pulsaciones", "latidos", "ppm", ...) and within 20-300
+- no other numbers (dates, times, a second reading)
+- no hedges or self-corrections ("creo", "como", "o", "no, perdón")
+- no device mention (device_classification is the LLM's job)
+
+`bp_parse_stats` counts how many requests were answered locally and how
+long the LLM takes when it is called, exposed under "bp_voice_parser" at
+GET /metrics/cache.
+"""
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.cache import register_cache_stats
+
+_UNITS = {
+    "cero": 0, "uno": 1, "dos": 2, "tres": 3, "cuatro": 4,
+    "cinco": 5, "seis": 6, "siete": 7, "ocho": 8, "nueve": 9,
+}
+_TEENS = {
+    "diez": 10, "once": 11, "doce": 12, "trece": 13, "catorce": 14, "quince": 15,
+    "dieciseis": 16, "diecisiete": 17, "dieciocho": 18, "diecinueve": 19,
+}
+_TWENTIES = {
+    "veintiun": 21, "veintiuno": 21, "veintiuna": 21, "veintidos": 22, "veintitres": 23,
+    "veinticuatro": 24, "veinticinco": 25, "veintiseis": 26, "veintisiete": 27,
+    "veintiocho": 28, "veintinueve": 29,
+}
+# Tens that take "y <unit>" ("treinta y dos"; "veinte y dos" is old but still heard)
+_TENS = {
+    "veinte": 20, "treinta": 30, "cuarenta": 40, "cincuenta": 50,
+    "sesenta": 60, "setenta": 70, "ochenta": 80, "noventa": 90,
+}
+# "un"/"una" are articles on their own ("una de ciento veinte"), numbers only
+# after "y" ("treinta y un")
+_UNITS_AFTER_Y = {**_UNITS, "un": 1, "una": 1}
+# Whisper sometimes splits compounds: "dieci seis", "veinti dos"
+_SPLIT_PREFIXES = {"dieci": 10, "veinti": 20}
+_HUNDREDS = {
+    "ciento": 100, "doscientos": 200, "doscientas": 200, "trescientos": 300,
+    "trescientas": 300, "cuatrocientos": 400, "quinientos": 500, "seiscientos": 600,
+    "setecientos": 700, "ochocientos": 800, "novecientos": 900,
+}
+
+# Introduce the pulse ("con pulso de setenta")...
+_PULSE_WORDS = {
+    "pulso", "pulsos", "pulsacion", "pulsaciones", "latido", "latidos",
+    "frecuencia", "ritmo", "bpm", "ppm",
+}
+# ...or follow it ("setenta y dos pulsaciones")
+_PULSE_UNITS = {"pulsacion", "pulsaciones", "latido", "latidos", "bpm", "ppm"}
+# Allowed between systolic and diastolic
+_SEPARATORS = {"/", "sobre", "con", "y", "la", "el", "baja", "minima", "diastolica"}
+_HEDGES = {
+    "o", "creo", "como", "quizas", "quiza", "talvez", "aproximadamente",
+    "masomenos", "perdon", "digo", "corrijo",
+}
+_HEDGE_PAIRS = {("tal", "vez"), ("no", "se"), ("no", "recuerdo"), ("no", "estoy")}
+_DEVICE_WORDS = {
+    "tensiometro", "monitor", "aparato", "maquina", "maquinita", "omron", "digital",
+    "manual", "muneca", "brazalete", "brazo",
+}
+
+SYSTOLIC_RANGE = (60, 300)
+DIASTOLIC_RANGE = (30, 200)
+PULSE_RANGE = (20, 300)
+
+_TOKEN_RE = re.compile(r"\d+|[a-z]+|/")
+
+
+def is_plausible_bp(systolic: int, diastolic: int) -> bool:
+    """Physiological ranges from BP_EXTRACTION_PROMPT, systolic above diastolic."""
+    return (
+        SYSTOLIC_RANGE[0] <= systolic <= SYSTOLIC_RANGE[1]
+        and DIASTOLIC_RANGE[0] <= diastolic <= DIASTOLIC_RANGE[1]
+        and systolic > diastolic
+    )
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-free word/digit tokens; "/" is kept as a token."""
+    text = unicodedata.normalize("NFKD", (text or "").casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _TOKEN_RE.findall(text)
+
+
+def _below_hundred(tokens: List[str], i: int) -> Optional[Tuple[int, int]]:
+    if i >= len(tokens):
+        return None
+    word = tokens[i]
+    if word in _UNITS:
+        return _UNITS[word], i + 1
+    if word in _TEENS:
+        return _TEENS[word], i + 1
+    if word in _TWENTIES:
+        return _TWENTIES[word], i + 1
+    if word in _SPLIT_PREFIXES:
+        if i + 1 < len(tokens) and _UNITS.get(tokens[i + 1], 0) > 0:
+            return _SPLIT_PREFIXES[word] + _UNITS[tokens[i + 1]], i + 2
+        return None
+    if word in _TENS:
+        value = _TENS[word]
+        # "y" only belongs to the number when a unit follows: in
+        # "ciento veinte y ochenta" it separates two readings.
+        if i + 2 < len(tokens) and tokens[i + 1] == "y" and _UNITS_AFTER_Y.get(tokens[i + 2], 0) > 0:
+            return value + _UNITS_AFTER_Y[tokens[i + 2]], i + 3
+        return value, i + 1
+    return None
+
+
+def parse_number(tokens: List[str], i: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse one cardinal starting at tokens[i].
+
+    Returns (value, index after the number) or None. "cien" stands alone
+    (so "cien ochenta" is two numbers); "ciento" and the other hundreds
+    absorb the following tens/units ("ciento veinte" is 120).
+    """
+    if i >= len(tokens):
+        return None
+    word = tokens[i]
+    if word.isdigit():
+        return int(word), i + 1
+    if word == "cien":
+        return 100, i + 1
+    if word in _HUNDREDS:
+        rest = _below_hundred(tokens, i + 1)
+        if rest is None:
+            return _HUNDREDS[word], i + 1
+        return _HUNDREDS[word] + rest[0], rest[1]
+    return _below_hundred(tokens, i)
+
+
+def _empty_result() -> Dict[str, Any]:
+    return {
+        "systolic": None,
+        "diastolic": None,
+        "pulse": None,
+        "device_classification": None,
+        "confidence": "low",
+    }
+
+
+def parse_bp_phrase(text: str) -> Dict[str, Any]:
+    """
+    Extract systolic/diastolic/pulse from a Spanish transcription.
+
+    Returns the BP_EXTRACTION_PROMPT JSON. Values are filled whenever a
+    plausible reading is found; confidence is "high" only under the rules
+    in the module docstring.
+    """
+    result = _empty_result()
+    tokens = tokenize(text)
+
+    # (value, start, end) of every number in the phrase
+    numbers: List[Tuple[int, int, int]] = []
+    i = 0
+    while i < len(tokens):
+        parsed = parse_number(tokens, i)
+        if parsed is None:
+            i += 1
+            continue
+        numbers.append((parsed[0], i, parsed[1]))
+        i = parsed[1]
+
+    pressures: List[Tuple[int, int, int]] = []
+    pulses: List[int] = []
+    previous_end = 0
+    for index, (value, start, end) in enumerate(numbers):
+        before = tokens[previous_end:start]
+        next_start = numbers[index + 1][1] if index + 1 < len(numbers) else len(tokens)
+        after = tokens[end:min(end + 1, next_start)]
+        if _PULSE_WORDS.intersection(before) or _PULSE_UNITS.intersection(after):
+            pulses.append(value)
+        else:
+            pressures.append((value, start, end))
+        previous_end = end
+
+    # First plausible systolic/diastolic pair joined only by separators
+    pair = None
+    for (s, _, s_end), (d, d_start, _) in zip(pressures, pressures[1:]):
+        if set(tokens[s_end:d_start]) <= _SEPARATORS and is_plausible_bp(s, d):
+            pair = (s, d)
+            break
+    if pair:
+        result["systolic"], result["diastolic"] = pair
+
+    pulse_ok = len(pulses) <= 1 and all(PULSE_RANGE[0] <= p <= PULSE_RANGE[1] for p in pulses)
+    if pulses and pulse_ok:
+        result["pulse"] = pulses[0]
+
+    words = set(tokens)
+    hedged = bool(_HEDGES.intersection(words)) or bool(_HEDGE_PAIRS.intersection(zip(tokens, tokens[1:])))
+    if (
+        pair
+        and len(pressures) == 2
+        and pulse_ok
+        and not hedged
+        and not _DEVICE_WORDS.intersection(words)
+    ):
+        result["confidence"] = "high"
+    return result
+
+
+class BPParseStats:
+    """Share of BP transcriptions answered by the local grammar, and the LLM time that saved."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self.local = 0
+        self.llm = 0
+        self.llm_calls = 0
+        self.llm_ms = 0.0
+        self.local_ms = 0.0
+
+    def record_local(self, elapsed_ms: float) -> None:
+        self.local += 1
+        self.local_ms += elapsed_ms
+
+    def record_fallback(self, elapsed_ms: float) -> None:
+        """Low-confidence local parse, handed to the LLM path (cache included)."""
+        self.llm += 1
+        self.local_ms += elapsed_ms
+
+    def record_llm_call(self, elapsed_ms: float) -> None:
+        """An actual chat completion (extraction cache misses only)."""
+        self.llm_calls += 1
+        self.llm_ms += elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.local + self.llm
+        avg_llm_ms = self.llm_ms / self.llm_calls if self.llm_calls else None
+        avg_local_ms = self.local_ms / requests if requests else None
+        return {
+            "requests": requests,
+            "resolved_locally": self.local,
+            "sent_to_llm": self.llm,
+            "local_rate": round(self.local / requests, 4) if requests else None,
+            "llm_calls": self.llm_calls,
+            "avg_llm_ms": round(avg_llm_ms, 1) if avg_llm_ms is not None else None,
+            "avg_local_ms": round(avg_local_ms, 3) if avg_local_ms is not None else None,
+            # Every local answer avoided one (average) chat completion
+            "estimated_ms_saved": round(self.local * (avg_llm_ms - avg_local_ms), 1)
+            if avg_llm_ms is not None and avg_local_ms is not None
+            else None,
+        }
+
+
+bp_parse_stats = BPParseStats()
+register_cache_stats("bp_voice_parser", bp_parse_stats.stats)
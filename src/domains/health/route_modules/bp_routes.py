@@ -25,6 +25,7 @@ from src.domains.events.schemas import BiometricEventType
 from src.domains.auth.routes import verify_token_jwt
 from src._config.logger import get_logger
 from src.core.database import get_database
+from src.core.user_loader import UserLoader, get_user_loader
 
 logger = get_logger(__name__)
 
@@ -36,7 +37,8 @@ async def upload_blood_pressure(
     reading: BloodPressureSubmission,
     background_tasks: BackgroundTasks,
     user_id: str = Depends(verify_token_jwt),
-    db=Depends(get_database)
+    db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader)
 ):
     """
     Upload a single blood pressure reading.
@@ -56,7 +58,7 @@ async def upload_blood_pressure(
                 detail="Solo puedes subir tus propios datos de presión arterial"
             )
 
-        service = HealthService(db)
+        service = HealthService(db, users)
 
         # Store the reading (Step 1 - synchronous)
         stored = await service.store_blood_pressure_reading(
@@ -75,7 +77,7 @@ async def upload_blood_pressure(
         # Check for crisis (generate alert if not already flagged by edge)
         alert_generated = False
         if classification["stage"] == "hypertensive_crisis" and not reading.crisis_flag:
-            alert_gen = AlertGenerator(db)
+            alert_gen = AlertGenerator(db, users)
             alert = await alert_gen.generate_bp_crisis_alert(
                 user_id=reading.user_id,
                 systolic=reading.systolic,
@@ -93,7 +95,7 @@ async def upload_blood_pressure(
 
         # Register biometric event for notifications (fire-and-forget)
         try:
-            event_service = BiometricEventService(db)
+            event_service = BiometricEventService(db, users)
             await event_service.register_biometric_event(
                 patient_id=reading.user_id,
                 event_type=BiometricEventType.WATCH_MEASUREMENT.value,
@@ -129,7 +131,8 @@ async def upload_blood_pressure_batch(
     batch: BloodPressureBatchInput,
     background_tasks: BackgroundTasks,
     user_id: str = Depends(verify_token_jwt),
-    db=Depends(get_database)
+    db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader)
 ):
     """
     Upload multiple blood pressure readings.
@@ -147,7 +150,7 @@ async def upload_blood_pressure_batch(
                 detail="Solo puedes subir tus propios datos de presión arterial"
             )
 
-        service = HealthService(db)
+        service = HealthService(db, users)
 
         # Prepare readings as dicts
         readings_list = [
@@ -184,7 +187,7 @@ async def upload_blood_pressure_batch(
             )
 
             if classification["stage"] == "hypertensive_crisis":
-                alert_gen = AlertGenerator(db)
+                alert_gen = AlertGenerator(db, users)
                 alert = await alert_gen.generate_bp_crisis_alert(
                     user_id=batch.user_id,
                     systolic=most_recent["systolic"],
@@ -220,7 +223,8 @@ async def get_patient_blood_pressure_history(
     patient_id: str,
     days: int = Query(30, ge=1, le=90, description="Number of days of history (1-90)"),
     user_id: str = Depends(verify_token_jwt),
-    db=Depends(get_database)
+    db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader)
 ):
     """
     Get blood pressure history for a patient.
@@ -233,7 +237,7 @@ async def get_patient_blood_pressure_history(
     - Otherwise: Must have active pairing as caregiver
     """
     try:
-        service = HealthService(db)
+        service = HealthService(db, users)
 
         # Authorization check
         has_access = await service.verify_patient_access(
@@ -272,6 +276,7 @@ async def get_patient_blood_pressure_readings(
     limit: int = Query(500, ge=1, le=2000),
     user_id: str = Depends(verify_token_jwt),
     db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader),
 ):
     """
     Get the patient's raw blood-pressure readings (caregiver-facing).
@@ -281,7 +286,7 @@ async def get_patient_blood_pressure_readings(
     caregiver pairing.
     """
     try:
-        service = HealthService(db)
+        service = HealthService(db, users)
 
         has_access = await service.verify_patient_access(
             requester_id=user_id,
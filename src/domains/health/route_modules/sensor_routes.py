@@ -22,6 +22,7 @@ from src.domains.events.schemas import BiometricEventType
 from src.domains.auth.routes import verify_token_jwt
 from src._config.logger import get_logger
 from src.core.database import get_database
+from src.core.user_loader import UserLoader, get_user_loader
 from typing import Optional
 
 logger = get_logger(__name__)
@@ -175,7 +176,8 @@ async def get_patient_alerts(
 async def get_patient_health_summary(
     patient_id: str,
     user_id: str = Depends(verify_token_jwt),
-    db=Depends(get_database)
+    db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader)
 ):
     """
     Get health summary for a patient (last 24 hours).
@@ -191,7 +193,7 @@ async def get_patient_health_summary(
     - Otherwise: Must have active pairing as caregiver
     """
     try:
-        service = HealthService(db)
+        service = HealthService(db, users)
 
         # Authorization check
         has_access = await service.verify_patient_access(
@@ -221,7 +223,8 @@ async def get_patient_health_summary(
 async def upload_health_metrics(
     metrics: HealthMetricsInput,
     user_id: str = Depends(verify_token_jwt),
-    db=Depends(get_database)
+    db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader)
 ):
     """
     Upload health metrics from watch (via phone app).
@@ -239,12 +242,12 @@ async def upload_health_metrics(
                 detail="Solo puedes subir tus propios datos de salud"
             )
 
-        service = HealthService(db)
+        service = HealthService(db, users)
         result = await service.ingest_health_metrics(metrics)
 
         # Register biometric events for notifications (fire-and-forget)
         try:
-            event_service = BiometricEventService(db)
+            event_service = BiometricEventService(db, users)
 
             # Steps and sleep are routine data shown in Calendar screen — no notification event needed.
 
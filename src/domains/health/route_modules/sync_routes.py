@@ -19,6 +19,7 @@ from src.domains.health.services import HealthService
 from src.domains.auth.routes import verify_token_jwt
 from src._config.logger import get_logger
 from src.core.database import get_database
+from src.core.user_loader import UserLoader, get_user_loader
 
 logger = get_logger(__name__)
 
@@ -118,7 +119,8 @@ async def get_patient_heart_rate_history(
     patient_id: str,
     days: int = Query(7, ge=1, le=30, description="Number of days of history (1-30)"),
     user_id: str = Depends(verify_token_jwt),
-    db=Depends(get_database)
+    db=Depends(get_database),
+    users: UserLoader = Depends(get_user_loader)
 ):
     """
     Get heart rate history for a patient.
@@ -130,7 +132,7 @@ async def get_patient_heart_rate_history(
     - Otherwise: Must have active pairing as caregiver
     """
     try:
-        service = HealthService(db)
+        service = HealthService(db, users)
 
         # Authorization check
         has_access = await service.verify_patient_access(
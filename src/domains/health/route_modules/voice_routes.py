@@ -4,17 +4,20 @@ Voice and Audio Parsing Routes.
 Handles:
 - Voice transcription parsing for BP extraction
 - Audio file upload and STT (Speech-to-Text) processing
-- BP value extraction using LLM with regex fallback
+- BP value extraction with a local Spanish grammar, LLM for ambiguous phrases
 
 Uses OpenAI Whisper for transcription and GPT for extraction.
 Following Single Responsibility Principle (SRP).
 """
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, Request
+from src.domains.health.audio_upload import AUDIO_UPLOAD_OPENAPI, read_audio_upload
 from src.domains.health.schemas import VoiceParseRequest, VoiceParseResult, AudioParseResult
 from src.domains.health.voice_parsing import get_voice_parsing_service
 from src.domains.events.services import BiometricEventService
 from src.domains.events.schemas import BiometricEventType
 from src.domains.auth.routes import verify_token_jwt
+from src.core.database import get_database
+from src.core.exceptions import ServiceBusyException
 from src._config.logger import get_logger
 
 logger = get_logger(__name__)
@@ -25,13 +28,14 @@ router = APIRouter()
 @router.post("/parse-bp-voice", response_model=VoiceParseResult)
 async def parse_bp_voice(
     request: VoiceParseRequest,
-    user_id: str = Depends(verify_token_jwt)
+    user_id: str = Depends(verify_token_jwt),
+    db=Depends(get_database),
 ):
     """
     Parse a voice transcription to extract blood pressure values.
 
-    Uses LLM (OpenAI) to extract BP values from natural language,
-    with regex fallback for common patterns like "120/80".
+    Unambiguous phrases ("120/80", "ciento veinte sobre ochenta") are parsed
+    locally; anything else goes to the LLM (OpenAI).
 
     Returns extracted values with a confidence level:
     - "high": Both systolic and diastolic clearly detected
@@ -41,7 +45,7 @@ async def parse_bp_voice(
         logger.info(f"Parsing BP voice transcription for user {user_id}: {request.transcription[:100]}...")
 
         service = get_voice_parsing_service()
-        result = await service.parse_transcription(request.transcription)
+        result = await service.parse_transcription(request.transcription, db=db)
 
         logger.info(f"Parse result: S={result.get('systolic')} D={result.get('diastolic')} conf={result.get('confidence')}")
 
@@ -58,10 +62,11 @@ async def parse_bp_voice(
         raise HTTPException(status_code=500, detail="No se pudo procesar la transcripción. Intenta de nuevo.")
 
 
-@router.post("/parse-bp-audio", response_model=AudioParseResult)
+@router.post("/parse-bp-audio", response_model=AudioParseResult, openapi_extra=AUDIO_UPLOAD_OPENAPI)
 async def parse_bp_audio(
-    audio: UploadFile = File(...),
-    user_id: str = Depends(verify_token_jwt)
+    request: Request,
+    user_id: str = Depends(verify_token_jwt),
+    db=Depends(get_database),
 ):
     """
     Parse an audio recording to extract blood pressure values.
@@ -73,44 +78,39 @@ async def parse_bp_audio(
     4. Returns values + transcription for confirmation
 
     File limits:
-    - Max size: 10MB
+    - Multipart field "audio"; the container is detected from its first bytes
+    - Max size: 10MB (413 as soon as the stream crosses it)
     - Max duration: ~30 seconds recommended
     """
     try:
-        logger.info(f"Received audio upload from user {user_id}: {audio.filename}, type: {audio.content_type}")
-
-        # Read audio content
-        audio_content = await audio.read()
-
-        # Validate file size
-        if len(audio_content) > 10 * 1024 * 1024:  # 10MB limit
-            raise HTTPException(status_code=413, detail="Audio file too large (max 10MB)")
-
-        if len(audio_content) < 1000:  # Minimum ~1KB
-            raise HTTPException(status_code=400, detail="Audio file too small or empty")
-
-        logger.info(f"Audio file size: {len(audio_content)} bytes")
+        # Streamed: rejected as soon as it crosses the size limit or turns
+        # out not to be audio
+        upload = await read_audio_upload(request)
+        logger.info(
+            f"Received audio upload from user {user_id}: {upload.client_filename}, "
+            f"type: {upload.content_type}, detected: {upload.format}, {len(upload.data)} bytes"
+        )
 
         # Parse audio (transcribe + extract BP)
         service = get_voice_parsing_service()
         result = await service.parse_audio(
-            audio_content,
-            audio.filename or "recording.m4a",
-            content_type=audio.content_type,
+            upload.data,
+            upload.filename,
+            content_type=upload.content_type,
+            db=db,
         )
 
         logger.info(
             f"Audio parse result: S={result.get('systolic')} D={result.get('diastolic')} "
             f"P={result.get('pulse')} conf={result.get('confidence')} "
-            f"silence_removed_ms={result.get('silence_removed_ms', 0)}"
+            f"silence_removed_ms={result.get('silence_removed_ms', 0)} "
+            f"bytes_saved={result.get('audio_bytes_saved', 0)}"
         )
 
         # Register voice measurement event for notifications
         try:
-            from src.core.database import db as db_instance
             from src.domains.health.classification import classify_blood_pressure
-            database = db_instance.get_db()
-            event_service = BiometricEventService(database)
+            event_service = BiometricEventService(db)
 
             voice_payload = {
                 "transcription": result.get("transcription", ""),
@@ -151,9 +151,10 @@ async def parse_bp_audio(
             audio_original_duration_ms=result.get("audio_original_duration_ms"),
             audio_trimmed_duration_ms=result.get("audio_trimmed_duration_ms"),
             silence_removed_ms=result.get("silence_removed_ms"),
+            audio_bytes_saved=result.get("audio_bytes_saved"),
         )
 
-    except HTTPException:
+    except (HTTPException, ServiceBusyException):
         raise
     except Exception as e:
         logger.error(f"Error parsing BP audio: {e}", exc_info=True)
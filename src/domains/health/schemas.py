@@ -253,6 +253,7 @@ class PatientHealthSummaryResponse(BaseModel):
     sleep: SleepSummary = SleepSummary()
     last_sync: Optional[int] = None  # Epoch milliseconds
     data_available: bool = False
+    degraded_sections: List[str] = []  # Sections whose reads failed/timed out
 
 
 # =========================================
@@ -479,6 +480,7 @@ class AudioParseResult(BaseModel):
     audio_original_duration_ms: Optional[int] = None
     audio_trimmed_duration_ms: Optional[int] = None
     silence_removed_ms: Optional[int] = None
+    audio_bytes_saved: Optional[int] = None  # Upload bytes not sent to Whisper
 
 
 # =========================================
@@ -6,15 +6,21 @@ Specialized services following Single Responsibility Principle:
 - HealthMetricsService: Metrics ingestion (steps, sleep, HR)
 - SyncService: Sync request management
 - BloodPressureService: BP and HR storage/history
+- HealthRollupService: Materialized daily rollups for the 30-day summary
+- PatientSnapshotService: Per-patient snapshot for the caregiver dashboard
 """
 from .patient_data_service import PatientDataService
 from .health_metrics_service import HealthMetricsService
 from .sync_service import SyncService
 from .blood_pressure_service import BloodPressureService
+from .rollup_service import HealthRollupService
+from .snapshot_service import PatientSnapshotService
 
 __all__ = [
     "PatientDataService",
     "HealthMetricsService",
     "SyncService",
-    "BloodPressureService"
+    "BloodPressureService",
+    "HealthRollupService",
+    "PatientSnapshotService"
 ]
@@ -12,10 +12,13 @@ Following Single Responsibility Principle (SRP).
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone, timedelta
 from collections import defaultdict, Counter
-from bson import ObjectId
 from src._config.logger import get_logger
+from src.core.cache import invalidate_patient
+from src.core.user_loader import UserLoader
 from src.domains.health.classification import classify_blood_pressure
 from src.domains.health.adapters import extract_date_from_timestamp
+from .rollup_service import HealthRollupService
+from .snapshot_service import PatientSnapshotService
 
 logger = get_logger(__name__)
 
@@ -23,8 +26,23 @@ logger = get_logger(__name__)
 class BloodPressureService:
     """Service for blood pressure and heart rate data management."""
     
-    def __init__(self, db):
+    def __init__(self, db, users: Optional[UserLoader] = None):
         self.db = db
+        self.users = users or UserLoader(db)
+        self.rollups = HealthRollupService(db)
+        self.snapshots = PatientSnapshotService(db)
+    
+    async def _update_read_models(self, user_id: str, docs: List[Dict[str, Any]]) -> None:
+        """Add stored readings to the rollup and snapshot; never fails the write."""
+        invalidate_patient(user_id)
+        try:
+            await self.rollups.record_bp_readings(user_id, docs)
+        except Exception as e:
+            logger.warning(f"Failed to update health rollup for {user_id}: {e}")
+        try:
+            await self.snapshots.record_bp_readings(user_id, docs)
+        except Exception as e:
+            logger.warning(f"Failed to update patient snapshot for {user_id}: {e}")
     
     async def store_blood_pressure_reading(
         self,
@@ -75,6 +93,7 @@ class BloodPressureService:
         
         result = await self.db.blood_pressure_readings.insert_one(doc)
         doc["_id"] = result.inserted_id
+        await self._update_read_models(user_id, [doc])
         
         logger.info(
             f"Stored BP reading for {user_id}: {systolic}/{diastolic} "
@@ -125,6 +144,7 @@ class BloodPressureService:
             result = await self.db.blood_pressure_readings.insert_many(docs)
             for i, doc in enumerate(docs):
                 doc["_id"] = result.inserted_ids[i]
+            await self._update_read_models(user_id, docs)
         
         logger.info(f"Stored {len(docs)} BP readings for {user_id}")
         
@@ -149,7 +169,7 @@ class BloodPressureService:
             Dict with patient_id, patient_name, days_requested, data_points, count
         """
         # Get patient name
-        user = await self.db.users.find_one({"_id": ObjectId(patient_id)})
+        user = await self.users.load(patient_id)
         patient_name = user.get("name", "Usuario") if user else "Usuario"
         
         # Calculate date range
@@ -228,7 +248,7 @@ class BloodPressureService:
         Used by the caregiver-facing history view to mirror the patient's
         local list. Returns readings sorted by timestamp descending.
         """
-        user = await self.db.users.find_one({"_id": ObjectId(patient_id)})
+        user = await self.users.load(patient_id)
         patient_name = user.get("name", "Usuario") if user else "Usuario"
 
         today = datetime.now(timezone.utc).date()
@@ -282,40 +302,44 @@ class BloodPressureService:
             Dict with patient_id, patient_name, days_requested, data_points, count
         """
         # Get patient name
-        user = await self.db.users.find_one({"_id": ObjectId(patient_id)})
+        user = await self.users.load(patient_id)
         patient_name = user.get("name", "Usuario") if user else "Usuario"
         
         # Calculate date range
         today = datetime.now(timezone.utc).date()
         start_date = today - timedelta(days=days - 1)
         
-        # Query heart rate records for each day
-        data_points = []
+        # One aggregation for the whole window: the daily `heart_rate` doc
+        # (avg/min/max, one per date thanks to the ingest upsert) and the
+        # count of raw `heart_rate_sample` docs, grouped by date.
+        pipeline = [
+            {"$match": {
+                "userId": patient_id,
+                "type": {"$in": ["heart_rate", "heart_rate_sample"]},
+                "date": {"$gte": start_date.isoformat(), "$lte": today.isoformat()},
+            }},
+            {"$group": {
+                "_id": "$date",
+                "avg_bpm": {"$max": {"$cond": [{"$eq": ["$type", "heart_rate"]}, "$average", None]}},
+                "min_bpm": {"$max": {"$cond": [{"$eq": ["$type", "heart_rate"]}, "$min", None]}},
+                "max_bpm": {"$max": {"$cond": [{"$eq": ["$type", "heart_rate"]}, "$max", None]}},
+                "sample_count": {"$sum": {"$cond": [{"$eq": ["$type", "heart_rate_sample"]}, 1, 0]}},
+            }},
+        ]
+        rows = await self.db.health_metrics.aggregate(pipeline).to_list(length=days)
+        by_date = {row["_id"]: row for row in rows}
         
+        # Fill missing days in Python so the chart always gets `days` points
+        data_points = []
         for i in range(days):
-            date = start_date + timedelta(days=i)
-            date_str = date.isoformat()
-            
-            # Get aggregated heart rate for this date
-            hr_record = await self.db.health_metrics.find_one({
-                "userId": patient_id,
-                "type": "heart_rate",
-                "date": date_str
-            })
-            
-            # Count samples for this date
-            sample_count = await self.db.health_metrics.count_documents({
-                "userId": patient_id,
-                "type": "heart_rate_sample",
-                "date": date_str
-            })
-            
+            date_str = (start_date + timedelta(days=i)).isoformat()
+            row = by_date.get(date_str) or {}
             data_points.append({
                 "date": date_str,
-                "avg_bpm": hr_record.get("average") if hr_record else None,
-                "min_bpm": hr_record.get("min") if hr_record else None,
-                "max_bpm": hr_record.get("max") if hr_record else None,
-                "sample_count": sample_count
+                "avg_bpm": row.get("avg_bpm"),
+                "min_bpm": row.get("min_bpm"),
+                "max_bpm": row.get("max_bpm"),
+                "sample_count": row.get("sample_count", 0)
             })
         
         return {
@@ -10,8 +10,11 @@ Handles health metrics ingestion from wearable devices:
 Following Single Responsibility Principle (SRP).
 """
 from typing import Dict, Any, Optional, List
-from datetime import datetime, timezone, timedelta, date as date_type
+from datetime import datetime, timezone
 from src._config.logger import get_logger
+from src.core.cache import invalidate_patient
+from .rollup_service import HealthRollupService, rollup_window, summarize_days
+from .snapshot_service import PatientSnapshotService
 
 logger = get_logger(__name__)
 
@@ -21,6 +24,8 @@ class HealthMetricsService:
     
     def __init__(self, db):
         self.db = db
+        self.rollups = HealthRollupService(db)
+        self.snapshots = PatientSnapshotService(db)
     
     async def ingest_health_metrics(self, metrics) -> Dict[str, Any]:
         """
@@ -131,6 +136,26 @@ class HealthMetricsService:
                 metrics_stored += len(hr_docs)
                 logger.info(f"Stored {len(hr_docs)} HR samples for {metrics.user_id} (source: {source})")
         
+        # Keep the materialized rollup and dashboard snapshot in step with the
+        # raw upserts. Failures only degrade those views until the next sync.
+        invalidate_patient(metrics.user_id)
+        try:
+            await self.rollups.record_daily_metrics(
+                metrics.user_id,
+                metrics.date,
+                steps=metrics.steps,
+                sleep_minutes=metrics.sleep_minutes,
+                hr_avg=metrics.avg_heart_rate,
+                hr_min=metrics.min_heart_rate,
+                hr_max=metrics.max_heart_rate,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to update health rollup for {metrics.user_id}: {e}")
+        try:
+            await self.snapshots.record_metrics(metrics)
+        except Exception as e:
+            logger.warning(f"Failed to update patient snapshot for {metrics.user_id}: {e}")
+        
         return {
             "success": True,
             "message": "Métricas guardadas correctamente",
@@ -224,91 +249,44 @@ class HealthMetricsService:
         """
         30-day aggregated summary for a patient.
 
-        Aggregates:
+        Served from the per-patient materialized rollup (`health_rollups`),
+        so this is a single point read regardless of how much raw data the
+        patient has:
           - blood_pressure: avg systolic/diastolic + reading count
-            (queried from `blood_pressure_readings` collection)
           - steps: total + daily average
           - sleep: avg minutes/hours per day
+          - heart_rate: avg of daily averages, window min/max
 
         Date window: rolling 30 days based on UTC today.
         """
-        now = datetime.now(timezone.utc)
-        end_date = now.date()
-        start_date = end_date - timedelta(days=30)
-        start_str = start_date.isoformat()
-        end_str = end_date.isoformat()
-        window_start_dt = datetime.combine(start_date, datetime.min.time(), tzinfo=timezone.utc)
-
-        # --- Blood pressure (from blood_pressure_readings) ---
-        bp_pipeline = [
-            {"$match": {
-                "userId": user_id,
-                "$or": [
-                    {"date": {"$gte": start_str, "$lte": end_str}},
-                    {"timestamp": {"$gte": window_start_dt.isoformat()}},
-                ],
-            }},
-            {"$group": {
-                "_id": None,
-                "avg_systolic": {"$avg": "$systolic"},
-                "avg_diastolic": {"$avg": "$diastolic"},
-                "count": {"$sum": 1},
-            }},
-        ]
-        bp_agg = await self.db.blood_pressure_readings.aggregate(bp_pipeline).to_list(length=1)
-        bp_result = bp_agg[0] if bp_agg else None
+        start_str, end_str = rollup_window()
+        days = await self.rollups.get_days(user_id)
+        s = summarize_days(days, start_str, end_str)
 
-        # --- Steps (from health_metrics) ---
-        steps_pipeline = [
-            {"$match": {
-                "userId": user_id,
-                "type": "steps",
-                "date": {"$gte": start_str, "$lte": end_str},
-            }},
-            {"$group": {
-                "_id": None,
-                "total": {"$sum": "$value"},
-                "days": {"$sum": 1},
-                "average": {"$avg": "$value"},
-            }},
-        ]
-        steps_agg = await self.db.health_metrics.aggregate(steps_pipeline).to_list(length=1)
-        steps_result = steps_agg[0] if steps_agg else None
-
-        # --- Sleep (from health_metrics, value in minutes) ---
-        sleep_pipeline = [
-            {"$match": {
-                "userId": user_id,
-                "type": "sleep",
-                "date": {"$gte": start_str, "$lte": end_str},
-            }},
-            {"$group": {
-                "_id": None,
-                "avg_minutes": {"$avg": "$value"},
-                "days": {"$sum": 1},
-            }},
-        ]
-        sleep_agg = await self.db.health_metrics.aggregate(sleep_pipeline).to_list(length=1)
-        sleep_result = sleep_agg[0] if sleep_agg else None
-
-        avg_sleep_min = sleep_result["avg_minutes"] if sleep_result else None
+        avg_sleep_min = s["sleep_avg_minutes"]
 
         return {
             "user_id": user_id,
             "window": {"from": start_str, "to": end_str, "days": 30},
             "blood_pressure": {
-                "avg_systolic": round(bp_result["avg_systolic"], 1) if bp_result and bp_result.get("avg_systolic") is not None else None,
-                "avg_diastolic": round(bp_result["avg_diastolic"], 1) if bp_result and bp_result.get("avg_diastolic") is not None else None,
-                "readings_count": bp_result["count"] if bp_result else 0,
+                "avg_systolic": round(s["bp_avg_systolic"], 1) if s["bp_avg_systolic"] is not None else None,
+                "avg_diastolic": round(s["bp_avg_diastolic"], 1) if s["bp_avg_diastolic"] is not None else None,
+                "readings_count": s["bp_count"],
             },
             "steps": {
-                "total": int(steps_result["total"]) if steps_result and steps_result.get("total") is not None else 0,
-                "daily_average": round(steps_result["average"], 0) if steps_result and steps_result.get("average") is not None else 0,
-                "days_with_data": steps_result["days"] if steps_result else 0,
+                "total": int(s["steps_total"]),
+                "daily_average": round(s["steps_average"], 0) if s["steps_average"] is not None else 0,
+                "days_with_data": s["steps_days"],
             },
             "sleep": {
                 "avg_minutes": round(avg_sleep_min, 1) if avg_sleep_min is not None else None,
                 "avg_hours": round(avg_sleep_min / 60.0, 2) if avg_sleep_min is not None else None,
-                "days_with_data": sleep_result["days"] if sleep_result else 0,
+                "days_with_data": s["sleep_days"],
+            },
+            "heart_rate": {
+                "avg_bpm": round(s["hr_avg"], 1) if s["hr_avg"] is not None else None,
+                "min_bpm": s["hr_min"],
+                "max_bpm": s["hr_max"],
+                "days_with_data": s["hr_days"],
             },
         }
@@ -9,10 +9,13 @@ Handles patient data queries and retrieval operations:
 
 Following Single Responsibility Principle (SRP).
 """
-from typing import Optional, Dict, Any
+import asyncio
+from typing import Optional, Dict, Any, Set, Callable, Awaitable
 from datetime import datetime, timezone, timedelta
 from bson import ObjectId
 from src._config.logger import get_logger
+from src._config.settings import settings
+from src.core.user_loader import UserLoader
 from src.domains.health.adapters import normalize_timestamp, timestamp_to_ms
 from src.domains.health.classification import classify_blood_pressure, classify_heart_rate
 
@@ -22,8 +25,9 @@ logger = get_logger(__name__)
 class PatientDataService:
     """Service for patient data queries and retrieval."""
     
-    def __init__(self, db):
+    def __init__(self, db, users: Optional[UserLoader] = None):
         self.db = db
+        self.users = users or UserLoader(db)
     
     async def get_patient_sensor_data(
         self,
@@ -165,6 +169,30 @@ class PatientDataService:
             "has_more": has_more
         }
     
+    async def _guarded_read(
+        self,
+        section: str,
+        semaphore: asyncio.Semaphore,
+        read: Callable[[], Awaitable[Any]],
+        degraded: Set[str],
+    ) -> Any:
+        """
+        Run one independent summary read under the per-request concurrency
+        cap and a per-section deadline. A failure or timeout is logged and
+        recorded in `degraded`; the caller treats its result as missing.
+        """
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    read(), timeout=settings.HEALTH_SUMMARY_SECTION_TIMEOUT_SECONDS
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Health summary section '{section}' failed: {type(e).__name__}: {e}"
+                )
+                degraded.add(section)
+                return None
+
     async def get_patient_health_summary(
         self,
         patient_id: str
@@ -172,22 +200,66 @@ class PatientDataService:
         """
         Get health summary for a patient (last 24 hours).
         
+        The per-section reads are independent, so they are issued concurrently
+        (capped by HEALTH_SUMMARY_MAX_CONCURRENCY) and latency approaches the
+        slowest read instead of the sum. A section whose read fails or times out
+        is reported as unavailable and listed in `degraded_sections`.
+        
         Args:
             patient_id: ID of the patient
             
         Returns:
             Dict with health metrics summary including blood pressure
         """
-        # Get patient name
-        user = await self.db.users.find_one({"_id": ObjectId(patient_id)})
-        patient_name = user.get("name", "Usuario") if user else "Usuario"
-        
         # Time range: last 24 hours
         now = datetime.now(timezone.utc)
         twenty_four_hours_ago = now - timedelta(hours=24)
         start_ts = int(twenty_four_hours_ago.timestamp() * 1000)
         start_iso = twenty_four_hours_ago.strftime("%Y-%m-%dT%H:%M:%SZ")
         
+        bp_query = {"userId": patient_id, "timestamp": {"$gte": start_iso}}
+        
+        def _latest_metric(metric_type: str):
+            return lambda: self.db.health_metrics.find_one({
+                "userId": patient_id,
+                "type": metric_type,
+                "timestamp": {"$gte": start_ts}
+            }, sort=[("timestamp", -1)])
+        
+        semaphore = asyncio.Semaphore(settings.HEALTH_SUMMARY_MAX_CONCURRENCY)
+        degraded: Set[str] = set()
+        (
+            user, hr_data, bp_data, bp_count, bp_readings, steps_data, sleep_data
+        ) = await asyncio.gather(
+            self._guarded_read(
+                "patient", semaphore,
+                lambda: self.users.load(patient_id),
+                degraded,
+            ),
+            self._guarded_read("heart_rate", semaphore, _latest_metric("heart_rate"), degraded),
+            self._guarded_read(
+                "blood_pressure", semaphore,
+                lambda: self.db.blood_pressure_readings.find_one(bp_query, sort=[("timestamp", -1)]),
+                degraded,
+            ),
+            self._guarded_read(
+                "blood_pressure", semaphore,
+                lambda: self.db.blood_pressure_readings.count_documents(bp_query),
+                degraded,
+            ),
+            self._guarded_read(
+                "blood_pressure", semaphore,
+                lambda: self.db.blood_pressure_readings.find(
+                    bp_query, {"systolic": 1, "diastolic": 1}
+                ).to_list(length=100),
+                degraded,
+            ),
+            self._guarded_read("steps", semaphore, _latest_metric("steps"), degraded),
+            self._guarded_read("sleep", semaphore, _latest_metric("sleep"), degraded),
+        )
+        
+        patient_name = user.get("name", "Usuario") if user else "Usuario"
+        
         # Initialize response with new structure
         response = {
             "patient_id": patient_id,
@@ -197,16 +269,11 @@ class PatientDataService:
             "steps": {"available": False},
             "sleep": {"available": False},
             "last_sync": None,
-            "data_available": False
+            "data_available": False,
+            "degraded_sections": []
         }
         
-        # Try to get heart rate data from health_metrics collection
-        hr_data = await self.db.health_metrics.find_one({
-            "userId": patient_id,
-            "type": "heart_rate",
-            "timestamp": {"$gte": start_ts}
-        }, sort=[("timestamp", -1)])
-        
+        # Heart rate data from health_metrics collection
         if hr_data and hr_data.get("average"):
             hr_category = classify_heart_rate(hr_data.get("average"))
             response["heart_rate"] = {
@@ -221,60 +288,35 @@ class PatientDataService:
             response["data_available"] = True
             response["last_sync"] = timestamp_to_ms(hr_data.get("timestamp"))
         
-        # Try to get blood pressure data
-        bp_data = await self.db.blood_pressure_readings.find_one({
-            "userId": patient_id,
-            "timestamp": {"$gte": start_iso}
-        }, sort=[("timestamp", -1)])
-        
-        if bp_data:
-            # Count BP readings in last 24 hours
-            bp_count = await self.db.blood_pressure_readings.count_documents({
-                "userId": patient_id,
-                "timestamp": {"$gte": start_iso}
-            })
+        # Blood pressure: all three reads must succeed to build the section
+        if bp_data and bp_readings and "blood_pressure" not in degraded:
+            systolics = [r["systolic"] for r in bp_readings]
+            diastolics = [r["diastolic"] for r in bp_readings]
             
-            # Get stats from last 24h readings
-            bp_cursor = self.db.blood_pressure_readings.find({
-                "userId": patient_id,
-                "timestamp": {"$gte": start_iso}
-            })
-            bp_readings = await bp_cursor.to_list(length=100)
+            latest = bp_data
+            classification = classify_blood_pressure(latest["systolic"], latest["diastolic"])
             
-            if bp_readings:
-                systolics = [r["systolic"] for r in bp_readings]
-                diastolics = [r["diastolic"] for r in bp_readings]
-                
-                latest = bp_data
-                classification = classify_blood_pressure(latest["systolic"], latest["diastolic"])
-                
-                response["blood_pressure"] = {
-                    "available": True,
-                    "avg_systolic": round(sum(systolics) / len(systolics)),
-                    "avg_diastolic": round(sum(diastolics) / len(diastolics)),
-                    "min_systolic": min(systolics),
-                    "max_systolic": max(systolics),
-                    "last_systolic": latest["systolic"],
-                    "last_diastolic": latest["diastolic"],
-                    "last_pulse": latest.get("pulse"),
-                    "last_reading_time": timestamp_to_ms(latest["timestamp"]),
-                    "current_stage": classification["stage"],
-                    "reading_count": bp_count
-                }
-                response["data_available"] = True
-                
-                # Update last_sync if BP is more recent
-                bp_ts_ms = timestamp_to_ms(latest["timestamp"])
-                if not response["last_sync"] or (bp_ts_ms and bp_ts_ms > response["last_sync"]):
-                    response["last_sync"] = bp_ts_ms
-        
-        # Try to get steps data
-        steps_data = await self.db.health_metrics.find_one({
-            "userId": patient_id,
-            "type": "steps",
-            "timestamp": {"$gte": start_ts}
-        }, sort=[("timestamp", -1)])
+            response["blood_pressure"] = {
+                "available": True,
+                "avg_systolic": round(sum(systolics) / len(systolics)),
+                "avg_diastolic": round(sum(diastolics) / len(diastolics)),
+                "min_systolic": min(systolics),
+                "max_systolic": max(systolics),
+                "last_systolic": latest["systolic"],
+                "last_diastolic": latest["diastolic"],
+                "last_pulse": latest.get("pulse"),
+                "last_reading_time": timestamp_to_ms(latest["timestamp"]),
+                "current_stage": classification["stage"],
+                "reading_count": bp_count
+            }
+            response["data_available"] = True
+            
+            # Update last_sync if BP is more recent
+            bp_ts_ms = timestamp_to_ms(latest["timestamp"])
+            if not response["last_sync"] or (bp_ts_ms and bp_ts_ms > response["last_sync"]):
+                response["last_sync"] = bp_ts_ms
         
+        # Steps data
         if steps_data:
             response["steps"] = {
                 "available": True,
@@ -286,13 +328,7 @@ class PatientDataService:
             if not response["last_sync"] or (ts_ms and ts_ms > response["last_sync"]):
                 response["last_sync"] = ts_ms
         
-        # Try to get sleep data
-        sleep_data = await self.db.health_metrics.find_one({
-            "userId": patient_id,
-            "type": "sleep",
-            "timestamp": {"$gte": start_ts}
-        }, sort=[("timestamp", -1)])
-        
+        # Sleep data
         if sleep_data:
             response["sleep"] = {
                 "available": True,
@@ -307,15 +343,20 @@ class PatientDataService:
         
         # If no health_metrics data, check if there's any sensor_batches data
         if not response["data_available"]:
-            latest_batch = await self.db.sensor_batches.find_one(
-                {"userId": patient_id},
-                sort=[("createdAt", -1)]
+            latest_batch = await self._guarded_read(
+                "sensor_batches", semaphore,
+                lambda: self.db.sensor_batches.find_one(
+                    {"userId": patient_id},
+                    sort=[("createdAt", -1)]
+                ),
+                degraded,
             )
             if latest_batch:
                 response["last_sync"] = normalize_timestamp(
                     int(latest_batch["createdAt"].timestamp() * 1000)
                 )
         
+        response["degraded_sections"] = sorted(degraded)
         return response
     
     async def get_biometrics_history(
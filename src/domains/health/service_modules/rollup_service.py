@@ -0,0 +1,267 @@
+"""
+Health Rollup Service.
+
+Maintains one materialized rollup document per patient in `health_rollups`
+so the caregiver 30-day summary is a single point read instead of three
+aggregations over the raw collections:
+- Steps / sleep / heart rate: latest daily value (ingest upserts per date)
+- Blood pressure: running per-day totals and counts (incremented per reading)
+
+Document shape:
+    {
+        "_id": "<userId>",
+        "userId": "<userId>",
+        "days": {
+            "YYYY-MM-DD": {
+                "steps": int, "sleep_minutes": int,
+                "hr_avg": int, "hr_min": int, "hr_max": int,
+                "bp_systolic_sum": int, "bp_diastolic_sum": int, "bp_count": int
+            }
+        },
+        "backfilled": true,   # set only by rebuild()
+        "updatedAt": datetime
+    }
+
+Ingestion upserts partial documents, so a rollup is trusted only once
+`rebuild()` has backfilled it from the raw collections (see `get_days`).
+
+Days falling out of the window are dropped by the nightly compaction job
+(`python -m scripts.compact_health_rollups`).
+
+Following Single Responsibility Principle (SRP).
+"""
+from typing import Dict, Any, Optional, List, Iterable
+from datetime import datetime, timezone, timedelta
+from src._config.logger import get_logger
+from src.domains.health.adapters import extract_date_from_timestamp
+
+logger = get_logger(__name__)
+
+ROLLUP_WINDOW_DAYS = 30
+
+
+def rollup_window(now: Optional[datetime] = None) -> tuple:
+    """Return (start_str, end_str) of the rolling window, UTC dates inclusive."""
+    end_date = (now or datetime.now(timezone.utc)).date()
+    start_date = end_date - timedelta(days=ROLLUP_WINDOW_DAYS)
+    return start_date.isoformat(), end_date.isoformat()
+
+
+class HealthRollupService:
+    """Service for the per-patient materialized daily rollups."""
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.health_rollups
+
+    # =========================================
+    # Write side (called from the ingestion paths)
+    # =========================================
+
+    async def record_daily_metrics(
+        self,
+        user_id: str,
+        date: str,
+        steps: Optional[int] = None,
+        sleep_minutes: Optional[int] = None,
+        hr_avg: Optional[int] = None,
+        hr_min: Optional[int] = None,
+        hr_max: Optional[int] = None,
+    ) -> None:
+        """
+        Mirror the daily steps/sleep/HR values written by ingest_health_metrics.
+
+        Those are per-date upserts in health_metrics (the latest sync wins), so
+        the rollup overwrites the day's values rather than accumulating them.
+        """
+        fields: Dict[str, Any] = {}
+        if steps is not None:
+            fields["steps"] = steps
+        if sleep_minutes is not None:
+            fields["sleep_minutes"] = sleep_minutes
+        if hr_avg is not None:
+            fields["hr_avg"] = hr_avg
+            fields["hr_min"] = hr_min
+            fields["hr_max"] = hr_max
+        if not fields:
+            return
+
+        await self.collection.update_one(
+            {"_id": user_id},
+            {
+                "$set": {
+                    **{f"days.{date}.{k}": v for k, v in fields.items()},
+                    "userId": user_id,
+                    "updatedAt": datetime.now(timezone.utc),
+                }
+            },
+            upsert=True
+        )
+
+    async def record_bp_readings(self, user_id: str, readings: Iterable[Dict[str, Any]]) -> None:
+        """
+        Add stored BP readings to the running per-day totals.
+
+        Args:
+            user_id: Patient ID
+            readings: Stored reading docs (need `systolic`, `diastolic` and
+                `date` or `timestamp`)
+        """
+        inc: Dict[str, int] = {}
+        for r in readings:
+            date = r.get("date") or extract_date_from_timestamp(r.get("timestamp"))
+            if not date:
+                continue
+            for key, value in (
+                ("bp_systolic_sum", r["systolic"]),
+                ("bp_diastolic_sum", r["diastolic"]),
+                ("bp_count", 1),
+            ):
+                path = f"days.{date}.{key}"
+                inc[path] = inc.get(path, 0) + value
+        if not inc:
+            return
+
+        await self.collection.update_one(
+            {"_id": user_id},
+            {
+                "$inc": inc,
+                "$set": {"userId": user_id, "updatedAt": datetime.now(timezone.utc)},
+            },
+            upsert=True
+        )
+
+    # =========================================
+    # Read side
+    # =========================================
+
+    async def get_days(self, user_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the per-day rollup map for a patient (one point read).
+
+        Rollups that were never backfilled (data ingested before rollups
+        existed, even if a sync has since upserted a partial document) are
+        rebuilt once from the raw collections.
+        """
+        doc = await self.collection.find_one({"_id": user_id}, {"days": 1, "backfilled": 1})
+        if doc is None or not doc.get("backfilled"):
+            return await self.rebuild(user_id)
+        return doc.get("days") or {}
+
+    async def rebuild(self, user_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Recompute the rollup for the current window from the raw collections
+        and persist it. Used as a lazy backfill and for repairs.
+        """
+        start_str, end_str = rollup_window()
+        days: Dict[str, Dict[str, Any]] = {}
+
+        # Older readings may lack `date`; their day comes from the ISO timestamp
+        bp_pipeline = [
+            {"$match": {
+                "userId": user_id,
+                "$or": [
+                    {"date": {"$gte": start_str, "$lte": end_str}},
+                    {"date": None, "timestamp": {"$gte": start_str}},
+                ],
+            }},
+            {"$group": {
+                "_id": {"$ifNull": ["$date", {"$substrCP": ["$timestamp", 0, 10]}]},
+                "bp_systolic_sum": {"$sum": "$systolic"},
+                "bp_diastolic_sum": {"$sum": "$diastolic"},
+                "bp_count": {"$sum": 1},
+            }},
+        ]
+        async for row in self.db.blood_pressure_readings.aggregate(bp_pipeline):
+            days.setdefault(row.pop("_id"), {}).update(row)
+
+        cursor = self.db.health_metrics.find(
+            {
+                "userId": user_id,
+                "type": {"$in": ["steps", "sleep", "heart_rate"]},
+                "date": {"$gte": start_str, "$lte": end_str},
+            },
+            {"type": 1, "date": 1, "value": 1, "average": 1, "min": 1, "max": 1}
+        )
+        async for d in cursor:
+            day = days.setdefault(d["date"], {})
+            if d["type"] == "steps":
+                day["steps"] = d.get("value")
+            elif d["type"] == "sleep":
+                day["sleep_minutes"] = d.get("value")
+            elif d.get("average") is not None:
+                day["hr_avg"] = d.get("average")
+                day["hr_min"] = d.get("min")
+                day["hr_max"] = d.get("max")
+
+        await self.collection.replace_one(
+            {"_id": user_id},
+            {
+                "userId": user_id,
+                "days": days,
+                "backfilled": True,
+                "updatedAt": datetime.now(timezone.utc),
+            },
+            upsert=True
+        )
+        logger.info(f"Rebuilt health rollup for {user_id} ({len(days)} days)")
+        return days
+
+    # =========================================
+    # Maintenance
+    # =========================================
+
+    async def compact(self, now: Optional[datetime] = None) -> int:
+        """
+        Drop every day older than the rolling window from all rollups.
+
+        Runs server-side as a single pipeline update, so it never loads the
+        rollup documents into the API process.
+
+        Returns:
+            Number of rollup documents modified
+        """
+        start_str, _ = rollup_window(now)
+        result = await self.collection.update_many(
+            {},
+            [{"$set": {"days": {"$arrayToObject": {"$filter": {
+                "input": {"$objectToArray": {"$ifNull": ["$days", {}]}},
+                "cond": {"$gte": ["$$this.k", start_str]},
+            }}}}}]
+        )
+        logger.info(
+            f"Compacted health rollups older than {start_str}: "
+            f"{result.modified_count} document(s) modified"
+        )
+        return result.modified_count
+
+
+def summarize_days(days: Dict[str, Dict[str, Any]], start_str: str, end_str: str) -> Dict[str, Any]:
+    """Fold the per-day rollup entries inside [start_str, end_str] into window totals."""
+    in_window: List[Dict[str, Any]] = [
+        v for k, v in days.items() if start_str <= k <= end_str and v
+    ]
+
+    steps = [d["steps"] for d in in_window if d.get("steps") is not None]
+    sleep = [d["sleep_minutes"] for d in in_window if d.get("sleep_minutes") is not None]
+    hr = [d for d in in_window if d.get("hr_avg") is not None]
+    bp_count = sum(d.get("bp_count", 0) for d in in_window)
+
+    return {
+        "bp_count": bp_count,
+        "bp_avg_systolic": (
+            sum(d.get("bp_systolic_sum", 0) for d in in_window) / bp_count if bp_count else None
+        ),
+        "bp_avg_diastolic": (
+            sum(d.get("bp_diastolic_sum", 0) for d in in_window) / bp_count if bp_count else None
+        ),
+        "steps_total": sum(steps),
+        "steps_days": len(steps),
+        "steps_average": sum(steps) / len(steps) if steps else None,
+        "sleep_avg_minutes": sum(sleep) / len(sleep) if sleep else None,
+        "sleep_days": len(sleep),
+        "hr_avg": sum(d["hr_avg"] for d in hr) / len(hr) if hr else None,
+        "hr_min": min((d["hr_min"] for d in hr if d.get("hr_min") is not None), default=None),
+        "hr_max": max((d["hr_max"] for d in hr if d.get("hr_max") is not None), default=None),
+        "hr_days": len(hr),
+    }
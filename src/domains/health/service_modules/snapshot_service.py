@@ -0,0 +1,244 @@
+"""
+Patient Snapshot Service.
+
+Maintains one `patient_snapshots` document per patient with everything the
+caregiver dashboard shows, updated on write by the ingestion paths:
+- Latest blood pressure reading
+- Latest heart rate aggregate
+- Steps for the most recent day
+- Last sync time
+- Unread alert count per caregiver
+
+Document shape:
+    {
+        "_id": "<patientId>",
+        "patientId": "<patientId>",
+        "latest_bp": {systolic, diastolic, pulse, stage, timestamp_ms},
+        "latest_hr": {average, min, max, timestamp_ms},
+        "steps": {date, value, timestamp_ms},
+        "last_sync": int (ms),
+        "unread_alerts": {"<caregiverId>": int},
+        "backfilled": true,   # set only by rebuild()
+        "updatedAt": datetime
+    }
+
+All writes are single upserts whose "latest" fields only move forward in
+time (pipeline update with $cond), so late or out-of-order syncs never
+overwrite newer data. Those upserts can create a partial document, so a
+snapshot is trusted only once `rebuild()` has backfilled it (see
+`get_snapshots`).
+
+Following Single Responsibility Principle (SRP).
+"""
+from typing import Dict, Any, Optional, List, Iterable
+from datetime import datetime, timezone
+from src._config.logger import get_logger
+from src.domains.health.adapters import timestamp_to_ms
+from src.domains.health.classification import classify_blood_pressure
+
+logger = get_logger(__name__)
+
+
+def _newer(field: str, ts_ms: int, value: Dict[str, Any]) -> Dict[str, Any]:
+    """Pipeline expression: `value` if ts_ms >= the stored field's timestamp."""
+    return {"$cond": [
+        {"$gte": [ts_ms, {"$ifNull": [f"${field}.timestamp_ms", 0]}]},
+        {"$literal": value},
+        f"${field}",
+    ]}
+
+
+class PatientSnapshotService:
+    """Service for the per-patient dashboard snapshot documents."""
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.patient_snapshots
+
+    async def _apply(self, patient_id: str, fields: Dict[str, Any], ts_ms: Optional[int]) -> None:
+        stage: Dict[str, Any] = {
+            **fields,
+            "patientId": patient_id,
+            "updatedAt": "$$NOW",
+        }
+        if ts_ms:
+            stage["last_sync"] = {"$max": [{"$ifNull": ["$last_sync", 0]}, ts_ms]}
+        await self.collection.update_one(
+            {"_id": patient_id},
+            [{"$set": stage}],
+            upsert=True
+        )
+
+    # =========================================
+    # Write side (called from the ingestion paths)
+    # =========================================
+
+    async def record_bp_readings(self, patient_id: str, readings: Iterable[Dict[str, Any]]) -> None:
+        """Keep the newest of the stored BP readings as `latest_bp`."""
+        newest = None
+        newest_ms = -1
+        for r in readings:
+            ts_ms = timestamp_to_ms(r.get("timestamp")) or 0
+            if ts_ms > newest_ms:
+                newest, newest_ms = r, ts_ms
+        if newest is None:
+            return
+
+        latest_bp = {
+            "systolic": newest["systolic"],
+            "diastolic": newest["diastolic"],
+            "pulse": newest.get("pulse"),
+            "stage": newest.get("stage"),
+            "timestamp_ms": newest_ms,
+        }
+        await self._apply(
+            patient_id,
+            {"latest_bp": _newer("latest_bp", newest_ms, latest_bp)},
+            newest_ms
+        )
+
+    async def record_metrics(self, metrics) -> None:
+        """Mirror the steps / heart rate values of a HealthMetricsInput sync."""
+        ts_ms = timestamp_to_ms(metrics.sync_timestamp) or 0
+        fields: Dict[str, Any] = {}
+
+        if metrics.avg_heart_rate is not None:
+            fields["latest_hr"] = _newer("latest_hr", ts_ms, {
+                "average": metrics.avg_heart_rate,
+                "min": metrics.min_heart_rate,
+                "max": metrics.max_heart_rate,
+                "timestamp_ms": ts_ms,
+            })
+
+        if metrics.steps is not None:
+            # Steps are a per-day counter: a later day always wins, and within
+            # the same day the latest sync wins. The date comes from the client,
+            # so it is a literal (a "$..." string would be read as a field path).
+            stored_date = {"$ifNull": ["$steps.date", ""]}
+            date = {"$literal": metrics.date}
+            fields["steps"] = {"$cond": [
+                {"$or": [
+                    {"$gt": [date, stored_date]},
+                    {"$and": [
+                        {"$eq": [date, stored_date]},
+                        {"$gte": [ts_ms, {"$ifNull": ["$steps.timestamp_ms", 0]}]},
+                    ]},
+                ]},
+                {"$literal": {"date": metrics.date, "value": metrics.steps, "timestamp_ms": ts_ms}},
+                "$steps",
+            ]}
+
+        if not fields and not ts_ms:
+            return
+        await self._apply(metrics.user_id, fields, ts_ms)
+
+    async def record_alert(self, patient_id: str, caregiver_ids: List[str]) -> None:
+        """Count a new unread event for every caregiver it was fanned out to."""
+        if not caregiver_ids:
+            return
+        await self.collection.update_one(
+            {"_id": patient_id},
+            {
+                "$inc": {f"unread_alerts.{cg_id}": 1 for cg_id in caregiver_ids},
+                "$set": {"patientId": patient_id, "updatedAt": datetime.now(timezone.utc)},
+            },
+            upsert=True
+        )
+
+    async def mark_alerts_read(self, caregiver_id: str, read_per_patient: Dict[str, int]) -> None:
+        """Decrement a caregiver's unread counters after events were marked read."""
+        for patient_id, count in read_per_patient.items():
+            if count <= 0:
+                continue
+            field = f"unread_alerts.{caregiver_id}"
+            # Clamp at zero: legacy events were never counted on insert.
+            await self.collection.update_one(
+                {"_id": patient_id},
+                [{"$set": {field: {"$max": [
+                    0, {"$subtract": [{"$ifNull": [f"${field}", 0]}, count]}
+                ]}}}]
+            )
+
+    # =========================================
+    # Read side
+    # =========================================
+
+    async def get_snapshots(self, patient_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the snapshots of several patients with one `$in` query.
+
+        Snapshots that were never backfilled (data stored before snapshots
+        existed, even if a sync or alert has since upserted a partial
+        document) are rebuilt from the raw collections once.
+        """
+        if not patient_ids:
+            return {}
+        snapshots: Dict[str, Dict[str, Any]] = {}
+        cursor = self.collection.find({"_id": {"$in": list(patient_ids)}})
+        for doc in await cursor.to_list(length=len(patient_ids)):
+            snapshots[doc["_id"]] = doc
+
+        for patient_id in patient_ids:
+            if not snapshots.get(patient_id, {}).get("backfilled"):
+                snapshots[patient_id] = await self.rebuild(patient_id)
+        return snapshots
+
+    async def rebuild(self, patient_id: str) -> Dict[str, Any]:
+        """Recompute a patient's snapshot from the raw collections and persist it."""
+        doc: Dict[str, Any] = {"_id": patient_id, "patientId": patient_id}
+        sync_times: List[int] = []
+
+        bp = await self.db.blood_pressure_readings.find_one(
+            {"userId": patient_id}, sort=[("timestamp", -1)]
+        )
+        if bp:
+            ts_ms = timestamp_to_ms(bp.get("timestamp")) or 0
+            doc["latest_bp"] = {
+                "systolic": bp["systolic"],
+                "diastolic": bp["diastolic"],
+                "pulse": bp.get("pulse"),
+                "stage": bp.get("stage") or classify_blood_pressure(bp["systolic"], bp["diastolic"])["stage"],
+                "timestamp_ms": ts_ms,
+            }
+            sync_times.append(ts_ms)
+
+        hr = await self.db.health_metrics.find_one(
+            {"userId": patient_id, "type": "heart_rate"}, sort=[("date", -1)]
+        )
+        if hr and hr.get("average") is not None:
+            ts_ms = timestamp_to_ms(hr.get("timestamp")) or 0
+            doc["latest_hr"] = {
+                "average": hr.get("average"),
+                "min": hr.get("min"),
+                "max": hr.get("max"),
+                "timestamp_ms": ts_ms,
+            }
+            sync_times.append(ts_ms)
+
+        steps = await self.db.health_metrics.find_one(
+            {"userId": patient_id, "type": "steps"}, sort=[("date", -1)]
+        )
+        if steps:
+            ts_ms = timestamp_to_ms(steps.get("timestamp")) or 0
+            doc["steps"] = {"date": steps.get("date"), "value": steps.get("value"), "timestamp_ms": ts_ms}
+            sync_times.append(ts_ms)
+
+        if sync_times:
+            doc["last_sync"] = max(sync_times)
+
+        unread_pipeline = [
+            {"$match": {"patientId": patient_id}},
+            {"$unwind": "$caregiverIds"},
+            {"$match": {"$expr": {"$not": [
+                {"$in": ["$caregiverIds", {"$ifNull": ["$readByCaregivers", []]}]}
+            ]}}},
+            {"$group": {"_id": "$caregiverIds", "count": {"$sum": 1}}},
+        ]
+        rows = await self.db.biometric_events.aggregate(unread_pipeline).to_list(length=None)
+        doc["unread_alerts"] = {row["_id"]: row["count"] for row in rows}
+        doc["backfilled"] = True
+        doc["updatedAt"] = datetime.now(timezone.utc)
+
+        await self.collection.replace_one({"_id": patient_id}, doc, upsert=True)
+        logger.info(f"Rebuilt patient snapshot for {patient_id}")
+        return doc
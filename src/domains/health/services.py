@@ -7,6 +7,9 @@ This class acts as a façade, delegating to specialized services:
 - SyncService: Sync management
 - BloodPressureService: BP/HR storage and history
 
+Patient read methods go through the shared response cache (src/core/cache.py);
+the underlying services invalidate it on every write.
+
 The verify_patient_access() method is deprecated in favor of AuthorizationService.
 
 Following Single Responsibility and Façade patterns.
@@ -18,6 +21,8 @@ from src.domains.health.service_modules import (
     SyncService,
     BloodPressureService
 )
+from src.core.cache import response_cache
+from src.core.user_loader import UserLoader
 
 
 class HealthService:
@@ -27,13 +32,15 @@ class HealthService:
     Delegates to specialized services while maintaining backward compatibility.
     """
     
-    def __init__(self, db):
+    def __init__(self, db, users: Optional[UserLoader] = None):
         self.db = db
+        # Request-scoped user identity map shared by the specialized services
+        self.users = users or UserLoader(db)
         # Initialize specialized services
-        self._patient_data = PatientDataService(db)
+        self._patient_data = PatientDataService(db, self.users)
         self._health_metrics = HealthMetricsService(db)
         self._sync = SyncService(db)
-        self._blood_pressure = BloodPressureService(db)
+        self._blood_pressure = BloodPressureService(db, self.users)
     
     # =========================================
     # DEPRECATED: Authorization (use AuthorizationService instead)
@@ -93,7 +100,13 @@ class HealthService:
         patient_id: str
     ) -> Dict[str, Any]:
         """Get health summary for a patient (last 24 hours)."""
-        return await self._patient_data.get_patient_health_summary(patient_id)
+        # A degraded summary (a section read failed or timed out) is served
+        # but not cached, so the next poll retries the failed section
+        return await response_cache.get_or_compute(
+            "health_summary", patient_id, (),
+            lambda: self._patient_data.get_patient_health_summary(patient_id),
+            cacheable=lambda summary: not summary.get("degraded_sections"),
+        )
     
     async def get_biometrics_history(
         self,
@@ -120,8 +133,11 @@ class HealthService:
         limit: int = 30,
     ) -> Dict[str, Any]:
         """Steps history for a patient (caregiver/self-read)."""
-        return await self._health_metrics.get_steps_history(
-            patient_id, date_from, date_to, limit
+        return await response_cache.get_or_compute(
+            "steps_history", patient_id, (str(date_from), str(date_to), limit),
+            lambda: self._health_metrics.get_steps_history(
+                patient_id, date_from, date_to, limit
+            ),
         )
 
     async def get_sleep_history(
@@ -132,13 +148,19 @@ class HealthService:
         limit: int = 30,
     ) -> Dict[str, Any]:
         """Sleep history for a patient (caregiver/self-read)."""
-        return await self._health_metrics.get_sleep_history(
-            patient_id, date_from, date_to, limit
+        return await response_cache.get_or_compute(
+            "sleep_history", patient_id, (str(date_from), str(date_to), limit),
+            lambda: self._health_metrics.get_sleep_history(
+                patient_id, date_from, date_to, limit
+            ),
         )
 
     async def get_30day_summary(self, patient_id: str) -> Dict[str, Any]:
         """Rolling 30-day aggregated summary for a patient."""
-        return await self._health_metrics.get_30day_summary(patient_id)
+        return await response_cache.get_or_compute(
+            "30day_summary", patient_id, (),
+            lambda: self._health_metrics.get_30day_summary(patient_id),
+        )
     
     # =========================================
     # Sync Management - Delegate to SyncService
@@ -201,7 +223,10 @@ class HealthService:
         days: int = 30
     ) -> Dict[str, Any]:
         """Get blood pressure history for a patient."""
-        return await self._blood_pressure.get_patient_blood_pressure_history(patient_id, days)
+        return await response_cache.get_or_compute(
+            "bp_history", patient_id, (days,),
+            lambda: self._blood_pressure.get_patient_blood_pressure_history(patient_id, days),
+        )
 
     async def get_patient_blood_pressure_readings(
         self,
@@ -210,8 +235,11 @@ class HealthService:
         limit: int = 500,
     ) -> Dict[str, Any]:
         """Get raw individual BP readings for a patient (caregiver view)."""
-        return await self._blood_pressure.get_patient_blood_pressure_readings(
-            patient_id, days, limit
+        return await response_cache.get_or_compute(
+            "bp_readings", patient_id, (days, limit),
+            lambda: self._blood_pressure.get_patient_blood_pressure_readings(
+                patient_id, days, limit
+            ),
         )
     
     async def get_patient_heart_rate_history(
@@ -220,4 +248,7 @@ class HealthService:
         days: int = 7
     ) -> Dict[str, Any]:
         """Get heart rate history for a patient."""
-        return await self._blood_pressure.get_patient_heart_rate_history(patient_id, days)
+        return await response_cache.get_or_compute(
+            "hr_history", patient_id, (days,),
+            lambda: self._blood_pressure.get_patient_heart_rate_history(patient_id, days),
+        )
@@ -0,0 +1,158 @@
+"""
+Content-addressed caches for the voice endpoints.
+
+Mobile clients retry uploads on flaky networks and patients repeat the same
+phrases ("ya me tomé las de la mañana"), so identical inputs keep paying for
+a Whisper call plus a chat completion. Two caches avoid that:
+
+- `transcription_cache`: SHA-256 of the trimmed PCM that would be sent to
+  Whisper (or of the upload itself when it was not preprocessed), together
+  with the Whisper model/language, -> transcription text.
+- `extraction_cache`: prompt version + normalized transcription ->
+  extracted JSON, for the BP, take-intent and new-medication LLM calls. The
+  prompt version is a hash of the prompt and model (`prompt_version`), so
+  editing a prompt never serves answers produced by the old one.
+
+Each cache has two tiers: an in-process LRU with per-entry expiry, and the
+Mongo `voice_cache` collection (TTL index on `expiresAt`) shared by workers
+and restarts. Only successful answers are stored; fallbacks (regex/keyword
+parsing after an LLM error) are not.
+
+Cached values are copied on the way in and out: callers add keys to the
+returned dicts.
+"""
+import copy
+import hashlib
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from cachetools import LRUCache
+
+from src._config.logger import get_logger
+from src._config.settings import settings
+from src.core.cache import register_cache_stats
+
+logger = get_logger(__name__)
+
+
+def audio_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def prompt_version(*parts: str) -> str:
+    """Short stable id of a prompt (system prompt, model, ...)."""
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+def normalize_transcription(text: str) -> str:
+    """Case, spacing and surrounding punctuation do not change the extraction."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return " ".join(text.split()).strip(" .,;:!?¡¿\"'")
+
+
+def extraction_key(version: str, transcription: str) -> str:
+    return hashlib.sha256(
+        f"{version}\n{normalize_transcription(transcription)}".encode("utf-8")
+    ).hexdigest()
+
+
+class VoiceResultCache:
+    """In-process LRU with per-entry expiry in front of the Mongo `voice_cache` collection."""
+
+    def __init__(
+        self,
+        kind: str,
+        max_entries: int,
+        ttl_seconds: float,
+        enabled: bool = True,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.kind = kind
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._timer = timer
+        self._entries: LRUCache = LRUCache(maxsize=max_entries)
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def _doc_id(self, key: str) -> str:
+        return f"{self.kind}:{key}"
+
+    async def get(self, db, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        entry: Optional[Tuple[float, Any]] = self._entries.get(key)
+        if entry is not None and entry[0] > self._timer():
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+        if db is not None:
+            now = datetime.utcnow()
+            try:
+                doc = await db.voice_cache.find_one(
+                    {"_id": self._doc_id(key), "expiresAt": {"$gt": now}}
+                )
+            except Exception as e:
+                logger.warning(f"voice cache: {self.kind} read failed: {e}")
+                doc = None
+            if doc:
+                remaining = (doc["expiresAt"] - now).total_seconds()
+                self._entries[key] = (self._timer() + remaining, doc["value"])
+                self.db_hits += 1
+                return copy.deepcopy(doc["value"])
+
+        self.misses += 1
+        return None
+
+    async def put(self, db, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        value = copy.deepcopy(value)
+        self._entries[key] = (self._timer() + self.ttl_seconds, value)
+        if db is None:
+            return
+        try:
+            await db.voice_cache.replace_one(
+                {"_id": self._doc_id(key)},
+                {
+                    "_id": self._doc_id(key),
+                    "kind": self.kind,
+                    "value": value,
+                    "expiresAt": datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning(f"voice cache: {self.kind} write failed: {e}")
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.db_hits + self.misses
+        return {
+            "hits": self.hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.db_hits) / lookups, 4) if lookups else None,
+            "entries": len(self._entries),
+        }
+
+
+transcription_cache = VoiceResultCache(
+    "transcription",
+    max_entries=settings.VOICE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.VOICE_TRANSCRIPTION_CACHE_TTL_SECONDS,
+    enabled=settings.VOICE_CACHE_ENABLED,
+)
+extraction_cache = VoiceResultCache(
+    "extraction",
+    max_entries=settings.VOICE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.VOICE_EXTRACTION_CACHE_TTL_SECONDS,
+    enabled=settings.VOICE_CACHE_ENABLED,
+)
+register_cache_stats("voice_transcriptions", transcription_cache.stats)
+register_cache_stats("voice_extractions", extraction_cache.stats)
@@ -4,44 +4,26 @@ Voice parsing service for blood pressure readings.
 Uses OpenAI to extract BP values from natural language transcriptions.
 Supports both text transcriptions and audio files (via Whisper STT).
 """
-import os
-import re
 import io
 import json
-import tempfile
-from openai import AsyncOpenAI
+import time
+from functools import partial, wraps
 from typing import Optional, BinaryIO, Tuple
 from src._config.logger import get_logger
+from src._config.settings import settings
+from src.domains.health.audio_preprocessing import audio_pool, whisper_upload_stats
+from src.domains.health.bp_grammar import bp_parse_stats, parse_bp_phrase
+from src.domains.health.voice_cache import (
+    audio_key,
+    extraction_cache,
+    extraction_key,
+    prompt_version,
+    transcription_cache,
+)
+from src.utils.openai_gateway import openai_gateway
 
 logger = get_logger(__name__)
 
-# Optional audio processing dependencies (pydub + ffmpeg).
-# If unavailable, the audio trim step is skipped and the original audio
-# is forwarded to Whisper unchanged.
-try:
-    from pydub import AudioSegment
-    from pydub.silence import detect_leading_silence
-    _PYDUB_AVAILABLE = True
-except Exception as _pydub_err:  # pragma: no cover - import-time guard
-    AudioSegment = None  # type: ignore
-    detect_leading_silence = None  # type: ignore
-    _PYDUB_AVAILABLE = False
-    logger.warning(f"pydub not available - audio trimming disabled: {_pydub_err}")
-
-
-# Mapping of HTTP content types to pydub format strings
-_CONTENT_TYPE_TO_FORMAT = {
-    "audio/mp4": "mp4",
-    "audio/m4a": "mp4",   # pydub uses "mp4" container for M4A
-    "audio/x-m4a": "mp4",
-    "audio/3gpp": "3gpp",
-    "audio/aac": "aac",
-    "audio/mpeg": "mp3",
-    "audio/mp3": "mp3",
-    "audio/wav": "wav",
-    "audio/webm": "webm",
-}
-
 # System prompt for BP extraction
 BP_EXTRACTION_PROMPT = """You are a medical assistant that extracts blood pressure readings from patient voice transcriptions.
 
@@ -141,115 +123,107 @@ Output JSON only:
 { "name": <string|null>, "dosage": <string>, "frequency_text": <string>, "times": [<string>], "confidence": "high"|"low" }"""
 
 
+_LLM_MODEL = "gpt-4o-mini"
+_WHISPER_MODEL = "whisper-1"
+_WHISPER_LANGUAGE = "es"
+
+# Part of the extraction cache keys: editing a prompt (or the model) must not
+# serve answers produced by the previous one.
+BP_EXTRACTION_PROMPT_VERSION = prompt_version("bp", _LLM_MODEL, BP_EXTRACTION_PROMPT)
+MED_TAKE_INTENT_PROMPT_VERSION = prompt_version("take-intent", _LLM_MODEL, MED_TAKE_INTENT_PROMPT)
+MED_EXTRACTION_PROMPT_VERSION = prompt_version("medication", _LLM_MODEL, MED_EXTRACTION_PROMPT)
+
+
+def _within_voice_deadline(method):
+    """Run an entry point under VOICE_REQUEST_DEADLINE_SECONDS (nested calls keep the outer deadline)."""
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        with self.gateway.deadline(settings.VOICE_REQUEST_DEADLINE_SECONDS):
+            return await method(self, *args, **kwargs)
+    return wrapper
+
+
 class VoiceParsingService:
     """Service for parsing BP values from voice transcriptions using OpenAI."""
     
     def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        # Shared client: every call goes through the gateway's limiter,
+        # deadline and circuit breaker.
+        self.gateway = openai_gateway
+        self.client = openai_gateway.client
+        if self.client is None:
             logger.warning("OPENAI_API_KEY not set - voice parsing will use fallback")
-            self.client = None
-        else:
-            self.client = AsyncOpenAI(api_key=api_key)
     
-    async def parse_transcription(self, transcription: str) -> dict:
+    async def _extract_cached(self, version: str, transcription: str, extract, db=None) -> dict:
+        """Run an LLM extraction through the content-addressed extraction cache."""
+        key = extraction_key(version, transcription)
+        cached = await extraction_cache.get(db, key)
+        if cached is not None:
+            return cached
+        result = await extract(transcription)
+        await extraction_cache.put(db, key, result)
+        return result
+
+    @_within_voice_deadline
+    async def parse_transcription(self, transcription: str, db=None) -> dict:
         """
         Parse a voice transcription to extract BP values.
+
+        The local Spanish grammar (bp_grammar.parse_bp_phrase) answers
+        unambiguous phrases like "ciento veinte sobre ochenta" directly; the
+        LLM is only called when that parse is low-confidence.
         
         Args:
             transcription: Raw text from speech recognition
+            db: Optional database for the shared tier of the extraction cache
             
         Returns:
             dict with keys: systolic, diastolic, pulse, device_classification, confidence
         """
-        # Try regex fallback first for simple patterns
-        regex_result = self._try_regex_parse(transcription)
+        started = time.perf_counter()
+        local_result = parse_bp_phrase(transcription)
+        local_ms = (time.perf_counter() - started) * 1000
+
+        if local_result["confidence"] == "high" and settings.VOICE_LOCAL_BP_PARSER_ENABLED:
+            bp_parse_stats.record_local(local_ms)
+            return local_result
+        bp_parse_stats.record_fallback(local_ms)
         
         # If we have OpenAI, use it for better parsing
         if self.client:
             try:
-                llm_result = await self._parse_with_llm(transcription)
+                llm_result = await self._extract_cached(
+                    BP_EXTRACTION_PROMPT_VERSION, transcription, self._parse_with_llm, db
+                )
                 
-                # If LLM found values and regex didn't, use LLM
-                # If both found values, prefer LLM for confidence assessment
                 if llm_result.get("systolic") or llm_result.get("diastolic"):
                     return llm_result
                     
             except Exception as e:
-                logger.error(f"LLM parsing failed, falling back to regex: {e}")
+                logger.error(f"LLM parsing failed, falling back to local parse: {e}")
         
-        # Fall back to regex result
-        return regex_result
-    
-    def _try_regex_parse(self, text: str) -> dict:
-        """
-        Simple regex-based parsing for common BP patterns.
-        
-        Patterns matched:
-        - "120/80" or "120 / 80"
-        - "120 sobre 80"
-        - "120 80" (two numbers in sequence)
-        """
-        result = {
-            "systolic": None,
-            "diastolic": None,
-            "pulse": None,
-            "device_classification": None,
-            "confidence": "low"
-        }
-        
-        lower = text.lower()
-        
-        # Pattern 1: "120/80" or "120 / 80"
-        slash_match = re.search(r'(\d{2,3})\s*[/\\]\s*(\d{2,3})', text)
-        if slash_match:
-            s, d = int(slash_match.group(1)), int(slash_match.group(2))
-            if self._is_plausible(s, d):
-                result["systolic"] = s
-                result["diastolic"] = d
-                result["confidence"] = "high"
-        
-        # Pattern 2: "120 sobre 80"
-        if not result["systolic"]:
-            sobre_match = re.search(r'(\d{2,3})\s+sobre\s+(\d{2,3})', lower)
-            if sobre_match:
-                s, d = int(sobre_match.group(1)), int(sobre_match.group(2))
-                if self._is_plausible(s, d):
-                    result["systolic"] = s
-                    result["diastolic"] = d
-                    result["confidence"] = "high"
-        
-        # Pattern 3: "pulso de 75" or "latidos 75"
-        pulse_match = re.search(r'(?:pulso|latidos|bpm)\s*(?:de|:)?\s*(\d{2,3})', lower)
-        if pulse_match:
-            p = int(pulse_match.group(1))
-            if 20 <= p <= 300:
-                result["pulse"] = p
-        
-        return result
-    
-    def _is_plausible(self, systolic: int, diastolic: int) -> bool:
-        """Check if BP values are physiologically plausible."""
-        if not (60 <= systolic <= 300):
-            return False
-        if not (30 <= diastolic <= 200):
-            return False
-        if systolic <= diastolic:
-            return False
-        return True
+        # Fall back to whatever the grammar found
+        return local_result
     
     async def _parse_with_llm(self, transcription: str) -> dict:
         """Use OpenAI to parse the transcription."""
-        response = await self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": BP_EXTRACTION_PROMPT},
-                {"role": "user", "content": f"Parse this voice transcription:\n\n{transcription}"}
-            ],
-            temperature=0.1,
-            response_format={"type": "json_object"}
+        started = time.perf_counter()
+        response = await self.gateway.call(
+            "chat",
+            partial(
+                self.client.chat.completions.create,
+                model=_LLM_MODEL,
+                messages=[
+                    {"role": "system", "content": BP_EXTRACTION_PROMPT},
+                    {"role": "user", "content": f"Parse this voice transcription:\n\n{transcription}"}
+                ],
+                temperature=0.1,
+                response_format={"type": "json_object"}
+            ),
         )
         
+        bp_parse_stats.record_llm_call((time.perf_counter() - started) * 1000)
+        
         content = response.choices[0].message.content
         result = json.loads(content)
         
@@ -262,233 +236,146 @@ class VoiceParsingService:
             "confidence": result.get("confidence", "low")
         }
     
+    @_within_voice_deadline
     async def transcribe_audio(
         self,
         audio_content: bytes,
         filename: str,
         content_type: Optional[str] = None,
+        db=None,
     ) -> Tuple[str, dict]:
         """
         Transcribe audio to text using OpenAI Whisper.
 
-        Applies leading-silence trimming with pydub (if available) before
-        sending to Whisper, to reduce API cost and latency. If trimming
-        fails for any reason, the original audio is forwarded unchanged.
+        Before sending to Whisper the upload is decoded, trimmed at both
+        ends and re-encoded as mono 16 kHz Opus (ffmpeg, if available), to
+        reduce upload size, API cost and latency. This runs in the audio
+        preprocessing process pool; if it is saturated, times out or fails,
+        the original audio is forwarded unchanged. A recording with no
+        speech-level audio is not sent at all and transcribes to "".
+
+        Transcriptions are cached by SHA-256 of the (trimmed) audio, so a
+        retried upload does not pay for a second Whisper call.
+
+        Whisper is called through the shared OpenAI gateway: when its breaker
+        is open, no slot frees up in time or the request deadline runs out,
+        ServiceBusyException is raised (503 at the endpoints).
 
         Args:
             audio_content: Audio file bytes (M4A, 3GP, MP3, WAV, ...)
-            filename: Original filename (used as fallback for format detection)
-            content_type: HTTP content type of the upload (preferred for format detection)
+            filename: Original filename (sent to Whisper when the audio is not re-encoded)
+            content_type: HTTP content type of the upload (logged; ffmpeg
+                detects the container from the content)
+            db: Optional database for the shared tier of the transcription cache
 
         Returns:
             Tuple of (transcription_text, metadata_dict). The metadata dict
-            contains the following keys (all ints, all in milliseconds):
+            contains the following keys (all ints):
               - audio_original_duration_ms
               - audio_trimmed_duration_ms
-              - silence_removed_ms
-            When trimming is not applied (pydub missing or fallback), the
-            three values are equal/zero, but the keys are always present.
+              - silence_removed_ms (both ends)
+              - trailing_silence_removed_ms
+              - audio_upload_bytes
+              - audio_whisper_bytes (0 when no speech was detected)
+              - audio_bytes_saved
+            When preprocessing is not applied (ffmpeg missing or fallback),
+            the durations are zero and the byte counts equal, but the keys
+            are always present.
         """
         if not self.client:
             raise ValueError("OpenAI client not configured - cannot transcribe audio")
+        # Provider down: answer 503 now instead of preprocessing an upload
+        # that cannot be transcribed.
+        self.gateway.ensure_available()
 
         logger.info(
             f"Transcribing audio file: {filename}, size: {len(audio_content)} bytes, "
             f"content_type={content_type}"
         )
 
-        # Default metadata (used when trim is skipped or fails)
+        # Default metadata (used when preprocessing is skipped or fails)
         metadata = {
             "audio_original_duration_ms": 0,
             "audio_trimmed_duration_ms": 0,
             "silence_removed_ms": 0,
+            "trailing_silence_removed_ms": 0,
         }
 
         send_bytes = audio_content
         send_filename = filename
 
-        # Best-effort audio trim: load + detect silence + re-export. On any
-        # failure, fall back silently to the original audio.
-        if _PYDUB_AVAILABLE:
-            try:
-                audio_segment = self._load_audio_from_bytes(audio_content, content_type, filename)
-                original_duration_ms = len(audio_segment)
-                metadata["audio_original_duration_ms"] = original_duration_ms
-
-                threshold = self._detect_noise_floor(audio_segment)
-                trimmed, removed_ms = self._trim_leading_silence(
-                    audio_segment,
-                    silence_threshold_dbfs=threshold,
+        # Best-effort preprocessing (decode + trim + re-encode) in the pool.
+        # When the pool is saturated, times out or fails, the original audio
+        # is sent instead.
+        processed = await audio_pool.run(audio_content)
+        if processed is not None:
+            metadata = dict(processed.metadata)
+            original_duration_ms = metadata["audio_original_duration_ms"]
+            if processed.audio is not None:
+                logger.info(
+                    f"Audio re-encoded: removed {metadata['silence_removed_ms']}ms of silence "
+                    f"({original_duration_ms}ms -> {metadata['audio_trimmed_duration_ms']}ms, "
+                    f"{len(audio_content)} -> {len(processed.audio)} bytes, "
+                    f"threshold={processed.threshold_dbfs:.1f} dBFS)"
                 )
-
-                metadata["audio_trimmed_duration_ms"] = len(trimmed)
-                metadata["silence_removed_ms"] = removed_ms
-
-                if removed_ms > 0:
-                    logger.info(
-                        f"Trim applied: removed {removed_ms}ms of leading silence "
-                        f"({original_duration_ms}ms -> {len(trimmed)}ms, "
-                        f"threshold={threshold:.1f} dBFS)"
-                    )
-                    send_bytes, send_filename = self._export_audio_for_whisper(trimmed)
-                else:
-                    logger.info(
-                        f"No silence trim applied (threshold={threshold:.1f} dBFS, "
-                        f"duration={original_duration_ms}ms)"
-                    )
-            except Exception as e:
-                logger.warning(
-                    f"Audio trim failed, sending original audio to Whisper: {e}"
+                send_bytes, send_filename = processed.audio, processed.filename
+            else:
+                logger.info(
+                    f"Original audio kept (threshold={processed.threshold_dbfs:.1f} dBFS, "
+                    f"duration={original_duration_ms}ms, speech={processed.speech_detected})"
                 )
-                # Reset metadata to safe defaults on failure
-                metadata = {
-                    "audio_original_duration_ms": 0,
-                    "audio_trimmed_duration_ms": 0,
-                    "silence_removed_ms": 0,
-                }
-                send_bytes = audio_content
-                send_filename = filename
 
+        skip = (
+            processed is not None
+            and not processed.speech_detected
+            and settings.AUDIO_SKIP_SILENT_UPLOADS
+        )
+        whisper_bytes = 0 if skip else len(send_bytes)
+        metadata.update(
+            audio_upload_bytes=len(audio_content),
+            audio_whisper_bytes=whisper_bytes,
+            audio_bytes_saved=len(audio_content) - whisper_bytes,
+        )
+        if skip:
+            logger.info("No speech detected in the recording, Whisper not called")
+            whisper_upload_stats.record(len(audio_content), 0, reencoded=False, skipped=True)
+            return "", metadata
+
+        digest = processed.digest if processed is not None else audio_key(audio_content)
+        cache_key = f"{_WHISPER_MODEL}:{_WHISPER_LANGUAGE}:{digest}"
+        cached = await transcription_cache.get(db, cache_key)
+        if cached is not None:
+            logger.info(f"Transcription cache hit ({len(cached)} chars)")
+            return cached, metadata
+
+        whisper_upload_stats.record(
+            len(audio_content), whisper_bytes, reencoded=send_bytes is not audio_content, skipped=False
+        )
         # Whisper API accepts file tuples; wrap bytes in BytesIO so the
         # OpenAI SDK can stream them with a proper content-length header.
-        response = await self.client.audio.transcriptions.create(
-            model="whisper-1",
-            file=(send_filename, io.BytesIO(send_bytes)),
-            language="es",  # Spanish
-            response_format="text"
+        response = await self.gateway.call(
+            "transcription",
+            partial(
+                self.client.audio.transcriptions.create,
+                model=_WHISPER_MODEL,
+                file=(send_filename, io.BytesIO(send_bytes)),
+                language=_WHISPER_LANGUAGE,  # Spanish
+                response_format="text"
+            ),
         )
 
         transcription = response.strip() if isinstance(response, str) else str(response).strip()
         logger.info(f"Transcription result ({len(transcription)} chars): {transcription[:100]}...")
+        await transcription_cache.put(db, cache_key, transcription)
         return transcription, metadata
 
-    # ------------------------------------------------------------------
-    # Audio processing helpers (pydub-based)
-    # ------------------------------------------------------------------
-
-    @staticmethod
-    def _format_from_content_type(content_type: Optional[str], filename: Optional[str]) -> str:
-        """Resolve a pydub format string from HTTP content type, with filename fallback."""
-        if content_type:
-            ct = content_type.split(";")[0].strip().lower()
-            fmt = _CONTENT_TYPE_TO_FORMAT.get(ct)
-            if fmt:
-                return fmt
-        if filename:
-            ext = os.path.splitext(filename)[1].lower().lstrip(".")
-            if ext == "m4a":
-                return "mp4"
-            if ext in {"mp4", "3gpp", "aac", "mp3", "wav", "webm"}:
-                return ext
-        # Default: assume M4A container (the Android client default)
-        return "mp4"
-
-    def _load_audio_from_bytes(
-        self,
-        file_bytes: bytes,
-        content_type: Optional[str],
-        filename: Optional[str] = None,
-    ) -> "AudioSegment":
-        """
-        Load an audio upload (M4A/3GP/MP3/...) into a pydub AudioSegment.
-
-        Writes the bytes to a short-lived temp file because ffmpeg needs a
-        seekable input. The temp file is always cleaned up.
-        """
-        fmt = self._format_from_content_type(content_type, filename)
-        tmp_path: Optional[str] = None
-        try:
-            with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as tmp:
-                tmp.write(file_bytes)
-                tmp_path = tmp.name
-            return AudioSegment.from_file(tmp_path, format=fmt)
-        finally:
-            if tmp_path:
-                try:
-                    os.unlink(tmp_path)
-                except OSError:
-                    pass
-
-    @staticmethod
-    def _detect_noise_floor(audio: "AudioSegment", sample_ms: int = 500) -> float:
-        """
-        Estimate background noise level by measuring dBFS of the first
-        `sample_ms` of audio (assumed to be silence/noise while the user
-        waits for the BP cuff to finish). Returns a dynamic silence
-        threshold = noise_floor + 6 dB, clamped to [-55.0, -25.0] dBFS.
-
-        For absolute silence (dBFS == -inf), returns a very sensitive
-        default of -50.0 dBFS so that any voice will be detected.
-        """
-        sample = audio[:sample_ms]
-        noise_floor_dbfs = sample.dBFS
-        if noise_floor_dbfs == float("-inf"):
-            return -50.0
-        threshold = noise_floor_dbfs + 6.0
-        # Clamp to reasonable speech-detection bounds
-        return max(-55.0, min(-25.0, threshold))
-
-    @staticmethod
-    def _trim_leading_silence(
-        audio: "AudioSegment",
-        silence_threshold_dbfs: float = -40.0,
-        safety_margin_ms: int = 300,
-        min_output_duration_ms: int = 1500,
-    ) -> Tuple["AudioSegment", int]:
-        """
-        Trim leading silence from an AudioSegment.
-
-        Args:
-            audio: full audio segment
-            silence_threshold_dbfs: dBFS level below which audio is silence.
-                More negative = more aggressive (trims more).
-            safety_margin_ms: ms preserved before the detected onset, so the
-                attack of the first word is not cut.
-            min_output_duration_ms: if trimming would yield audio shorter
-                than this, return the original instead.
-
-        Returns:
-            (trimmed_audio, ms_removed). ms_removed == 0 when no trim was applied.
-        """
-        if detect_leading_silence is None:
-            return audio, 0
-
-        start_trim_ms = detect_leading_silence(
-            audio, silence_threshold=silence_threshold_dbfs
-        )
-        start_trim_ms = max(0, start_trim_ms - safety_margin_ms)
-        if start_trim_ms == 0:
-            return audio, 0
-
-        trimmed = audio[start_trim_ms:]
-        if len(trimmed) < min_output_duration_ms:
-            return audio, 0
-
-        return trimmed, start_trim_ms
-
-    @staticmethod
-    def _export_audio_for_whisper(audio: "AudioSegment") -> Tuple[bytes, str]:
-        """
-        Export the (possibly trimmed) AudioSegment to in-memory MP3 bytes.
-
-        MP3 is supported by Whisper, lighter than WAV, and consistently
-        smaller than the original M4A when the user had a long silent
-        prefix that has now been removed.
-
-        Returns:
-            (audio_bytes, filename) where filename carries the .mp3
-            extension so Whisper detects the format from the multipart upload.
-        """
-        buffer = io.BytesIO()
-        audio.export(buffer, format="mp3")
-        buffer.seek(0)
-        return buffer.read(), "audio.mp3"
-
+    @_within_voice_deadline
     async def parse_audio(
         self,
         audio_content: bytes,
         filename: str,
         content_type: Optional[str] = None,
+        db=None,
     ) -> dict:
         """
         Transcribe audio and parse BP values in one step.
@@ -496,17 +383,18 @@ class VoiceParsingService:
         Args:
             audio_content: Audio file bytes
             filename: Original filename
-            content_type: Optional HTTP content type, used to pick the
-                pydub decoder before trimming.
+            content_type: Optional HTTP content type (logged)
+            db: Optional database for the shared cache tier
 
         Returns:
             dict with: systolic, diastolic, pulse, device_classification,
             confidence, transcription, audio_original_duration_ms,
-            audio_trimmed_duration_ms, silence_removed_ms
+            audio_trimmed_duration_ms, silence_removed_ms, trailing_silence_removed_ms,
+            audio_upload_bytes, audio_whisper_bytes, audio_bytes_saved
         """
         # Step 1: Transcribe audio to text (with silence trim if available)
         transcription, audio_metadata = await self.transcribe_audio(
-            audio_content, filename, content_type=content_type
+            audio_content, filename, content_type=content_type, db=db
         )
 
         if not transcription:
@@ -521,7 +409,7 @@ class VoiceParsingService:
             }
 
         # Step 2: Parse transcription for BP values
-        result = await self.parse_transcription(transcription)
+        result = await self.parse_transcription(transcription, db=db)
 
         # Include transcription + audio metadata in result
         result["transcription"] = transcription
@@ -547,14 +435,18 @@ class VoiceParsingService:
 
     async def _parse_take_intent_with_llm(self, transcription: str) -> dict:
         """Use OpenAI to parse the medication-take intent."""
-        response = await self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": MED_TAKE_INTENT_PROMPT},
-                {"role": "user", "content": f"Parse this patient voice transcription:\n\n{transcription}"},
-            ],
-            temperature=0.1,
-            response_format={"type": "json_object"},
+        response = await self.gateway.call(
+            "chat",
+            partial(
+                self.client.chat.completions.create,
+                model=_LLM_MODEL,
+                messages=[
+                    {"role": "system", "content": MED_TAKE_INTENT_PROMPT},
+                    {"role": "user", "content": f"Parse this patient voice transcription:\n\n{transcription}"},
+                ],
+                temperature=0.1,
+                response_format={"type": "json_object"},
+            ),
         )
         result = json.loads(response.choices[0].message.content)
         intent = result.get("intent")
@@ -569,7 +461,8 @@ class VoiceParsingService:
             "confidence": result.get("confidence", "low"),
         }
 
-    async def parse_take_intent(self, transcription: str) -> dict:
+    @_within_voice_deadline
+    async def parse_take_intent(self, transcription: str, db=None) -> dict:
         """
         Parse a voice transcription to detect a medication-take confirmation
         and its time-of-day group ("franja").
@@ -580,16 +473,20 @@ class VoiceParsingService:
         """
         if self.client:
             try:
-                return await self._parse_take_intent_with_llm(transcription)
+                return await self._extract_cached(
+                    MED_TAKE_INTENT_PROMPT_VERSION, transcription, self._parse_take_intent_with_llm, db
+                )
             except Exception as e:
                 logger.error(f"LLM take-intent parsing failed, using keyword fallback: {e}")
         return self._try_keyword_take_intent(transcription)
 
+    @_within_voice_deadline
     async def parse_take_audio(
         self,
         audio_content: bytes,
         filename: str,
         content_type: Optional[str] = None,
+        db=None,
     ) -> dict:
         """
         Transcribe audio and parse the medication-take intent in one step.
@@ -597,11 +494,11 @@ class VoiceParsingService:
         Returns dict with: intent, franja, confidence, transcription.
         """
         transcription, _audio_metadata = await self.transcribe_audio(
-            audio_content, filename, content_type=content_type
+            audio_content, filename, content_type=content_type, db=db
         )
         if not transcription:
             return {"intent": "unknown", "franja": None, "confidence": "low", "transcription": ""}
-        result = await self.parse_take_intent(transcription)
+        result = await self.parse_take_intent(transcription, db=db)
         result["transcription"] = transcription
         return result
 
@@ -612,14 +509,18 @@ class VoiceParsingService:
     # ------------------------------------------------------------------
 
     async def _parse_medication_with_llm(self, transcription: str) -> dict:
-        response = await self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": MED_EXTRACTION_PROMPT},
-                {"role": "user", "content": f"Extract the medication from:\n\n{transcription}"},
-            ],
-            temperature=0.1,
-            response_format={"type": "json_object"},
+        response = await self.gateway.call(
+            "chat",
+            partial(
+                self.client.chat.completions.create,
+                model=_LLM_MODEL,
+                messages=[
+                    {"role": "system", "content": MED_EXTRACTION_PROMPT},
+                    {"role": "user", "content": f"Extract the medication from:\n\n{transcription}"},
+                ],
+                temperature=0.1,
+                response_format={"type": "json_object"},
+            ),
         )
         result = json.loads(response.choices[0].message.content)
         times = [t for t in (result.get("times") or []) if isinstance(t, str) and ":" in t]
@@ -631,7 +532,8 @@ class VoiceParsingService:
             "confidence": result.get("confidence", "low"),
         }
 
-    async def parse_medication_intent(self, transcription: str) -> dict:
+    @_within_voice_deadline
+    async def parse_medication_intent(self, transcription: str, db=None) -> dict:
         """
         Extract a new medication's {name, dosage, frequency_text, times,
         confidence} from a transcription. Requires the LLM; without it returns
@@ -640,22 +542,28 @@ class VoiceParsingService:
         """
         if self.client:
             try:
-                return await self._parse_medication_with_llm(transcription)
+                return await self._extract_cached(
+                    MED_EXTRACTION_PROMPT_VERSION, transcription, self._parse_medication_with_llm, db
+                )
             except Exception as e:
                 logger.error(f"LLM medication extraction failed: {e}")
         return {"name": None, "dosage": "", "frequency_text": "", "times": [], "confidence": "low"}
 
+    @_within_voice_deadline
     async def parse_medication_audio(
         self,
         audio_content: bytes,
         filename: str,
         content_type: Optional[str] = None,
+        db=None,
     ) -> dict:
         """Transcribe audio and extract the new medication in one step."""
-        transcription, _meta = await self.transcribe_audio(audio_content, filename, content_type=content_type)
+        transcription, _meta = await self.transcribe_audio(
+            audio_content, filename, content_type=content_type, db=db
+        )
         if not transcription:
             return {"name": None, "dosage": "", "frequency_text": "", "times": [], "confidence": "low", "transcription": ""}
-        result = await self.parse_medication_intent(transcription)
+        result = await self.parse_medication_intent(transcription, db=db)
         result["transcription"] = transcription
         return result
 
@@ -0,0 +1,237 @@
+"""
+Write coalescing for location reports (POST /api/location/update).
+
+Phones report their position every few minutes (more often while moving),
+and most reports from a device that is standing still repeat the previous
+one. Each report used to cost two writes: `users.lastLocation` and a
+`locations` history document. Now:
+
+- `last_positions` keeps the last stored position of each user in memory.
+  A report that moved less than LOCATION_MIN_DISTANCE_METERS from it only
+  reaches the history once every LOCATION_HISTORY_INTERVAL_SECONDS, so a
+  parked phone leaves one point per window instead of one per report.
+- The `users.lastLocation` update is skipped when the device has not moved
+  and the stored `updatedAt` is less than
+  LOCATION_UPDATED_AT_GRANULARITY_SECONDS old. `updatedAt` is what the
+  partner's "stale" flag (15 minutes) is computed from, so it is still
+  refreshed at that granularity.
+- History documents go through `location_history_writer`, which buffers
+  them and writes one `insert_many` when LOCATION_HISTORY_BATCH_SIZE
+  documents are pending or LOCATION_HISTORY_FLUSH_SECONDS after the first
+  one, whichever comes first.
+
+Consistency:
+- Positions are process-local (the API runs a single uvicorn worker).
+  Entries expire after the longer of the two windows, after which the next
+  report writes both documents again, so a restart or an eviction only
+  costs extra writes.
+- Buffered history is lost if the process dies before a flush (at most
+  LOCATION_HISTORY_FLUSH_SECONDS of points, which also expire after 7
+  days). Shutdown flushes, and `get_location_history` flushes before
+  reading so a user always sees their own latest points.
+
+Counters are exposed under "location_ingest" at GET /metrics/cache.
+"""
+import asyncio
+import math
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from cachetools import TTLCache
+
+from src._config.logger import get_logger
+from src._config.settings import settings
+from src.core.cache import register_cache_stats
+
+logger = get_logger(__name__)
+
+_EARTH_RADIUS_M = 6_371_000.0
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle (haversine) distance in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * _EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class LastPosition(NamedTuple):
+    latitude: float
+    longitude: float
+    user_written_at: datetime  # updatedAt stored on users.lastLocation
+    history_written_at: datetime  # createdAt of the last history point
+
+
+class WriteDecision(NamedTuple):
+    update_user: bool
+    insert_history: bool
+
+
+class LastPositionIndex:
+    """Last stored position per user, deciding which writes a report needs."""
+
+    def __init__(
+        self,
+        max_users: int,
+        min_distance_m: float,
+        history_interval_seconds: float,
+        updated_at_granularity_seconds: float,
+    ):
+        self.min_distance_m = min_distance_m
+        self.history_interval_seconds = history_interval_seconds
+        self.updated_at_granularity_seconds = updated_at_granularity_seconds
+        self._positions = TTLCache(
+            maxsize=max_users, ttl=max(history_interval_seconds, updated_at_granularity_seconds)
+        )
+        self.clear()
+
+    def clear(self) -> None:
+        self._positions.clear()
+        self.reports = 0
+        self.user_updates_skipped = 0
+        self.history_skipped = 0
+
+    def decide(self, user_id: str, latitude: float, longitude: float, now: datetime) -> WriteDecision:
+        """Which writes a report at `now` needs; records the ones it will make."""
+        self.reports += 1
+        previous: Optional[LastPosition] = self._positions.get(user_id)
+        if previous is None:
+            self._positions[user_id] = LastPosition(latitude, longitude, now, now)
+            return WriteDecision(True, True)
+
+        moved = (
+            distance_m(previous.latitude, previous.longitude, latitude, longitude)
+            >= self.min_distance_m
+        )
+        update_user = moved or (
+            (now - previous.user_written_at).total_seconds() >= self.updated_at_granularity_seconds
+        )
+        insert_history = moved or (
+            (now - previous.history_written_at).total_seconds() >= self.history_interval_seconds
+        )
+        self.user_updates_skipped += not update_user
+        self.history_skipped += not insert_history
+        if update_user or insert_history:
+            self._positions[user_id] = LastPosition(
+                latitude if moved else previous.latitude,
+                longitude if moved else previous.longitude,
+                now if update_user else previous.user_written_at,
+                now if insert_history else previous.history_written_at,
+            )
+        return WriteDecision(update_user, insert_history)
+
+    def forget(self, user_id: str) -> None:
+        """Next report writes both documents (e.g. the user document changed elsewhere)."""
+        self._positions.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "reports": self.reports,
+            "user_updates_skipped": self.user_updates_skipped,
+            "history_skipped": self.history_skipped,
+            "users": len(self._positions),
+            "max_users": self._positions.maxsize,
+        }
+
+
+class HistoryWriter:
+    """Buffers history documents and writes them with `insert_many`."""
+
+    def __init__(self, batch_size: int, flush_seconds: float):
+        self.batch_size = max(batch_size, 1)
+        self.flush_seconds = flush_seconds
+        self._collection = None
+        self._pending: List[Dict[str, Any]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+
+    def reset(self) -> None:
+        """Drop pending documents and zero the counters (tests)."""
+        timer = self._timer
+        if timer is not None and not timer.done() and not timer.get_loop().is_closed():
+            timer.cancel()
+        self._timer = None
+        self._collection = None
+        self._pending = []
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def add(self, collection, document: Dict[str, Any]) -> None:
+        """Queue a document; writes the batch now if it is full."""
+        if self._collection is not None and collection != self._collection:
+            await self.flush()  # Motor collections compare by database and name
+        self._collection = collection
+        self._pending.append(document)
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+            return
+        loop = asyncio.get_running_loop()
+        if self._timer is None or self._timer.done() or self._timer.get_loop() is not loop:
+            self._timer = loop.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_seconds)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write every pending document (one insert_many)."""
+        async with self._get_lock():
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            collection = self._collection
+            if self._timer is not None and self._timer is not asyncio.current_task():
+                self._timer.cancel()
+                self._timer = None
+            try:
+                await collection.insert_many(batch, ordered=False)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.warning(f"Could not write {len(batch)} location history points: {e}")
+                return
+            self.batches += 1
+            self.written += len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "written": self.written,
+            "failed": self.failed,
+            "avg_batch": round(self.written / self.batches, 1) if self.batches else None,
+        }
+
+
+last_positions = LastPositionIndex(
+    max_users=settings.LOCATION_POSITION_CACHE_MAX_USERS,
+    min_distance_m=settings.LOCATION_MIN_DISTANCE_METERS,
+    history_interval_seconds=settings.LOCATION_HISTORY_INTERVAL_SECONDS,
+    updated_at_granularity_seconds=settings.LOCATION_UPDATED_AT_GRANULARITY_SECONDS,
+)
+location_history_writer = HistoryWriter(
+    batch_size=settings.LOCATION_HISTORY_BATCH_SIZE,
+    flush_seconds=settings.LOCATION_HISTORY_FLUSH_SECONDS,
+)
+register_cache_stats(
+    "location_ingest",
+    lambda: {**last_positions.stats(), "history_writer": location_history_writer.stats()},
+)
@@ -0,0 +1,259 @@
+"""
+Live location channel (WebSocket /api/location/live).
+
+Caregivers used to see a patient's position only by polling
+GET /api/location/paired. They can now keep a WebSocket open and receive
+positions as they are reported:
+
+- `LocationService.update_location` publishes every position it stores on
+  the user document to `live_location_hub`. Reports that wrote nothing (the
+  device did not move, see ingest.py) are not published.
+- Each subscriber gets at most one batch every
+  LOCATION_LIVE_MIN_INTERVAL_SECONDS. Positions that arrive in between
+  replace the pending one for the same patient. A slow or throttled client
+  therefore always receives the latest position, never a backlog, and holds
+  at most one pending message per patient it follows.
+- Disabling sharing closes the streams of the patient's caregivers (4403),
+  and revoking or replacing a pairing closes the caregiver's stream (4410).
+  The client gets a final {"type": "closed", "reason": ...} message before
+  the close frame.
+
+An idle subscriber costs one small object, one sender task and the
+connection itself. Keepalive pings are left to the server's WebSocket
+implementation (uvicorn pings every 20 s). At most
+LOCATION_LIVE_MAX_SUBSCRIBERS connections are accepted per process; beyond
+that the handshake is closed with 1013 (try again later). See
+`python -m scripts.load_test_live_location` for the footprint of 1,000 idle
+subscribers.
+
+The hub is process-local (the API runs a single uvicorn worker).
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from src._config.logger import get_logger
+from src._config.settings import settings
+from src.core.cache import register_cache_stats
+
+logger = get_logger(__name__)
+
+# Close codes sent to the client (4000-4999 are application defined)
+CLOSE_TRY_AGAIN_LATER = 1013
+CLOSE_NO_PAIRING = 4404
+CLOSE_SHARING_DISABLED = 4403
+CLOSE_PAIRING_REVOKED = 4410
+
+
+def location_message(
+    patient_id: str,
+    latitude: float,
+    longitude: float,
+    accuracy: Optional[float],
+    updated_at: datetime,
+    stale: bool = False,
+) -> Dict[str, Any]:
+    return {
+        "type": "location",
+        "patientId": patient_id,
+        "latitude": latitude,
+        "longitude": longitude,
+        "accuracy": accuracy,
+        "updatedAt": int(updated_at.timestamp() * 1000),
+        "stale": stale,
+    }
+
+
+class LiveSubscriber:
+    """One caregiver connection: the latest pending position per patient."""
+
+    __slots__ = (
+        "caregiver_id", "patient_ids", "min_interval", "_timer", "_pending",
+        "_wake", "_last_sent", "close_code", "close_reason", "sent", "replaced",
+    )
+
+    def __init__(
+        self,
+        caregiver_id: str,
+        patient_ids: FrozenSet[str],
+        min_interval: float,
+        timer: Callable[[], float],
+    ):
+        self.caregiver_id = caregiver_id
+        self.patient_ids = patient_ids
+        self.min_interval = min_interval
+        self._timer = timer
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._wake = asyncio.Event()
+        self._last_sent = float("-inf")
+        self.close_code: Optional[int] = None
+        self.close_reason: Optional[str] = None
+        self.sent = 0
+        self.replaced = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def offer(self, patient_id: str, message: Dict[str, Any]) -> None:
+        if patient_id in self._pending:
+            self.replaced += 1
+        self._pending[patient_id] = message
+        self._wake.set()
+
+    def close(self, code: int, reason: str) -> None:
+        if self.close_code is None:
+            self.close_code = code
+            self.close_reason = reason
+            self._wake.set()
+
+    async def next_batch(self) -> List[Dict[str, Any]]:
+        """
+        Wait for pending positions and return them, no earlier than
+        `min_interval` after the previous batch. Returns [] once closed.
+        """
+        while True:
+            await self._wake.wait()
+            if self.close_code is not None:
+                return []
+            delay = self._last_sent + self.min_interval - self._timer()
+            if delay > 0:
+                await asyncio.sleep(delay)  # Newer positions replace pending ones meanwhile
+                if self.close_code is not None:
+                    return []
+            self._wake.clear()
+            if self._pending:
+                batch = list(self._pending.values())
+                self._pending.clear()
+                self._last_sent = self._timer()
+                self.sent += len(batch)
+                return batch
+
+
+class LiveLocationHub:
+    """In-process fan-out of patient positions to subscribed caregivers."""
+
+    def __init__(
+        self,
+        max_subscribers: int,
+        min_interval_seconds: float,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.max_subscribers = max_subscribers
+        self.min_interval_seconds = min_interval_seconds
+        self._timer = timer
+        self.reset()
+
+    def reset(self) -> None:
+        self._by_patient: Dict[str, Set[LiveSubscriber]] = {}
+        self._by_caregiver: Dict[str, Set[LiveSubscriber]] = {}
+        self.subscribers = 0
+        self.published = 0
+        self.rejected_full = 0
+        self.closed = 0
+
+    def subscribe(self, caregiver_id: str, patient_ids: Iterable[str]) -> Optional[LiveSubscriber]:
+        """Register a connection; None when the hub is full."""
+        if self.subscribers >= self.max_subscribers:
+            self.rejected_full += 1
+            return None
+        subscriber = LiveSubscriber(
+            caregiver_id, frozenset(patient_ids), self.min_interval_seconds, self._timer
+        )
+        for patient_id in subscriber.patient_ids:
+            self._by_patient.setdefault(patient_id, set()).add(subscriber)
+        self._by_caregiver.setdefault(caregiver_id, set()).add(subscriber)
+        self.subscribers += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: LiveSubscriber) -> None:
+        caregiver_subs = self._by_caregiver.get(subscriber.caregiver_id)
+        if caregiver_subs is None or subscriber not in caregiver_subs:
+            return
+        caregiver_subs.discard(subscriber)
+        if not caregiver_subs:
+            del self._by_caregiver[subscriber.caregiver_id]
+        for patient_id in subscriber.patient_ids:
+            patient_subs = self._by_patient.get(patient_id)
+            if patient_subs is not None:
+                patient_subs.discard(subscriber)
+                if not patient_subs:
+                    del self._by_patient[patient_id]
+        self.subscribers -= 1
+
+    def publish(self, patient_id: str, message: Dict[str, Any]) -> int:
+        """Hand a position to the patient's subscribers (never blocks). Returns how many."""
+        subscribers = self._by_patient.get(patient_id)
+        if not subscribers:
+            return 0
+        self.published += 1
+        for subscriber in subscribers:
+            subscriber.offer(patient_id, message)
+        return len(subscribers)
+
+    def _close(self, subscribers: Iterable[LiveSubscriber], code: int, reason: str) -> int:
+        closing = list(subscribers)
+        for subscriber in closing:
+            subscriber.close(code, reason)
+        self.closed += len(closing)
+        return len(closing)
+
+    def close_patient(self, patient_id: str, code: int, reason: str) -> int:
+        """Close every stream that follows the patient (e.g. sharing disabled)."""
+        return self._close(self._by_patient.get(patient_id, ()), code, reason)
+
+    def close_caregiver(self, caregiver_id: Optional[str], code: int, reason: str) -> int:
+        """Close every stream of the caregiver (e.g. pairing revoked or replaced)."""
+        if not caregiver_id:
+            return 0
+        return self._close(self._by_caregiver.get(caregiver_id, ()), code, reason)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": self.subscribers,
+            "max_subscribers": self.max_subscribers,
+            "patients_followed": len(self._by_patient),
+            "published": self.published,
+            "rejected_full": self.rejected_full,
+            "closed": self.closed,
+            "min_interval_seconds": self.min_interval_seconds,
+        }
+
+
+async def serve_subscriber(websocket: WebSocket, hub: LiveLocationHub, subscriber: LiveSubscriber) -> None:
+    """
+    Stream positions to an accepted WebSocket until the client disconnects
+    or the hub closes the subscription. Messages from the client are ignored.
+    """
+    async def send_positions() -> None:
+        while True:
+            batch = await subscriber.next_batch()
+            if subscriber.close_code is not None:
+                await websocket.send_json({"type": "closed", "reason": subscriber.close_reason})
+                await websocket.close(code=subscriber.close_code)
+                return
+            for message in batch:
+                await websocket.send_json(message)
+
+    sender = asyncio.create_task(send_positions())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # Closed by the sender
+    finally:
+        hub.unsubscribe(subscriber)
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+
+
+live_location_hub = LiveLocationHub(
+    max_subscribers=settings.LOCATION_LIVE_MAX_SUBSCRIBERS,
+    min_interval_seconds=settings.LOCATION_LIVE_MIN_INTERVAL_SECONDS,
+)
+register_cache_stats("live_locations", live_location_hub.stats)
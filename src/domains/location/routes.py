@@ -1,7 +1,11 @@
 """
 FastAPI routes for location tracking and sharing endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, status
 from src.domains.location.schemas import (
     LocationUpdateRequest,
     LocationUpdateResponse,
@@ -15,9 +19,18 @@ from src.domains.location.schemas import (
     PartnerLocationInfo,
     LocationCoordinates
 )
-from src.domains.location.services import LocationService
+from src.domains.location.live import (
+    CLOSE_NO_PAIRING,
+    CLOSE_SHARING_DISABLED,
+    CLOSE_TRY_AGAIN_LATER,
+    live_location_hub,
+    location_message,
+    serve_subscriber,
+)
+from src.domains.location.services import LOCATION_STALE_MINUTES, LocationService
 from src.domains.auth.routes import verify_token_jwt
 from src.core.database import get_database
+from src.core.pairing_access import pairing_access
 from src._config.logger import get_logger
 
 logger = get_logger(__name__)
@@ -308,3 +321,99 @@ async def get_location_history(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error al obtener historial de ubicación"
         )
+
+
+# Browsers cannot set headers on a WebSocket handshake; they send the token
+# as the second offered subprotocol instead: new WebSocket(url, ["bearer", token]).
+# Never in the URL, which uvicorn and proxies write to their access logs.
+_BEARER_SUBPROTOCOL = "bearer"
+
+
+def _handshake_authorization(websocket: WebSocket) -> Tuple[Optional[str], Optional[str]]:
+    """Return (Authorization value, subprotocol to accept) from the handshake."""
+    authorization = websocket.headers.get("authorization")
+    if authorization:
+        return authorization, None
+    offered = websocket.scope.get("subprotocols") or []
+    if len(offered) == 2 and offered[0] == _BEARER_SUBPROTOCOL:
+        return f"Bearer {offered[1]}", _BEARER_SUBPROTOCOL
+    return None, None
+
+
+@router.websocket("/live")
+async def live_location(
+    websocket: WebSocket,
+    db=Depends(get_database)
+):
+    """
+    Live positions of the caregiver's paired patients.
+    
+    **Authentication Required:** Bearer token in the Authorization header of
+    the handshake, or offered as subprotocols ["bearer", <token>] by clients
+    that cannot set headers (the handshake is rejected otherwise)
+    
+    **Messages (server → client):**
+    - {"type": "location", "patientId", "latitude", "longitude", "accuracy",
+      "updatedAt", "stale"}: first the last known position of each patient,
+      then every new one, at most one batch every
+      LOCATION_LIVE_MIN_INTERVAL_SECONDS (only the latest position is kept)
+    - {"type": "closed", "reason"} before the server closes the stream:
+      "sharing_disabled" (4403), "pairing_revoked" / "pairing_replaced" (4410)
+    
+    Other close codes: 4404 no active pairing (or no patient sharing),
+    1013 too many open streams, try again later.
+    """
+    authorization, subprotocol = _handshake_authorization(websocket)
+    try:
+        user_id = await verify_token_jwt(authorization=authorization, db=db)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept(subprotocol=subprotocol)
+    patient_ids = await pairing_access.patients_of(db, user_id)
+    if not patient_ids:
+        await websocket.send_json({"type": "closed", "reason": "no_active_pairing"})
+        await websocket.close(code=CLOSE_NO_PAIRING)
+        return
+    
+    patients = await db.users.find(
+        {"_id": {"$in": [ObjectId(p) for p in patient_ids]}},
+        {"lastLocation": 1, "sharingLocation": 1}
+    ).to_list(length=len(patient_ids))
+    sharing = [p for p in patients if p.get("sharingLocation", True)]
+    if not sharing:
+        await websocket.send_json({"type": "closed", "reason": "sharing_disabled"})
+        await websocket.close(code=CLOSE_SHARING_DISABLED)
+        return
+    
+    subscriber = live_location_hub.subscribe(user_id, [str(p["_id"]) for p in sharing])
+    if subscriber is None:
+        logger.warning(f"Live location hub full, rejecting caregiver {user_id}")
+        await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+        return
+    
+    # Last known positions first, so the map does not wait for the next report
+    now = datetime.now(timezone.utc)
+    try:
+        for patient in sharing:
+            loc = patient.get("lastLocation") or {}
+            coordinates = loc.get("coordinates", [])
+            updated_at = loc.get("updatedAt")
+            if len(coordinates) != 2 or not updated_at:
+                continue
+            if updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            await websocket.send_json(location_message(
+                str(patient["_id"]),
+                latitude=coordinates[1],  # GeoJSON: [lng, lat]
+                longitude=coordinates[0],
+                accuracy=loc.get("accuracy"),
+                updated_at=updated_at,
+                stale=now - updated_at > timedelta(minutes=LOCATION_STALE_MINUTES),
+            ))
+    except Exception:
+        live_location_hub.unsubscribe(subscriber)  # Client gone during the snapshot
+        raise
+    
+    await serve_subscriber(websocket, live_location_hub, subscriber)
@@ -5,6 +5,11 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta, timezone
 from bson import ObjectId
 from src._config.logger import get_logger
+from src._config.settings import settings
+from src.core.cache import ResponseCache, register_cache_stats
+from src.core.pairing_access import pairing_access
+from src.domains.location.ingest import last_positions, location_history_writer
+from src.domains.location.live import CLOSE_SHARING_DISABLED, live_location_hub, location_message
 
 logger = get_logger(__name__)
 
@@ -12,6 +17,18 @@ COLLECTION_NAME = "locations"
 LOCATION_TTL_DAYS = 7
 LOCATION_STALE_MINUTES = 15  # Mark location as stale after 15 minutes
 
+_USER_LOCATION_PROJECTION = {"name": 1, "profilePicture": 1, "lastLocation": 1, "sharingLocation": 1, "role": 1}
+
+# GET /api/location/paired responses, per requesting user. The key carries
+# the partner's version, so update_location / toggle_sharing of either user
+# (which invalidate their own id) make the pair's entries unreachable.
+paired_location_cache = ResponseCache(
+    max_bytes=settings.LOCATION_PAIRED_CACHE_MAX_BYTES,
+    ttl_seconds=settings.LOCATION_PAIRED_CACHE_TTL_SECONDS,
+    enabled=settings.LOCATION_PAIRED_CACHE_TTL_SECONDS > 0,
+)
+register_cache_stats("paired_locations", paired_location_cache.stats)
+
 
 class LocationService:
     """Service for managing location tracking and sharing."""
@@ -33,7 +50,12 @@ class LocationService:
         
         This method:
         1. Updates lastLocation embedded in the User document (primary source)
-        2. Optionally inserts into locations collection for history (with TTL)
+           and publishes it to live-location subscribers
+        2. Queues a point for the locations collection (history, with TTL)
+        
+        Reports from a device that has not moved skip one or both writes
+        (see src/domains/location/ingest.py); history points are written
+        in batches.
         
         GeoJSON format: coordinates are [longitude, latitude] (lng first!)
         
@@ -48,39 +70,53 @@ class LocationService:
             Dict with success status and server timestamp
         """
         now = datetime.now(timezone.utc)
+        decision = last_positions.decide(user_id, latitude, longitude, now)
         
         # Convert client timestamp to datetime if provided
         client_dt = None
         if client_timestamp:
             client_dt = datetime.fromtimestamp(client_timestamp / 1000, tz=timezone.utc)
         
-        # GeoJSON Point format: coordinates are [longitude, latitude]
-        last_location = {
-            "type": "Point",
-            "coordinates": [longitude, latitude],  # GeoJSON: lng first, lat second
-            "accuracy": accuracy,
-            "updatedAt": now
-        }
+        if decision.update_user:
+            # GeoJSON Point format: coordinates are [longitude, latitude]
+            last_location = {
+                "type": "Point",
+                "coordinates": [longitude, latitude],  # GeoJSON: lng first, lat second
+                "accuracy": accuracy,
+                "updatedAt": now
+            }
+            
+            # Update User document with lastLocation (upsert pattern - no document growth)
+            try:
+                await self.db.users.update_one(
+                    {"_id": ObjectId(user_id)},
+                    {"$set": {"lastLocation": last_location}}
+                )
+            except Exception:
+                last_positions.forget(user_id)  # Not stored: the retry must write
+                raise
+            paired_location_cache.invalidate(user_id)
+            live_location_hub.publish(
+                user_id, location_message(user_id, latitude, longitude, accuracy, now)
+            )
+        
+        if decision.insert_history:
+            # History for tracking/analytics (auto-expires via TTL), written in batches
+            history_doc = {
+                "userId": user_id,
+                "latitude": latitude,
+                "longitude": longitude,
+                "accuracy": accuracy,
+                "clientTimestamp": client_dt,
+                "createdAt": now
+            }
+            await location_history_writer.add(self.collection, history_doc)
         
-        # Update User document with lastLocation (upsert pattern - no document growth)
-        await self.db.users.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$set": {"lastLocation": last_location}}
+        logger.info(
+            f"Updated location for user {user_id}: ({latitude}, {longitude}) "
+            f"user={decision.update_user} history={decision.insert_history}"
         )
         
-        # Also insert into history collection (for tracking/analytics, auto-expires via TTL)
-        history_doc = {
-            "userId": user_id,
-            "latitude": latitude,
-            "longitude": longitude,
-            "accuracy": accuracy,
-            "clientTimestamp": client_dt,
-            "createdAt": now
-        }
-        await self.collection.insert_one(history_doc)
-        
-        logger.info(f"Updated location for user {user_id}: ({latitude}, {longitude})")
-        
         return {
             "success": True,
             "updated_at": int(now.timestamp() * 1000)
@@ -96,10 +132,7 @@ class LocationService:
         Returns:
             User document with name, avatar, lastLocation, sharingLocation, role
         """
-        user = await self.db.users.find_one(
-            {"_id": ObjectId(user_id)},
-            {"name": 1, "profilePicture": 1, "lastLocation": 1, "sharingLocation": 1, "role": 1}
-        )
+        user = await self.db.users.find_one({"_id": ObjectId(user_id)}, _USER_LOCATION_PROJECTION)
         return user
     
     async def get_latest_location(self, user_id: str) -> Optional[Dict[str, Any]]:
@@ -133,16 +166,49 @@ class LocationService:
         - Display stale warning for outdated locations
         - Handle cases where partner disabled sharing
         
+        The pairing comes from the in-memory pairing index and both users
+        are read with one query. The response is cached for
+        LOCATION_PAIRED_CACHE_TTL_SECONDS (map screens poll this endpoint)
+        and dropped when either user reports a new location or toggles
+        sharing. The returned dict may be shared: treat it as read-only.
+        
         Args:
             user_id: ID of the requesting user
             
         Returns:
             Dict with self and partner location data
         """
+        pairing = await pairing_access.active_pairing(self.db, user_id)
+        partner_id = None
+        if pairing:
+            if pairing.get("patientId") == user_id:
+                partner_id = pairing.get("caregiverId")
+            else:
+                partner_id = pairing.get("patientId")
+        partner_version = paired_location_cache.version(partner_id) if partner_id else 0
+        return await paired_location_cache.get_or_compute(
+            "paired_location",
+            user_id,
+            (partner_id, partner_version),
+            lambda: self._build_paired_location(user_id, pairing, partner_id),
+        )
+    
+    async def _build_paired_location(
+        self,
+        user_id: str,
+        pairing: Optional[Dict[str, Any]],
+        paired_user_id: Optional[str],
+    ) -> Dict[str, Any]:
         now = datetime.now(timezone.utc)
         
-        # Get current user data
-        current_user = await self.get_user_with_location(user_id)
+        # Current user and partner in one round trip
+        ids = [ObjectId(user_id)] + ([ObjectId(paired_user_id)] if paired_user_id else [])
+        users = await self.db.users.find(
+            {"_id": {"$in": ids}}, _USER_LOCATION_PROJECTION
+        ).to_list(length=len(ids))
+        users_by_id = {str(u["_id"]): u for u in users}
+        
+        current_user = users_by_id.get(user_id)
         if not current_user:
             return {
                 "self": None,
@@ -174,14 +240,6 @@ class LocationService:
             "sharingEnabled": current_user.get("sharingLocation", True)
         }
         
-        # Find active pairing where user is either patient or caregiver
-        pairing = await self.db.pairings.find_one({
-            "$or": [
-                {"patientId": user_id, "status": "active"},
-                {"caregiverId": user_id, "status": "active"}
-            ]
-        })
-        
         if not pairing:
             return {
                 "self": self_data,
@@ -193,12 +251,10 @@ class LocationService:
         # Determine partner info based on current user's role in pairing
         if pairing["patientId"] == user_id:
             # Current user is patient, partner is caregiver
-            paired_user_id = pairing.get("caregiverId")
             default_partner_name = pairing.get("caregiverName", "Cuidador")
             partner_role = "caregiver"
         else:
             # Current user is caregiver, partner is patient
-            paired_user_id = pairing["patientId"]
             default_partner_name = pairing.get("patientName", "Paciente")
             partner_role = "patient"
         
@@ -210,8 +266,7 @@ class LocationService:
                 "message": "Usuario vinculado no disponible"
             }
         
-        # Get partner user data
-        partner_user = await self.get_user_with_location(paired_user_id)
+        partner_user = users_by_id.get(paired_user_id)
         
         if not partner_user:
             return {
@@ -297,6 +352,9 @@ class LocationService:
         
         if result.matched_count == 0:
             raise ValueError("User not found")
+        paired_location_cache.invalidate(user_id)
+        if not enabled:
+            live_location_hub.close_patient(user_id, CLOSE_SHARING_DISABLED, "sharing_disabled")
         
         logger.info(f"User {user_id} set location sharing to {enabled}")
         
@@ -335,6 +393,8 @@ class LocationService:
         Returns:
             List of location documents
         """
+        # Points still buffered in this process belong in the answer
+        await location_history_writer.flush()
         since = datetime.now(timezone.utc) - timedelta(hours=hours)
         
         cursor = self.collection.find(
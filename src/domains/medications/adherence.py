@@ -0,0 +1,125 @@
+"""
+Per-month medication take counts, shared by the adherence report, the
+calendar and the PDF report.
+
+The counts come from one aggregation grouped by (medicationId, date), so only
+one small row per medication-day leaves Mongo instead of every take document.
+
+Caching:
+- Fully past months cannot change except through a backdated take/untake, so
+  they are kept with no TTL (LRU-bounded). MedicationService invalidates the
+  month of the take's date on every take and untake.
+- The current (or a future) month gets a short TTL on top of the same
+  explicit invalidation.
+- A generation counter keeps a load that raced with an invalidation from
+  caching the pre-change counts.
+
+Cached values are shared between requests: callers must treat them as
+read-only.
+"""
+import calendar
+import time
+from typing import Callable, Dict
+
+from cachetools import LRUCache, TTLCache
+
+from src._config.logger import get_logger
+from src._config.settings import settings
+from src.core.cache import register_cache_stats
+
+logger = get_logger(__name__)
+
+# medicationId -> {"YYYY-MM-DD": number of takes}
+MonthTakes = Dict[str, Dict[str, int]]
+
+
+class MonthlyTakesCache:
+    def __init__(
+        self,
+        max_months: int,
+        current_ttl_seconds: float,
+        enabled: bool = True,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.enabled = enabled
+        self._past = LRUCache(maxsize=max_months)
+        self._current = TTLCache(maxsize=max_months, ttl=current_ttl_seconds, timer=timer)
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _is_past(year: int, month: int) -> bool:
+        return f"{year:04d}-{month:02d}" < time.strftime("%Y-%m", time.gmtime())
+
+    async def get(self, db, user_id: str, year: int, month: int) -> MonthTakes:
+        """Take counts of a patient's month (aggregated on first use)."""
+        key = (user_id, f"{year:04d}-{month:02d}")
+        if self.enabled:
+            for store in (self._past, self._current):
+                counts = store.get(key)
+                if counts is not None:
+                    self.hits += 1
+                    return counts
+        self.misses += 1
+
+        generation = self._generation
+        counts = await self._aggregate(db, user_id, year, month)
+        if self.enabled and generation == self._generation:
+            (self._past if self._is_past(year, month) else self._current)[key] = counts
+        return counts
+
+    @staticmethod
+    async def _aggregate(db, user_id: str, year: int, month: int) -> MonthTakes:
+        _, days_in_month = calendar.monthrange(year, month)
+        pipeline = [
+            {"$match": {
+                "userId": user_id,
+                "date": {
+                    "$gte": f"{year:04d}-{month:02d}-01",
+                    "$lte": f"{year:04d}-{month:02d}-{days_in_month:02d}",
+                },
+            }},
+            {"$group": {
+                "_id": {"medicationId": "$medicationId", "date": "$date"},
+                "count": {"$sum": 1},
+            }},
+        ]
+        rows = await db.medication_takes.aggregate(pipeline).to_list(length=None)
+        counts: MonthTakes = {}
+        for row in rows:
+            counts.setdefault(row["_id"]["medicationId"], {})[row["_id"]["date"]] = row["count"]
+        return counts
+
+    def invalidate(self, user_id: str, date_str: str) -> None:
+        """Drop the cached month containing `date_str` ("YYYY-MM-DD")."""
+        key = (user_id, date_str[:7])
+        self._generation += 1
+        self.invalidations += 1
+        self._past.pop(key, None)
+        self._current.pop(key, None)
+
+    def clear(self) -> None:
+        self._past.clear()
+        self._current.clear()
+        self._generation += 1
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+            "past_months": len(self._past),
+            "current_months": len(self._current),
+        }
+
+
+monthly_takes = MonthlyTakesCache(
+    max_months=settings.MEDICATION_MONTH_CACHE_MAX_ENTRIES,
+    current_ttl_seconds=settings.MEDICATION_MONTH_CACHE_CURRENT_TTL_SECONDS,
+    enabled=settings.MEDICATION_MONTH_CACHE_ENABLED,
+)
+register_cache_stats("medication_months", monthly_takes.stats)
@@ -9,13 +9,32 @@ never store a hallucinated medication. Source order:
 Validation is done live over HTTP (httpx). It degrades gracefully: on any
 network error the next source is tried, and if all fail the caller gets
 matched=False (the app then asks the patient to repeat / pick a candidate).
+
+Latency:
+- All lookups share one pooled httpx client (keep-alive, no TLS handshake per
+  request). It is closed on app shutdown (`close_http_client`).
+- Results are cached by `_norm(name)` in two tiers: an in-process LRU and the
+  Mongo `drug_catalog_cache` collection (TTL index on `expiresAt`), so other
+  workers and restarts reuse them. Registries answering "no match" are cached
+  too, for a shorter time; lookups where a registry failed are not cached.
+- With DRUG_CATALOG_HEDGE, both registries are queried concurrently and the
+  first non-empty answer wins, instead of waiting for Colombia to miss.
+- When DRUG_INDEX_PATH points to an offline snapshot (drug_index.py), names
+  are resolved locally first, with fuzzy ranking for misspellings; only names
+  the snapshot cannot match confidently go to the cache/network path.
 """
+import asyncio
+import time
 import unicodedata
-from typing import Any, Dict, List
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
+from cachetools import LRUCache
 
 from src._config.logger import get_logger
+from src._config.settings import settings
+from src.core.cache import register_cache_stats
 
 logger = get_logger(__name__)
 
@@ -24,6 +43,8 @@ _CIMA_URL = "https://cima.aemps.es/cima/rest/medicamentos"
 _TIMEOUT = 6.0
 _MAX_CANDIDATES = 5
 
+_http_client: Optional[httpx.AsyncClient] = None
+
 
 def _norm(s: str) -> str:
     """Lowercase, strip accents, collapse whitespace - for de-duplication."""
@@ -31,17 +52,89 @@ def _norm(s: str) -> str:
     return " ".join(s.lower().split())
 
 
+def get_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for registry lookups (created on first use)."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=_TIMEOUT,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            headers={"Accept": "application/json"},
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+class DrugCatalogCache:
+    """In-process LRU of validation results with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self._entries: LRUCache = LRUCache(maxsize=max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.db_hits = 0
+        self.lookups = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry: Optional[Tuple[float, Dict[str, Any]]] = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, result: Dict[str, Any], ttl_seconds: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl_seconds, result)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "db_hits": self.db_hits,
+            "registry_lookups": self.lookups,
+            "entries": len(self._entries),
+        }
+
+
+catalog_cache = DrugCatalogCache(settings.DRUG_CATALOG_CACHE_MAX_ENTRIES)
+register_cache_stats("drug_catalog", catalog_cache.stats)
+
+
 class DrugCatalogService:
     """Validates a drug name against the Colombian CUM registry, then CIMA."""
 
+    def __init__(
+        self,
+        db=None,
+        hedge: Optional[bool] = None,
+        co_url: str = _CO_URL,
+        cima_url: str = _CIMA_URL,
+        index=None,
+    ):
+        self.cache_collection = db.drug_catalog_cache if db is not None else None
+        self.index = index
+        self.hedge = settings.DRUG_CATALOG_HEDGE if hedge is None else hedge
+        self.co_url = co_url
+        self.cima_url = cima_url
+
     async def _http_get_json(self, url: str, params: dict) -> Any:
-        async with httpx.AsyncClient(timeout=_TIMEOUT) as client:
-            resp = await client.get(url, params=params, headers={"Accept": "application/json"})
-            resp.raise_for_status()
-            return resp.json()
+        resp = await get_http_client().get(url, params=params)
+        resp.raise_for_status()
+        return resp.json()
 
     async def _search_colombia(self, name: str) -> List[Dict[str, str]]:
-        rows = await self._http_get_json(_CO_URL, {"$q": name, "$limit": 20})
+        rows = await self._http_get_json(self.co_url, {"$q": name, "$limit": 20})
         out: List[Dict[str, str]] = []
         seen = set()
         for row in rows or []:
@@ -56,7 +149,7 @@ class DrugCatalogService:
         return out
 
     async def _search_spain(self, name: str) -> List[Dict[str, str]]:
-        data = await self._http_get_json(_CIMA_URL, {"nombre": name})
+        data = await self._http_get_json(self.cima_url, {"nombre": name})
         rows = (data.get("resultados") if isinstance(data, dict) else None) or []
         out: List[Dict[str, str]] = []
         seen = set()
@@ -69,6 +162,90 @@ class DrugCatalogService:
                 out.append({"name": prod, "active_ingredient": ai, "source": "es"})
         return out
 
+    async def _search_sequential(self, name: str) -> Tuple[List[Dict[str, str]], bool]:
+        """Colombia, then Spain on a miss. Returns (candidates, any source failed)."""
+        failed = False
+        candidates: List[Dict[str, str]] = []
+        try:
+            candidates = await self._search_colombia(name)
+        except Exception as e:
+            failed = True
+            logger.warning(f"drug catalog: Colombia (CUM) lookup failed for '{name}': {e}")
+
+        if not candidates:
+            try:
+                candidates = await self._search_spain(name)
+            except Exception as e:
+                failed = True
+                logger.warning(f"drug catalog: Spain (CIMA) lookup failed for '{name}': {e}")
+        return candidates, failed
+
+    async def _search_hedged(self, name: str) -> Tuple[List[Dict[str, str]], bool]:
+        """Both registries at once; the first non-empty answer wins."""
+        tasks = [
+            asyncio.ensure_future(self._search_colombia(name)),
+            asyncio.ensure_future(self._search_spain(name)),
+        ]
+        failed = False
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    candidates = await next_done
+                except Exception as e:
+                    failed = True
+                    logger.warning(f"drug catalog: hedged lookup failed for '{name}': {e}")
+                    continue
+                if candidates:
+                    return candidates, failed
+            return [], failed
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _search_local(self, name: str) -> List[Dict[str, Any]]:
+        """Ranked fuzzy candidates from the offline snapshot, if one is configured."""
+        index = self.index
+        if index is None:
+            from src.domains.medications.drug_index import get_drug_index
+            index = get_drug_index(settings.DRUG_INDEX_PATH)
+        if index is None:
+            return []
+        return index.search(name, limit=_MAX_CANDIDATES)
+
+    async def _load_cached(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.cache_collection is None:
+            return None
+        try:
+            doc = await self.cache_collection.find_one(
+                {"_id": key, "expiresAt": {"$gt": datetime.utcnow()}}
+            )
+        except Exception as e:
+            logger.warning(f"drug catalog: cache read failed for '{key}': {e}")
+            return None
+        if not doc:
+            return None
+        remaining = (doc["expiresAt"] - datetime.utcnow()).total_seconds()
+        catalog_cache.put(key, doc["result"], remaining)
+        catalog_cache.db_hits += 1
+        return doc["result"]
+
+    async def _store(self, key: str, result: Dict[str, Any]) -> None:
+        ttl = (
+            settings.DRUG_CATALOG_CACHE_TTL_SECONDS if result["matched"]
+            else settings.DRUG_CATALOG_NEGATIVE_TTL_SECONDS
+        )
+        catalog_cache.put(key, result, ttl)
+        if self.cache_collection is None:
+            return
+        try:
+            await self.cache_collection.replace_one(
+                {"_id": key},
+                {"_id": key, "result": result, "expiresAt": datetime.utcnow() + timedelta(seconds=ttl)},
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning(f"drug catalog: cache write failed for '{key}': {e}")
+
     async def validate(self, name: str) -> Dict[str, Any]:
         """
         Validate a drug name against the registries.
@@ -83,28 +260,39 @@ class DrugCatalogService:
             "candidates": [],
             "source": None,
         }
-        if not name or not name.strip():
+        key = _norm(name)
+        if not key:
             return result
 
-        candidates: List[Dict[str, str]] = []
-        try:
-            candidates = await self._search_colombia(name)
-        except Exception as e:
-            logger.warning(f"drug catalog: Colombia (CUM) lookup failed for '{name}': {e}")
+        local = self._search_local(name)
+        if local and local[0]["score"] >= settings.DRUG_INDEX_MIN_SCORE:
+            return self._matched(result, local)
 
-        if not candidates:
-            try:
-                candidates = await self._search_spain(name)
-            except Exception as e:
-                logger.warning(f"drug catalog: Spain (CIMA) lookup failed for '{name}': {e}")
+        cached = catalog_cache.get(key) or await self._load_cached(key)
+        if cached is not None:
+            return cached
+
+        catalog_cache.lookups += 1
+        search = self._search_hedged if self.hedge else self._search_sequential
+        candidates, failed = await search(name)
 
         if candidates:
-            best = candidates[0]
-            result.update(
-                matched=True,
-                canonical_name=best["name"],
-                active_ingredient=best["active_ingredient"],
-                candidates=candidates[:_MAX_CANDIDATES],
-                source=best["source"],
-            )
+            self._matched(result, candidates)
+        if candidates or not failed:
+            await self._store(key, result)
+        if not candidates and local:
+            # Weak local matches are still offered for the patient to pick
+            result = {**result, "candidates": local}
+        return result
+
+    @staticmethod
+    def _matched(result: Dict[str, Any], candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        best = candidates[0]
+        result.update(
+            matched=True,
+            canonical_name=best["name"],
+            active_ingredient=best["active_ingredient"],
+            candidates=candidates[:_MAX_CANDIDATES],
+            source=best["source"],
+        )
         return result
@@ -0,0 +1,314 @@
+"""
+Offline drug registry index (CUM / CIMA snapshot) with fuzzy matching.
+
+Voice-extracted names are often misspelled ("losartam", "metformin"), and
+every miss of the in-process cache used to be a live registry call. A
+snapshot of the registries is compiled by `scripts/build_drug_index.py` into
+one binary file that is memory-mapped at startup (no parsing, pages are
+loaded on demand and shared between workers):
+
+    header | strings | entries | terms | term postings | trigrams | trigram postings
+
+- entries:  one per product: display name, active ingredient, source.
+- terms:    sorted unique words (>= 3 letters) of the normalized product
+            names and active ingredients, each with its posting list of
+            `entry_id * 2 + in_name`. Prefix lookups are a binary search
+            over this table.
+- trigrams: sorted character trigrams of the padded terms (" losartan "),
+            each with its posting list of term ids.
+
+A query is normalized with `_norm`, split into words and every word is
+scored against the terms: 1.0 for an exact term, 0.9+ for a prefix, and
+the trigram Dice coefficient for fuzzy matches; a match on the active
+ingredient only counts INGREDIENT_WEIGHT of a match on the product name. An
+entry's score is the mean over the query words of its best term score;
+results are ranked by score, then by shorter name (entry ids are assigned
+in name-length order, so only the top results are ever decoded).
+"""
+import heapq
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src._config.logger import get_logger
+from src.domains.medications.drug_catalog import _norm
+
+logger = get_logger(__name__)
+
+MAGIC = b"DRGIDX01"
+_HEADER = struct.Struct("<8s10I")  # magic + (offset, count) for 5 sections
+_ENTRY = struct.Struct("<IHIHB")  # name off/len, ingredient off/len, source
+_TERM = struct.Struct("<IHHII")  # term off/len, trigram count, postings off/len
+_TRIGRAM = struct.Struct("<III")  # packed trigram, postings off/len
+_TERM_NTRI = struct.Struct("<H")  # trigram count alone (offset 6 in a term record)
+
+_SOURCES = ("co", "es")
+_MIN_TERM_LEN = 3
+_MAX_PREFIX_TERMS = 64
+FUZZY_MIN_SCORE = 0.5  # Dice threshold for a fuzzy term match
+INGREDIENT_WEIGHT = 0.95  # Prefer the product the patient named over its generics
+MAX_FUZZY_TERMS = 16  # Closest terms kept per misspelled word
+FUZZY_RELATIVE_FLOOR = 0.85  # ... and only those within 15% of the closest
+
+
+def _terms(text: str) -> List[str]:
+    return [w for w in _norm(text).split() if len(w) >= _MIN_TERM_LEN and w.isalpha()]
+
+
+def _trigrams(term: str) -> List[int]:
+    padded = f" {term} ".encode("ascii", "ignore")
+    return sorted({
+        (padded[i] << 16) | (padded[i + 1] << 8) | padded[i + 2]
+        for i in range(len(padded) - 2)
+    })
+
+
+def build_index(entries: Iterable[Dict[str, str]], path: str) -> int:
+    """
+    Write the index for `entries` ({name, active_ingredient, source}) to
+    `path` (atomically). Duplicate (name, source) pairs are dropped. Returns
+    the number of entries written.
+    """
+    strings = bytearray()
+    string_offsets: Dict[str, Tuple[int, int]] = {}
+
+    def intern(s: str) -> Tuple[int, int]:
+        if s not in string_offsets:
+            data = s.encode("utf-8")[:0xFFFF]
+            string_offsets[s] = (len(strings), len(data))
+            strings.extend(data)
+        return string_offsets[s]
+
+    unique: Dict[Tuple[str, str], Tuple[str, str]] = {}
+    for e in entries:
+        name = (e.get("name") or "").strip()
+        ingredient = (e.get("active_ingredient") or "").strip()
+        source = e.get("source") if e.get("source") in _SOURCES else "co"
+        key = (_norm(name), source)
+        if key[0] and key not in unique:
+            unique[key] = (name, ingredient)
+
+    # Ids follow (name length, name): ranking ties resolve by the smaller id
+    entry_rows = []
+    term_entries: Dict[str, set] = {}
+    ordered = sorted(unique.items(), key=lambda kv: (len(kv[1][0]), kv[0]))
+    for entry_id, ((_, source), (name, ingredient)) in enumerate(ordered):
+        entry_rows.append((*intern(name), *intern(ingredient), _SOURCES.index(source)))
+        name_terms = set(_terms(name))
+        for term in name_terms | set(_terms(ingredient)):
+            term_entries.setdefault(term, set()).add(entry_id * 2 + (term in name_terms))
+
+    terms = sorted(term_entries)
+    term_postings: List[int] = []
+    term_rows = []
+    trigram_terms: Dict[int, List[int]] = {}
+    for term_id, term in enumerate(terms):
+        ids = sorted(term_entries[term])
+        trigrams = _trigrams(term)
+        term_rows.append((*intern(term), len(trigrams), len(term_postings), len(ids)))
+        term_postings.extend(ids)
+        for tri in trigrams:
+            trigram_terms.setdefault(tri, []).append(term_id)  # Ascending term ids
+
+    trigram_postings: List[int] = []
+    trigram_rows = []
+    for tri in sorted(trigram_terms):
+        ids = trigram_terms[tri]
+        trigram_rows.append((tri, len(trigram_postings), len(ids)))
+        trigram_postings.extend(ids)
+
+    sections = [
+        bytes(strings),
+        b"".join(_ENTRY.pack(*r) for r in entry_rows),
+        b"".join(_TERM.pack(*r) for r in term_rows),
+        struct.pack(f"<{len(term_postings)}I", *term_postings),
+        b"".join(_TRIGRAM.pack(*r) for r in trigram_rows),
+        struct.pack(f"<{len(trigram_postings)}I", *trigram_postings),
+    ]
+    counts = [len(strings), len(entry_rows), len(term_rows), len(term_postings),
+              len(trigram_rows), len(trigram_postings)]
+
+    offsets = []
+    position = _HEADER.size
+    for section in sections:
+        position += (-position) % 4  # Keep u32 arrays aligned for memoryview.cast
+        offsets.append(position)
+        position += len(section)
+
+    # strings offset is implied (right after the header); store the other five
+    header_fields = []
+    for i in range(1, 6):
+        header_fields += [offsets[i], counts[i]]
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, *header_fields))
+        for offset, section in zip(offsets, sections):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(section)
+    os.replace(tmp_path, path)
+    return len(entry_rows)
+
+
+class DrugIndex:
+    """Read-only view over a memory-mapped index file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, *fields = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a drug index file")
+        (self._entries_off, self.entry_count, self._terms_off, self.term_count,
+         self._term_post_off, term_post_count, self._tri_off, self.trigram_count,
+         self._tri_post_off, tri_post_count) = fields
+        self._view = view = memoryview(self._mm)
+        self._term_postings = view[self._term_post_off:self._term_post_off + 4 * term_post_count].cast("I")
+        self._tri_postings = view[self._tri_post_off:self._tri_post_off + 4 * tri_post_count].cast("I")
+        self._tri_keys = _KeyView(self._mm, self._tri_off, self.trigram_count)
+
+    def close(self) -> None:
+        self._term_postings.release()
+        self._tri_postings.release()
+        self._view.release()
+        self._mm.close()
+
+    # -- raw records -------------------------------------------------------
+
+    def _string(self, offset: int, length: int) -> str:
+        start = _HEADER.size + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+    def _term(self, term_id: int) -> Tuple[str, int, int, int]:
+        off, length, ntri, post_off, post_len = _TERM.unpack_from(
+            self._mm, self._terms_off + term_id * _TERM.size
+        )
+        start = _HEADER.size + off
+        return self._mm[start:start + length].decode("ascii"), ntri, post_off, post_len
+
+    def entry(self, entry_id: int) -> Dict[str, str]:
+        name_off, name_len, ai_off, ai_len, source = _ENTRY.unpack_from(
+            self._mm, self._entries_off + entry_id * _ENTRY.size
+        )
+        return {
+            "name": self._string(name_off, name_len),
+            "active_ingredient": self._string(ai_off, ai_len),
+            "source": _SOURCES[source],
+        }
+
+    # -- term matching -----------------------------------------------------
+
+    def _prefix_terms(self, word: str) -> Dict[int, float]:
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid)[0] < word:
+                lo = mid + 1
+            else:
+                hi = mid
+        scores: Dict[int, float] = {}
+        for term_id in range(lo, min(lo + _MAX_PREFIX_TERMS, self.term_count)):
+            term = self._term(term_id)[0]
+            if not term.startswith(word):
+                break
+            scores[term_id] = 1.0 if term == word else 0.9 + 0.1 * len(word) / len(term)
+        return scores
+
+    def _trigram_postings(self, tri: int):
+        i = bisect_left(self._tri_keys, tri)
+        if i == self.trigram_count or self._tri_keys[i] != tri:
+            return None
+        _, off, length = _TRIGRAM.unpack_from(self._mm, self._tri_off + i * _TRIGRAM.size)
+        return self._tri_postings[off:off + length]
+
+    def _fuzzy_terms(self, word: str) -> Dict[int, float]:
+        """Best MAX_FUZZY_TERMS terms by trigram Dice coefficient."""
+        query = _trigrams(word)
+        postings = [p for p in map(self._trigram_postings, query) if p is not None]
+        if not postings:
+            return {}
+        # Shared-trigram counts for every term touched; the counting runs in C
+        needed = max(1, int(FUZZY_MIN_SCORE * len(query) / (2 - FUZZY_MIN_SCORE)))
+        shared = Counter(chain.from_iterable(postings))
+
+        scores = []
+        for term_id, count in shared.items():
+            if count < needed:
+                continue
+            ntri = _TERM_NTRI.unpack_from(self._mm, self._terms_off + term_id * _TERM.size + 6)[0]
+            dice = 2 * count / (len(query) + ntri)
+            if dice >= FUZZY_MIN_SCORE:
+                scores.append((dice, term_id))
+        best = heapq.nlargest(MAX_FUZZY_TERMS, scores)
+        # Terms well below the closest one would not make the top results
+        floor = best[0][0] * FUZZY_RELATIVE_FLOOR if best else 0.0
+        return {term_id: dice for dice, term_id in best if dice >= floor}
+
+    # -- search ------------------------------------------------------------
+
+    def search(self, text: str, limit: int = 5) -> List[Dict[str, object]]:
+        """Ranked candidates ({name, active_ingredient, source, score})."""
+        words = _terms(text)
+        if not words:
+            return []
+        totals: Dict[int, float] = {}
+        for word in words:
+            term_scores = self._prefix_terms(word)
+            if 1.0 not in term_scores.values():
+                # No exact term: add fuzzy matches (they cannot beat an exact one)
+                for term_id, score in self._fuzzy_terms(word).items():
+                    term_scores[term_id] = max(score, term_scores.get(term_id, 0.0))
+            best: Dict[int, float] = {}
+            for term_id, score in term_scores.items():
+                _, _, off, length = self._term(term_id)
+                for posting in self._term_postings[off:off + length]:
+                    entry_id = posting >> 1
+                    weighted = score if posting & 1 else score * INGREDIENT_WEIGHT
+                    if weighted > best.get(entry_id, 0.0):
+                        best[entry_id] = weighted
+            for entry_id, score in best.items():
+                totals[entry_id] = totals.get(entry_id, 0.0) + score
+
+        ranked = []
+        for entry_id, total in heapq.nsmallest(limit, totals.items(), key=lambda kv: (-kv[1], kv[0])):
+            entry = self.entry(entry_id)
+            entry["score"] = round(total / len(words), 3)
+            ranked.append(entry)
+        return ranked
+
+
+class _KeyView:
+    """Sequence of the packed trigram keys, for bisect over the mmap."""
+
+    def __init__(self, mm, offset: int, count: int):
+        self._mm = mm
+        self._offset = offset
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> int:
+        return struct.unpack_from("<I", self._mm, self._offset + i * _TRIGRAM.size)[0]
+
+
+_index: Optional[DrugIndex] = None
+_index_loaded = False
+
+
+def get_drug_index(path: Optional[str]) -> Optional[DrugIndex]:
+    """The process-wide index for `path` (opened once), or None if unavailable."""
+    global _index, _index_loaded
+    if not _index_loaded:
+        _index_loaded = True
+        if path and os.path.exists(path):
+            try:
+                _index = DrugIndex(path)
+                logger.info(f"Loaded offline drug index {path}: {_index.entry_count} products")
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning(f"Could not load offline drug index {path}: {e}")
+    return _index
@@ -1,7 +1,7 @@
 """
 Modelos de datos para medicamentos en MongoDB
 """
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, List
 
 class MedicationDB:
@@ -25,6 +25,7 @@ class MedicationDB:
         antiguos.
         """
         primary_time = times[0] if times else ""
+        now = datetime.utcnow()
         return {
             "_id": medication_id,
             "userId": user_id,
@@ -35,8 +36,9 @@ class MedicationDB:
             "instructions": instructions,
             "medicationType": medication_type,
             "isActive": is_active,
-            "createdAt": datetime.utcnow(),
-            "updatedAt": datetime.utcnow()
+            "nextDueAt": MedicationDB.next_due_at(times, now) if is_active else None,
+            "createdAt": now,
+            "updatedAt": now
         }
 
     @staticmethod
@@ -49,6 +51,32 @@ class MedicationDB:
         legacy = doc.get("time")
         return [legacy] if legacy else []
 
+    @staticmethod
+    def next_due_at(times: List[str], after: datetime) -> Optional[datetime]:
+        """Próximo horario programado (UTC) estrictamente posterior a `after`.
+
+        Se guarda como `nextDueAt` y lo consume el barrido de dosis olvidadas
+        (src/domains/medications/sweeper.py). None si no hay horarios válidos.
+        """
+        slots = []
+        for t in times or []:
+            try:
+                hh, mm = (int(part) for part in t.split(":"))
+            except (ValueError, AttributeError):
+                continue
+            if 0 <= hh < 24 and 0 <= mm < 60:
+                slots.append((hh, mm))
+        if not slots:
+            return None
+
+        for day_offset in (0, 1):
+            day = (after + timedelta(days=day_offset)).date()
+            for hh, mm in sorted(slots):
+                candidate = datetime(day.year, day.month, day.day, hh, mm)
+                if candidate > after:
+                    return candidate
+        return None
+
     @staticmethod
     def to_response(doc: dict) -> dict:
         """Convierte documento MongoDB a formato de respuesta"""
@@ -1,7 +1,7 @@
 """
 Rutas para gestión de medicamentos y recordatorios
 """
-from fastapi import APIRouter, HTTPException, Depends, Query, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request
 from typing import Optional, List
 from datetime import datetime
 
@@ -24,8 +24,10 @@ from src.domains.medications.schemas import (
 )
 from src.domains.medications.services import MedicationService
 from src.domains.medications.drug_catalog import DrugCatalogService
+from src.domains.health.audio_upload import AUDIO_UPLOAD_OPENAPI, read_audio_upload
 from src.domains.health.voice_parsing import get_voice_parsing_service
 from src.core.database import get_database
+from src.core.exceptions import ServiceBusyException
 from src.domains.auth.routes import verify_token
 from src._config.logger import get_logger
 
@@ -303,6 +305,12 @@ async def take_medication(
 @router.post("/take-batch", response_model=TakeMedicationBatchResponse)
 async def take_medication_batch(
     batch: TakeMedicationBatch,
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias="Idempotency-Key",
+        max_length=128,
+        description="Clave única de la confirmación. Un reintento con la misma clave no duplica tomas.",
+    ),
     user_id: str = Depends(verify_token),
     db=Depends(get_database)
 ):
@@ -313,16 +321,23 @@ async def take_medication_batch(
     horario se marcan como tomadas. Dispara un único evento batched al
     cuidador en lugar de N notificaciones individuales.
 
+    Valida todos los medicamentos con una consulta, inserta todas las tomas
+    con un insert_many y, con el header Idempotency-Key, un reintento devuelve
+    las tomas ya registradas sin duplicarlas ni volver a notificar.
+
     SOLO el dueño de los medicamentos puede registrar tomas.
     """
     try:
         service = MedicationService(db)
 
-        # Validate ownership of every medication first; fail fast if any
-        # belongs to another user.
-        med_docs: dict = {}
+        # Validate ownership of every medication first (one $in query); fail
+        # fast if any is missing or belongs to another user.
+        med_docs = await service.get_medications_raw_many(
+            [item.medication_id for item in batch.medications],
+            {"userId": 1, "name": 1, "dosage": 1},
+        )
         for item in batch.medications:
-            doc = await service.get_medication_raw(item.medication_id)
+            doc = med_docs.get(item.medication_id)
             if not doc:
                 raise HTTPException(
                     status_code=404,
@@ -333,30 +348,30 @@ async def take_medication_batch(
                     status_code=403,
                     detail="Solo el paciente puede marcar sus medicamentos como tomados",
                 )
-            med_docs[item.medication_id] = doc
 
-        # Record every take.
-        recorded_takes: List[dict] = []
-        recorded_meds: List[dict] = []
-        for item in batch.medications:
-            doc = med_docs[item.medication_id]
-            scheduled = item.scheduled_time or batch.scheduled_time
-            take = await service.take_medication(
-                medication_id=item.medication_id,
-                user_id=user_id,
-                taken_at=batch.taken_at,
-                notes=item.notes,
-                scheduled_time=scheduled,
-            )
-            if take:
-                recorded_takes.append(take)
-                recorded_meds.append({
+        recorded_takes, new_takes = await service.take_medications_batch(
+            user_id=user_id,
+            items=[
+                {
                     "medication_id": item.medication_id,
-                    "name": doc.get("name", ""),
-                    "dosage": doc.get("dosage", ""),
-                })
+                    "scheduled_time": item.scheduled_time or batch.scheduled_time,
+                    "notes": item.notes,
+                }
+                for item in batch.medications
+            ],
+            taken_at=batch.taken_at,
+            idempotency_key=idempotency_key,
+        )
+        recorded_meds = [
+            {
+                "medication_id": take["medicationId"],
+                "name": med_docs[take["medicationId"]].get("name", ""),
+                "dosage": med_docs[take["medicationId"]].get("dosage", ""),
+            }
+            for take in new_takes
+        ]
 
-        # Fire ONE batched event for the caregiver.
+        # Fire ONE batched event for the caregiver (not again on a retry).
         if recorded_meds:
             try:
                 from src.domains.events.services import BiometricEventService
@@ -456,20 +471,12 @@ async def get_today_status(
                     detail="No tienes permiso para ver los medicamentos de este paciente"
                 )
         
-        result = await service.get_medications_with_today_status(
+        # Read-only: missed doses are detected by the background sweeper
+        # (src/domains/medications/sweeper.py).
+        return await service.get_medications_with_today_status(
             user_id=target_user_id,
             target_date=date
         )
-
-        # Trigger missed-dose notifications for the patient's caregiver.
-        # Runs on every fetch (patient or caregiver) so a single missed alert
-        # per (medication, day) is sent reliably without a separate scheduler.
-        try:
-            await service.check_and_notify_missed_doses(target_user_id, result)
-        except Exception as e:
-            logger.warning(f"Failed missed-dose check: {e}")
-
-        return result
     except HTTPException:
         raise
     except Exception as e:
@@ -557,9 +564,13 @@ async def get_calendar_events(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/parse-take-voice", response_model=VoiceTakeIntentResponse)
+@router.post(
+    "/parse-take-voice",
+    response_model=VoiceTakeIntentResponse,
+    openapi_extra=AUDIO_UPLOAD_OPENAPI,
+)
 async def parse_take_voice(
-    audio: UploadFile = File(...),
+    request: Request,
     user_id: str = Depends(verify_token),
     db=Depends(get_database),
 ):
@@ -573,17 +584,14 @@ async def parse_take_voice(
     sobre los items que el paciente confirme.
     """
     try:
-        audio_content = await audio.read()
-        if len(audio_content) > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(status_code=413, detail="Audio demasiado grande (máx 10MB)")
-        if len(audio_content) < 1000:
-            raise HTTPException(status_code=400, detail="Audio vacío o demasiado corto")
+        upload = await read_audio_upload(request)
 
         voice_service = get_voice_parsing_service()
         parsed = await voice_service.parse_take_audio(
-            audio_content,
-            audio.filename or "take.m4a",
-            content_type=audio.content_type,
+            upload.data,
+            upload.filename,
+            content_type=upload.content_type,
+            db=db,
         )
 
         medications: List[VoiceTakeMedicationItem] = []
@@ -614,17 +622,22 @@ async def parse_take_voice(
             confidence=parsed.get("confidence", "low"),
             medications=medications,
         )
-    except HTTPException:
+    except (HTTPException, ServiceBusyException):
         raise
     except Exception as e:
         logger.error(f"Error parsing take voice: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="No se pudo procesar el audio. Intenta de nuevo.")
 
 
-@router.post("/parse-voice", response_model=VoiceMedicationParseResponse)
+@router.post(
+    "/parse-voice",
+    response_model=VoiceMedicationParseResponse,
+    openapi_extra=AUDIO_UPLOAD_OPENAPI,
+)
 async def parse_medication_voice(
-    audio: UploadFile = File(...),
+    request: Request,
     user_id: str = Depends(verify_token),
+    db=Depends(get_database),
 ):
     """
     Interpreta un audio para REGISTRAR un medicamento nuevo por voz. Extrae
@@ -634,17 +647,14 @@ async def parse_medication_voice(
     hace luego con POST /medications usando los datos confirmados.
     """
     try:
-        audio_content = await audio.read()
-        if len(audio_content) > 10 * 1024 * 1024:
-            raise HTTPException(status_code=413, detail="Audio demasiado grande (máx 10MB)")
-        if len(audio_content) < 1000:
-            raise HTTPException(status_code=400, detail="Audio vacío o demasiado corto")
+        upload = await read_audio_upload(request)
 
         voice_service = get_voice_parsing_service()
         parsed = await voice_service.parse_medication_audio(
-            audio_content,
-            audio.filename or "med.m4a",
-            content_type=audio.content_type,
+            upload.data,
+            upload.filename,
+            content_type=upload.content_type,
+            db=db,
         )
 
         validation = {
@@ -652,7 +662,7 @@ async def parse_medication_voice(
             "candidates": [], "source": None,
         }
         if parsed.get("name"):
-            validation = await DrugCatalogService().validate(parsed["name"])
+            validation = await DrugCatalogService(db).validate(parsed["name"])
 
         candidates = [
             DrugCandidate(
@@ -682,7 +692,7 @@ async def parse_medication_voice(
             source=validation.get("source"),
             candidates=candidates,
         )
-    except HTTPException:
+    except (HTTPException, ServiceBusyException):
         raise
     except Exception as e:
         logger.error(f"Error parsing medication voice: {e}", exc_info=True)
@@ -0,0 +1,298 @@
+"""
+Server-side dose reminder scheduler.
+
+Medication schedules repeat every day at fixed HH:MM (UTC) slots, so the
+scheduler keeps a single-level timer wheel with one bucket per minute of the
+day (1440 buckets) holding the ids of the medications due at that minute.
+A background loop wakes up at every minute boundary and:
+
+1. Sends a MEDICATION reminder to each patient with a dose due at that
+   minute: one notification document per patient (insert_many) plus a push
+   to the patient's device (DOSE_SCHEDULER_PUSH_CONCURRENCY at a time).
+2. Triggers the missed-dose sweeper (src/domains/medications/sweeper.py)
+   when the bucket `MISSED_DOSE_GRACE_MINUTES` earlier had doses, so missed
+   doses are reported at the exact minute their grace period ends.
+
+Keeping schedules current:
+- MedicationService calls `schedule()` / `unschedule()` on create, update and
+  delete, so changes made through this worker apply immediately.
+- Every tick the leader also picks up medications whose `updatedAt` moved
+  (changes made through other workers).
+
+Only one worker fires: the loop holds the "dose_scheduler" Mongo lease
+(src/core/leases.py). The lease is renewed after every fired minute with
+that minute as `firedThrough`, so a new leader resumes after it instead of
+re-sending reminders, and a worker whose renewal fails stops firing. The wheel is only loaded while this worker is the leader.
+
+Memory: a slot costs one list entry (8 bytes) in its bucket plus one entry
+in the medication's tuple of minutes; the minute ints are shared. Removed
+or moved slots are dropped lazily when their bucket fires. See
+`python -m scripts.bench_dose_scheduler` for the 1M-slot footprint.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from src._config.logger import get_logger
+from src._config.settings import settings
+from src.core.leases import MongoLease
+from src.core.user_loader import UserLoader
+from src.domains.medications.models import MedicationDB
+from src.domains.medications.sweeper import MissedDoseSweeper
+from src.domains.notifications.models import NotificationDB, NotificationType, NotificationPriority
+from src.utils.fcm_client import is_fcm_available, send_push_notification
+
+logger = get_logger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+LEASE_NAME = "dose_scheduler"
+
+# Shared int objects for every minute of the day (a slot stores a reference)
+_MINUTES = tuple(range(MINUTES_PER_DAY))
+
+
+def slot_minutes(times: Iterable[str]) -> Tuple[int, ...]:
+    """Minutes of the day (UTC) of valid "HH:MM" entries, sorted and unique."""
+    minutes = set()
+    for t in times or []:
+        try:
+            hh, mm = (int(part) for part in t.split(":"))
+        except (ValueError, AttributeError):
+            continue
+        if 0 <= hh < 24 and 0 <= mm < 60:
+            minutes.add(_MINUTES[hh * 60 + mm])
+    return tuple(sorted(minutes))
+
+
+def _hhmm(minute_of_day: int) -> str:
+    return f"{minute_of_day // 60:02d}:{minute_of_day % 60:02d}"
+
+
+class DoseScheduler:
+    """Timer wheel of daily dose slots for all patients."""
+
+    def __init__(self):
+        self.db = None
+        self.lease: Optional[MongoLease] = None
+        self.sweeper: Optional[MissedDoseSweeper] = None
+        self.is_leader = False
+        self._wheel: List[List[str]] = [[] for _ in range(MINUTES_PER_DAY)]
+        self._slots: Dict[str, Tuple[int, ...]] = {}
+        self._next_minute: Optional[int] = None  # Next epoch minute to fire
+        self._synced_at: Optional[datetime] = None
+        self.reminders_sent = 0
+
+    # =========================================
+    # Wheel maintenance
+    # =========================================
+
+    def schedule(self, medication_id: str, times: Iterable[str]) -> None:
+        """Set (or replace) the daily slots of a medication."""
+        if not self.is_leader:
+            return
+        minutes = slot_minutes(times)
+        if not minutes:
+            self._slots.pop(medication_id, None)
+            return
+        previous = self._slots.get(medication_id, ())
+        self._slots[medication_id] = minutes
+        for minute in minutes:
+            if minute not in previous:
+                self._wheel[minute].append(medication_id)
+
+    def unschedule(self, medication_id: str) -> None:
+        """Drop every slot of a medication (bucket entries go away lazily)."""
+        self._slots.pop(medication_id, None)
+
+    def due_at(self, minute_of_day: int) -> List[str]:
+        """Medication ids due at a minute of the day; compacts the bucket."""
+        bucket = self._wheel[minute_of_day]
+        live = [
+            med_id for med_id in dict.fromkeys(bucket)
+            if minute_of_day in self._slots.get(med_id, ())
+        ]
+        self._wheel[minute_of_day] = live
+        return live
+
+    def clear(self) -> None:
+        self._wheel = [[] for _ in range(MINUTES_PER_DAY)]
+        self._slots = {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "leader": self.is_leader,
+            "medications": len(self._slots),
+            "slots": sum(len(m) for m in self._slots.values()),
+            "reminders_sent": self.reminders_sent,
+        }
+
+    # =========================================
+    # Loading
+    # =========================================
+
+    async def _load_all(self) -> None:
+        self.clear()
+        self._synced_at = datetime.utcnow()
+        cursor = self.db.medications.find({"isActive": True}, {"time": 1, "times": 1})
+        async for doc in cursor:
+            self.schedule(doc["_id"], MedicationDB.normalize_times(doc))
+        logger.info(
+            f"Dose scheduler loaded {len(self._slots)} medication(s), "
+            f"{self.stats()['slots']} slot(s)"
+        )
+
+    async def _sync_changes(self) -> None:
+        """Apply schedule changes made through other workers."""
+        since = self._synced_at - timedelta(seconds=5)  # Overlap: re-applying is idempotent
+        self._synced_at = datetime.utcnow()
+        cursor = self.db.medications.find(
+            {"updatedAt": {"$gt": since}},
+            {"time": 1, "times": 1, "isActive": 1},
+        )
+        async for doc in cursor:
+            if doc.get("isActive", True):
+                self.schedule(doc["_id"], MedicationDB.normalize_times(doc))
+            else:
+                self.unschedule(doc["_id"])
+
+    # =========================================
+    # Firing
+    # =========================================
+
+    async def _send_reminders(self, minute_of_day: int, medication_ids: List[str]) -> None:
+        """One notification + push per patient with doses due at this minute."""
+        cursor = self.db.medications.find(
+            {"_id": {"$in": medication_ids}, "isActive": True},
+            {"userId": 1, "name": 1, "dosage": 1},
+        )
+        by_patient: Dict[str, List[Dict[str, Any]]] = {}
+        for doc in await cursor.to_list(length=len(medication_ids)):
+            by_patient.setdefault(doc["userId"], []).append(doc)
+        if not by_patient:
+            return
+
+        scheduled = _hhmm(minute_of_day)
+        title = "💊 Hora de tu medicamento"
+        notifications = []
+        messages: Dict[str, str] = {}
+        for patient_id, meds in by_patient.items():
+            names = ", ".join(
+                f"{m.get('name', '')} ({m['dosage']})" if m.get("dosage") else m.get("name", "")
+                for m in meds
+            )
+            messages[patient_id] = f"Es hora de tomar {names}"
+            notifications.append(NotificationDB.create_document(
+                notification_id=str(uuid4()),
+                user_id=patient_id,
+                notification_type=NotificationType.MEDICATION,
+                title=title,
+                message=messages[patient_id],
+                priority=NotificationPriority.HIGH,
+                metadata={
+                    "scheduled_time": scheduled,
+                    "medication_ids": [m["_id"] for m in meds],
+                },
+            ))
+        await self.db.notifications.insert_many(notifications, ordered=False)
+        self.reminders_sent += len(notifications)
+
+        if not is_fcm_available():
+            return
+        patient_ids = list(by_patient)
+        patients = await UserLoader(self.db).load_many(patient_ids)
+        limiter = asyncio.Semaphore(settings.DOSE_SCHEDULER_PUSH_CONCURRENCY)
+
+        async def push(patient_id: str, token: str) -> None:
+            async with limiter:
+                await send_push_notification(
+                    token, title, messages[patient_id],
+                    data={"type": "medication_reminder", "scheduled_time": scheduled},
+                )
+
+        await asyncio.gather(*[
+            push(patient_id, patient["fcmToken"])
+            for patient_id, patient in zip(patient_ids, patients)
+            if patient and patient.get("fcmToken")
+        ])
+
+    async def fire_minute(self, epoch_minute: int) -> bool:
+        """Send the reminders of one minute. Returns True if a missed-dose check is due."""
+        medication_ids = self.due_at(epoch_minute % MINUTES_PER_DAY)
+        if medication_ids:
+            try:
+                await self._send_reminders(epoch_minute % MINUTES_PER_DAY, medication_ids)
+            except Exception as e:
+                logger.warning(f"Failed to send dose reminders for {_hhmm(epoch_minute % MINUTES_PER_DAY)}: {e}")
+        grace_minute = (epoch_minute - settings.MISSED_DOSE_GRACE_MINUTES) % MINUTES_PER_DAY
+        return bool(self.due_at(grace_minute))
+
+    def _step_down(self) -> None:
+        logger.info("Dose scheduler lost its lease")
+        self.is_leader = False
+        self.clear()
+
+    async def tick(self, now_ts: Optional[float] = None) -> None:
+        """Renew/acquire leadership and fire every minute up to now."""
+        now_minute = int((now_ts if now_ts is not None else time.time()) // 60)
+
+        if not self.is_leader:
+            lease = await self.lease.acquire()
+            if lease is None:
+                return
+            self.is_leader = True
+            try:
+                await self._load_all()
+            except Exception:
+                self.is_leader = False
+                self.clear()
+                raise
+            fired_through = lease.get("firedThrough")
+            start = fired_through + 1 if fired_through is not None else now_minute
+            self._next_minute = max(start, now_minute - settings.DOSE_SCHEDULER_MAX_CATCHUP_MINUTES)
+            check_missed = True  # Catch up on anything missed while there was no leader
+        else:
+            if not await self.lease.renew():
+                self._step_down()
+                return
+            await self._sync_changes()
+            check_missed = False
+
+        while self._next_minute <= now_minute:
+            fired = self._next_minute
+            check_missed = await self.fire_minute(fired) or check_missed
+            self._next_minute += 1
+            # Record progress per minute: a long catch-up must neither outlive
+            # the lease nor let the next leader re-send what was already sent
+            if not await self.lease.renew(firedThrough=fired):
+                self._step_down()
+                return
+
+        if check_missed:
+            await self.sweeper.sweep_all(now=datetime.utcfromtimestamp(now_minute * 60))
+            if not await self.lease.renew(firedThrough=self._next_minute - 1):
+                self._step_down()
+
+    async def run(self, db) -> None:
+        """Tick at every minute boundary until cancelled."""
+        self.db = db
+        self.lease = MongoLease(db, LEASE_NAME, settings.DOSE_SCHEDULER_LEASE_SECONDS)
+        self.sweeper = MissedDoseSweeper(db)
+        try:
+            while True:
+                try:
+                    await self.tick()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Dose scheduler tick failed: {e}")
+                await asyncio.sleep(60 - time.time() % 60 + 0.5)
+        finally:
+            if self.is_leader:
+                self.is_leader = False
+                self.clear()
+                await self.lease.release()
+
+
+dose_scheduler = DoseScheduler()
@@ -2,16 +2,23 @@
 Servicios para gestión de medicamentos
 """
 from datetime import datetime, date
-from typing import Optional, List
-from uuid import uuid4
+from typing import Dict, Optional, List, Tuple
+from uuid import NAMESPACE_URL, uuid4, uuid5
 import calendar
 
+from pymongo.errors import BulkWriteError
+
 from src.domains.medications.models import MedicationDB, MedicationTakeDB
 from src._config.logger import get_logger
+from src.core.cache import invalidate_patient
+from src.core.pairing_access import pairing_access
+from src.domains.medications.adherence import monthly_takes
+from src.domains.medications.scheduler import dose_scheduler
 
 logger = get_logger(__name__)
 
-PAIRINGS_COLLECTION = "pairings"
+# Namespace for take ids derived from an idempotency key
+_TAKE_ID_NAMESPACE = uuid5(NAMESPACE_URL, "hacking-health/medication-takes")
 
 
 class MedicationService:
@@ -39,14 +46,8 @@ class MedicationService:
         if requester_id == patient_id:
             return True
         
-        # Caso 2: Verificar si es un cuidador activo
-        pairing = await db[PAIRINGS_COLLECTION].find_one({
-            "caregiverId": requester_id,
-            "patientId": patient_id,
-            "status": "active"
-        })
-        
-        if pairing:
+        # Caso 2: Verificar si es un cuidador activo (índice en memoria de emparejamientos)
+        if patient_id in await pairing_access.patients_of(db, requester_id):
             logger.debug(
                 f"Caregiver {requester_id} has active pairing with patient {patient_id}"
             )
@@ -87,6 +88,7 @@ class MedicationService:
         )
 
         await self.medications.insert_one(document)
+        dose_scheduler.schedule(medication_id, times)
         logger.info(
             f"Created medication {medication_id} for user {user_id} "
             f"with {len(times)} reminder time(s)"
@@ -158,6 +160,20 @@ class MedicationService:
         )
         
         if result:
+            schedule_changed = {"times", "time", "is_active"} & set(updates)
+            if schedule_changed:
+                # Re-arm the missed-dose sweeper and the reminder wheel
+                is_active = result.get("isActive", True)
+                next_due = MedicationDB.next_due_at(
+                    MedicationDB.normalize_times(result), datetime.utcnow()
+                ) if is_active else None
+                await self.medications.update_one(
+                    {"_id": medication_id}, {"$set": {"nextDueAt": next_due}}
+                )
+                if is_active:
+                    dose_scheduler.schedule(medication_id, MedicationDB.normalize_times(result))
+                else:
+                    dose_scheduler.unschedule(medication_id)
             logger.info(f"Updated medication {medication_id}")
             return MedicationDB.to_response(result)
         return None
@@ -169,12 +185,14 @@ class MedicationService:
             {
                 "$set": {
                     "isActive": False,
+                    "nextDueAt": None,
                     "updatedAt": datetime.utcnow()
                 }
             }
         )
         
         if result.modified_count > 0:
+            dose_scheduler.unschedule(medication_id)
             logger.info(f"Soft deleted medication {medication_id}")
             return True
         return False
@@ -217,6 +235,8 @@ class MedicationService:
         )
 
         await self.medication_takes.insert_one(document)
+        invalidate_patient(user_id)
+        monthly_takes.invalidate(user_id, date_str)
         logger.info(
             f"Recorded take {take_id} for medication {medication_id}"
             + (f" (slot {scheduled_time})" if scheduled_time else "")
@@ -224,6 +244,92 @@ class MedicationService:
 
         return MedicationTakeDB.to_response(document)
     
+    async def get_medications_raw_many(
+        self,
+        medication_ids: List[str],
+        projection: Optional[dict] = None,
+    ) -> Dict[str, dict]:
+        """Documentos raw de varios medicamentos con una sola consulta $in."""
+        ids = list(dict.fromkeys(medication_ids))
+        cursor = self.medications.find({"_id": {"$in": ids}}, projection)
+        return {doc["_id"]: doc for doc in await cursor.to_list(length=len(ids))}
+
+    async def take_medications_batch(
+        self,
+        user_id: str,
+        items: List[dict],
+        taken_at: Optional[datetime] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> Tuple[List[dict], List[dict]]:
+        """Registrar varias tomas con un único insert_many.
+
+        ``items``: [{medication_id, scheduled_time, notes}], ya validados por
+        el llamador (pertenecen a ``user_id``).
+
+        Con ``idempotency_key`` los ids de las tomas se derivan de (usuario,
+        clave, medicamento, horario), así que un reintento de la misma
+        confirmación choca con las tomas ya guardadas en vez de duplicarlas.
+
+        Devuelve (todas las tomas del batch, solo las registradas ahora).
+        """
+        actual_taken_at = taken_at or datetime.utcnow()
+        date_str = actual_taken_at.strftime("%Y-%m-%d")
+
+        documents = []
+        occurrences: Dict[Tuple[str, str], int] = {}
+        for item in items:
+            medication_id = item["medication_id"]
+            scheduled = item.get("scheduled_time")
+            if idempotency_key:
+                slot = (medication_id, scheduled or "")
+                occurrences[slot] = occurrences.get(slot, 0) + 1
+                take_id = str(uuid5(
+                    _TAKE_ID_NAMESPACE,
+                    f"{user_id}|{idempotency_key}|{medication_id}|{slot[1]}|{occurrences[slot]}",
+                ))
+            else:
+                take_id = str(uuid4())
+            documents.append(MedicationTakeDB.create_document(
+                take_id=take_id,
+                medication_id=medication_id,
+                user_id=user_id,
+                taken_at=actual_taken_at,
+                date=date_str,
+                notes=item.get("notes"),
+                scheduled_time=scheduled,
+            ))
+
+        duplicate_ids = set()
+        try:
+            await self.medication_takes.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(err.get("code") != 11000 for err in errors):
+                raise
+            duplicate_ids = {documents[err["index"]]["_id"] for err in errors}
+
+        new_docs = [d for d in documents if d["_id"] not in duplicate_ids]
+        replayed: Dict[str, dict] = {}
+        if duplicate_ids:
+            # Retry of an already recorded confirmation: return what was stored
+            cursor = self.medication_takes.find({"_id": {"$in": list(duplicate_ids)}})
+            replayed = {d["_id"]: d for d in await cursor.to_list(length=len(duplicate_ids))}
+            logger.info(
+                f"Take batch for user {user_id}: {len(duplicate_ids)} take(s) already "
+                f"recorded under idempotency key"
+            )
+        if new_docs:
+            invalidate_patient(user_id)
+            monthly_takes.invalidate(user_id, date_str)
+            logger.info(f"Recorded {len(new_docs)} take(s) in batch for user {user_id}")
+
+        all_takes = [
+            MedicationTakeDB.to_response(replayed.get(d["_id"], d))
+            for d in documents
+            if d["_id"] not in duplicate_ids or d["_id"] in replayed
+        ]
+        return all_takes, [MedicationTakeDB.to_response(d) for d in new_docs]
+
     async def untake_medication(
         self,
         medication_id: str,
@@ -249,6 +355,9 @@ class MedicationService:
             query,
             sort=[("takenAt", -1)],  # Delete the most recent matching one
         )
+        if result is not None:
+            invalidate_patient(user_id)
+            monthly_takes.invalidate(user_id, date_str)
 
         return result is not None
     
@@ -269,117 +378,6 @@ class MedicationService:
         
         return takes
 
-    async def check_and_notify_missed_doses(
-        self,
-        patient_id: str,
-        medications_with_takes: List[dict],
-        grace_minutes: int = 30,
-    ) -> None:
-        """
-        Look at today's medications and, for each scheduled slot whose moment
-        + grace period has passed without enough takes recorded, register a
-        SINGLE batched MEDICATION_MISSED_BATCH biometric event grouping all
-        the medications pending for that slot. The caregiver receives one
-        push per (slot, day), not one per pending pill.
-
-        Dedup is enforced via the per-medication `missedAlertsByTime` map
-        with key `YYYY-MM-DD:HH:MM` so callers can invoke this method on
-        every list refresh without spamming.
-        """
-        from src.domains.events.services import BiometricEventService
-        from src.domains.events.schemas import BiometricEventType
-
-        if not medications_with_takes:
-            return
-
-        now = datetime.utcnow()
-        today_str = now.strftime("%Y-%m-%d")
-        event_service = BiometricEventService(self.db)
-
-        # slot -> list of {med_id, name, dosage}
-        pending_by_slot: dict = {}
-
-        for item in medications_with_takes:
-            med = item.get("medication") or {}
-            takes = item.get("takes") or []
-            takes_count = len(takes)
-            scheduled_times = med.get("times") or (
-                [med.get("time")] if med.get("time") else []
-            )
-            scheduled_times = [t for t in scheduled_times if t and ":" in t]
-            if not scheduled_times:
-                continue
-
-            med_id = med.get("id") or med.get("_id")
-            if not med_id:
-                continue
-
-            doc = await self.medications.find_one({"_id": med_id})
-            if not doc:
-                continue
-            missed_map = doc.get("missedAlertsByTime") or {}
-
-            for idx, scheduled in enumerate(sorted(scheduled_times)):
-                # If patient already has enough takes to cover slots up to
-                # and including this one, skip.
-                if takes_count > idx:
-                    continue
-                try:
-                    hh, mm = scheduled.split(":")
-                    scheduled_dt = now.replace(
-                        hour=int(hh), minute=int(mm), second=0, microsecond=0
-                    )
-                except Exception:
-                    continue
-
-                overdue_minutes = (now - scheduled_dt).total_seconds() / 60
-                if overdue_minutes < grace_minutes:
-                    continue
-
-                slot_key = f"{today_str}:{scheduled}"
-                if missed_map.get(slot_key):
-                    continue
-
-                pending_by_slot.setdefault(scheduled, []).append({
-                    "med_id": med_id,
-                    "name": doc.get("name", ""),
-                    "dosage": doc.get("dosage", ""),
-                    "slot_key": slot_key,
-                })
-
-        # Fire one batch event per slot that has any pending medications.
-        for scheduled, entries in pending_by_slot.items():
-            if not entries:
-                continue
-            try:
-                await event_service.register_biometric_event(
-                    patient_id=patient_id,
-                    event_type=BiometricEventType.MEDICATION_MISSED_BATCH.value,
-                    payload={
-                        "scheduled_time": scheduled,
-                        "count": len(entries),
-                        "medications": [
-                            {
-                                "medication_id": e["med_id"],
-                                "name": e["name"],
-                                "dosage": e["dosage"],
-                            }
-                            for e in entries
-                        ],
-                    },
-                )
-                # Mark dedup on every medication in this batch.
-                for e in entries:
-                    await self.medications.update_one(
-                        {"_id": e["med_id"]},
-                        {"$set": {f"missedAlertsByTime.{e['slot_key']}": True}},
-                    )
-            except Exception as e:
-                logger.warning(
-                    f"Failed to register missed-dose batch event at "
-                    f"{scheduled} for patient {patient_id}: {e}"
-                )
-    
     async def get_medications_with_today_status(
         self,
         user_id: str,
@@ -470,42 +468,20 @@ class MedicationService:
         month: int
     ) -> dict:
         """Obtener reporte mensual de adherencia a medicamentos"""
-        # Calcular rango de fechas
         _, days_in_month = calendar.monthrange(year, month)
-        start_date = f"{year:04d}-{month:02d}-01"
-        end_date = f"{year:04d}-{month:02d}-{days_in_month:02d}"
         
         # Obtener medicamentos activos
         medications = await self.get_medications(user_id, include_inactive=True)
         
-        # Obtener todas las tomas del mes
-        cursor = self.medication_takes.find({
-            "userId": user_id,
-            "date": {"$gte": start_date, "$lte": end_date}
-        })
-        
-        takes = []
-        async for doc in cursor:
-            takes.append(MedicationTakeDB.to_response(doc))
-        
-        # Agrupar tomas por medicamento y fecha
-        takes_by_med = {}
-        for take in takes:
-            med_id = take["medicationId"]
-            if med_id not in takes_by_med:
-                takes_by_med[med_id] = {}
-            
-            date_str = take["date"]
-            if date_str not in takes_by_med[med_id]:
-                takes_by_med[med_id][date_str] = 0
-            takes_by_med[med_id][date_str] += 1
+        # Tomas del mes agrupadas por medicamento y fecha (una agregación, cacheada)
+        takes_by_med = await monthly_takes.get(self.db, user_id, year, month)
         
         # Calcular estadísticas por medicamento
         medication_stats = []
         total_adherence = 0
         
         for med in medications:
-            daily_takes = takes_by_med.get(med["id"], {})
+            daily_takes = dict(takes_by_med.get(med["id"], {}))
             days_taken = len(daily_takes)
             adherence = (days_taken / days_in_month) * 100 if days_in_month > 0 else 0
             total_adherence += adherence
@@ -549,27 +525,18 @@ class MedicationService:
         medications = await self.get_medications(user_id)
         total_medications = len(medications)
         
-        # Get all takes for the month
-        start_date = f"{year:04d}-{month:02d}-01"
-        end_date = f"{year:04d}-{month:02d}-{days_in_month:02d}"
-        
-        cursor = self.medication_takes.find({
-            "userId": user_id,
-            "date": {"$gte": start_date, "$lte": end_date}
-        })
-        
+        # Distinct medications taken per day, from the cached monthly counts
+        takes_by_med = await monthly_takes.get(self.db, user_id, year, month)
         takes_by_date = {}
-        async for doc in cursor:
-            date_str = doc["date"]
-            if date_str not in takes_by_date:
-                takes_by_date[date_str] = set()
-            takes_by_date[date_str].add(doc["medicationId"])
+        for daily_takes in takes_by_med.values():
+            for date_str in daily_takes:
+                takes_by_date[date_str] = takes_by_date.get(date_str, 0) + 1
         
         # Generate event list
         events = []
         for day in range(1, days_in_month + 1):
             date_str = f"{year:04d}-{month:02d}-{day:02d}"
-            medications_taken = len(takes_by_date.get(date_str, set()))
+            medications_taken = takes_by_date.get(date_str, 0)
             
             events.append({
                 "date": date_str,
@@ -0,0 +1,251 @@
+"""
+Missed-dose sweeper.
+
+Detects scheduled medication slots that passed their grace period without
+a take, across all patients, and notifies the caregivers. Runs as a
+background task started with the app (see src/main.py), so detection no
+longer depends on someone opening GET /medications/today/status and that
+endpoint stays read-only.
+
+Every active medication carries `nextDueAt`: the next scheduled slot (UTC)
+not yet checked. It is set on create/update (MedicationDB.next_due_at) and
+indexed together with `isActive`, so each sweep is one indexed range query:
+
+    {"isActive": True, "nextDueAt": {"$lte": now - grace}}
+
+For the due medications the sweeper:
+1. Counts the takes of the involved (medication, day) pairs with one
+   aggregation. A slot is fulfilled when the day has more takes than the
+   slot's position in the sorted schedule (same rule as isTakenToday).
+2. Registers ONE MEDICATION_MISSED_BATCH event per (patient, day, slot)
+   grouping all medications missed at that slot.
+3. Writes the `missedAlertsByTime` dedup markers and the advanced
+   `nextDueAt` of every processed medication with a single bulk_write.
+
+Each slot is checked against its own date, so a 23:45 dose whose grace
+period ends after midnight is still reported. Slots whose grace period
+ended more than MISSED_DOSE_MAX_DELAY_MINUTES ago (e.g. after downtime) are
+skipped without notifying. If an event cannot be registered, the medication's `nextDueAt`
+is left unchanged so the next sweep retries; the dedup markers keep the
+other slots from being sent twice.
+"""
+import asyncio
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from src._config.logger import get_logger
+from src._config.settings import settings
+from src.domains.events.schemas import BiometricEventType
+from src.domains.events.services import BiometricEventService
+from src.domains.medications.models import MedicationDB
+
+logger = get_logger(__name__)
+
+_SWEEP_PROJECTION = {
+    "userId": 1,
+    "name": 1,
+    "dosage": 1,
+    "time": 1,
+    "times": 1,
+    "nextDueAt": 1,
+    "missedAlertsByTime": 1,
+}
+
+
+class MissedDoseSweeper:
+    """Background detection of missed medication doses."""
+
+    def __init__(
+        self,
+        db,
+        grace_minutes: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_delay_minutes: Optional[int] = None,
+    ):
+        self.db = db
+        self.medications = db.medications
+        self.medication_takes = db.medication_takes
+        self.grace_minutes = grace_minutes if grace_minutes is not None else settings.MISSED_DOSE_GRACE_MINUTES
+        self.batch_size = batch_size or settings.MISSED_DOSE_SWEEP_BATCH_SIZE
+        self.max_delay_minutes = (
+            max_delay_minutes if max_delay_minutes is not None else settings.MISSED_DOSE_MAX_DELAY_MINUTES
+        )
+
+    async def backfill_next_due(self, now: datetime) -> int:
+        """
+        Set `nextDueAt` on active medications created before the field existed.
+
+        Starts from the beginning of today so today's already overdue slots
+        are still checked (the dedup markers prevent repeats).
+        """
+        cursor = self.medications.find(
+            {"isActive": True, "nextDueAt": {"$exists": False}},
+            {"time": 1, "times": 1},
+        ).limit(self.batch_size)
+        docs = await cursor.to_list(length=self.batch_size)
+        if not docs:
+            return 0
+
+        start_of_day = datetime.combine(now.date(), time.min) - timedelta(microseconds=1)
+        ops = [
+            UpdateOne(
+                {"_id": doc["_id"], "nextDueAt": {"$exists": False}},
+                {"$set": {"nextDueAt": MedicationDB.next_due_at(
+                    MedicationDB.normalize_times(doc), start_of_day
+                )}},
+            )
+            for doc in docs
+        ]
+        await self.medications.bulk_write(ops, ordered=False)
+        return len(ops)
+
+    async def _take_counts(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        """Number of takes per (medicationId, date) with one aggregation."""
+        if not pairs:
+            return {}
+        pipeline = [
+            {"$match": {
+                "medicationId": {"$in": sorted({m for m, _ in pairs})},
+                "date": {"$in": sorted({d for _, d in pairs})},
+            }},
+            {"$group": {
+                "_id": {"medicationId": "$medicationId", "date": "$date"},
+                "count": {"$sum": 1},
+            }},
+        ]
+        rows = await self.medication_takes.aggregate(pipeline).to_list(length=None)
+        return {(r["_id"]["medicationId"], r["_id"]["date"]): r["count"] for r in rows}
+
+    async def sweep(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Process one batch of overdue medications. Returns counters."""
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(minutes=self.grace_minutes)
+        stale_before = cutoff - timedelta(minutes=self.max_delay_minutes)
+        stats = {
+            "backfilled": await self.backfill_next_due(now),
+            "due": 0, "advanced": 0, "missed": 0, "events": 0,
+        }
+
+        cursor = self.medications.find(
+            {"isActive": True, "nextDueAt": {"$lte": cutoff}},
+            _SWEEP_PROJECTION,
+        ).sort("nextDueAt", 1).limit(self.batch_size)
+        docs = await cursor.to_list(length=self.batch_size)
+        if not docs:
+            return stats
+        stats["due"] = len(docs)
+
+        # Expand every overdue slot of each medication (normally just one)
+        due_slots: List[Tuple[Dict[str, Any], datetime, int]] = []
+        next_due: Dict[str, Optional[datetime]] = {}
+        for doc in docs:
+            times = sorted(t for t in MedicationDB.normalize_times(doc) if ":" in t)
+            slot = doc["nextDueAt"]
+            while slot is not None and slot <= cutoff:
+                hhmm = slot.strftime("%H:%M")
+                position = times.index(hhmm) if hhmm in times else 0
+                due_slots.append((doc, slot, position))
+                slot = MedicationDB.next_due_at(times, slot)
+            next_due[doc["_id"]] = slot
+
+        take_counts = await self._take_counts(
+            [(doc["_id"], slot.strftime("%Y-%m-%d")) for doc, slot, _ in due_slots]
+        )
+
+        # (patient, slot key) -> medications missed at that slot
+        missed: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for doc, slot, position in due_slots:
+            if slot < stale_before:
+                continue  # Left over from before downtime
+            date_str = slot.strftime("%Y-%m-%d")
+            if take_counts.get((doc["_id"], date_str), 0) > position:
+                continue
+            slot_key = f"{date_str}:{slot.strftime('%H:%M')}"
+            if (doc.get("missedAlertsByTime") or {}).get(slot_key):
+                continue
+            missed.setdefault((doc["userId"], slot_key), []).append(doc)
+
+        markers: Dict[str, Dict[str, bool]] = {}
+        failed = set()
+        event_service = BiometricEventService(self.db)
+        for (patient_id, slot_key), meds in missed.items():
+            scheduled = slot_key.split(":", 1)[1]
+            try:
+                await event_service.register_biometric_event(
+                    patient_id=patient_id,
+                    event_type=BiometricEventType.MEDICATION_MISSED_BATCH.value,
+                    payload={
+                        "scheduled_time": scheduled,
+                        "count": len(meds),
+                        "medications": [
+                            {
+                                "medication_id": m["_id"],
+                                "name": m.get("name", ""),
+                                "dosage": m.get("dosage", ""),
+                            }
+                            for m in meds
+                        ],
+                    },
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Failed to register missed-dose batch event at "
+                    f"{scheduled} for patient {patient_id}: {e}"
+                )
+                failed.update(m["_id"] for m in meds)
+                continue
+            stats["events"] += 1
+            stats["missed"] += len(meds)
+            for m in meds:
+                markers.setdefault(m["_id"], {})[f"missedAlertsByTime.{slot_key}"] = True
+
+        ops = []
+        for doc in docs:
+            update = dict(markers.get(doc["_id"], {}))
+            if doc["_id"] not in failed:
+                update["nextDueAt"] = next_due[doc["_id"]]
+                stats["advanced"] += 1
+            if update:
+                # Guard on the value we read: a concurrent schedule edit wins
+                ops.append(UpdateOne(
+                    {"_id": doc["_id"], "nextDueAt": doc["nextDueAt"]},
+                    {"$set": update},
+                ))
+        if ops:
+            await self.medications.bulk_write(ops, ordered=False)
+
+        if stats["events"]:
+            logger.info(
+                f"Missed-dose sweep: {stats['events']} event(s) for "
+                f"{stats['missed']} missed dose(s), {stats['due']} medication(s) due"
+            )
+        return stats
+
+    async def sweep_all(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Sweep batch after batch until fewer than `batch_size` medications are
+        due, so a busy minute never leaves overdue slots for a later sweep.
+        Stops early if a batch advanced nothing (every event failed).
+        """
+        now = now or datetime.utcnow()
+        totals: Dict[str, int] = {}
+        while True:
+            stats = await self.sweep(now=now)
+            for key, value in stats.items():
+                totals[key] = totals.get(key, 0) + value
+            if stats["due"] < self.batch_size or not stats["advanced"]:
+                return totals
+
+    async def run_forever(self, interval_seconds: Optional[float] = None) -> None:
+        """Sweep every `interval_seconds` until cancelled."""
+        interval = interval_seconds or settings.MISSED_DOSE_SWEEP_INTERVAL_SECONDS
+        while True:
+            try:
+                await self.sweep_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Missed-dose sweep failed: {e}")
+            await asyncio.sleep(interval)
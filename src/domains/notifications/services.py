@@ -7,11 +7,10 @@ from uuid import uuid4
 
 from src.domains.notifications.models import NotificationDB, HealthTipDB, NotificationType, NotificationPriority
 from src._config.logger import get_logger
+from src.core.pairing_access import pairing_access
 
 logger = get_logger(__name__)
 
-PAIRINGS_COLLECTION = "pairings"
-
 
 class NotificationService:
     """Servicio para gestión de notificaciones"""
@@ -38,14 +37,8 @@ class NotificationService:
         if requester_id == patient_id:
             return True
         
-        # Caso 2: Verificar si es un cuidador activo
-        pairing = await db[PAIRINGS_COLLECTION].find_one({
-            "caregiverId": requester_id,
-            "patientId": patient_id,
-            "status": "active"
-        })
-        
-        if pairing:
+        # Caso 2: Verificar si es un cuidador activo (índice en memoria de emparejamientos)
+        if patient_id in await pairing_access.patients_of(db, requester_id):
             logger.debug(
                 f"Caregiver {requester_id} has active pairing with patient {patient_id}"
             )
@@ -7,6 +7,8 @@ from bson import ObjectId
 import random
 import string
 from src._config.logger import get_logger
+from src.core.pairing_access import pairing_access
+from src.domains.location.live import CLOSE_PAIRING_REVOKED, live_location_hub
 
 logger = get_logger(__name__)
 
@@ -195,6 +197,7 @@ class PairingService:
                 }
             }
         )
+        pairing_access.invalidate_caregiver(caregiver_id)
         
         logger.info(
             f"Pairing activated: {caregiver.get('name')} (caregiver) <-> "
@@ -251,7 +254,9 @@ class PairingService:
                 }
             },
         )
+        pairing_access.invalidate_caregiver(caregiver_id)
         if result.modified_count:
+            live_location_hub.close_caregiver(caregiver_id, CLOSE_PAIRING_REVOKED, "pairing_replaced")
             logger.info(
                 f"Auto-ended {result.modified_count} previous pairing(s) for "
                 f"caregiver {caregiver_id} (replaced by {keep_pairing_id})"
@@ -476,6 +481,8 @@ class PairingService:
                 }
             }
         )
+        pairing_access.invalidate_caregiver(pairing.get("caregiverId"))
+        live_location_hub.close_caregiver(pairing.get("caregiverId"), CLOSE_PAIRING_REVOKED, "pairing_revoked")
         
         logger.info(f"Pairing {pairing_id} revoked by user {user_id}")
         
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from src.core.database import get_database
+from src.core.auth_cache import invalidate_user
+from src.core.pairing_access import pairing_access
 from src.domains.auth.routes import verify_token
 from src.domains.user.schemas import UserResponse, OAuthProviderInfo, FullUserProfileResponse, ConnectionInfo
 from src.domains.pairing.services import PairingService
@@ -185,6 +187,7 @@ _USER_OWNED_COLLECTIONS = [
     "health_metrics",
     "sensor_batches",
     "locations",
+    "health_rollups",
 ]
 
 # Collections that may reference a user under several id fields.
@@ -192,6 +195,7 @@ _USER_MULTIFIELD_COLLECTIONS = {
     "notifications": ["userId", "patientId", "caregiverId"],
     "sync_requests": ["userId", "patientId", "caregiverId"],
     "alerts": ["userId", "patientId", "caregiverId"],
+    "patient_snapshots": ["patientId"],
 }
 
 
@@ -246,6 +250,10 @@ async def delete_user_and_data(db, user_id: str) -> dict:
     except Exception:
         summary["users"] = 0
 
+    # Outstanding access tokens and pairings must stop working on the next request.
+    invalidate_user(user_id)
+    pairing_access.clear()
+
     return summary
 
 
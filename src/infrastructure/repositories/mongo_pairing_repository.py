@@ -8,6 +8,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from src.core.repositories.pairing_repository import IPairingRepository
 from src.core.exceptions import ResourceNotFoundException
+from src.core.pairing_access import pairing_access
 
 
 class MongoPairingRepository(IPairingRepository):
@@ -122,13 +123,7 @@ class MongoPairingRepository(IPairingRepository):
         - Requester IS the patient, OR
         - Active pairing exists between requester (caregiver) and patient
         """
-        # Self-access always allowed
-        if requester_id == patient_id:
-            return True
-        
-        # Check for active caregiver-patient relationship
-        pairing = await self.find_relationship(requester_id, patient_id)
-        return pairing is not None
+        return await pairing_access.has_access(self.db, requester_id, patient_id)
     
     async def create_pending_pairing(
         self, 
@@ -162,6 +157,7 @@ class MongoPairingRepository(IPairingRepository):
                 }
             }
         )
+        pairing_access.invalidate_caregiver(caregiver_id)
         return result.modified_count > 0
     
     async def deactivate_pairing(self, pairing_id: str) -> bool:
@@ -170,4 +166,5 @@ class MongoPairingRepository(IPairingRepository):
             {"_id": ObjectId(pairing_id)},
             {"$set": {"status": "inactive"}}
         )
+        pairing_access.clear()
         return result.modified_count > 0
@@ -1,4 +1,8 @@
-from fastapi import FastAPI
+import asyncio
+import shutil
+
+from fastapi import FastAPI, Depends, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from src.domains.txagent.routes import router as txagent_router
 from src.domains.health.routes import router as health_router
@@ -9,6 +13,7 @@ from src.domains.pairing.routes import router as pairing_router
 from src.domains.medications.routes import router as medications_router
 from src.domains.notifications.routes import router as notifications_router
 from src.domains.location.routes import router as location_router
+from src.domains.location.ingest import location_history_writer
 from src.domains.drawing_challenges.routes import router as drawing_challenges_router
 from src.domains.events.routes import router as events_router
 from src.domains.caregiver.routes import router as caregiver_router
@@ -16,6 +21,14 @@ from src.domains.reports.routes import router as reports_router
 from src._config.logger import setup_logging, get_logger
 from src.middleware.logging import LoggingMiddleware
 from src.core.database import db
+from src._config.settings import settings
+from src.domains.medications.sweeper import MissedDoseSweeper
+from src.domains.medications.scheduler import dose_scheduler
+from src.domains.medications.drug_catalog import close_http_client as close_drug_catalog_client
+from src.domains.health.audio_preprocessing import audio_pool
+from src.core.cache import cache_stats
+from src.core.exceptions import ServiceBusyException
+from src.domains.auth.routes import verify_token_jwt
 
 # Setup logging
 setup_logging()
@@ -33,15 +46,11 @@ async def startup_db_client():
     database = db.get_db()
     logger = get_logger(__name__)
 
-    # Verify ffmpeg is available (required by pydub for audio trimming in /parse-bp-audio)
-    try:
-        from pydub.utils import which as pydub_which
-        if not pydub_which("ffmpeg"):
-            logger.error("ffmpeg not found in PATH - audio trimming will be disabled")
-        else:
-            logger.info("ffmpeg found - audio trimming enabled")
-    except Exception as e:
-        logger.warning(f"Could not verify ffmpeg availability: {e}")
+    # Verify ffmpeg is available (decodes/trims uploads for the voice endpoints)
+    if not shutil.which("ffmpeg"):
+        logger.error("ffmpeg not found in PATH - audio trimming will be disabled")
+    else:
+        logger.info("ffmpeg found - audio trimming enabled")
 
     # Create indexes for pairings collection
     try:
@@ -63,6 +72,7 @@ async def startup_db_client():
     try:
         await database.health_metrics.create_index("userId")
         await database.health_metrics.create_index([("userId", 1), ("type", 1)])
+        await database.health_metrics.create_index([("userId", 1), ("type", 1), ("date", 1)])
         await database.health_metrics.create_index([("userId", 1), ("timestamp", -1)])
         await database.health_metrics.create_index("timestamp")
     except Exception as e:
@@ -73,6 +83,10 @@ async def startup_db_client():
         await database.medications.create_index("userId")
         await database.medications.create_index([("userId", 1), ("isActive", 1)])
         await database.medications.create_index([("userId", 1), ("time", 1)])
+        # Missed-dose sweeper range scan
+        await database.medications.create_index([("isActive", 1), ("nextDueAt", 1)])
+        # Dose scheduler picks up schedule changes made by other workers
+        await database.medications.create_index("updatedAt")
     except Exception as e:
         logger.warning(f"Could not create indexes for medications: {e}")
     
@@ -86,6 +100,18 @@ async def startup_db_client():
     except Exception as e:
         logger.warning(f"Could not create indexes for medication_takes: {e}")
     
+    # Drug registry validation cache: expired entries removed by Mongo
+    try:
+        await database.drug_catalog_cache.create_index("expiresAt", expireAfterSeconds=0)
+    except Exception as e:
+        logger.warning(f"Could not create indexes for drug_catalog_cache: {e}")
+
+    # Voice transcription/extraction cache: expired entries removed by Mongo
+    try:
+        await database.voice_cache.create_index("expiresAt", expireAfterSeconds=0)
+    except Exception as e:
+        logger.warning(f"Could not create indexes for voice_cache: {e}")
+    
     # Create indexes for notifications collection
     try:
         await database.notifications.create_index("userId")
@@ -167,8 +193,32 @@ async def startup_db_client():
     # NOTE: Pairing cleanup code removed - was deleting active connections on every deployment
     # If you need to clean up test data, do it manually via MongoDB console
 
+    # Background dose reminders + missed-dose detection. The scheduler runs
+    # the sweep at the minute each grace period ends; without it, poll.
+    if settings.DOSE_SCHEDULER_ENABLED:
+        app.state.dose_scheduler = asyncio.create_task(dose_scheduler.run(database))
+    elif settings.MISSED_DOSE_SWEEP_ENABLED:
+        app.state.missed_dose_sweeper = asyncio.create_task(
+            MissedDoseSweeper(database).run_forever()
+        )
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Wait for the background jobs to unwind (the scheduler releases its
+    # lease in a finally) before the database client is closed
+    tasks = [
+        task for task in (
+            getattr(app.state, task_name, None)
+            for task_name in ("dose_scheduler", "missed_dose_sweeper")
+        )
+        if task is not None
+    ]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await close_drug_catalog_client()
+    await location_history_writer.flush()
+    audio_pool.shutdown()
     db.close()
 
 # Configure CORS
@@ -199,6 +249,21 @@ app.include_router(drawing_challenges_router)
 app.include_router(events_router)
 app.include_router(caregiver_router)
 
+@app.exception_handler(ServiceBusyException)
+async def service_busy_handler(request: Request, exc: ServiceBusyException):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": exc.message},
+        headers={"Retry-After": str(exc.retry_after_seconds)},
+    )
+
+
 @app.get("/")
 async def root():
     return {"message": "Hacking Health API is running"}
+
+
+@app.get("/metrics/cache")
+async def get_cache_metrics(user_id: str = Depends(verify_token_jwt)):
+    """Hit/miss/eviction counters of the in-process caches."""
+    return cache_stats()
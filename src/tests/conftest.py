@@ -34,3 +34,42 @@ def client():
         yield c
     
     app.dependency_overrides.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_process_caches():
+    """Tests reuse ids with different mock data: never share cached responses/tokens/pairings/months/drugs/voice/locations/stats."""
+    from src.core.cache import response_cache
+    from src.core.auth_cache import token_cache
+    from src.core.pairing_access import pairing_access
+    from src.domains.medications.adherence import monthly_takes
+    from src.domains.medications.drug_catalog import catalog_cache
+    from src.domains.health.voice_cache import extraction_cache, transcription_cache
+    from src.domains.health.bp_grammar import bp_parse_stats
+    from src.domains.health.audio_preprocessing import whisper_upload_stats
+    from src.domains.location.ingest import last_positions, location_history_writer
+    from src.domains.location.live import live_location_hub
+    from src.domains.location.services import paired_location_cache
+    from src.utils.openai_gateway import openai_gateway
+    response_cache.clear()
+    token_cache.clear()
+    pairing_access.clear()
+    monthly_takes.clear()
+    catalog_cache.clear()
+    transcription_cache.clear()
+    extraction_cache.clear()
+    bp_parse_stats.clear()
+    openai_gateway.reset()
+    whisper_upload_stats.clear()
+    last_positions.clear()
+    location_history_writer.reset()
+    paired_location_cache.clear()
+    live_location_hub.reset()
+    yield
+    response_cache.clear()
+    token_cache.clear()
+    pairing_access.clear()
+    monthly_takes.clear()
+    catalog_cache.clear()
+    transcription_cache.clear()
+    extraction_cache.clear()
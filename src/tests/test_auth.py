@@ -1,3 +1,17 @@
+import threading
+import pytest
+from argon2 import PasswordHasher
+from unittest.mock import AsyncMock, MagicMock
+from bson.objectid import ObjectId
+
+from src._config.settings import settings
+from src.core.jwt import create_access_token, verify_access_token
+from src.core.auth_cache import token_cache, invalidate_user, TokenVerificationCache
+from src.core import security
+from src.core.exceptions import ServiceBusyException
+from src.domains.auth.routes import verify_token_jwt
+
+
 def test_login_new_user(client):
     """
     Test login with a new user (should trigger registration).
@@ -13,3 +27,116 @@ def test_login_new_user(client):
     assert "token" in data
     assert "refresh" in data
     assert "expiry" in data
+
+
+# -----------------------------------------------------------------------------
+# verify_token_jwt fast path (src/core/auth_cache.py)
+# -----------------------------------------------------------------------------
+
+def _users_db(exists: bool = True):
+    db = MagicMock()
+    db.users.find_one = AsyncMock(return_value={"_id": ObjectId()} if exists else None)
+    return db
+
+
+@pytest.mark.asyncio
+async def test_verify_token_jwt_caches_claims_and_user(monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG", False)
+    user_id = str(ObjectId())
+    token = create_access_token(user_id)
+    db = _users_db()
+
+    for _ in range(3):
+        assert await verify_token_jwt(authorization=f"Bearer {token}", db=db) == user_id
+
+    db.users.find_one.assert_awaited_once()
+    assert token_cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidate_user_forces_existence_recheck(monkeypatch):
+    from fastapi import HTTPException
+
+    monkeypatch.setattr(settings, "DEBUG", False)
+    user_id = str(ObjectId())
+    token = create_access_token(user_id)
+    await verify_token_jwt(authorization=f"Bearer {token}", db=_users_db())
+
+    # Account deleted: next request must look the user up again and fail
+    invalidate_user(user_id)
+    with pytest.raises(HTTPException) as exc:
+        await verify_token_jwt(authorization=f"Bearer {token}", db=_users_db(exists=False))
+    assert exc.value.status_code == 401
+
+
+def test_token_reusing_cached_jti_is_not_trusted():
+    cache = TokenVerificationCache(max_entries=10, ttl_seconds=60)
+    user_id = str(ObjectId())
+    token = create_access_token(user_id)
+    cache.remember_token(token, verify_access_token(token))
+    assert cache.get_user_id(token) == user_id
+
+    # Same payload (same jti) with a tampered signature
+    forged = token[:-4] + ("AAAA" if not token.endswith("AAAA") else "BBBB")
+    assert cache.get_user_id(forged) is None
+
+
+def test_cached_claims_expire_after_staleness_bound():
+    now = [1000.0]
+    cache = TokenVerificationCache(max_entries=10, ttl_seconds=30, timer=lambda: now[0])
+    user_id = str(ObjectId())
+    token = create_access_token(user_id)
+    payload = verify_access_token(token)
+    cache.remember_token(token, payload)
+    assert cache.get_user_id(token) == user_id
+
+    now[0] += 31
+    assert cache.get_user_id(token) is None
+
+
+# -----------------------------------------------------------------------------
+# argon2 off the event loop (src/core/security.py)
+# -----------------------------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_verify_runs_in_worker_thread(monkeypatch):
+    seen = {}
+    real = security._verify_and_check
+
+    def _spy(*args):
+        seen["thread"] = threading.current_thread().name
+        return real(*args)
+
+    monkeypatch.setattr(security, "_verify_and_check", _spy)
+    stored = security.get_password_hash("secret")
+
+    assert await security.verify_and_rehash("secret", stored) == (True, None)
+    assert await security.verify_password_async("wrong", stored) is False
+    assert seen["thread"].startswith("argon2")
+
+
+@pytest.mark.asyncio
+async def test_outdated_hash_is_rehashed_with_current_params():
+    weak = PasswordHasher(time_cost=1, memory_cost=8192, parallelism=1).hash("secret")
+
+    valid, rehashed = await security.verify_and_rehash("secret", weak)
+
+    assert valid is True
+    assert rehashed and rehashed != weak
+    assert not security.ph.check_needs_rehash(rehashed)
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_raises_busy(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", 0.01)
+    limiter = security._get_limiter()
+    held = 0
+    while not limiter.locked():
+        await limiter.acquire()
+        held += 1
+    try:
+        with pytest.raises(ServiceBusyException):
+            await security.hash_password_async("secret")
+    finally:
+        for _ in range(held):
+            limiter.release()
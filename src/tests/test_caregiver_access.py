@@ -9,6 +9,7 @@ Validates the security requirements:
                                        this test asserts an unsigned/malformed token is rejected
   5. Pairing with status != "active" → 403
   6. /caregiver/patients lists only active caregiver pairings
+  7. Revoking / auto-replacing a pairing denies access on the very next check
 
 We exercise authorization at the service/helper layer with an AsyncMock'd db
 rather than spinning a real Mongo. Endpoint integration is covered through
@@ -28,6 +29,7 @@ from src.core.authorization import (
 )
 from src.core import jwt as jwt_module
 from src.domains.auth.routes import verify_token_jwt
+from src.domains.pairing.services import PairingService
 from src._config.settings import settings
 
 
@@ -45,19 +47,16 @@ OTHER_PATIENT_ID = "507f1f77bcf86cd799439013"
 async def test_require_caregiver_access_with_active_pairing_returns_patient():
     """Caregiver with active pairing → returns safe patient projection."""
     mock_db = AsyncMock()
-    mock_db.users.find_one = AsyncMock(return_value={
+    mock_db.users.find = MagicMock(return_value=_async_cursor([{
         "_id": ObjectId(PATIENT_ID),
         "name": "Carmen",
         "email": "carmen@example.com",       # must NOT leak into response
         "password": "secret_hash",            # must NOT leak
         "profile_picture": "https://x/y.jpg",
-    })
-    mock_db.pairings.find_one = AsyncMock(return_value={
-        "_id": ObjectId(),
-        "caregiverId": CAREGIVER_ID,
-        "patientId": PATIENT_ID,
-        "status": "active",
-    })
+    }]))
+    mock_db.pairings.find = MagicMock(return_value=_async_cursor([
+        {"_id": ObjectId(), "patientId": PATIENT_ID},
+    ]))
 
     result = await require_caregiver_access(PATIENT_ID, CAREGIVER_ID, mock_db)
 
@@ -72,11 +71,11 @@ async def test_require_caregiver_access_with_active_pairing_returns_patient():
 async def test_require_caregiver_access_without_pairing_raises_403():
     """Caregiver with no pairing → 403."""
     mock_db = AsyncMock()
-    mock_db.users.find_one = AsyncMock(return_value={
+    mock_db.users.find = MagicMock(return_value=_async_cursor([{
         "_id": ObjectId(PATIENT_ID),
         "name": "Carmen",
-    })
-    mock_db.pairings.find_one = AsyncMock(return_value=None)
+    }]))
+    mock_db.pairings.find = MagicMock(return_value=_async_cursor([]))
 
     with pytest.raises(HTTPException) as exc:
         await require_caregiver_access(PATIENT_ID, CAREGIVER_ID, mock_db)
@@ -87,18 +86,18 @@ async def test_require_caregiver_access_without_pairing_raises_403():
 async def test_require_caregiver_access_with_revoked_pairing_raises_403():
     """status != 'active' pairing must NOT grant access (query already filters)."""
     mock_db = AsyncMock()
-    mock_db.users.find_one = AsyncMock(return_value={
+    mock_db.users.find = MagicMock(return_value=_async_cursor([{
         "_id": ObjectId(PATIENT_ID),
         "name": "Carmen",
-    })
-    # Repository query filters {status: "active"} so a revoked pairing returns None
-    mock_db.pairings.find_one = AsyncMock(return_value=None)
+    }]))
+    # The index query filters {status: "active"} so a revoked pairing is not loaded
+    mock_db.pairings.find = MagicMock(return_value=_async_cursor([]))
 
     with pytest.raises(HTTPException) as exc:
         await require_caregiver_access(PATIENT_ID, CAREGIVER_ID, mock_db)
     assert exc.value.status_code == 403
     # Verify the query was filtered by status="active"
-    call_kwargs = mock_db.pairings.find_one.call_args
+    call_kwargs = mock_db.pairings.find.call_args
     query = call_kwargs.args[0] if call_kwargs.args else call_kwargs.kwargs.get("filter")
     assert query["status"] == "active"
 
@@ -107,10 +106,10 @@ async def test_require_caregiver_access_with_revoked_pairing_raises_403():
 async def test_require_caregiver_access_self_access_raises_403():
     """requester == patient on caregiver-only endpoint → 403 (own-data NOT allowed here)."""
     mock_db = AsyncMock()
-    mock_db.users.find_one = AsyncMock(return_value={
+    mock_db.users.find = MagicMock(return_value=_async_cursor([{
         "_id": ObjectId(PATIENT_ID),
         "name": "Carmen",
-    })
+    }]))
 
     with pytest.raises(HTTPException) as exc:
         await require_caregiver_access(PATIENT_ID, PATIENT_ID, mock_db)
@@ -121,7 +120,7 @@ async def test_require_caregiver_access_self_access_raises_403():
 async def test_require_caregiver_access_unknown_patient_raises_404():
     """Patient does not exist → 404."""
     mock_db = AsyncMock()
-    mock_db.users.find_one = AsyncMock(return_value=None)
+    mock_db.users.find = MagicMock(return_value=_async_cursor([]))
 
     with pytest.raises(HTTPException) as exc:
         await require_caregiver_access(PATIENT_ID, CAREGIVER_ID, mock_db)
@@ -149,7 +148,7 @@ async def test_assert_data_access_allows_own_data():
 async def test_assert_data_access_blocks_other_patient():
     """A patient cannot read another patient's data."""
     mock_db = AsyncMock()
-    mock_db.pairings.find_one = AsyncMock(return_value=None)
+    mock_db.pairings.find = MagicMock(return_value=_async_cursor([]))
     with pytest.raises(HTTPException) as exc:
         await assert_data_access(mock_db, PATIENT_ID, OTHER_PATIENT_ID)
     assert exc.value.status_code == 403
@@ -159,13 +158,80 @@ async def test_assert_data_access_blocks_other_patient():
 async def test_assert_data_access_allows_caregiver_with_pairing():
     """Caregiver with active pairing → no exception."""
     mock_db = AsyncMock()
+    mock_db.pairings.find = MagicMock(return_value=_async_cursor([
+        {"_id": ObjectId(), "patientId": PATIENT_ID},
+    ]))
+    await assert_data_access(mock_db, CAREGIVER_ID, PATIENT_ID)
+
+
+def _pairing_db(patient_ids):
+    """MagicMock db whose `pairings.find` yields active pairings for `patient_ids`."""
+    mock_db = MagicMock()
+    mock_db.__getitem__.side_effect = lambda name: getattr(mock_db, name)
+    mock_db.pairings.find = MagicMock(return_value=_async_cursor([
+        {"_id": ObjectId(), "patientId": pid} for pid in patient_ids
+    ]))
+    return mock_db
+
+
+@pytest.mark.asyncio
+async def test_pairing_index_answers_repeated_checks_without_queries():
+    """The caregiver's active patients are loaded once, then checks are set lookups."""
+    mock_db = _pairing_db([PATIENT_ID])
+
+    await assert_data_access(mock_db, CAREGIVER_ID, PATIENT_ID)
+    await assert_data_access(mock_db, CAREGIVER_ID, PATIENT_ID)
+    with pytest.raises(HTTPException):
+        await assert_data_access(mock_db, CAREGIVER_ID, OTHER_PATIENT_ID)
+
+    assert mock_db.pairings.find.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_revoking_pairing_takes_effect_on_next_access_check():
+    """After PairingService.revoke_pairing the caregiver is denied immediately."""
+    pairing_oid = ObjectId()
+    mock_db = _pairing_db([PATIENT_ID])
+    await assert_data_access(mock_db, CAREGIVER_ID, PATIENT_ID)  # index now cached
+
     mock_db.pairings.find_one = AsyncMock(return_value={
+        "_id": pairing_oid,
         "caregiverId": CAREGIVER_ID,
         "patientId": PATIENT_ID,
         "status": "active",
     })
+    mock_db.pairings.update_one = AsyncMock()
+    mock_db.pairings.find = MagicMock(return_value=_async_cursor([]))
+
+    result = await PairingService(mock_db).revoke_pairing(str(pairing_oid), PATIENT_ID)
+    assert result["success"] is True
+
+    with pytest.raises(HTTPException) as exc:
+        await assert_data_access(mock_db, CAREGIVER_ID, PATIENT_ID)
+    assert exc.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_auto_replaced_pairing_loses_access_immediately():
+    """Ending a caregiver's other pairings drops the old patient from the index."""
+    mock_db = _pairing_db([PATIENT_ID])
     await assert_data_access(mock_db, CAREGIVER_ID, PATIENT_ID)
 
+    ended = MagicMock()
+    ended.modified_count = 1
+    mock_db.pairings.update_many = AsyncMock(return_value=ended)
+    mock_db.pairings.find = MagicMock(return_value=_async_cursor([
+        {"_id": ObjectId(), "patientId": OTHER_PATIENT_ID},
+    ]))
+
+    await PairingService(mock_db)._end_other_caregiver_pairings(
+        caregiver_id=CAREGIVER_ID, keep_pairing_id=ObjectId()
+    )
+
+    with pytest.raises(HTTPException):
+        await assert_data_access(mock_db, CAREGIVER_ID, PATIENT_ID)
+    await assert_data_access(mock_db, CAREGIVER_ID, OTHER_PATIENT_ID)
+
 
 # -----------------------------------------------------------------------------
 # JWT role tests
@@ -216,7 +282,7 @@ def caregiver_client(monkeypatch):
     mock_db = MagicMock()
     mock_db.pairings = MagicMock()
     mock_db.users = MagicMock()
-    mock_db.users.find_one = AsyncMock(return_value=None)
+    mock_db.users.find = MagicMock(return_value=_async_cursor([]))
     mock_db.pairings.find_one = AsyncMock(return_value=None)
     mock_db.pairings.find = MagicMock(return_value=_async_cursor([]))
     mock_db.blood_pressure_readings = MagicMock()
@@ -264,11 +330,11 @@ def test_caregiver_patients_list_returns_active_pairings(caregiver_client):
             "status": "active",
         }
     ]))
-    caregiver_client.mock_db.users.find_one = AsyncMock(return_value={
+    caregiver_client.mock_db.users.find = MagicMock(return_value=_async_cursor([{
         "_id": ObjectId(PATIENT_ID),
         "name": "Carmen",
         "profile_picture": None,
-    })
+    }]))
 
     resp = caregiver_client.get("/caregiver/patients")
     assert resp.status_code == 200
@@ -281,13 +347,70 @@ def test_caregiver_patients_list_returns_active_pairings(caregiver_client):
     assert "password" not in data["patients"][0]
 
 
+def test_caregiver_dashboard_reads_snapshots_with_one_in_query(caregiver_client):
+    """GET /caregiver/dashboard serves every patient from patient_snapshots."""
+    from datetime import datetime, timezone
+
+    today = datetime.now(timezone.utc).date().isoformat()
+    mock_db = caregiver_client.mock_db
+    mock_db.pairings.find = MagicMock(return_value=_async_cursor([
+        {"_id": ObjectId(), "patientId": PATIENT_ID, "patientName": "Carmen",
+         "caregiverId": CAREGIVER_ID, "status": "active"},
+        {"_id": ObjectId(), "patientId": OTHER_PATIENT_ID, "patientName": "Luis",
+         "caregiverId": CAREGIVER_ID, "status": "active"},
+    ]))
+    mock_db.users.find = MagicMock(return_value=_async_cursor([
+        {"_id": ObjectId(PATIENT_ID), "name": "Carmen", "profile_picture": "https://x/y.jpg"},
+    ]))
+    mock_db.patient_snapshots.find = MagicMock(return_value=_async_cursor([
+        {
+            "_id": PATIENT_ID,
+            "latest_bp": {"systolic": 150, "diastolic": 95, "pulse": 80,
+                          "stage": "hypertension_2", "timestamp_ms": 1000},
+            "latest_hr": {"average": 72, "min": 60, "max": 100, "timestamp_ms": 900},
+            "steps": {"date": today, "value": 3200, "timestamp_ms": 900},
+            "last_sync": 1000,
+            "unread_alerts": {CAREGIVER_ID: 3, "someone-else": 7},
+            "backfilled": True,
+        },
+        {
+            "_id": OTHER_PATIENT_ID,
+            "steps": {"date": "2020-01-01", "value": 9999, "timestamp_ms": 1},
+            "last_sync": 1,
+            "backfilled": True,
+        },
+    ]))
+
+    resp = caregiver_client.get("/caregiver/dashboard")
+    assert resp.status_code == 200
+    data = resp.json()
+
+    # One $in over snapshots for all patients, no per-patient lookups
+    mock_db.patient_snapshots.find.assert_called_once()
+    query = mock_db.patient_snapshots.find.call_args.args[0]
+    assert set(query["_id"]["$in"]) == {PATIENT_ID, OTHER_PATIENT_ID}
+    mock_db.users.find_one.assert_not_called()
+
+    assert data["count"] == 2
+    carmen, luis = data["patients"]
+    assert carmen["blood_pressure"]["systolic"] == 150
+    assert carmen["heart_rate"]["average"] == 72
+    assert carmen["steps_today"] == 3200
+    assert carmen["unread_alerts"] == 3
+    assert carmen["profile_picture"] == "https://x/y.jpg"
+    # Stale steps from a previous day are not "today"
+    assert luis["steps_today"] == 0
+    assert luis["blood_pressure"] == {"available": False}
+    assert luis["unread_alerts"] == 0
+
+
 def test_caregiver_bp_history_403_when_no_pairing(caregiver_client):
     """Caregiver without an active pairing → 403."""
-    caregiver_client.mock_db.users.find_one = AsyncMock(return_value={
+    caregiver_client.mock_db.users.find = MagicMock(return_value=_async_cursor([{
         "_id": ObjectId(PATIENT_ID),
         "name": "Carmen",
-    })
-    caregiver_client.mock_db.pairings.find_one = AsyncMock(return_value=None)
+    }]))
+    caregiver_client.mock_db.pairings.find = MagicMock(return_value=_async_cursor([]))
 
     resp = caregiver_client.get(f"/caregiver/patients/{PATIENT_ID}/history/bp")
     assert resp.status_code == 403
@@ -295,7 +418,7 @@ def test_caregiver_bp_history_403_when_no_pairing(caregiver_client):
 
 def test_caregiver_steps_history_404_when_patient_missing(caregiver_client):
     """Unknown patient_id → 404."""
-    caregiver_client.mock_db.users.find_one = AsyncMock(return_value=None)
+    caregiver_client.mock_db.users.find = MagicMock(return_value=_async_cursor([]))
     resp = caregiver_client.get(f"/caregiver/patients/{PATIENT_ID}/history/steps")
     assert resp.status_code == 404
 
@@ -307,16 +430,13 @@ def test_caregiver_bp_history_response_is_flat_list(caregiver_client):
     service dict ({patient_id, patient_name, readings:[...], count})
     under the `readings` key, which broke the Android client.
     """
-    caregiver_client.mock_db.users.find_one = AsyncMock(return_value={
+    caregiver_client.mock_db.users.find = MagicMock(return_value=_async_cursor([{
         "_id": ObjectId(PATIENT_ID),
         "name": "Carmen",
-    })
-    caregiver_client.mock_db.pairings.find_one = AsyncMock(return_value={
-        "_id": ObjectId(),
-        "caregiverId": CAREGIVER_ID,
-        "patientId": PATIENT_ID,
-        "status": "active",
-    })
+    }]))
+    caregiver_client.mock_db.pairings.find = MagicMock(return_value=_async_cursor([
+        {"_id": ObjectId(), "patientId": PATIENT_ID},
+    ]))
     # Mock blood_pressure_readings cursor with one document.
     caregiver_client.mock_db.blood_pressure_readings.find = MagicMock(
         return_value=_async_cursor([
@@ -343,6 +463,8 @@ def test_caregiver_bp_history_response_is_flat_list(caregiver_client):
     assert isinstance(data["readings"], list), \
         f"Expected list, got {type(data['readings']).__name__}: {data['readings']}"
     assert data["count"] == len(data["readings"])
+    # Authorization and the BP service share the request's user identity map.
+    caregiver_client.mock_db.users.find.assert_called_once()
     # patient projection still sanitised
     assert "email" not in data["patient"]
     assert "password" not in data["patient"]
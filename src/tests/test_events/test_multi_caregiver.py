@@ -73,7 +73,13 @@ async def test_register_event_fans_out_to_all_caregivers(monkeypatch):
     patient_id = str(ObjectId())
 
     db = MagicMock()
-    db.users.find_one = AsyncMock(return_value={"name": "Ana", "fcmToken": "tok"})
+    users_cursor = MagicMock()
+    users_cursor.to_list = AsyncMock(return_value=[
+        {"_id": ObjectId(patient_id), "name": "Ana"},
+        {"_id": ObjectId(c1), "name": "Cuidador 1", "fcmToken": "tok1"},
+        {"_id": ObjectId(c2), "name": "Cuidador 2", "fcmToken": "tok2"},
+    ])
+    db.users.find = MagicMock(return_value=users_cursor)
     inserted = MagicMock()
     inserted.inserted_id = ObjectId()
     collection = MagicMock()
@@ -81,10 +87,8 @@ async def test_register_event_fans_out_to_all_caregivers(monkeypatch):
     db.__getitem__.return_value = collection
 
     monkeypatch.setattr(PairingService, "get_patient_caregivers", AsyncMock(return_value=[c1, c2]))
-    monkeypatch.setattr(
-        "src.domains.events.services.send_health_alert_push",
-        AsyncMock(return_value={"success_count": 2}),
-    )
+    push = AsyncMock(return_value={"success_count": 2})
+    monkeypatch.setattr("src.domains.events.services.send_health_alert_push", push)
 
     svc = BiometricEventService(db)
     doc = await svc.register_biometric_event(
@@ -98,3 +102,9 @@ async def test_register_event_fans_out_to_all_caregivers(monkeypatch):
     stored = collection.insert_one.await_args.args[0]
     assert stored["caregiverIds"] == [c1, c2]
     assert stored["caregiverId"] == c1
+    # Patient and both caregivers resolved with a single projected $in query.
+    db.users.find.assert_called_once()
+    query, projection = db.users.find.call_args.args
+    assert len(query["_id"]["$in"]) == 3
+    assert "password" not in projection
+    assert sorted(push.await_args.kwargs["fcm_tokens"]) == ["tok1", "tok2"]
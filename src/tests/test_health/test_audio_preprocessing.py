@@ -0,0 +1,193 @@
+"""
+Tests for the audio preprocessing pool (src/domains/health/audio_preprocessing.py):
+saturation, timeouts and failures fall back to the untrimmed upload, and a
+timed-out job keeps its slot until the worker is done with it.
+
+The pool logic is exercised with a thread executor and blocking fake jobs;
+one test runs a real job in a spawned worker process.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.domains.health import audio_preprocessing
+from src.domains.health.audio_preprocessing import AudioPreprocessPool, PreprocessedAudio
+from src.domains.health.voice_parsing import VoiceParsingService
+
+_RESULT = PreprocessedAudio(
+    audio=b"trimmed",
+    filename="audio.ogg",
+    metadata={
+        "audio_original_duration_ms": 8000,
+        "audio_trimmed_duration_ms": 3000,
+        "silence_removed_ms": 5000,
+    },
+    threshold_dbfs=-45.0,
+    digest="ab" * 32,
+)
+
+
+@pytest.fixture(autouse=True)
+def _ffmpeg(monkeypatch):
+    monkeypatch.setattr(audio_preprocessing, "_FFMPEG_AVAILABLE", True)
+
+
+def _pool(job, **kwargs):
+    kwargs.setdefault("workers", 1)
+    kwargs.setdefault("max_pending", 2)
+    kwargs.setdefault("timeout_seconds", 5.0)
+    return AudioPreprocessPool(job=job, executor_factory=ThreadPoolExecutor, **kwargs)
+
+
+def _blocking_job(release: threading.Event):
+    def job(data):
+        release.wait(5)
+        return _RESULT
+    return job
+
+
+async def _wait_until(predicate):
+    for _ in range(200):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_falls_back_without_waiting():
+    release = threading.Event()
+    pool = _pool(_blocking_job(release), max_pending=1)
+    try:
+        first = asyncio.ensure_future(pool.run(b"a"))
+        await _wait_until(lambda: pool.pending == 1)
+
+        assert await asyncio.wait_for(pool.run(b"b"), 0.5) is None
+        assert pool.saturated == 1
+
+        release.set()
+        assert await first == _RESULT
+        assert pool.pending == 0
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timed_out_job_keeps_its_slot_until_it_finishes():
+    release = threading.Event()
+    pool = _pool(_blocking_job(release), max_pending=1, timeout_seconds=0.05)
+    try:
+        assert await pool.run(b"a") is None
+        assert pool.timeouts == 1
+        assert pool.pending == 1  # Worker still busy with the abandoned job
+
+        release.set()
+        await _wait_until(lambda: pool.pending == 0)
+        assert await pool.run(b"b") == _RESULT
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_failed_job_falls_back():
+    def job(data):
+        raise RuntimeError("ffmpeg exited with 1")
+
+    pool = _pool(job)
+    try:
+        assert await pool.run(b"a") is None
+        assert pool.failures == 1
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_disabled_pool_never_submits():
+    pool = _pool(MagicMock(side_effect=AssertionError("must not run")), workers=0)
+    assert await pool.run(b"a") is None
+    assert pool.jobs == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("processed", [None, _RESULT])
+async def test_transcribe_sends_trimmed_or_original_audio(monkeypatch, processed):
+    monkeypatch.setattr(
+        "src.domains.health.voice_parsing.audio_pool.run", AsyncMock(return_value=processed)
+    )
+    service = VoiceParsingService()
+    service.client = MagicMock()
+    service.client.audio.transcriptions.create = AsyncMock(return_value=" ciento veinte sobre ochenta ")
+
+    text, metadata = await service.transcribe_audio(b"original", "rec.m4a", "audio/mp4")
+
+    assert text == "ciento veinte sobre ochenta"
+    sent_name, sent_file = service.client.audio.transcriptions.create.call_args.kwargs["file"]
+    if processed is None:
+        assert (sent_name, sent_file.read()) == ("rec.m4a", b"original")
+        assert metadata["silence_removed_ms"] == 0
+    else:
+        assert (sent_name, sent_file.read()) == ("audio.ogg", b"trimmed")
+        assert metadata.items() >= _RESULT.metadata.items()
+        assert metadata["audio_bytes_saved"] == len(b"original") - len(b"trimmed")
+
+
+@pytest.mark.asyncio
+async def test_silent_recording_skips_whisper(monkeypatch):
+    silent = _RESULT._replace(audio=None, filename=None, speech_detected=False)
+    monkeypatch.setattr(
+        "src.domains.health.voice_parsing.audio_pool.run", AsyncMock(return_value=silent)
+    )
+    service = VoiceParsingService()
+    service.client = MagicMock()
+    service.client.audio.transcriptions.create = AsyncMock()
+
+    result = await service.parse_audio(b"x" * 4000, "rec.m4a")
+
+    service.client.audio.transcriptions.create.assert_not_awaited()
+    assert result["transcription"] == ""
+    assert result["confidence"] == "low"
+    assert (result["audio_whisper_bytes"], result["audio_bytes_saved"]) == (0, 4000)
+    assert audio_preprocessing.whisper_upload_stats.stats()["skipped_silent"] == 1
+
+
+@pytest.mark.asyncio
+async def test_upload_stats_report_bytes_saved(monkeypatch):
+    monkeypatch.setattr(
+        "src.domains.health.voice_parsing.audio_pool.run", AsyncMock(side_effect=[_RESULT, None])
+    )
+    service = VoiceParsingService()
+    service.client = MagicMock()
+    service.client.audio.transcriptions.create = AsyncMock(return_value="ciento veinte")
+
+    await service.transcribe_audio(b"a" * 1000, "rec.m4a")
+    await service.transcribe_audio(b"b" * 1000, "rec.m4a")
+
+    stats = audio_preprocessing.whisper_upload_stats.stats()
+    assert stats["requests"] == 2
+    assert stats["reencoded"] == 1
+    assert stats["upload_bytes"] == 2000
+    assert stats["whisper_bytes"] == len(b"trimmed") + 1000
+    assert stats["bytes_saved"] == 1000 - len(b"trimmed")
+
+
+@pytest.mark.asyncio
+async def test_real_worker_process_runs_job():
+    # detect_noise_floor stands in for preprocess_audio (which needs ffmpeg):
+    # it exercises spawning, pickling the upload and the result.
+    pool = AudioPreprocessPool(
+        workers=1, max_pending=1, timeout_seconds=30.0,
+        job=audio_preprocessing.detect_noise_floor,
+    )
+    try:
+        result = await pool.run(bytes(32000))
+    finally:
+        pool.shutdown()
+
+    assert result == -50.0, pool.stats()
+    assert pool.pending == 0
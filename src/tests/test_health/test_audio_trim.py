@@ -1,144 +1,242 @@
 """
-Unit tests for the audio trimming helpers in VoiceParsingService.
+Unit tests for the PCM-level audio trimming helpers in
+src/domains/health/audio_preprocessing.py.
 
-These tests use synthetic audio generated with pydub (silence + a 440 Hz
-sine tone simulating voice) so they do not depend on real recordings or
-the OpenAI API.
+These tests use synthetic 16 kHz mono PCM (silence + a 440 Hz sine tone
+simulating voice) so they do not depend on real recordings or the OpenAI
+API. Frame RMS is checked on both the NumPy path (when installed) and the
+audioop fallback.
 
-Skipped automatically if pydub or ffmpeg is not available.
+ffmpeg decode/encode tests are skipped if ffmpeg is not available.
 """
+import math
+import shutil
+from array import array
+
 import pytest
 
-pydub = pytest.importorskip("pydub", reason="pydub is required for audio trim tests")
-from pydub import AudioSegment
-from pydub.generators import Sine
-from pydub.utils import which as pydub_which
+from src.domains.health import audio_preprocessing
+from src.domains.health.audio_preprocessing import (
+    SAMPLE_RATE,
+    _needs_seekable_input,
+    decode_pcm,
+    detect_noise_floor,
+    detect_offset_ms,
+    detect_onset_ms,
+    duration_ms,
+    encode_for_whisper,
+    preprocess_audio,
+    speech_ms,
+    trim_leading_silence,
+    trim_silence,
+)
+
+_FFMPEG_AVAILABLE = shutil.which("ffmpeg") is not None
+
+
+def _tone(duration_ms: int, dbfs: float = -10.0) -> bytes:
+    amplitude = 32767 * 10 ** (dbfs / 20) * math.sqrt(2)  # sine RMS = peak / sqrt(2)
+    n = SAMPLE_RATE * duration_ms // 1000
+    return array(
+        "h", (int(amplitude * math.sin(2 * math.pi * 440 * i / SAMPLE_RATE)) for i in range(n))
+    ).tobytes()
 
-# ffmpeg is required by pydub for any non-trivial decoding/encoding work.
-# detect_leading_silence on raw in-memory AudioSegments does not need ffmpeg,
-# but keeping the guard makes failures explicit on misconfigured CI.
-_FFMPEG_AVAILABLE = pydub_which("ffmpeg") is not None
 
-from src.domains.health.voice_parsing import VoiceParsingService
+def _silence(duration_ms: int) -> bytes:
+    return bytes(SAMPLE_RATE * duration_ms // 1000 * 2)
 
 
-def _make_test_audio(silence_ms: int, voice_ms: int) -> AudioSegment:
-    """Generate synthetic audio: leading silence followed by a 440 Hz tone."""
-    silence = AudioSegment.silent(duration=silence_ms)
-    if voice_ms <= 0:
-        return silence
-    # -10 dBFS tone is well above the default silence threshold (-40 dBFS)
-    voice = Sine(440).to_audio_segment(duration=voice_ms).apply_gain(-10)
-    return silence + voice
+def _make_test_audio(silence_ms: int, voice_ms: int) -> bytes:
+    """Synthetic PCM: leading silence followed by a -10 dBFS 440 Hz tone."""
+    return _silence(silence_ms) + (_tone(voice_ms) if voice_ms > 0 else b"")
+
+
+@pytest.fixture(autouse=True, params=["numpy", "audioop"])
+def rms_backend(request, monkeypatch):
+    if request.param == "numpy":
+        np = pytest.importorskip("numpy")
+        monkeypatch.setattr(audio_preprocessing, "_np", np)
+    else:
+        if audio_preprocessing._audioop is None:
+            pytest.skip("audioop not available")
+        monkeypatch.setattr(audio_preprocessing, "_np", None)
+    return request.param
 
 
 # ---------------------------------------------------------------------------
-# _trim_leading_silence
+# trim_leading_silence
 # ---------------------------------------------------------------------------
 
 class TestTrimLeadingSilence:
     def test_removes_long_leading_silence(self):
         audio = _make_test_audio(silence_ms=5000, voice_ms=3000)
-        trimmed, removed_ms = VoiceParsingService._trim_leading_silence(
-            audio, silence_threshold_dbfs=-40.0
-        )
-        # At least 4.5s should be removed (5s - 300ms safety margin - tolerance)
-        assert removed_ms >= 4500, f"expected >= 4500ms removed, got {removed_ms}"
-        # Voice portion preserved (3000ms tone, allowing for small detection slop)
-        assert len(trimmed) >= 2500, f"expected >= 2500ms remaining, got {len(trimmed)}"
+        trimmed, removed_ms = trim_leading_silence(audio, silence_threshold_dbfs=-40.0)
+        # 5s of silence minus the 300ms safety margin
+        assert removed_ms == 4700
+        assert duration_ms(trimmed) == 3300
 
     def test_no_crash_on_pure_silence(self):
-        audio = AudioSegment.silent(duration=10_000)
-        trimmed, removed_ms = VoiceParsingService._trim_leading_silence(audio)
+        audio = _silence(10_000)
+        trimmed, removed_ms = trim_leading_silence(audio)
         # min_output_duration protection kicks in and returns original
         assert removed_ms == 0
-        assert len(trimmed) == len(audio)
+        assert trimmed == audio
 
     def test_no_cut_when_voice_starts_immediately(self):
         # Only 100ms of silence before voice -> after subtracting 300ms safety
         # margin the start_trim is clamped to 0, so nothing is removed.
         audio = _make_test_audio(silence_ms=100, voice_ms=5000)
-        trimmed, removed_ms = VoiceParsingService._trim_leading_silence(
-            audio, silence_threshold_dbfs=-40.0
-        )
+        trimmed, removed_ms = trim_leading_silence(audio, silence_threshold_dbfs=-40.0)
         assert removed_ms == 0
-        assert len(trimmed) == len(audio)
+        assert trimmed == audio
 
     def test_respects_min_output_duration(self):
-        # Long silence + very short voice -> trimming would yield only ~500ms,
+        # Long silence + very short voice -> trimming would yield only ~800ms,
         # which is below the 1500ms minimum -> return original.
         audio = _make_test_audio(silence_ms=8000, voice_ms=500)
-        trimmed, removed_ms = VoiceParsingService._trim_leading_silence(
-            audio,
-            silence_threshold_dbfs=-40.0,
-            min_output_duration_ms=1500,
+        trimmed, removed_ms = trim_leading_silence(
+            audio, silence_threshold_dbfs=-40.0, min_output_duration_ms=1500
         )
         assert removed_ms == 0
-        assert len(trimmed) == len(audio)
+        assert trimmed == audio
+
+
+class TestDetectOnset:
+    def test_onset_is_first_loud_frame(self):
+        audio = _make_test_audio(silence_ms=1230, voice_ms=1000)
+        assert detect_onset_ms(audio, -40.0) == 1230
+
+    def test_no_onset_returns_duration(self):
+        assert detect_onset_ms(_silence(2000), -40.0) == 2000
+
+    def test_quiet_noise_below_threshold_is_silence(self):
+        audio = _tone(1000, dbfs=-50.0) + _tone(1000, dbfs=-10.0)
+        assert detect_onset_ms(audio, -40.0) == 1000
+
+
+class TestTrimSilence:
+    def test_trims_both_ends(self):
+        audio = _silence(2000) + _tone(2000) + _silence(4000)
+        trimmed, leading_ms, trailing_ms = trim_silence(audio, silence_threshold_dbfs=-40.0)
+        # 300ms kept before the onset, 500ms after the last loud frame
+        assert (leading_ms, trailing_ms) == (1700, 3500)
+        assert duration_ms(trimmed) == 2800
+        assert trimmed == audio[1700 * 32:4500 * 32]
+
+    def test_trailing_only(self):
+        audio = _tone(2000) + _silence(3000)
+        trimmed, leading_ms, trailing_ms = trim_silence(audio, silence_threshold_dbfs=-40.0)
+        assert (leading_ms, trailing_ms) == (0, 2500)
+        assert duration_ms(trimmed) == 2500
+
+    def test_pure_silence_is_untouched(self):
+        audio = _silence(5000)
+        assert trim_silence(audio) == (audio, 0, 0)
+
+    def test_respects_min_output_duration(self):
+        audio = _silence(3000) + _tone(300) + _silence(3000)
+        assert trim_silence(audio, silence_threshold_dbfs=-40.0) == (audio, 0, 0)
+
+    def test_offset_is_end_of_last_loud_frame(self):
+        audio = _tone(1230) + _silence(1000)
+        assert detect_offset_ms(audio, -40.0) == 1230
+        assert detect_offset_ms(_silence(1000), -40.0) == 0
+
+
+class TestSpeechDetection:
+    def test_silence_and_quiet_noise_have_no_speech(self):
+        assert speech_ms(_silence(3000), -50.0) == 0
+        noise = _tone(3000, dbfs=-55.0)
+        assert speech_ms(noise, detect_noise_floor(noise)) == 0
+
+    def test_counts_loud_frames(self):
+        assert speech_ms(_silence(1000) + _tone(700) + _silence(1000), -50.0) == 700
+
+    def test_speech_from_the_first_frame_is_detected(self):
+        # The noise floor is measured on the voice itself (threshold clamped
+        # to -25 dBFS); -30 dBFS speech still counts.
+        audio = _tone(2000, dbfs=-30.0)
+        assert detect_noise_floor(audio) == -25.0
+        assert speech_ms(audio, -25.0) == 2000
 
 
 # ---------------------------------------------------------------------------
-# _detect_noise_floor
+# detect_noise_floor
 # ---------------------------------------------------------------------------
 
 class TestDetectNoiseFloor:
     def test_pure_silence_returns_sensitive_default(self):
-        audio = AudioSegment.silent(duration=2000)
-        threshold = VoiceParsingService._detect_noise_floor(audio)
-        # Pure silence -> -inf dBFS -> fallback to -50.0
-        assert threshold == -50.0
+        assert detect_noise_floor(_silence(2000)) == -50.0
 
     def test_threshold_is_clamped(self):
         # Loud signal at the start would push threshold above -25 dBFS;
         # the implementation clamps to [-55.0, -25.0].
-        loud = Sine(440).to_audio_segment(duration=1000).apply_gain(0)  # ~0 dBFS
-        threshold = VoiceParsingService._detect_noise_floor(loud)
-        assert -55.0 <= threshold <= -25.0
+        assert detect_noise_floor(_tone(1000, dbfs=-6.0)) == -25.0
 
     def test_threshold_is_above_noise_floor(self):
-        # A quiet noise sample around -45 dBFS -> threshold should be ~-39 dBFS
+        # A quiet noise sample around -45 dBFS -> threshold ~-39 dBFS
         # (noise_floor + 6 dB), still within the clamp range.
-        quiet = Sine(440).to_audio_segment(duration=1000).apply_gain(-45)
-        threshold = VoiceParsingService._detect_noise_floor(quiet)
-        assert -55.0 <= threshold <= -25.0
-        # Should be strictly greater than the underlying noise floor
-        assert threshold > quiet.dBFS
+        threshold = detect_noise_floor(_tone(1000, dbfs=-45.0))
+        assert threshold == pytest.approx(-39.0, abs=0.1)
 
 
 # ---------------------------------------------------------------------------
-# _export_audio_for_whisper (requires ffmpeg for MP3 encoding)
+# Container handling
 # ---------------------------------------------------------------------------
 
-@pytest.mark.skipif(not _FFMPEG_AVAILABLE, reason="ffmpeg not available")
-class TestExportForWhisper:
-    def test_export_returns_mp3_bytes(self):
-        audio = _make_test_audio(silence_ms=100, voice_ms=1000)
-        data, filename = VoiceParsingService._export_audio_for_whisper(audio)
-        assert isinstance(data, bytes)
-        assert len(data) > 0
-        assert filename == "audio.mp3"
+def _box(kind: bytes, payload: bytes = b"") -> bytes:
+    return (8 + len(payload)).to_bytes(4, "big") + kind + payload
+
+
+class TestSeekableInput:
+    def test_moov_after_mdat_needs_seekable_input(self):
+        data = _box(b"ftyp", b"M4A ") + _box(b"mdat", b"\0" * 64) + _box(b"moov")
+        assert _needs_seekable_input(data)
+
+    def test_faststart_mp4_is_pipeable(self):
+        data = _box(b"ftyp", b"M4A ") + _box(b"moov") + _box(b"mdat", b"\0" * 64)
+        assert not _needs_seekable_input(data)
+
+    def test_other_containers_are_pipeable(self):
+        assert not _needs_seekable_input(b"ID3\x04" + b"\0" * 64)
+        assert not _needs_seekable_input(b"RIFF\0\0\0\0WAVE")
 
 
 # ---------------------------------------------------------------------------
-# _format_from_content_type
+# ffmpeg round trip
 # ---------------------------------------------------------------------------
 
-class TestFormatFromContentType:
-    @pytest.mark.parametrize(
-        "content_type,filename,expected",
-        [
-            ("audio/mp4", None, "mp4"),
-            ("audio/m4a", None, "mp4"),
-            ("audio/3gpp", None, "3gpp"),
-            ("audio/mpeg", None, "mp3"),
-            (None, "recording.m4a", "mp4"),
-            (None, "recording.3gpp", "3gpp"),
-            (None, None, "mp4"),  # default fallback
-            ("audio/mp4; codecs=mp4a.40.2", None, "mp4"),  # parameterized type
-        ],
+@pytest.mark.skipif(not _FFMPEG_AVAILABLE, reason="ffmpeg not available")
+class TestFfmpegPipes:
+    def test_encode_returns_ogg_opus(self):
+        data, filename = encode_for_whisper(_make_test_audio(silence_ms=100, voice_ms=1000))
+        assert data[:4] == b"OggS"
+        assert filename == "audio.ogg"
+
+    def test_preprocess_trims_encoded_upload(self):
+        upload, _ = encode_for_whisper(_make_test_audio(silence_ms=5000, voice_ms=3000))
+        assert abs(duration_ms(decode_pcm(upload)) - 8000) <= 50
+
+        result = preprocess_audio(upload)
+        assert result.audio[:4] == b"OggS"
+        assert result.metadata["silence_removed_ms"] >= 4500
+
+    def test_untrimmed_upload_is_reencoded_when_smaller(self):
+        upload = _run_wav(_make_test_audio(silence_ms=100, voice_ms=3000))
+
+        result = preprocess_audio(upload, reencode=True)
+        assert result.audio[:4] == b"OggS"
+        assert len(result.audio) < len(upload)
+        assert preprocess_audio(upload, reencode=False).audio is None
+
+    def test_silent_upload_is_flagged_and_not_encoded(self):
+        result = preprocess_audio(_run_wav(_silence(3000)))
+        assert not result.speech_detected
+        assert result.audio is None
+
+
+def _run_wav(pcm: bytes) -> bytes:
+    """16 kHz mono WAV upload (uncompressed, like some Android recorders)."""
+    return audio_preprocessing._run_ffmpeg(
+        ["-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1"], ["-f", "wav"], pcm
     )
-    def test_format_detection(self, content_type, filename, expected):
-        assert (
-            VoiceParsingService._format_from_content_type(content_type, filename)
-            == expected
-        )
@@ -0,0 +1,186 @@
+"""
+Tests for the streaming audio upload reader (src/domains/health/audio_upload.py)
+and the three voice endpoints that use it.
+"""
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+from unittest.mock import AsyncMock, MagicMock
+
+from src.core.database import db, get_database
+from src.domains.auth.routes import verify_token, verify_token_jwt
+from src.domains.health import audio_upload
+from src.domains.health.audio_upload import detect_audio_format, read_audio_upload
+from src.domains.health.route_modules import voice_routes
+from src.domains.medications import routes as medication_routes
+from src.main import app
+
+M4A_HEAD = b"\x00\x00\x00\x1cftypM4A \x00\x00\x00\x00"
+BOUNDARY = b"voiceboundary"
+
+
+@pytest.mark.parametrize("head, expected", [
+    (M4A_HEAD, ("mp4", "m4a")),
+    (b"\x00\x00\x00\x18ftyp3gp4\x00\x00", ("mp4", "m4a")),
+    (b"OggS\x00\x02" + b"\x00" * 6, ("ogg", "ogg")),
+    (b"RIFF\x24\x00\x00\x00WAVEfmt ", ("wav", "wav")),
+    (b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81", ("webm", "webm")),
+    (b"ID3\x04\x00\x00\x00\x00", ("mp3", "mp3")),
+    (b"\xff\xfb\x90\x64\x00\x00", ("mp3", "mp3")),
+    (b"\xff\xf1\x50\x80\x00\x1f", ("aac", "aac")),
+    (b"#!AMR\n\x3c\x00", ("amr", "amr")),
+    (b"fLaC\x00\x00\x00\x22", ("flac", "flac")),
+])
+def test_detects_container_from_first_bytes(head, expected):
+    assert detect_audio_format(head) == expected
+
+
+@pytest.mark.parametrize("head", [b"%PDF-1.7\n%\xe2\xe3", b"<html><body>", b"\x89PNG\r\n\x1a\n\x00\x00", b"PK\x03\x04"])
+def test_rejects_non_audio(head):
+    assert detect_audio_format(head) is None
+
+
+def _multipart(data: bytes, field: str = "audio", filename: str = "rec.m4a") -> bytes:
+    return (
+        b"--" + BOUNDARY + b"\r\n"
+        + f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'.encode()
+        + b"Content-Type: audio/mp4\r\n\r\n"
+        + data
+        + b"\r\n--" + BOUNDARY + b"--\r\n"
+    )
+
+
+def _streaming_request(body: bytes, chunk_size: int = 64 * 1024):
+    """Request without Content-Length whose body arrives in chunks; counts chunks read."""
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    state = {"read": 0}
+
+    async def receive():
+        index = state["read"]
+        state["read"] += 1
+        return {"type": "http.request", "body": chunks[index], "more_body": index + 1 < len(chunks)}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/",
+        "headers": [(b"content-type", b"multipart/form-data; boundary=" + BOUNDARY)],
+    }
+    return Request(scope, receive), state, len(chunks)
+
+
+@pytest.mark.asyncio
+async def test_oversized_stream_is_cut_at_the_limit():
+    request, state, total_chunks = _streaming_request(_multipart(M4A_HEAD + b"\0" * (4 * 1024 * 1024)))
+
+    with pytest.raises(HTTPException) as exc:
+        await read_audio_upload(request, max_bytes=1024 * 1024)
+
+    assert exc.value.status_code == 413
+    assert state["read"] <= 1024 * 1024 // (64 * 1024) + 2
+    assert state["read"] < total_chunks
+
+
+@pytest.mark.asyncio
+async def test_non_audio_is_rejected_on_the_first_chunk():
+    request, state, total_chunks = _streaming_request(_multipart(b"%PDF-1.7\n" + b"\0" * (1024 * 1024)))
+
+    with pytest.raises(HTTPException) as exc:
+        await read_audio_upload(request)
+
+    assert exc.value.status_code == 415
+    assert state["read"] == 1 < total_chunks
+
+
+@pytest.mark.asyncio
+async def test_accepted_upload_is_one_buffer_named_by_content():
+    payload = M4A_HEAD + bytes(range(256)) * 40
+    request, _, _ = _streaming_request(_multipart(payload, filename="grabacion.mp3"), chunk_size=1000)
+
+    upload = await read_audio_upload(request)
+
+    assert isinstance(upload.data, bytearray)
+    assert upload.data == payload
+    assert (upload.format, upload.filename) == ("mp4", "audio.m4a")
+    assert upload.client_filename == "grabacion.mp3"
+    assert upload.content_type == "audio/mp4"
+
+
+@pytest.mark.asyncio
+async def test_other_parts_are_ignored():
+    body = (
+        b"--" + BOUNDARY + b'\r\nContent-Disposition: form-data; name="note"\r\n\r\nhola\r\n'
+        + _multipart(M4A_HEAD + b"\0" * 2000)
+    )
+    request, _, _ = _streaming_request(body)
+    upload = await read_audio_upload(request)
+    assert len(upload.data) == len(M4A_HEAD) + 2000
+
+
+# ---------------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------------
+
+_ENDPOINTS = [
+    ("/health/parse-bp-audio", "parse_audio"),
+    ("/medications/parse-take-voice", "parse_take_audio"),
+    ("/medications/parse-voice", "parse_medication_audio"),
+]
+
+
+@pytest.fixture
+def voice_client(monkeypatch):
+    service = MagicMock()
+    service.parse_audio = AsyncMock(return_value={"confidence": "low", "transcription": ""})
+    service.parse_take_audio = AsyncMock(return_value={"intent": "unknown", "transcription": ""})
+    service.parse_medication_audio = AsyncMock(return_value={"name": None, "transcription": ""})
+    monkeypatch.setattr(voice_routes, "get_voice_parsing_service", lambda: service)
+    monkeypatch.setattr(medication_routes, "get_voice_parsing_service", lambda: service)
+    monkeypatch.setattr(voice_routes, "BiometricEventService", MagicMock())
+    db.connect = MagicMock()
+    app.dependency_overrides[get_database] = lambda: MagicMock()
+    app.dependency_overrides[verify_token_jwt] = lambda: "patient-1"
+    app.dependency_overrides[verify_token] = lambda: "patient-1"
+    yield TestClient(app), service
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("path, method", _ENDPOINTS)
+def test_endpoint_passes_streamed_buffer(voice_client, path, method):
+    client, service = voice_client
+    payload = M4A_HEAD + b"\0" * 5000
+
+    response = client.post(path, files={"audio": ("rec.3gp", payload, "audio/3gpp")})
+
+    assert response.status_code == 200
+    data, filename = getattr(service, method).await_args.args
+    assert data == payload
+    assert filename == "audio.m4a"
+
+
+@pytest.mark.parametrize("path", [path for path, _ in _ENDPOINTS])
+def test_endpoint_rejects_oversized_upload(voice_client, monkeypatch, path):
+    client, _ = voice_client
+    monkeypatch.setattr(audio_upload.settings, "VOICE_UPLOAD_MAX_BYTES", 4096)
+
+    response = client.post(path, files={"audio": ("rec.m4a", M4A_HEAD + b"\0" * 8192, "audio/mp4")})
+
+    assert response.status_code == 413
+
+
+@pytest.mark.parametrize("path", [path for path, _ in _ENDPOINTS])
+def test_endpoint_rejects_by_content_not_name(voice_client, path):
+    client, _ = voice_client
+    response = client.post(path, files={"audio": ("rec.m4a", b"<html>" + b"\0" * 5000, "audio/mp4")})
+    assert response.status_code == 415
+
+
+def test_endpoint_rejects_small_or_missing_audio(voice_client):
+    client, _ = voice_client
+    assert client.post(
+        "/health/parse-bp-audio", files={"audio": ("rec.m4a", M4A_HEAD, "audio/mp4")}
+    ).status_code == 400
+    assert client.post(
+        "/health/parse-bp-audio", files={"other": ("rec.m4a", M4A_HEAD * 100, "audio/mp4")}
+    ).status_code == 400
@@ -0,0 +1,145 @@
+"""
+Tests for the local Spanish BP grammar (src/domains/health/bp_grammar.py)
+and how VoiceParsingService.parse_transcription routes between it and the
+LLM.
+
+The phrase corpus in bp_phrase_corpus.json holds real dictation shapes:
+"local" phrases must be answered without the LLM, "llm" phrases must be
+marked low-confidence so the LLM decides.
+"""
+import json
+from pathlib import Path
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.domains.health import voice_parsing
+from src.domains.health.bp_grammar import bp_parse_stats, parse_bp_phrase, parse_number, tokenize
+from src.domains.health.voice_parsing import VoiceParsingService
+
+CORPUS_PATH = Path(__file__).parent / "bp_phrase_corpus.json"
+with open(CORPUS_PATH, encoding="utf-8") as f:
+    CORPUS = json.load(f)
+
+
+def _number(text: str) -> int:
+    tokens = tokenize(text)
+    value, end = parse_number(tokens, 0)
+    assert end == len(tokens)
+    return value
+
+
+@pytest.mark.parametrize("text, value", [
+    ("cero", 0),
+    ("nueve", 9),
+    ("quince", 15),
+    ("dieciséis", 16),
+    ("veintidós", 22),
+    ("veinti tres", 23),
+    ("treinta y un", 31),
+    ("setenta y cinco", 75),
+    ("noventa y nueve", 99),
+    ("cien", 100),
+    ("ciento uno", 101),
+    ("ciento veinte", 120),
+    ("ciento treinta y ocho", 138),
+    ("doscientos", 200),
+    ("doscientos cuarenta y siete", 247),
+    ("trescientos", 300),
+    ("135", 135),
+])
+def test_spanish_cardinals(text, value):
+    assert _number(text) == value
+
+
+def test_tokenize_strips_accents_and_splits_slash():
+    assert tokenize("¿Presión 120/80, ciento dieciséis?") == [
+        "presion", "120", "/", "80", "ciento", "dieciseis",
+    ]
+
+
+@pytest.mark.parametrize("case", CORPUS["local"], ids=lambda c: c["text"][:40])
+def test_corpus_resolved_locally(case):
+    result = parse_bp_phrase(case["text"])
+    assert result == {**case["expected"], "device_classification": None, "confidence": "high"}
+
+
+@pytest.mark.parametrize("case", CORPUS["llm"], ids=lambda c: c["why"])
+def test_corpus_left_to_llm(case):
+    assert parse_bp_phrase(case["text"])["confidence"] == "low"
+
+
+def test_low_confidence_still_reports_what_was_found():
+    result = parse_bp_phrase("Creo que ciento veinte sobre ochenta, pulso setenta")
+    assert (result["systolic"], result["diastolic"], result["pulse"]) == (120, 80, 70)
+    assert result["confidence"] == "low"
+
+
+# ---------------------------------------------------------------------------
+# Routing in parse_transcription
+# ---------------------------------------------------------------------------
+
+def _completion(payload: dict):
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = json.dumps(payload)
+    return response
+
+
+@pytest.fixture
+def service():
+    svc = VoiceParsingService()
+    svc.client = MagicMock()
+    svc.client.chat.completions.create = AsyncMock(return_value=_completion({
+        "systolic": 130, "diastolic": 85, "pulse": None,
+        "device_classification": "omron", "confidence": "high",
+    }))
+    return svc
+
+
+@pytest.mark.asyncio
+async def test_confident_phrase_skips_llm(service):
+    result = await service.parse_transcription("Ciento veinte sobre ochenta con pulso de 70")
+
+    assert result == {
+        "systolic": 120, "diastolic": 80, "pulse": 70,
+        "device_classification": None, "confidence": "high",
+    }
+    service.client.chat.completions.create.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_ambiguous_phrase_goes_to_llm(service):
+    result = await service.parse_transcription("El Omron marcó ciento treinta sobre ochenta y cinco")
+
+    assert result["device_classification"] == "omron"
+    service.client.chat.completions.create.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_llm_failure_falls_back_to_local_values(service):
+    service.client.chat.completions.create = AsyncMock(side_effect=RuntimeError("timeout"))
+    result = await service.parse_transcription("Creo que ciento veinte sobre ochenta")
+
+    assert (result["systolic"], result["diastolic"], result["confidence"]) == (120, 80, "low")
+
+
+@pytest.mark.asyncio
+async def test_local_parser_can_be_disabled(service, monkeypatch):
+    monkeypatch.setattr(voice_parsing.settings, "VOICE_LOCAL_BP_PARSER_ENABLED", False)
+    await service.parse_transcription("Ciento veinte sobre ochenta")
+    service.client.chat.completions.create.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_stats_report_local_share_over_corpus(service):
+    phrases = [c["text"] for c in CORPUS["local"] + CORPUS["llm"]]
+    for text in phrases:
+        await service.parse_transcription(text)
+
+    stats = bp_parse_stats.stats()
+    assert stats["requests"] == len(phrases)
+    assert stats["resolved_locally"] == len(CORPUS["local"])
+    assert stats["local_rate"] == round(len(CORPUS["local"]) / len(phrases), 4)
+    assert stats["llm_calls"] == service.client.chat.completions.create.await_count
+    assert stats["estimated_ms_saved"] is not None
@@ -0,0 +1,430 @@
+"""
+Unit tests for the health service modules.
+
+The Mongo handle is an AsyncMock/MagicMock so the tests run offline; they
+assert both the shape of the response and how many round trips the service
+issues against the collections.
+"""
+import asyncio
+import pytest
+from datetime import datetime, timezone, timedelta
+from unittest.mock import AsyncMock, MagicMock
+from bson import ObjectId
+
+from src.domains.health.service_modules import (
+    BloodPressureService,
+    HealthMetricsService,
+    HealthRollupService,
+    PatientDataService,
+    PatientSnapshotService,
+)
+from src._config.settings import settings
+
+
+PATIENT_ID = str(ObjectId())
+
+
+def _agg_cursor(rows):
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=rows)
+    return cursor
+
+
+def _async_rows(rows):
+    cursor = MagicMock()
+    cursor.__aiter__.return_value = rows
+    return cursor
+
+
+def _make_db(agg_rows=None):
+    db = MagicMock()
+    db.users.find = MagicMock(return_value=_agg_cursor([{"_id": ObjectId(PATIENT_ID), "name": "Carmen"}]))
+    db.health_metrics.aggregate = MagicMock(return_value=_agg_cursor(agg_rows or []))
+    db.health_metrics.find_one = AsyncMock(return_value=None)
+    db.health_metrics.count_documents = AsyncMock(return_value=0)
+    return db
+
+
+def _day(offset: int) -> str:
+    today = datetime.now(timezone.utc).date()
+    return (today - timedelta(days=offset)).isoformat()
+
+
+# ---------------------------------------------------------------------------
+# BloodPressureService.get_patient_heart_rate_history
+# ---------------------------------------------------------------------------
+
+class TestHeartRateHistory:
+    @pytest.mark.asyncio
+    async def test_single_aggregation_for_whole_window(self):
+        db = _make_db()
+        await BloodPressureService(db).get_patient_heart_rate_history(PATIENT_ID, days=30)
+
+        # One aggregate, no per-day find_one/count_documents round trips
+        assert db.health_metrics.aggregate.call_count == 1
+        db.health_metrics.find_one.assert_not_awaited()
+        db.health_metrics.count_documents.assert_not_awaited()
+
+        pipeline = db.health_metrics.aggregate.call_args.args[0]
+        match = pipeline[0]["$match"]
+        assert match["userId"] == PATIENT_ID
+        assert set(match["type"]["$in"]) == {"heart_rate", "heart_rate_sample"}
+        assert match["date"] == {"$gte": _day(29), "$lte": _day(0)}
+
+    @pytest.mark.asyncio
+    async def test_missing_days_are_filled(self):
+        db = _make_db([
+            {"_id": _day(0), "avg_bpm": 72, "min_bpm": 60, "max_bpm": 95, "sample_count": 12},
+            {"_id": _day(3), "avg_bpm": None, "min_bpm": None, "max_bpm": None, "sample_count": 4},
+        ])
+        result = await BloodPressureService(db).get_patient_heart_rate_history(PATIENT_ID, days=7)
+
+        points = result["data_points"]
+        assert [p["date"] for p in points] == [_day(i) for i in range(6, -1, -1)]
+        assert points[-1] == {
+            "date": _day(0), "avg_bpm": 72, "min_bpm": 60, "max_bpm": 95, "sample_count": 12,
+        }
+        # Samples without a daily aggregate: counted but not charted
+        assert points[3]["avg_bpm"] is None
+        assert points[3]["sample_count"] == 4
+        assert points[0] == {
+            "date": _day(6), "avg_bpm": None, "min_bpm": None, "max_bpm": None, "sample_count": 0,
+        }
+        assert result["count"] == 1
+        assert result["patient_name"] == "Carmen"
+        assert result["days_requested"] == 7
+
+
+# ---------------------------------------------------------------------------
+# HealthRollupService (materialized 30-day summary)
+# ---------------------------------------------------------------------------
+
+def _rollup_db(rollup_doc=None):
+    db = MagicMock()
+    db.health_rollups.find_one = AsyncMock(return_value=rollup_doc)
+    db.health_rollups.update_one = AsyncMock()
+    db.health_metrics.update_one = AsyncMock()
+    db.health_metrics.aggregate = MagicMock(return_value=_agg_cursor([]))
+    db.blood_pressure_readings.aggregate = MagicMock(return_value=_agg_cursor([]))
+    db.blood_pressure_readings.insert_many = AsyncMock(
+        return_value=MagicMock(inserted_ids=[ObjectId(), ObjectId()])
+    )
+    return db
+
+
+class TestHealthRollups:
+    @pytest.mark.asyncio
+    async def test_summary_is_one_point_read(self):
+        db = _rollup_db({"_id": PATIENT_ID, "backfilled": True, "days": {
+            _day(0): {"steps": 4000, "sleep_minutes": 420, "hr_avg": 70, "hr_min": 55, "hr_max": 120,
+                      "bp_systolic_sum": 250, "bp_diastolic_sum": 170, "bp_count": 2},
+            _day(5): {"steps": 6000, "sleep_minutes": 360},
+            _day(45): {"steps": 99999, "bp_systolic_sum": 999, "bp_diastolic_sum": 999, "bp_count": 1},
+        }})
+        summary = await HealthMetricsService(db).get_30day_summary(PATIENT_ID)
+
+        db.health_rollups.find_one.assert_awaited_once()
+        db.health_metrics.aggregate.assert_not_called()
+        db.blood_pressure_readings.aggregate.assert_not_called()
+
+        assert summary["window"] == {"from": _day(30), "to": _day(0), "days": 30}
+        assert summary["blood_pressure"] == {
+            "avg_systolic": 125.0, "avg_diastolic": 85.0, "readings_count": 2,
+        }
+        assert summary["steps"] == {"total": 10000, "daily_average": 5000, "days_with_data": 2}
+        assert summary["sleep"]["avg_minutes"] == 390.0
+        assert summary["sleep"]["avg_hours"] == 6.5
+        assert summary["heart_rate"] == {
+            "avg_bpm": 70.0, "min_bpm": 55, "max_bpm": 120, "days_with_data": 1,
+        }
+
+    @pytest.mark.asyncio
+    async def test_ingest_sets_daily_values(self):
+        db = _rollup_db()
+        metrics = MagicMock(
+            user_id=PATIENT_ID, date=_day(0), source="watch", sync_timestamp=1,
+            steps=1234, sleep_minutes=None, avg_heart_rate=71, min_heart_rate=58,
+            max_heart_rate=110, heart_rate_samples=[],
+        )
+        await HealthMetricsService(db).ingest_health_metrics(metrics)
+
+        update = db.health_rollups.update_one.call_args
+        assert update.args[0] == {"_id": PATIENT_ID}
+        fields = update.args[1]["$set"]
+        assert fields[f"days.{_day(0)}.steps"] == 1234
+        assert fields[f"days.{_day(0)}.hr_avg"] == 71
+        assert f"days.{_day(0)}.sleep_minutes" not in fields
+        assert update.kwargs["upsert"] is True
+
+    @pytest.mark.asyncio
+    async def test_bp_batch_increments_per_day_totals(self):
+        db = _rollup_db()
+        await BloodPressureService(db).store_blood_pressure_batch(PATIENT_ID, [
+            {"systolic": 120, "diastolic": 80, "timestamp": "2026-03-01T08:00:00Z"},
+            {"systolic": 140, "diastolic": 90, "timestamp": "2026-03-01T20:00:00Z"},
+        ])
+
+        db.health_rollups.update_one.assert_awaited_once()
+        inc = db.health_rollups.update_one.call_args.args[1]["$inc"]
+        assert inc == {
+            "days.2026-03-01.bp_systolic_sum": 260,
+            "days.2026-03-01.bp_diastolic_sum": 170,
+            "days.2026-03-01.bp_count": 2,
+        }
+
+    @pytest.mark.asyncio
+    async def test_partial_rollup_from_post_deploy_sync_is_backfilled(self):
+        # A sync upserted today's values before anyone read the summary
+        db = _rollup_db({"_id": PATIENT_ID, "days": {_day(0): {"steps": 500}}})
+        db.health_rollups.replace_one = AsyncMock()
+        db.blood_pressure_readings.aggregate = MagicMock(return_value=_async_rows([
+            {"_id": _day(3), "bp_systolic_sum": 130, "bp_diastolic_sum": 80, "bp_count": 1},
+        ]))
+        db.health_metrics.find = MagicMock(return_value=_async_rows([
+            {"type": "steps", "date": _day(0), "value": 500},
+            {"type": "steps", "date": _day(2), "value": 8000},
+        ]))
+
+        summary = await HealthMetricsService(db).get_30day_summary(PATIENT_ID)
+
+        assert summary["steps"]["total"] == 8500
+        assert summary["blood_pressure"]["readings_count"] == 1
+        replaced = db.health_rollups.replace_one.call_args.args[1]
+        assert replaced["backfilled"] is True
+        # Readings stored without `date` are grouped by their timestamp's day
+        match = db.blood_pressure_readings.aggregate.call_args.args[0][0]["$match"]
+        assert {"date": None, "timestamp": {"$gte": _day(30)}} in match["$or"]
+
+    @pytest.mark.asyncio
+    async def test_bp_reading_without_date_uses_timestamp_day(self):
+        db = _rollup_db()
+        await HealthRollupService(db).record_bp_readings(PATIENT_ID, [
+            {"systolic": 120, "diastolic": 80, "timestamp": "2026-03-01T08:00:00Z"},
+        ])
+        inc = db.health_rollups.update_one.call_args.args[1]["$inc"]
+        assert inc["days.2026-03-01.bp_count"] == 1
+        assert "backfilled" not in db.health_rollups.update_one.call_args.args[1]["$set"]
+
+    @pytest.mark.asyncio
+    async def test_rollup_failure_does_not_fail_ingest(self):
+        db = _rollup_db()
+        db.health_rollups.update_one = AsyncMock(side_effect=RuntimeError("boom"))
+        metrics = MagicMock(
+            user_id=PATIENT_ID, date=_day(0), source="watch", sync_timestamp=1,
+            steps=10, sleep_minutes=None, avg_heart_rate=None, heart_rate_samples=[],
+        )
+        result = await HealthMetricsService(db).ingest_health_metrics(metrics)
+        assert result["success"] is True
+
+
+# ---------------------------------------------------------------------------
+# PatientSnapshotService (caregiver dashboard)
+# ---------------------------------------------------------------------------
+
+class TestPatientSnapshots:
+    @pytest.mark.asyncio
+    async def test_bp_batch_keeps_only_newest_reading(self):
+        db = MagicMock()
+        db.patient_snapshots.update_one = AsyncMock()
+        await PatientSnapshotService(db).record_bp_readings(PATIENT_ID, [
+            {"systolic": 120, "diastolic": 80, "timestamp": "2026-03-01T20:00:00Z", "stage": "normal"},
+            {"systolic": 160, "diastolic": 100, "timestamp": "2026-03-01T08:00:00Z", "stage": "hypertension_2"},
+        ])
+
+        db.patient_snapshots.update_one.assert_awaited_once()
+        call = db.patient_snapshots.update_one.call_args
+        assert call.args[0] == {"_id": PATIENT_ID}
+        assert call.kwargs["upsert"] is True
+        stage = call.args[1][0]["$set"]
+        # Conditional on being newer than what is stored
+        newer, latest, keep = stage["latest_bp"]["$cond"]
+        assert latest["$literal"]["systolic"] == 120
+        assert keep == "$latest_bp"
+        assert stage["last_sync"]["$max"][1] == latest["$literal"]["timestamp_ms"]
+
+    @pytest.mark.asyncio
+    async def test_client_date_is_a_literal_in_the_steps_pipeline(self):
+        db = MagicMock()
+        db.patient_snapshots.update_one = AsyncMock()
+        metrics = MagicMock(
+            user_id=PATIENT_ID, date="$steps.value", sync_timestamp=1000,
+            steps=10, avg_heart_rate=None,
+        )
+        await PatientSnapshotService(db).record_metrics(metrics)
+
+        steps = db.patient_snapshots.update_one.call_args.args[1][0]["$set"]["steps"]
+        later_day, same_day = steps["$cond"][0]["$or"]
+        assert later_day["$gt"][0] == {"$literal": "$steps.value"}
+        assert same_day["$and"][0]["$eq"][0] == {"$literal": "$steps.value"}
+
+    @pytest.mark.asyncio
+    async def test_alert_counts_each_caregiver(self):
+        db = MagicMock()
+        db.patient_snapshots.update_one = AsyncMock()
+        await PatientSnapshotService(db).record_alert(PATIENT_ID, ["cg1", "cg2"])
+
+        update = db.patient_snapshots.update_one.call_args.args[1]
+        assert update["$inc"] == {"unread_alerts.cg1": 1, "unread_alerts.cg2": 1}
+
+    @pytest.mark.asyncio
+    async def test_missing_snapshot_is_rebuilt(self):
+        db = MagicMock()
+        db.patient_snapshots.find = MagicMock(return_value=_agg_cursor([]))
+        db.patient_snapshots.replace_one = AsyncMock()
+        db.blood_pressure_readings.find_one = AsyncMock(return_value={
+            "systolic": 130, "diastolic": 85, "timestamp": "2026-03-01T08:00:00Z", "stage": "elevated",
+        })
+        db.health_metrics.find_one = AsyncMock(return_value=None)
+        db.biometric_events.aggregate = MagicMock(
+            return_value=_agg_cursor([{"_id": "cg1", "count": 2}])
+        )
+
+        snaps = await PatientSnapshotService(db).get_snapshots([PATIENT_ID])
+
+        snap = snaps[PATIENT_ID]
+        assert snap["latest_bp"]["systolic"] == 130
+        assert snap["unread_alerts"] == {"cg1": 2}
+        assert "latest_hr" not in snap
+        db.patient_snapshots.replace_one.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_partial_snapshot_from_post_deploy_alert_is_rebuilt(self):
+        db = MagicMock()
+        partial = {"_id": PATIENT_ID, "unread_alerts": {"cg1": 1}}  # Upserted by record_alert
+        done = {"_id": "other", "backfilled": True, "latest_bp": {"systolic": 118}}
+        db.patient_snapshots.find = MagicMock(return_value=_agg_cursor([partial, done]))
+        db.patient_snapshots.replace_one = AsyncMock()
+        db.blood_pressure_readings.find_one = AsyncMock(return_value={
+            "systolic": 130, "diastolic": 85, "timestamp": "2026-03-01T08:00:00Z", "stage": "elevated",
+        })
+        db.health_metrics.find_one = AsyncMock(return_value=None)
+        db.biometric_events.aggregate = MagicMock(
+            return_value=_agg_cursor([{"_id": "cg1", "count": 3}])
+        )
+
+        snaps = await PatientSnapshotService(db).get_snapshots([PATIENT_ID, "other"])
+
+        assert snaps[PATIENT_ID]["latest_bp"]["systolic"] == 130
+        assert snaps[PATIENT_ID]["unread_alerts"] == {"cg1": 3}
+        assert snaps[PATIENT_ID]["backfilled"] is True
+        assert snaps["other"] is done
+        db.patient_snapshots.replace_one.assert_awaited_once()
+
+
+# ---------------------------------------------------------------------------
+# PatientDataService.get_patient_health_summary (concurrent fan-out)
+# ---------------------------------------------------------------------------
+
+def _summary_db(delay: float = 0.0):
+    """Every read sleeps `delay` seconds and tracks peak concurrency."""
+    state = {"in_flight": 0, "peak": 0}
+
+    def slow(value):
+        async def _read(*args, **kwargs):
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+            await asyncio.sleep(delay)
+            state["in_flight"] -= 1
+            return value
+        return AsyncMock(side_effect=_read)
+
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    db = MagicMock()
+    users_cursor = MagicMock()
+    users_cursor.to_list = slow([{"_id": ObjectId(PATIENT_ID), "name": "Carmen"}])
+    db.users.find = MagicMock(return_value=users_cursor)
+    db.health_metrics.find_one = slow({"average": 70, "min": 60, "max": 90, "value": 4000, "timestamp": ts})
+    db.blood_pressure_readings.find_one = slow({"systolic": 130, "diastolic": 85, "timestamp": ts})
+    db.blood_pressure_readings.count_documents = slow(2)
+    bp_cursor = MagicMock()
+    bp_cursor.to_list = slow([{"systolic": 130, "diastolic": 85}, {"systolic": 120, "diastolic": 75}])
+    db.blood_pressure_readings.find = MagicMock(return_value=bp_cursor)
+    db.sensor_batches.find_one = slow(None)
+    return db, state
+
+
+class TestHealthSummaryFanOut:
+    @pytest.mark.asyncio
+    async def test_reads_run_concurrently_under_cap(self, monkeypatch):
+        monkeypatch.setattr(settings, "HEALTH_SUMMARY_MAX_CONCURRENCY", 3)
+        db, state = _summary_db(delay=0.05)
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await PatientDataService(db).get_patient_health_summary(PATIENT_ID)
+        elapsed = loop.time() - start
+
+        assert state["peak"] == 3
+        # 7 reads, 3 at a time -> ~3 rounds, far below the sequential sum
+        assert elapsed < 7 * 0.05
+        assert result["patient_name"] == "Carmen"
+        assert result["blood_pressure"]["reading_count"] == 2
+        assert result["blood_pressure"]["avg_systolic"] == 125
+        assert result["heart_rate"]["available"] is True
+        assert result["degraded_sections"] == []
+
+    @pytest.mark.asyncio
+    async def test_failed_section_degrades_only_itself(self, monkeypatch):
+        monkeypatch.setattr(settings, "HEALTH_SUMMARY_SECTION_TIMEOUT_SECONDS", 0.05)
+        db, _ = _summary_db()
+
+        async def _hang(*args, **kwargs):
+            await asyncio.sleep(1)
+        db.blood_pressure_readings.count_documents = AsyncMock(side_effect=_hang)
+
+        result = await PatientDataService(db).get_patient_health_summary(PATIENT_ID)
+
+        assert result["degraded_sections"] == ["blood_pressure"]
+        assert result["blood_pressure"] == {"available": False, "reading_count": 0}
+        assert result["heart_rate"]["available"] is True
+        assert result["steps"]["available"] is True
+        assert result["data_available"] is True
+
+    @pytest.mark.asyncio
+    async def test_degraded_summary_is_not_cached(self, monkeypatch):
+        from src.domains.health.services import HealthService
+
+        monkeypatch.setattr(settings, "HEALTH_SUMMARY_SECTION_TIMEOUT_SECONDS", 0.05)
+        db, _ = _summary_db()
+        healthy_count = db.blood_pressure_readings.count_documents
+
+        async def _hang(*args, **kwargs):
+            await asyncio.sleep(1)
+        db.blood_pressure_readings.count_documents = AsyncMock(side_effect=_hang)
+        first = await HealthService(db).get_patient_health_summary(PATIENT_ID)
+        assert first["degraded_sections"] == ["blood_pressure"]
+
+        db.blood_pressure_readings.count_documents = healthy_count  # Mongo recovered
+        second = await HealthService(db).get_patient_health_summary(PATIENT_ID)
+        third = await HealthService(db).get_patient_health_summary(PATIENT_ID)
+
+        assert second["degraded_sections"] == []
+        assert second["blood_pressure"]["reading_count"] == 2
+        assert third is second  # Complete summaries are cached as before
+
+
+# ---------------------------------------------------------------------------
+# Response cache invalidation from the write paths
+# ---------------------------------------------------------------------------
+
+class TestWritePathInvalidation:
+    @pytest.mark.asyncio
+    async def test_bp_store_and_metrics_ingest_bump_patient_version(self):
+        from src.core.cache import response_cache
+
+        db = _rollup_db()
+        db.blood_pressure_readings.insert_one = AsyncMock(return_value=MagicMock(inserted_id=ObjectId()))
+        before = response_cache.version(PATIENT_ID)
+        invalidations = response_cache.stats()["invalidations"]
+
+        await BloodPressureService(db).store_blood_pressure_reading(
+            PATIENT_ID, 120, 80, None, "2026-03-01T08:00:00Z"
+        )
+        metrics = MagicMock(
+            user_id=PATIENT_ID, date=_day(0), source="watch", sync_timestamp=1,
+            steps=10, sleep_minutes=None, avg_heart_rate=None, heart_rate_samples=[],
+        )
+        await HealthMetricsService(db).ingest_health_metrics(metrics)
+
+        assert response_cache.version(PATIENT_ID) != before
+        assert response_cache.stats()["invalidations"] == invalidations + 2
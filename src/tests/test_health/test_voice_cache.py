@@ -0,0 +1,129 @@
+"""
+Tests for the content-addressed voice caches (src/domains/health/voice_cache.py):
+retried uploads skip Whisper, repeated phrases skip the LLM, prompt edits
+change the key, and answers are shared through the Mongo tier.
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.domains.health import voice_parsing
+from src.domains.health.voice_cache import (
+    VoiceResultCache,
+    extraction_cache,
+    extraction_key,
+    normalize_transcription,
+    transcription_cache,
+)
+from src.domains.health.voice_parsing import VoiceParsingService
+
+
+def _completion(payload: dict):
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = json.dumps(payload)
+    return response
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(voice_parsing.audio_pool, "run", AsyncMock(return_value=None))
+    svc = VoiceParsingService()
+    svc.client = MagicMock()
+    svc.client.audio.transcriptions.create = AsyncMock(return_value="Creo que ciento veinte sobre ochenta.")
+    svc.client.chat.completions.create = AsyncMock(return_value=_completion({
+        "systolic": 120, "diastolic": 80, "pulse": None,
+        "device_classification": None, "confidence": "high",
+    }))
+    return svc
+
+
+@pytest.mark.asyncio
+async def test_retried_upload_skips_whisper_and_llm(service):
+    first = await service.parse_audio(b"upload-bytes" * 100, "rec.m4a")
+    first["systolic"] = 999  # Callers own the returned dict
+    second = await service.parse_audio(b"upload-bytes" * 100, "rec.m4a")
+
+    assert second["systolic"] == 120
+    assert second["transcription"] == "Creo que ciento veinte sobre ochenta."
+    service.client.audio.transcriptions.create.assert_awaited_once()
+    service.client.chat.completions.create.assert_awaited_once()
+    assert transcription_cache.stats()["hits"] >= 1
+    assert extraction_cache.stats()["hits"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_different_audio_is_transcribed_again(service):
+    await service.parse_audio(b"first-upload" * 100, "rec.m4a")
+    await service.parse_audio(b"other-upload" * 100, "rec.m4a")
+
+    assert service.client.audio.transcriptions.create.await_count == 2
+    # Same words -> the extraction is reused
+    service.client.chat.completions.create.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_repeated_phrase_shares_extraction_across_formatting(service):
+    service.client.chat.completions.create = AsyncMock(return_value=_completion(
+        {"intent": "confirm_take", "franja": "morning", "confidence": "high"}
+    ))
+
+    a = await service.parse_take_intent("Ya me tomé las de la mañana.")
+    b = await service.parse_take_intent("  ya me tomé   las de la MAÑANA ")
+
+    assert a == b == {"intent": "confirm_take", "franja": "morning", "confidence": "high"}
+    service.client.chat.completions.create.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_llm_failures_are_not_cached(service):
+    service.client.chat.completions.create = AsyncMock(side_effect=RuntimeError("timeout"))
+    assert (await service.parse_take_intent("ya me tomé las de la noche"))["franja"] == "night"
+
+    service.client.chat.completions.create = AsyncMock(return_value=_completion(
+        {"intent": "unknown", "franja": None, "confidence": "low"}
+    ))
+    result = await service.parse_take_intent("ya me tomé las de la noche")
+    assert result["intent"] == "unknown"
+
+
+def test_prompt_version_is_part_of_the_key():
+    text = "ciento veinte sobre ochenta"
+    assert extraction_key(voice_parsing.BP_EXTRACTION_PROMPT_VERSION, text) != extraction_key(
+        voice_parsing.MED_TAKE_INTENT_PROMPT_VERSION, text
+    )
+    assert normalize_transcription("¿Ciento  veinte?") == "ciento veinte"
+
+
+@pytest.mark.asyncio
+async def test_mongo_tier_serves_other_workers():
+    db = MagicMock()
+    db.voice_cache.replace_one = AsyncMock()
+    cache = VoiceResultCache("extraction", max_entries=10, ttl_seconds=3600)
+
+    await cache.put(db, "k", {"systolic": 120})
+    doc = db.voice_cache.replace_one.call_args.args[1]
+    assert doc["_id"] == "extraction:k"
+    assert doc["value"] == {"systolic": 120}
+
+    other_worker = VoiceResultCache("extraction", max_entries=10, ttl_seconds=3600)
+    db.voice_cache.find_one = AsyncMock(return_value={
+        **doc, "expiresAt": datetime.utcnow() + timedelta(hours=1),
+    })
+    assert await other_worker.get(db, "k") == {"systolic": 120}
+    assert await other_worker.get(db, "k") == {"systolic": 120}
+    db.voice_cache.find_one.assert_awaited_once()
+    assert other_worker.stats()["db_hits"] == 1
+    assert other_worker.stats()["hit_rate"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_in_process():
+    clock = [0.0]
+    cache = VoiceResultCache("transcription", max_entries=10, ttl_seconds=60, timer=lambda: clock[0])
+    await cache.put(None, "k", "hola")
+    assert await cache.get(None, "k") == "hola"
+    clock[0] = 61.0
+    assert await cache.get(None, "k") is None
@@ -0,0 +1,218 @@
+"""
+Tests for the live-location channel (src/domains/location/live.py and
+WebSocket /api/location/live): latest-only throttled delivery, bounded
+per-subscriber state, and streams closed by sharing/pairing changes.
+"""
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from src.core.database import db, get_database
+from src.domains.auth.routes import verify_token_jwt
+from src.domains.location import routes as location_routes
+from src.domains.location.live import (
+    CLOSE_PAIRING_REVOKED,
+    CLOSE_SHARING_DISABLED,
+    LiveLocationHub,
+    live_location_hub,
+    location_message,
+)
+from src.main import app
+
+PATIENT_ID = str(ObjectId())
+CAREGIVER_ID = str(ObjectId())
+T0 = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _position(i: int) -> dict:
+    return location_message(PATIENT_ID, 6.24 + i * 0.001, -75.58, 5.0, T0)
+
+
+class TestHub:
+    @pytest.mark.asyncio
+    async def test_throttled_subscriber_gets_latest_position_only(self):
+        clock = _Clock()
+        hub = LiveLocationHub(max_subscribers=10, min_interval_seconds=2.0, timer=clock)
+        subscriber = hub.subscribe(CAREGIVER_ID, [PATIENT_ID])
+
+        hub.publish(PATIENT_ID, _position(0))
+        assert await subscriber.next_batch() == [_position(0)]  # First one goes out at once
+
+        for i in range(1, 50):
+            hub.publish(PATIENT_ID, _position(i))
+        assert subscriber.pending == 1
+        clock.now += 2.0
+        assert await subscriber.next_batch() == [_position(49)]
+        assert subscriber.replaced == 48
+
+    @pytest.mark.asyncio
+    async def test_batch_waits_for_the_interval(self):
+        hub = LiveLocationHub(max_subscribers=10, min_interval_seconds=0.2)
+        subscriber = hub.subscribe(CAREGIVER_ID, [PATIENT_ID])
+        hub.publish(PATIENT_ID, _position(0))
+        await subscriber.next_batch()
+
+        hub.publish(PATIENT_ID, _position(1))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await subscriber.next_batch()
+        assert loop.time() - started >= 0.15
+
+    @pytest.mark.asyncio
+    async def test_close_wakes_waiting_subscriber(self):
+        hub = LiveLocationHub(max_subscribers=10, min_interval_seconds=1.0)
+        subscriber = hub.subscribe(CAREGIVER_ID, [PATIENT_ID])
+        waiting = asyncio.create_task(subscriber.next_batch())
+        await asyncio.sleep(0)
+
+        assert hub.close_patient(PATIENT_ID, CLOSE_SHARING_DISABLED, "sharing_disabled") == 1
+        assert await asyncio.wait_for(waiting, 1.0) == []
+        assert subscriber.close_code == CLOSE_SHARING_DISABLED
+
+    @pytest.mark.asyncio
+    async def test_thousand_idle_subscribers_and_cleanup(self):
+        hub = LiveLocationHub(max_subscribers=1000, min_interval_seconds=2.0)
+        subscribers = [hub.subscribe(str(ObjectId()), [PATIENT_ID]) for _ in range(1000)]
+        assert hub.subscribe(CAREGIVER_ID, [PATIENT_ID]) is None  # Full
+        assert hub.stats()["rejected_full"] == 1
+
+        for i in range(20):
+            assert hub.publish(PATIENT_ID, _position(i)) == 1000
+        assert all(s.pending == 1 for s in subscribers)  # Bounded: no backlog
+
+        for subscriber in subscribers:
+            hub.unsubscribe(subscriber)
+        assert hub.stats()["subscribers"] == 0
+        assert hub.stats()["patients_followed"] == 0
+        assert hub.publish(PATIENT_ID, _position(0)) == 0
+
+
+# ---------------------------------------------------------------------------
+# WebSocket endpoint
+# ---------------------------------------------------------------------------
+
+def _users_cursor(docs):
+    return MagicMock(to_list=AsyncMock(return_value=docs))
+
+
+@pytest.fixture
+def live_client(monkeypatch):
+    mock_db = MagicMock()
+    mock_db.pairings.find = MagicMock(return_value=_users_cursor([{"patientId": PATIENT_ID}]))
+    patient = {
+        "_id": ObjectId(PATIENT_ID),
+        "sharingLocation": True,
+        "lastLocation": {"coordinates": [-75.58, 6.24], "accuracy": 8.0, "updatedAt": T0},
+    }
+    mock_db.users.find = MagicMock(return_value=_users_cursor([patient]))
+    mock_db.users.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
+    mock_db["locations"].insert_many = AsyncMock()
+
+    async def caregiver_token(authorization=None, db=None):
+        if authorization != "Bearer caregiver-token":
+            raise location_routes.HTTPException(status_code=401)
+        return CAREGIVER_ID
+
+    monkeypatch.setattr(location_routes, "verify_token_jwt", caregiver_token)
+    monkeypatch.setattr(live_location_hub, "min_interval_seconds", 0.0)
+    db.connect = MagicMock()
+    app.dependency_overrides[get_database] = lambda: mock_db
+    app.dependency_overrides[verify_token_jwt] = lambda: PATIENT_ID  # HTTP routes: the patient
+    yield TestClient(app), patient
+    app.dependency_overrides.clear()
+
+
+_AUTH = {"headers": {"Authorization": "Bearer caregiver-token"}}
+
+
+def test_caregiver_receives_snapshot_then_live_positions(live_client):
+    client, _ = live_client
+    with client.websocket_connect("/api/location/live", **_AUTH) as ws:
+        snapshot = ws.receive_json()
+        assert snapshot["patientId"] == PATIENT_ID
+        assert (snapshot["latitude"], snapshot["stale"]) == (6.24, True)
+
+        assert client.post("/api/location/update", json={"latitude": 6.3, "longitude": -75.5}).status_code == 200
+        live = ws.receive_json()
+        assert (live["type"], live["latitude"], live["stale"]) == ("location", 6.3, False)
+        assert live_location_hub.stats()["subscribers"] == 1
+
+    assert live_location_hub.stats()["subscribers"] == 0
+
+
+def test_sharing_disabled_closes_the_stream(live_client):
+    client, _ = live_client
+    # Browser clients: token offered as the second subprotocol, not in the URL
+    with client.websocket_connect(
+        "/api/location/live", subprotocols=["bearer", "caregiver-token"]
+    ) as ws:
+        assert ws.accepted_subprotocol == "bearer"
+        ws.receive_json()
+        assert client.patch("/api/location/sharing", json={"sharingEnabled": False}).status_code == 200
+
+        assert ws.receive_json() == {"type": "closed", "reason": "sharing_disabled"}
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+        assert exc.value.code == CLOSE_SHARING_DISABLED
+
+
+def test_revoked_pairing_closes_the_stream(live_client):
+    client, _ = live_client
+    mock_db = app.dependency_overrides[get_database]()
+    pairing_id = ObjectId()
+    mock_db["pairings"].find_one = AsyncMock(return_value={
+        "_id": pairing_id, "patientId": PATIENT_ID, "caregiverId": CAREGIVER_ID, "status": "active",
+    })
+    mock_db["pairings"].update_one = AsyncMock()
+    with client.websocket_connect("/api/location/live", **_AUTH) as ws:
+        ws.receive_json()
+        # The patient revokes the pairing
+        assert client.post(f"/api/pairing/{pairing_id}/revoke").json()["success"] is True
+
+        assert ws.receive_json() == {"type": "closed", "reason": "pairing_revoked"}
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+        assert exc.value.code == CLOSE_PAIRING_REVOKED
+
+
+def test_patient_not_sharing_is_refused(live_client):
+    client, patient = live_client
+    patient["sharingLocation"] = False
+    with client.websocket_connect("/api/location/live", **_AUTH) as ws:
+        assert ws.receive_json() == {"type": "closed", "reason": "sharing_disabled"}
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+        assert exc.value.code == CLOSE_SHARING_DISABLED
+
+
+@pytest.mark.parametrize("connect", [
+    {"subprotocols": ["bearer", "nope"]},
+    {"headers": {"Authorization": "Bearer nope"}},
+])
+def test_bad_token_is_rejected(live_client, connect):
+    client, _ = live_client
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/api/location/live", **connect) as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+
+def test_token_in_query_string_is_not_accepted(live_client):
+    client, _ = live_client
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/api/location/live?token=caregiver-token") as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
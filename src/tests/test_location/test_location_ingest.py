@@ -0,0 +1,166 @@
+"""
+Tests for location report write coalescing (src/domains/location/ingest.py):
+movement/time thresholds decide which writes a report needs, and history
+points are written in insert_many batches.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from bson import ObjectId
+
+from src.domains.location import ingest
+from src.domains.location.ingest import HistoryWriter, LastPositionIndex, distance_m
+from src.domains.location.services import LocationService
+
+USER_ID = str(ObjectId())
+T0 = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+# ~11 m north of the origin per 0.0001 degrees of latitude
+LAT, LNG = 6.2442, -75.5812
+
+
+def _index() -> LastPositionIndex:
+    return LastPositionIndex(
+        max_users=100,
+        min_distance_m=25.0,
+        history_interval_seconds=300.0,
+        updated_at_granularity_seconds=60.0,
+    )
+
+
+def test_distance_is_haversine_meters():
+    assert distance_m(LAT, LNG, LAT, LNG) == 0
+    assert distance_m(LAT, LNG, LAT + 0.001, LNG) == pytest.approx(111.2, abs=0.5)
+
+
+class TestWriteDecision:
+    def test_first_report_writes_both(self):
+        assert _index().decide(USER_ID, LAT, LNG, T0) == (True, True)
+
+    def test_stationary_reports_are_coalesced(self):
+        index = _index()
+        index.decide(USER_ID, LAT, LNG, T0)
+
+        # GPS jitter (~10 m) within the granularity: nothing to write
+        assert index.decide(USER_ID, LAT + 0.0001, LNG, T0 + timedelta(seconds=30)) == (False, False)
+        # updatedAt refreshed every minute, history only every 5 minutes
+        assert index.decide(USER_ID, LAT, LNG, T0 + timedelta(seconds=61)) == (True, False)
+        assert index.decide(USER_ID, LAT, LNG, T0 + timedelta(seconds=301)) == (True, True)
+        assert index.stats()["history_skipped"] == 2
+
+    def test_movement_writes_both(self):
+        index = _index()
+        index.decide(USER_ID, LAT, LNG, T0)
+        assert index.decide(USER_ID, LAT + 0.0005, LNG, T0 + timedelta(seconds=5)) == (True, True)
+
+    def test_slow_drift_is_measured_from_the_last_stored_point(self):
+        index = _index()
+        index.decide(USER_ID, LAT, LNG, T0)
+        for step in range(1, 3):
+            assert index.decide(USER_ID, LAT + step * 0.0001, LNG, T0 + timedelta(seconds=step)) == (False, False)
+        assert index.decide(USER_ID, LAT + 0.0003, LNG, T0 + timedelta(seconds=3)) == (True, True)
+
+    def test_forget_forces_next_write(self):
+        index = _index()
+        index.decide(USER_ID, LAT, LNG, T0)
+        index.forget(USER_ID)
+        assert index.decide(USER_ID, LAT, LNG, T0 + timedelta(seconds=1)) == (True, True)
+
+
+class TestHistoryWriter:
+    @pytest.mark.asyncio
+    async def test_flushes_when_batch_is_full(self):
+        collection = MagicMock(insert_many=AsyncMock())
+        writer = HistoryWriter(batch_size=3, flush_seconds=60.0)
+
+        for i in range(7):
+            await writer.add(collection, {"i": i})
+
+        assert collection.insert_many.await_count == 2
+        assert [d["i"] for d in collection.insert_many.await_args_list[0].args[0]] == [0, 1, 2]
+        assert writer.pending == 1
+        writer.reset()
+
+    @pytest.mark.asyncio
+    async def test_flushes_after_the_interval(self):
+        collection = MagicMock(insert_many=AsyncMock())
+        writer = HistoryWriter(batch_size=100, flush_seconds=0.05)
+
+        await writer.add(collection, {"i": 1})
+        await writer.add(collection, {"i": 2})
+        assert collection.insert_many.await_count == 0
+        await asyncio.sleep(0.15)
+
+        collection.insert_many.assert_awaited_once()
+        assert len(collection.insert_many.await_args.args[0]) == 2
+        assert writer.stats()["written"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_counted_and_dropped(self):
+        collection = MagicMock(insert_many=AsyncMock(side_effect=RuntimeError("down")))
+        writer = HistoryWriter(batch_size=2, flush_seconds=60.0)
+
+        await writer.add(collection, {"i": 1})
+        await writer.add(collection, {"i": 2})
+
+        assert writer.stats()["failed"] == 2
+        assert writer.pending == 0
+
+
+def _db():
+    db = MagicMock()
+    db.users.update_one = AsyncMock()
+    db["locations"].insert_many = AsyncMock()
+    return db
+
+
+def _at(moment: datetime):
+    fake = MagicMock(wraps=datetime)
+    fake.now.return_value = moment
+    return patch("src.domains.location.services.datetime", fake)
+
+
+@pytest.mark.asyncio
+async def test_stationary_device_writes_once_per_window():
+    db = _db()
+    service = LocationService(db)
+
+    for seconds in range(0, 300, 30):  # A report every 30 s for 5 minutes
+        with _at(T0 + timedelta(seconds=seconds)):
+            result = await service.update_location(USER_ID, LAT, LNG, accuracy=8.0)
+        assert result["success"]
+    await ingest.location_history_writer.flush()
+
+    assert db.users.update_one.await_count == 5  # t = 0, 60, 120, 180, 240
+    db["locations"].insert_many.assert_awaited_once()
+    assert len(db["locations"].insert_many.await_args.args[0]) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_user_update_is_retried_on_next_report():
+    db = _db()
+    db.users.update_one.side_effect = [RuntimeError("primary stepped down"), None]
+    service = LocationService(db)
+
+    with _at(T0), pytest.raises(RuntimeError):
+        await service.update_location(USER_ID, LAT, LNG)
+    with _at(T0 + timedelta(seconds=5)):
+        await service.update_location(USER_ID, LAT, LNG)
+
+    assert db.users.update_one.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_history_read_includes_buffered_points():
+    db = _db()
+    cursor = MagicMock()
+    cursor.__aiter__.return_value = []
+    db["locations"].find = MagicMock(return_value=cursor)
+    service = LocationService(db)
+
+    with _at(T0):
+        await service.update_location(USER_ID, LAT, LNG)
+    await service.get_location_history(USER_ID)
+
+    db["locations"].insert_many.assert_awaited_once()
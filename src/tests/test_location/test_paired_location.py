@@ -0,0 +1,125 @@
+"""
+Tests for GET /api/location/paired lookups (LocationService.get_paired_user_location):
+one users query on a miss, none on a hit, and invalidation by location
+updates, sharing toggles and pairing changes.
+"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bson import ObjectId
+
+from src.core.pairing_access import pairing_access
+from src.domains.location.services import LocationService
+
+PATIENT_ID = str(ObjectId())
+CAREGIVER_ID = str(ObjectId())
+
+
+def _user(user_id: str, name: str, minutes_ago: float, sharing: bool = True) -> dict:
+    return {
+        "_id": ObjectId(user_id),
+        "name": name,
+        "role": "patient" if user_id == PATIENT_ID else "caregiver",
+        "sharingLocation": sharing,
+        "lastLocation": {
+            "type": "Point",
+            "coordinates": [-75.58, 6.24],
+            "accuracy": 10.0,
+            "updatedAt": datetime.now(timezone.utc) - timedelta(minutes=minutes_ago),
+        },
+    }
+
+
+def _db(patient_sharing: bool = True, patient_minutes_ago: float = 1):
+    db = MagicMock()
+    db.pairings.find_one = AsyncMock(return_value={
+        "_id": ObjectId(),
+        "patientId": PATIENT_ID,
+        "caregiverId": CAREGIVER_ID,
+        "patientName": "Ana",
+        "caregiverName": "Luis",
+    })
+    users = [
+        _user(PATIENT_ID, "Ana", patient_minutes_ago, sharing=patient_sharing),
+        _user(CAREGIVER_ID, "Luis", 2),
+    ]
+    db.users.find = MagicMock(side_effect=lambda *a, **k: MagicMock(to_list=AsyncMock(return_value=users)))
+    db.users.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
+    db["locations"].insert_many = AsyncMock()
+    return db
+
+
+@pytest.mark.asyncio
+async def test_miss_is_one_users_query_and_hit_is_none():
+    db = _db()
+    service = LocationService(db)
+
+    first = await service.get_paired_user_location(CAREGIVER_ID)
+    second = await service.get_paired_user_location(CAREGIVER_ID)
+
+    assert first is second
+    assert first["self"]["name"] == "Luis"
+    assert first["partner"]["name"] == "Ana"
+    assert first["partner"]["role"] == "patient"
+    assert first["partner"]["locationStale"] is False
+    assert db.users.find.call_count == 1
+    query, projection = db.users.find.call_args.args
+    assert set(query["_id"]["$in"]) == {ObjectId(PATIENT_ID), ObjectId(CAREGIVER_ID)}
+    assert "lastLocation" in projection and "password" not in projection
+    db.pairings.find_one.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_partner_location_update_invalidates():
+    db = _db()
+    service = LocationService(db)
+    await service.get_paired_user_location(CAREGIVER_ID)
+
+    await service.update_location(PATIENT_ID, 6.25, -75.57)
+    await service.get_paired_user_location(CAREGIVER_ID)
+
+    assert db.users.find.call_count == 2
+    db.pairings.find_one.assert_awaited_once()  # Pairing still from the index
+
+
+@pytest.mark.asyncio
+async def test_sharing_toggle_invalidates_both_views():
+    db = _db()
+    service = LocationService(db)
+    await service.get_paired_user_location(CAREGIVER_ID)
+    await service.get_paired_user_location(PATIENT_ID)
+
+    await service.toggle_sharing(PATIENT_ID, False)
+    await service.get_paired_user_location(CAREGIVER_ID)
+    await service.get_paired_user_location(PATIENT_ID)
+
+    assert db.users.find.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_revoked_pairing_is_not_served_from_cache():
+    db = _db()
+    service = LocationService(db)
+    await service.get_paired_user_location(CAREGIVER_ID)
+
+    db.pairings.find_one.return_value = None
+    pairing_access.invalidate_caregiver(CAREGIVER_ID)  # PairingService.revoke_pairing
+    result = await service.get_paired_user_location(CAREGIVER_ID)
+
+    assert result["partner"] is None
+    assert result["hasRelation"] is False
+
+
+@pytest.mark.asyncio
+async def test_partner_with_sharing_disabled():
+    hidden = await LocationService(_db(patient_sharing=False)).get_paired_user_location(CAREGIVER_ID)
+    assert hidden["partner"]["location"] is None
+    assert hidden["partner"]["sharingDisabledMessage"]
+
+
+@pytest.mark.asyncio
+async def test_partner_stale_location():
+    stale = await LocationService(_db(patient_minutes_ago=20)).get_paired_user_location(CAREGIVER_ID)
+    assert stale["partner"]["locationStale"] is True
+    assert stale["partner"]["location"]["latitude"] == 6.24
@@ -0,0 +1,282 @@
+"""
+Tests for the dose reminder scheduler (src/domains/medications/scheduler.py)
+and the Mongo lease that keeps it single-leader (src/core/leases.py).
+"""
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from pymongo.errors import DuplicateKeyError
+
+from src.core.leases import MongoLease
+from src.domains.medications import scheduler as scheduler_module
+from src.domains.medications.scheduler import DoseScheduler, slot_minutes
+from src.domains.medications.services import MedicationService
+
+# 2026-05-20 08:00 UTC as an epoch minute
+NOW_MINUTE = int(datetime(2026, 5, 20, 8, 0, tzinfo=timezone.utc).timestamp() // 60)
+NOW_TS = NOW_MINUTE * 60 + 1
+
+
+class _AsyncIter:
+    """Motor cursor stand-in supporting `async for`."""
+
+    def __init__(self, items):
+        self._items = list(items)
+
+    def __aiter__(self):
+        self._iter = iter(self._items)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def _cursor(items):
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=items)
+    return cursor
+
+
+def _leader():
+    scheduler = DoseScheduler()
+    scheduler.is_leader = True
+    return scheduler
+
+
+def _scheduler_db(schedules, due_docs, lease=None):
+    db = MagicMock()
+    db.leases.find_one_and_update = AsyncMock(return_value=lease or {"_id": "dose_scheduler"})
+    # 1st find → wheel load, then the reminder lookup(s)
+    db.medications.find = MagicMock(side_effect=[_AsyncIter(schedules)] + [_cursor(due_docs)] * 5)
+    db.notifications.insert_many = AsyncMock()
+    return db
+
+
+def _started(db):
+    scheduler = DoseScheduler()
+    scheduler.db = db
+    scheduler.lease = MongoLease(db, "dose_scheduler", 90, owner="worker-a")
+    scheduler.sweeper = MagicMock()
+    scheduler.sweeper.sweep_all = AsyncMock()
+    return scheduler
+
+
+@pytest.fixture(autouse=True)
+def _no_fcm(monkeypatch):
+    monkeypatch.setattr(scheduler_module, "is_fcm_available", lambda: False)
+
+
+def test_slot_minutes_ignores_invalid_and_duplicates():
+    assert slot_minutes(["20:00", "08:00", "08:00", "bad", "24:00"]) == (480, 1200)
+
+
+def test_reschedule_and_unschedule_are_dropped_lazily_from_buckets():
+    scheduler = _leader()
+    scheduler.schedule("losartan", ["08:00", "20:00"])
+    scheduler.schedule("metformina", ["08:00"])
+    scheduler.schedule("losartan", ["09:00", "20:00"])
+    scheduler.unschedule("metformina")
+
+    assert scheduler.due_at(480) == []
+    assert scheduler._wheel[480] == []  # Compacted
+    assert scheduler.due_at(540) == ["losartan"]
+    assert scheduler.due_at(1200) == ["losartan"]
+    assert scheduler._wheel[1200] == ["losartan"]  # Unchanged slot not duplicated
+
+
+def test_followers_do_not_keep_a_wheel():
+    scheduler = DoseScheduler()
+    scheduler.schedule("losartan", ["08:00"])
+    assert scheduler.stats()["slots"] == 0
+
+
+@pytest.mark.asyncio
+async def test_lease_lost_race_is_not_acquired():
+    db = MagicMock()
+    db.leases.find_one_and_update = AsyncMock(side_effect=DuplicateKeyError("taken"))
+    assert await MongoLease(db, "dose_scheduler", 90).acquire() is None
+
+
+@pytest.mark.asyncio
+async def test_leader_sends_one_reminder_per_patient_and_records_progress():
+    db = _scheduler_db(
+        schedules=[
+            {"_id": "losartan", "times": ["08:00", "20:00"]},
+            {"_id": "metformina", "times": ["08:00"]},
+            {"_id": "insulina", "time": "08:00"},
+            {"_id": "aspirina", "times": ["12:00"]},
+        ],
+        due_docs=[
+            {"_id": "losartan", "userId": "p1", "name": "Losartan", "dosage": "50mg"},
+            {"_id": "metformina", "userId": "p1", "name": "Metformina", "dosage": ""},
+            {"_id": "insulina", "userId": "p2", "name": "Insulina", "dosage": "10U"},
+        ],
+    )
+    scheduler = _started(db)
+
+    await scheduler.tick(now_ts=NOW_TS)
+
+    assert scheduler.is_leader
+    query = db.medications.find.call_args_list[1].args[0]
+    assert set(query["_id"]["$in"]) == {"losartan", "metformina", "insulina"}
+    notifications = db.notifications.insert_many.await_args.args[0]
+    by_patient = {n["userId"]: n for n in notifications}
+    assert set(by_patient) == {"p1", "p2"}
+    assert by_patient["p1"]["type"] == "MEDICATION"
+    assert by_patient["p1"]["metadata"]["scheduled_time"] == "08:00"
+    assert "Losartan (50mg)" in by_patient["p1"]["message"]
+    # New leader always runs a catch-up sweep; progress stored on the lease
+    scheduler.sweeper.sweep_all.assert_awaited_once()
+    last_update = db.leases.find_one_and_update.await_args_list[-1].args[1]
+    assert last_update["$set"]["firedThrough"] == NOW_MINUTE
+
+
+@pytest.mark.asyncio
+async def test_new_leader_resumes_after_fired_through_without_refiring():
+    db = _scheduler_db(
+        schedules=[{"_id": "losartan", "times": ["07:58", "08:00"]}],
+        due_docs=[{"_id": "losartan", "userId": "p1", "name": "Losartan", "dosage": ""}],
+        # Previous leader fired up to 07:59 before dying
+        lease={"_id": "dose_scheduler", "firedThrough": NOW_MINUTE - 1},
+    )
+    scheduler = _started(db)
+
+    await scheduler.tick(now_ts=NOW_TS)
+
+    db.notifications.insert_many.assert_awaited_once()
+    assert db.notifications.insert_many.await_args.args[0][0]["metadata"]["scheduled_time"] == "08:00"
+
+
+@pytest.mark.asyncio
+async def test_catch_up_records_each_minute_and_stops_when_the_lease_is_lost():
+    db = _scheduler_db(
+        schedules=[{"_id": "losartan", "times": ["07:58", "07:59", "08:00"]}],
+        due_docs=[{"_id": "losartan", "userId": "p1", "name": "Losartan", "dosage": ""}],
+    )
+    lease = {"_id": "dose_scheduler", "firedThrough": NOW_MINUTE - 3}
+    # acquire, renew after 07:58, then another worker holds the lease
+    db.leases.find_one_and_update = AsyncMock(side_effect=[lease, lease, DuplicateKeyError("taken")])
+    scheduler = _started(db)
+
+    await scheduler.tick(now_ts=NOW_TS)
+
+    renewals = [c.args[1]["$set"]["firedThrough"] for c in db.leases.find_one_and_update.await_args_list[1:]]
+    assert renewals == [NOW_MINUTE - 2, NOW_MINUTE - 1]
+    assert db.notifications.insert_many.await_count == 2  # 08:00 is left to the new leader
+    assert not scheduler.is_leader
+    scheduler.sweeper.sweep_all.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_reminder_pushes_run_concurrently_under_the_cap(monkeypatch):
+    state = {"in_flight": 0, "peak": 0, "sent": 0}
+
+    async def push(*args, **kwargs):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+        state["sent"] += 1
+        return True
+
+    class _Loader:
+        def __init__(self, db):
+            pass
+
+        async def load_many(self, ids):
+            return [{"fcmToken": f"token-{i}"} for i in ids]
+
+    monkeypatch.setattr(scheduler_module, "is_fcm_available", lambda: True)
+    monkeypatch.setattr(scheduler_module, "send_push_notification", push)
+    monkeypatch.setattr(scheduler_module, "UserLoader", _Loader)
+    monkeypatch.setattr(scheduler_module.settings, "DOSE_SCHEDULER_PUSH_CONCURRENCY", 3)
+    due = [{"_id": f"m{i}", "userId": f"p{i}", "name": "X", "dosage": ""} for i in range(10)]
+    db = _scheduler_db(schedules=[], due_docs=due)
+    db.medications.find = MagicMock(return_value=_cursor(due))
+    scheduler = _started(db)
+
+    await scheduler._send_reminders(8 * 60, [d["_id"] for d in due])
+
+    assert state["sent"] == 10
+    assert state["peak"] == 3
+
+
+@pytest.mark.asyncio
+async def test_grace_minute_bucket_triggers_the_missed_dose_sweep():
+    db = _scheduler_db(schedules=[{"_id": "losartan", "times": ["07:30"]}], due_docs=[])
+    scheduler = _started(db)
+    await scheduler.tick(now_ts=NOW_TS - 60)  # Becomes leader at 07:59
+    scheduler.sweeper.sweep_all.reset_mock()
+    db.medications.find = MagicMock(return_value=_AsyncIter([]))
+
+    await scheduler.tick(now_ts=NOW_TS)  # 08:00 = 07:30 + 30 min grace
+
+    scheduler.sweeper.sweep_all.assert_awaited_once()
+    assert scheduler.sweeper.sweep_all.await_args.kwargs["now"] == datetime(2026, 5, 20, 8, 0)
+
+
+@pytest.mark.asyncio
+async def test_follower_does_nothing_while_lease_is_held():
+    db = _scheduler_db(schedules=[], due_docs=[])
+    db.leases.find_one_and_update = AsyncMock(side_effect=DuplicateKeyError("taken"))
+    scheduler = _started(db)
+
+    await scheduler.tick(now_ts=NOW_TS)
+
+    assert not scheduler.is_leader
+    db.medications.find.assert_not_called()
+    scheduler.sweeper.sweep_all.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_medication_service_updates_the_wheel(monkeypatch):
+    scheduler = _leader()
+    monkeypatch.setattr("src.domains.medications.services.dose_scheduler", scheduler)
+    db = MagicMock()
+    db.medications.insert_one = AsyncMock()
+    db.medications.update_one = AsyncMock(return_value=MagicMock(modified_count=1))
+    db.medications.find_one_and_update = AsyncMock(return_value={
+        "_id": "x", "userId": "p1", "name": "Losartan", "times": ["09:00"],
+        "medicationType": "pill", "isActive": True,
+    })
+    service = MedicationService(db)
+
+    created = await service.create_medication("p1", "Losartan", "50mg", ["08:00"], "", "pill")
+    med_id = created["id"]
+    assert scheduler.due_at(480) == [med_id]
+
+    db.medications.find_one_and_update.return_value["_id"] = med_id
+    await service.update_medication(med_id, "p1", {"times": ["09:00"]})
+    assert scheduler.due_at(480) == []
+    assert scheduler.due_at(540) == [med_id]
+
+    await service.delete_medication(med_id, "p1")
+    assert scheduler.due_at(540) == []
+
+
+@pytest.mark.asyncio
+async def test_shutdown_releases_the_lease_before_closing_the_database(monkeypatch):
+    from src import main
+
+    events = []
+    db = _scheduler_db(schedules=[], due_docs=[])
+    db.leases.update_one = AsyncMock(side_effect=lambda *a, **k: events.append("release"))
+    scheduler = DoseScheduler()
+    monkeypatch.setattr(scheduler_module, "MongoLease", lambda *a, **k: MongoLease(db, "dose_scheduler", 90))
+    monkeypatch.setattr(main.app.state, "dose_scheduler", asyncio.create_task(scheduler.run(db)), raising=False)
+    monkeypatch.setattr(main.app.state, "missed_dose_sweeper", None, raising=False)
+    monkeypatch.setattr(main, "close_drug_catalog_client", AsyncMock())
+    monkeypatch.setattr(main.location_history_writer, "flush", AsyncMock())
+    monkeypatch.setattr(main.audio_pool, "shutdown", MagicMock())
+    monkeypatch.setattr(main.db, "close", lambda: events.append("db_close"))
+    await asyncio.sleep(0.05)  # First tick: becomes leader, then sleeps
+    assert scheduler.is_leader
+
+    await main.shutdown_db_client()
+
+    assert events == ["release", "db_close"]
@@ -98,3 +98,148 @@ async def test_parse_medication_intent_fallback_without_llm():
     res = await svc.parse_medication_intent("quiero registrar losartan 50 mg cada 12 horas")
     assert res["name"] is None
     assert res["confidence"] == "low"
+
+
+# ---------------------------------------------------------------------------
+# Pooled client, two-tier cache and hedged lookups, against local stub servers
+# ---------------------------------------------------------------------------
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest_asyncio
+
+from src.domains.medications.drug_catalog import catalog_cache, close_http_client, get_http_client
+
+
+class _StubRegistry:
+    """Local HTTP server answering like datos.gov.co (/co) and CIMA (/es)."""
+
+    def __init__(self):
+        self.responses = {"/co": (200, []), "/es": (200, {"resultados": []})}
+        self.delays = {"/co": 0.0, "/es": 0.0}
+        self.hits = []  # (path, client port)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                stub.hits.append((path, self.client_address[1]))
+                time.sleep(stub.delays.get(path, 0.0))
+                status, payload = stub.responses.get(path, (404, {}))
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def service(self, db=None, hedge=False):
+        return DrugCatalogService(db, hedge=hedge, co_url=f"{self.base}/co", cima_url=f"{self.base}/es")
+
+    def paths(self):
+        return [path for path, _ in self.hits]
+
+
+_CO_MATCH = [{"producto": "COZAAR 100 MG", "principioactivo": "LOSARTAN", "estadoregistro": "Vigente"}]
+_ES_MATCH = {"resultados": [{"nombre": "Losartan Cinfa 100 mg", "pactivos": "LOSARTAN"}]}
+
+
+@pytest_asyncio.fixture
+async def registry():
+    stub = _StubRegistry()
+    yield stub
+    await close_http_client()  # The pooled client is bound to this test's loop
+    stub.server.shutdown()
+    stub.server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_pooled_client_reuses_the_connection_and_caches_by_normalized_name(registry):
+    registry.responses["/co"] = (200, _CO_MATCH)
+    svc = registry.service()
+
+    first = await svc.validate("Losartán")
+    assert (await svc.validate("  losartan ")) == first  # Same _norm key: cached
+    await svc.validate("cozaar")
+
+    assert registry.paths() == ["/co", "/co"]
+    assert len({port for _, port in registry.hits}) == 1  # One keep-alive connection
+    assert get_http_client() is get_http_client()
+    assert catalog_cache.stats()["hits"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_no_match_is_cached_but_registry_errors_are_not(registry):
+    svc = registry.service()
+    assert (await svc.validate("xyzzy"))["matched"] is False
+    assert (await svc.validate("xyzzy"))["matched"] is False
+    assert registry.paths() == ["/co", "/es"]
+
+    registry.responses["/co"] = (500, {})
+    registry.responses["/es"] = (503, {})
+    await svc.validate("plugh")
+    await svc.validate("plugh")
+    assert registry.paths()[2:] == ["/co", "/es", "/co", "/es"]
+
+
+@pytest.mark.asyncio
+async def test_mongo_tier_serves_other_workers_and_is_written_through(registry):
+    registry.responses["/co"] = (200, _CO_MATCH)
+    stored = {
+        "matched": True, "canonical_name": "COZAAR 100 MG", "active_ingredient": "LOSARTAN",
+        "candidates": [], "source": "co",
+    }
+    db = MagicMock()
+    db.drug_catalog_cache.find_one = AsyncMock(side_effect=lambda q: (
+        {"_id": q["_id"], "result": stored, "expiresAt": datetime.utcnow() + timedelta(hours=1)}
+        if q["_id"] == "losartan" else None
+    ))
+    db.drug_catalog_cache.replace_one = AsyncMock()
+    svc = registry.service(db)
+
+    assert await svc.validate("LOSARTAN") == stored
+    assert registry.hits == []
+
+    await svc.validate("cozaar")
+    doc = db.drug_catalog_cache.replace_one.await_args.args[1]
+    assert doc["_id"] == "cozaar"
+    assert doc["result"]["source"] == "co"
+    assert doc["expiresAt"] > datetime.utcnow() + timedelta(days=6)
+
+
+@pytest.mark.asyncio
+async def test_hedged_lookup_takes_the_first_non_empty_answer(registry):
+    registry.responses["/co"] = (200, _CO_MATCH)
+    registry.responses["/es"] = (200, _ES_MATCH)
+    registry.delays["/co"] = 1.0
+
+    start = time.perf_counter()
+    res = await registry.service(hedge=True).validate("losartan")
+
+    assert res["source"] == "es"
+    assert time.perf_counter() - start < 0.8
+
+
+@pytest.mark.asyncio
+async def test_hedged_lookup_waits_for_the_other_registry_on_an_empty_answer(registry):
+    registry.responses["/co"] = (200, _CO_MATCH)
+    registry.delays["/co"] = 0.2
+
+    res = await registry.service(hedge=True).validate("losartan")
+
+    assert res["source"] == "co"
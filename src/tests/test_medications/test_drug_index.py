@@ -0,0 +1,106 @@
+"""
+Tests for the offline drug registry index (src/domains/medications/drug_index.py)
+and its use by DrugCatalogService.validate before any network lookup.
+"""
+import pytest
+
+from scripts.build_drug_index import cum_entries
+from src.domains.medications.drug_catalog import DrugCatalogService
+from src.domains.medications.drug_index import DrugIndex, build_index
+
+ENTRIES = [
+    {"name": "COZAAR 100 MG", "active_ingredient": "LOSARTAN POTASICO", "source": "co"},
+    {"name": "Losartan Cinfa 50 mg comprimidos", "active_ingredient": "LOSARTAN POTASICO", "source": "es"},
+    {"name": "LOSARTAN 50 MG", "active_ingredient": "LOSARTAN POTASICO", "source": "co"},
+    {"name": "LOSARTAN 50 MG", "active_ingredient": "LOSARTAN POTASICO", "source": "co"},  # dup
+    {"name": "GLUCOPHAGE 850 MG", "active_ingredient": "METFORMINA CLORHIDRATO", "source": "co"},
+    {"name": "Metformina Normon 850 mg", "active_ingredient": "METFORMINA", "source": "es"},
+    {"name": "ASPIRINA 100 MG", "active_ingredient": "ÁCIDO ACETILSALICÍLICO", "source": "co"},
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "drug_index.bin")
+    assert build_index(ENTRIES, path) == 6
+    idx = DrugIndex(path)
+    yield idx
+    idx.close()
+
+
+def _names(results):
+    return [r["name"] for r in results]
+
+
+def test_exact_name_ranks_first_then_shorter_names(index):
+    results = index.search("losartán")
+    assert _names(results)[:2] == ["LOSARTAN 50 MG", "Losartan Cinfa 50 mg comprimidos"]
+    assert results[0]["score"] == 1.0
+    # Products matching only through the active ingredient rank below
+    assert results[2]["name"] == "COZAAR 100 MG"
+    assert results[2]["score"] < 1.0
+
+
+def test_prefix_and_misspellings_resolve_locally(index):
+    assert index.search("glucoph")[0]["name"] == "GLUCOPHAGE 850 MG"
+    assert index.search("metfromina 850")[0]["name"] == "Metformina Normon 850 mg"
+    top = index.search("aspirna")[0]
+    assert top["name"] == "ASPIRINA 100 MG"
+    assert top["active_ingredient"] == "ÁCIDO ACETILSALICÍLICO"
+    assert top["source"] == "co"
+
+
+def test_unknown_or_blank_names_have_no_candidates(index):
+    assert index.search("xyzzy") == []
+    assert index.search("50 mg") == []
+
+
+def test_rejects_files_that_are_not_an_index(tmp_path):
+    path = tmp_path / "bogus.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        DrugIndex(str(path))
+
+
+def test_importer_keeps_only_current_cum_registrations(tmp_path):
+    path = tmp_path / "cum.csv"
+    path.write_text(
+        "producto,principioactivo,estadoregistro\n"
+        "COZAAR 100 MG,LOSARTAN,Vigente\n"
+        "VIEJO 5 MG,X,Vencido\n",
+        encoding="utf-8",
+    )
+    assert [e["name"] for e in cum_entries(str(path))] == ["COZAAR 100 MG"]
+
+
+@pytest.mark.asyncio
+async def test_validate_resolves_locally_without_network(index, monkeypatch):
+    svc = DrugCatalogService(index=index)
+
+    async def no_network(url, params):
+        raise AssertionError("network must not be used")
+
+    monkeypatch.setattr(svc, "_http_get_json", no_network)
+    res = await svc.validate("glucofage")
+
+    assert res["matched"] is True
+    assert res["canonical_name"] == "GLUCOPHAGE 850 MG"
+    assert res["source"] == "co"
+
+
+@pytest.mark.asyncio
+async def test_validate_falls_back_to_network_for_unknown_names(index, monkeypatch):
+    svc = DrugCatalogService(index=index)
+    calls = []
+
+    async def fake_get(url, params):
+        calls.append(url)
+        if "datos.gov.co" in url:
+            return [{"producto": "ENTRESTO 50 MG", "principioactivo": "SACUBITRIL", "estadoregistro": "Vigente"}]
+        return {"resultados": []}
+
+    monkeypatch.setattr(svc, "_http_get_json", fake_get)
+    res = await svc.validate("entresto")
+
+    assert res["canonical_name"] == "ENTRESTO 50 MG"
+    assert len(calls) == 1
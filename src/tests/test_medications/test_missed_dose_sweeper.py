@@ -0,0 +1,239 @@
+"""
+Tests for the background missed-dose sweeper (src/domains/medications/sweeper.py).
+
+The sweeper replaces the inline check that GET /medications/today/status used
+to run: overdue slots are found through the indexed `nextDueAt` field, one
+event is registered per (patient, slot) and the dedup markers + advanced
+`nextDueAt` are written with a single bulk_write.
+"""
+from datetime import datetime
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.domains.medications.models import MedicationDB
+from src.domains.medications.sweeper import MissedDoseSweeper
+from src.domains.medications.services import MedicationService
+from src.domains.events.services import BiometricEventService
+
+
+NOW = datetime(2026, 5, 20, 9, 0)  # 09:00 UTC
+
+
+def _cursor(items):
+    cursor = MagicMock()
+    cursor.sort = MagicMock(return_value=cursor)
+    cursor.limit = MagicMock(return_value=cursor)
+    cursor.to_list = AsyncMock(return_value=items)
+    return cursor
+
+
+def _med(med_id, user_id, times, next_due, **extra):
+    return {
+        "_id": med_id, "userId": user_id, "name": med_id.title(), "dosage": "1",
+        "times": times, "nextDueAt": next_due, **extra,
+    }
+
+
+def _sweeper_db(due, takes=None, legacy=None):
+    db = MagicMock()
+    # 1st find → legacy docs without nextDueAt (backfill), 2nd → due medications
+    db.medications.find = MagicMock(side_effect=[_cursor(legacy or []), _cursor(due)])
+    db.medications.bulk_write = AsyncMock()
+    db.medication_takes.aggregate = MagicMock(return_value=_cursor(takes or []))
+    return db
+
+
+@pytest.fixture
+def registered(monkeypatch):
+    events = []
+
+    async def _register(self, patient_id, event_type, payload, **kwargs):
+        events.append((patient_id, event_type, payload))
+        return {}
+
+    monkeypatch.setattr(BiometricEventService, "register_biometric_event", _register)
+    return events
+
+
+def test_next_due_at_rolls_over_to_tomorrow():
+    assert MedicationDB.next_due_at(["20:00", "08:00"], NOW) == datetime(2026, 5, 20, 20, 0)
+    assert MedicationDB.next_due_at(["08:00"], NOW) == datetime(2026, 5, 21, 8, 0)
+    assert MedicationDB.next_due_at(["bad", "25:00"], NOW) is None
+
+
+@pytest.mark.asyncio
+async def test_one_event_per_patient_slot_and_single_bulk_write(registered):
+    slot = datetime(2026, 5, 20, 8, 0)
+    db = _sweeper_db(
+        due=[
+            _med("losartan", "p1", ["08:00", "20:00"], slot),
+            _med("metformina", "p1", ["08:00"], slot),
+            _med("aspirina", "p1", ["08:00"], slot),
+            _med("insulina", "p2", ["08:00"], slot),
+        ],
+        # aspirina already taken today → not missed
+        takes=[{"_id": {"medicationId": "aspirina", "date": "2026-05-20"}, "count": 1}],
+    )
+
+    stats = await MissedDoseSweeper(db, grace_minutes=30).sweep(now=NOW)
+
+    assert stats["events"] == 2
+    assert stats["missed"] == 3
+    by_patient = {pid: payload for pid, _, payload in registered}
+    assert {m["medication_id"] for m in by_patient["p1"]["medications"]} == {"losartan", "metformina"}
+    assert by_patient["p1"]["scheduled_time"] == "08:00"
+    assert by_patient["p2"]["count"] == 1
+
+    db.medications.bulk_write.assert_awaited_once()
+    ops = {op._filter["_id"]: op._doc["$set"] for op in db.medications.bulk_write.await_args.args[0]}
+    assert ops["losartan"]["missedAlertsByTime.2026-05-20:08:00"] is True
+    assert ops["losartan"]["nextDueAt"] == datetime(2026, 5, 20, 20, 0)
+    assert ops["metformina"]["nextDueAt"] == datetime(2026, 5, 21, 8, 0)
+    # Taken: no marker, but the schedule still advances
+    assert ops["aspirina"] == {"nextDueAt": datetime(2026, 5, 21, 8, 0)}
+
+
+@pytest.mark.asyncio
+async def test_already_notified_and_stale_slots_are_not_sent(registered):
+    db = _sweeper_db(due=[
+        _med("losartan", "p1", ["08:00"], datetime(2026, 5, 20, 8, 0),
+             missedAlertsByTime={"2026-05-20:08:00": True}),
+        # Left over from before downtime: yesterday's slot is skipped
+        _med("metformina", "p1", ["07:00"], datetime(2026, 5, 19, 7, 0)),
+    ])
+
+    stats = await MissedDoseSweeper(db, grace_minutes=30).sweep(now=NOW)
+
+    # metformina's today 07:00 slot is still reported
+    assert stats["events"] == 1
+    assert [m["medication_id"] for m in registered[0][2]["medications"]] == ["metformina"]
+    ops = {op._filter["_id"]: op._doc["$set"] for op in db.medications.bulk_write.await_args.args[0]}
+    assert ops["losartan"] == {"nextDueAt": datetime(2026, 5, 21, 8, 0)}
+    assert ops["metformina"]["nextDueAt"] == datetime(2026, 5, 21, 7, 0)
+    assert "missedAlertsByTime.2026-05-19:07:00" not in ops["metformina"]
+
+
+@pytest.mark.asyncio
+async def test_slot_whose_grace_ends_after_midnight_is_reported(registered):
+    late = datetime(2026, 5, 19, 23, 45)
+    db = _sweeper_db(due=[_med("losartan", "p1", ["23:45"], late)])
+
+    stats = await MissedDoseSweeper(db, grace_minutes=30).sweep(now=datetime(2026, 5, 20, 0, 16))
+
+    assert stats["events"] == 1
+    assert registered[0][2]["scheduled_time"] == "23:45"
+    # Takes are counted on the slot's own day
+    match = db.medication_takes.aggregate.call_args.args[0][0]["$match"]
+    assert match["date"] == {"$in": ["2026-05-19"]}
+    op = db.medications.bulk_write.await_args.args[0][0]
+    assert op._doc["$set"]["missedAlertsByTime.2026-05-19:23:45"] is True
+
+
+@pytest.mark.asyncio
+async def test_slot_within_grace_period_is_not_due():
+    db = _sweeper_db(due=[])
+    await MissedDoseSweeper(db, grace_minutes=30).sweep(now=NOW)
+
+    query = db.medications.find.call_args_list[1].args[0]
+    assert query["isActive"] is True
+    assert query["nextDueAt"] == {"$lte": datetime(2026, 5, 20, 8, 30)}
+    db.medications.bulk_write.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_failed_event_keeps_next_due_for_retry(monkeypatch):
+    monkeypatch.setattr(
+        BiometricEventService, "register_biometric_event",
+        AsyncMock(side_effect=RuntimeError("push down")),
+    )
+    slot = datetime(2026, 5, 20, 8, 0)
+    db = _sweeper_db(due=[_med("losartan", "p1", ["08:00"], slot)])
+
+    stats = await MissedDoseSweeper(db, grace_minutes=30).sweep(now=NOW)
+
+    assert stats["events"] == 0
+    db.medications.bulk_write.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_sweep_all_drains_more_due_slots_than_one_batch(registered):
+    slot = datetime(2026, 5, 20, 8, 0)
+    meds = [_med(f"med{i}", f"p{i}", ["08:00"], slot) for i in range(5)]
+    db = MagicMock()
+    # Per batch: backfill lookup, then up to 2 due medications
+    db.medications.find = MagicMock(side_effect=[
+        _cursor([]), _cursor(meds[0:2]),
+        _cursor([]), _cursor(meds[2:4]),
+        _cursor([]), _cursor(meds[4:5]),
+    ])
+    db.medications.bulk_write = AsyncMock()
+    db.medication_takes.aggregate = MagicMock(return_value=_cursor([]))
+
+    stats = await MissedDoseSweeper(db, grace_minutes=30, batch_size=2).sweep_all(now=NOW)
+
+    assert stats["due"] == 5
+    assert stats["events"] == 5
+    assert db.medications.bulk_write.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_sweep_all_stops_when_a_full_batch_makes_no_progress(monkeypatch):
+    monkeypatch.setattr(
+        BiometricEventService, "register_biometric_event",
+        AsyncMock(side_effect=RuntimeError("push down")),
+    )
+    slot = datetime(2026, 5, 20, 8, 0)
+    db = _sweeper_db(due=[_med("a", "p1", ["08:00"], slot), _med("b", "p2", ["08:00"], slot)])
+
+    stats = await MissedDoseSweeper(db, grace_minutes=30, batch_size=2).sweep_all(now=NOW)
+
+    assert stats["due"] == 2  # One batch, no retry loop
+
+
+@pytest.mark.asyncio
+async def test_legacy_medications_are_backfilled_from_start_of_day(registered):
+    db = _sweeper_db(due=[], legacy=[{"_id": "old", "time": "08:00"}])
+
+    stats = await MissedDoseSweeper(db, grace_minutes=30).sweep(now=NOW)
+
+    assert stats["backfilled"] == 1
+    op = db.medications.bulk_write.await_args.args[0][0]
+    assert op._doc["$set"]["nextDueAt"] == datetime(2026, 5, 20, 8, 0)
+
+
+@pytest.mark.asyncio
+async def test_today_status_is_read_only():
+    db = MagicMock()
+    db.medications.find = MagicMock(return_value=_AsyncIter([
+        _med("losartan", "p1", ["08:00"], datetime(2026, 5, 20, 8, 0), isActive=True, medicationType="pill"),
+    ]))
+    db.medication_takes.find = MagicMock(return_value=_AsyncIter([]))
+    db.medications.update_one = AsyncMock()
+    db.medications.bulk_write = AsyncMock()
+
+    result = await MedicationService(db).get_medications_with_today_status("p1", "2026-05-20")
+
+    assert result[0]["isTakenToday"] is False
+    db.medications.update_one.assert_not_awaited()
+    db.medications.bulk_write.assert_not_awaited()
+
+
+class _AsyncIter:
+    """Motor cursor stand-in supporting `.sort()` and `async for`."""
+
+    def __init__(self, items):
+        self._items = list(items)
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self._items)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
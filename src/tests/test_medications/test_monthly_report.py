@@ -0,0 +1,118 @@
+"""
+Tests for the monthly adherence report and calendar, computed from one
+(medicationId, date) aggregation cached per month
+(src/domains/medications/adherence.py).
+"""
+from datetime import datetime
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.domains.medications.adherence import MonthlyTakesCache, monthly_takes
+from src.domains.medications.services import MedicationService
+
+
+class _AsyncIter:
+    """Motor cursor stand-in supporting `.sort()` and `async for`."""
+
+    def __init__(self, items):
+        self._items = list(items)
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self._items)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def _med(med_id, name, active=True):
+    return {"_id": med_id, "userId": "p1", "name": name, "times": ["08:00"],
+            "medicationType": "pill", "isActive": active}
+
+
+def _row(med_id, date, count):
+    return {"_id": {"medicationId": med_id, "date": date}, "count": count}
+
+
+def _report_db(meds, rows):
+    db = MagicMock()
+    db.medications.find = MagicMock(side_effect=lambda *a, **k: _AsyncIter(meds))
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=rows)
+    db.medication_takes.aggregate = MagicMock(return_value=cursor)
+    db.medication_takes.find = MagicMock(side_effect=AssertionError("takes must be aggregated"))
+    return db
+
+
+@pytest.mark.asyncio
+async def test_report_and_calendar_share_one_aggregation():
+    db = _report_db(
+        meds=[_med("losartan", "Losartan"), _med("metformina", "Metformina")],
+        rows=[
+            _row("losartan", "2024-02-01", 2),
+            _row("losartan", "2024-02-02", 1),
+            _row("metformina", "2024-02-01", 3),
+        ],
+    )
+    service = MedicationService(db)
+
+    report = await service.get_monthly_report("p1", 2024, 2)
+    events = await service.get_calendar_events("p1", 2024, 2)
+
+    by_med = {m["medicationId"]: m for m in report["medications"]}
+    assert by_med["losartan"]["dailyTakes"] == {"2024-02-01": 2, "2024-02-02": 1}
+    assert by_med["losartan"]["daysTaken"] == 2
+    assert by_med["losartan"]["totalDays"] == 29
+    assert by_med["metformina"]["adherencePercentage"] == round(100 / 29, 1)
+    assert report["monthName"] == "Febrero"
+    assert len(events) == 29
+    assert events[0]["medicationsTaken"] == 2
+    assert events[1]["medicationsTaken"] == 1
+    assert events[2] == {"date": "2024-02-03", "hasMedication": True,
+                         "medicationsTaken": 0, "totalMedications": 2}
+
+    db.medication_takes.aggregate.assert_called_once()
+    match = db.medication_takes.aggregate.call_args.args[0][0]["$match"]
+    assert match == {"userId": "p1", "date": {"$gte": "2024-02-01", "$lte": "2024-02-29"}}
+
+
+@pytest.mark.asyncio
+async def test_backdated_take_invalidates_a_cached_past_month():
+    db = _report_db(meds=[_med("losartan", "Losartan")], rows=[])
+    db.medications.find_one = AsyncMock(return_value=_med("losartan", "Losartan"))
+    db.medication_takes.insert_one = AsyncMock()
+    service = MedicationService(db)
+
+    await service.get_monthly_report("p1", 2024, 2)
+    await service.get_monthly_report("p1", 2024, 2)
+    assert db.medication_takes.aggregate.call_count == 1  # Past month served from cache
+
+    invalidations = monthly_takes.stats()["invalidations"]
+    await service.take_medication("losartan", "p1", taken_at=datetime(2024, 2, 10, 8, 0))
+    await service.get_monthly_report("p1", 2024, 2)
+    assert db.medication_takes.aggregate.call_count == 2
+    assert monthly_takes.stats()["invalidations"] == invalidations + 1
+
+
+@pytest.mark.asyncio
+async def test_current_month_expires_and_past_month_does_not():
+    clock = [0.0]
+    cache = MonthlyTakesCache(max_months=10, current_ttl_seconds=60, timer=lambda: clock[0])
+    db = _report_db(meds=[], rows=[])
+
+    await cache.get(db, "p1", 2024, 2)
+    await cache.get(db, "p1", 2999, 1)  # Not yet past: short TTL tier
+    assert cache.stats()["past_months"] == 1
+    assert cache.stats()["current_months"] == 1
+
+    clock[0] = 120.0
+    await cache.get(db, "p1", 2024, 2)
+    await cache.get(db, "p1", 2999, 1)
+    assert db.medication_takes.aggregate.call_count == 3
@@ -0,0 +1,149 @@
+"""
+Tests for POST /medications/take-batch: one $in validation query, one
+insert_many, one batched caregiver event, and Idempotency-Key replays that
+return the stored takes without recording them twice.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from pymongo.errors import BulkWriteError
+from unittest.mock import AsyncMock, MagicMock
+
+from src.core.database import db, get_database
+from src.domains.auth.routes import verify_token
+from src.domains.events.services import BiometricEventService
+from src.main import app
+
+PATIENT_ID = "patient-1"
+
+
+def _med(med_id, name, owner=PATIENT_ID):
+    return {"_id": med_id, "userId": owner, "name": name, "dosage": "50 mg"}
+
+
+def _cursor(items):
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=list(items))
+    return cursor
+
+
+@pytest.fixture
+def client(monkeypatch):
+    mock_db = MagicMock()
+    mock_db.medications.find = MagicMock(return_value=_cursor([
+        _med("losartan", "Losartan"),
+        _med("metformina", "Metformina"),
+    ]))
+    mock_db.medication_takes.insert_many = AsyncMock()
+    mock_db.medication_takes.insert_one = AsyncMock(
+        side_effect=AssertionError("takes must be inserted in one batch")
+    )
+
+    register_event = AsyncMock(return_value={})
+    monkeypatch.setattr(BiometricEventService, "register_biometric_event", register_event)
+
+    app.dependency_overrides[get_database] = lambda: mock_db
+    app.dependency_overrides[verify_token] = lambda: PATIENT_ID
+    db.connect = MagicMock()
+    db.close = MagicMock()
+
+    c = TestClient(app)
+    c.mock_db = mock_db
+    c.register_event = register_event
+    try:
+        yield c
+    finally:
+        app.dependency_overrides.clear()
+
+
+BODY = {
+    "scheduledTime": "08:00",
+    "medications": [{"medicationId": "losartan"}, {"medicationId": "metformina"}],
+}
+
+
+def test_batch_validates_and_inserts_once_and_emits_one_event(client):
+    resp = client.post("/medications/take-batch", json=BODY)
+
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert data["count"] == 2
+    assert [t["medicationId"] for t in data["takes"]] == ["losartan", "metformina"]
+    assert all(t["scheduledTime"] == "08:00" for t in data["takes"])
+
+    client.mock_db.medications.find.assert_called_once()
+    query = client.mock_db.medications.find.call_args.args[0]
+    assert query == {"_id": {"$in": ["losartan", "metformina"]}}
+
+    client.mock_db.medication_takes.insert_many.assert_awaited_once()
+    docs = client.mock_db.medication_takes.insert_many.call_args.args[0]
+    assert len(docs) == 2
+    assert client.mock_db.medication_takes.insert_many.call_args.kwargs["ordered"] is False
+
+    client.register_event.assert_awaited_once()
+    payload = client.register_event.call_args.kwargs["payload"]
+    assert payload["count"] == 2
+    assert [m["name"] for m in payload["medications"]] == ["Losartan", "Metformina"]
+
+
+def test_idempotency_key_derives_stable_take_ids(client):
+    headers = {"Idempotency-Key": "alarm-42"}
+    client.post("/medications/take-batch", json=BODY, headers=headers)
+    client.post("/medications/take-batch", json=BODY, headers=headers)
+    client.post("/medications/take-batch", json=BODY, headers={"Idempotency-Key": "alarm-43"})
+
+    calls = client.mock_db.medication_takes.insert_many.call_args_list
+    first, retry, other = ([d["_id"] for d in c.args[0]] for c in calls)
+    assert first == retry
+    assert set(first).isdisjoint(other)
+
+
+def test_replayed_batch_returns_stored_takes_without_event(client):
+    client.post("/medications/take-batch", json=BODY, headers={"Idempotency-Key": "alarm-42"})
+    stored = client.mock_db.medication_takes.insert_many.call_args.args[0]
+    client.register_event.reset_mock()
+
+    client.mock_db.medication_takes.insert_many = AsyncMock(side_effect=BulkWriteError({
+        "writeErrors": [
+            {"index": 0, "code": 11000, "errmsg": "E11000 duplicate key"},
+            {"index": 1, "code": 11000, "errmsg": "E11000 duplicate key"},
+        ],
+    }))
+    client.mock_db.medication_takes.find = MagicMock(return_value=_cursor(stored))
+
+    resp = client.post("/medications/take-batch", json=BODY, headers={"Idempotency-Key": "alarm-42"})
+
+    assert resp.status_code == 200, resp.text
+    assert [t["id"] for t in resp.json()["takes"]] == [d["_id"] for d in stored]
+    client.register_event.assert_not_awaited()
+
+
+def test_other_write_errors_are_not_treated_as_replays(client):
+    client.mock_db.medication_takes.insert_many = AsyncMock(side_effect=BulkWriteError({
+        "writeErrors": [{"index": 0, "code": 121, "errmsg": "Document failed validation"}],
+    }))
+
+    resp = client.post("/medications/take-batch", json=BODY, headers={"Idempotency-Key": "alarm-42"})
+
+    assert resp.status_code == 500
+    client.register_event.assert_not_awaited()
+
+
+def test_unknown_medication_is_404_before_any_write(client):
+    body = {"medications": [{"medicationId": "losartan"}, {"medicationId": "nope"}]}
+
+    resp = client.post("/medications/take-batch", json=body)
+
+    assert resp.status_code == 404
+    client.mock_db.medication_takes.insert_many.assert_not_awaited()
+
+
+def test_foreign_medication_is_403_before_any_write(client):
+    client.mock_db.medications.find = MagicMock(return_value=_cursor([
+        _med("losartan", "Losartan"),
+        _med("metformina", "Metformina", owner="someone-else"),
+    ]))
+
+    resp = client.post("/medications/take-batch", json=BODY)
+
+    assert resp.status_code == 403
+    client.mock_db.medication_takes.insert_many.assert_not_awaited()
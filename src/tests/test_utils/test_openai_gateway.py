@@ -0,0 +1,313 @@
+"""
+Tests for the OpenAI gateway (src/utils/openai_gateway.py).
+
+A real AsyncOpenAI client talks to a local stub HTTP server that can be made
+slow or failing, so the limiter, deadlines and circuit breaker are exercised
+through the SDK's own HTTP path.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, MagicMock
+
+import openai
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+
+from src.core.database import db, get_database
+from src.core.exceptions import ServiceBusyException
+from src.domains.auth.routes import verify_token_jwt
+from src.domains.health import voice_parsing
+from src.domains.health.route_modules import voice_routes
+from src.domains.health.voice_parsing import VoiceParsingService
+from src.main import app
+from src.utils.openai_gateway import CLOSED, HALF_OPEN, OPEN, OpenAIGateway, build_client
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        stub = self.server
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with stub.lock:
+            stub.requests += 1
+            stub.active += 1
+            stub.max_active = max(stub.max_active, stub.active)
+        try:
+            time.sleep(stub.delay)
+            if stub.status != 200:
+                body, content_type = json.dumps({"error": {"message": "degraded"}}).encode(), "application/json"
+            elif self.path.endswith("/audio/transcriptions"):
+                body, content_type = "ya me tomé las de la mañana".encode(), "text/plain"
+            else:
+                content = json.dumps({"intent": "confirm_take", "franja": "night", "confidence": "high"})
+                body = json.dumps({
+                    "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": "stub",
+                    "choices": [{
+                        "index": 0, "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": content},
+                    }],
+                }).encode()
+                content_type = "application/json"
+            self.send_response(stub.status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client cancelled (deadline)
+        finally:
+            with stub.lock:
+                stub.active -= 1
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.delay = 0.0
+    server.status = 200
+    server.requests = server.active = server.max_active = 0
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _gateway(server, timer=time.monotonic, **overrides) -> OpenAIGateway:
+    options = dict(
+        max_concurrency=4,
+        queue_timeout_seconds=1.0,
+        call_timeout_seconds=5.0,
+        failure_threshold=2,
+        reset_timeout_seconds=30.0,
+    )
+    options.update(overrides)
+    client = build_client(api_key="test", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1")
+    client = client.with_options(max_retries=0)
+    return OpenAIGateway(client, timer=timer, **options)
+
+
+def _chat(gateway: OpenAIGateway):
+    return gateway.call(
+        "chat",
+        lambda: gateway.client.chat.completions.create(
+            model="stub", messages=[{"role": "user", "content": "hola"}]
+        ),
+    )
+
+
+@pytest_asyncio.fixture
+async def service(stub_server, monkeypatch):
+    monkeypatch.setattr(voice_parsing.audio_pool, "run", AsyncMock(return_value=None))
+    svc = VoiceParsingService()
+    svc.gateway = _gateway(stub_server)
+    svc.client = svc.gateway.client
+    yield svc
+    await svc.client.close()
+
+
+@pytest.mark.asyncio
+async def test_voice_flow_through_stub(service, stub_server):
+    result = await service.parse_take_audio(b"\0" * 2000, "take.m4a")
+
+    assert result["transcription"] == "ya me tomé las de la mañana"
+    assert result["franja"] == "night"  # From the stub LLM, not the keywords
+    stats = service.gateway.stats()
+    assert stats["calls"] == 2
+    assert set(stats["latency"]) == {"transcription", "chat"}
+    assert stats["in_flight"] == 0
+    assert stats["breaker_state"] == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped(stub_server):
+    stub_server.delay = 0.1
+    gateway = _gateway(stub_server, max_concurrency=2)
+
+    await asyncio.gather(*(_chat(gateway) for _ in range(6)))
+
+    assert stub_server.requests == 6
+    assert stub_server.max_active == 2
+    assert gateway.stats()["max_in_flight"] == 2
+    await gateway.client.close()
+
+
+@pytest.mark.asyncio
+async def test_no_slot_in_time_is_busy(stub_server):
+    stub_server.delay = 0.3
+    gateway = _gateway(stub_server, max_concurrency=1, queue_timeout_seconds=0.05)
+
+    results = await asyncio.gather(_chat(gateway), _chat(gateway), return_exceptions=True)
+
+    assert sum(isinstance(r, ServiceBusyException) for r in results) == 1
+    assert gateway.stats()["rejected_busy"] == 1
+    assert gateway.state == CLOSED
+    await gateway.client.close()
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_slow_call(stub_server):
+    stub_server.delay = 2.0
+    gateway = _gateway(stub_server)
+
+    started = time.monotonic()
+    with pytest.raises(ServiceBusyException):
+        with gateway.deadline(0.2):
+            with gateway.deadline(10.0):  # Nested: the earlier deadline wins
+                await _chat(gateway)
+
+    assert time.monotonic() - started < 1.0
+    assert gateway.stats()["deadline_exceeded"] == 1
+    # Running out of request budget does not count against the provider
+    assert gateway.consecutive_failures == 0
+    await gateway.client.close()
+
+
+@pytest.mark.asyncio
+async def test_call_timeout_counts_as_failure(stub_server):
+    stub_server.delay = 1.0
+    gateway = _gateway(stub_server, call_timeout_seconds=0.1, failure_threshold=1)
+
+    with pytest.raises(ServiceBusyException):
+        await _chat(gateway)
+
+    assert gateway.state == OPEN
+    assert gateway.stats()["timeouts"] == 1
+    await gateway.client.close()
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_fails_fast_and_recovers(stub_server):
+    clock = _Clock()
+    stub_server.status = 500
+    gateway = _gateway(stub_server, timer=clock)
+
+    for _ in range(2):
+        with pytest.raises(openai.InternalServerError):
+            await _chat(gateway)
+    assert gateway.state == OPEN
+
+    with pytest.raises(ServiceBusyException) as exc:
+        await _chat(gateway)
+    assert exc.value.retry_after_seconds == 30
+    assert stub_server.requests == 2  # Not sent
+
+    clock.now += 31
+    stub_server.status = 200
+    await _chat(gateway)  # Half-open probe succeeds
+    assert gateway.state == CLOSED
+    assert gateway.stats()["rejected_open"] == 1
+    await gateway.client.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens(stub_server):
+    clock = _Clock()
+    stub_server.status = 503
+    gateway = _gateway(stub_server, timer=clock, failure_threshold=1)
+
+    with pytest.raises(openai.InternalServerError):
+        await _chat(gateway)
+    clock.now += 31
+    assert gateway._admit() is True
+    assert gateway.state == HALF_OPEN
+    with pytest.raises(ServiceBusyException):
+        gateway._admit()  # Only one probe at a time
+    gateway._probe_in_flight = False
+
+    with pytest.raises(openai.InternalServerError):
+        await _chat(gateway)
+    assert gateway.state == OPEN
+    assert gateway.times_opened == 2
+    await gateway.client.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("stage", ["queued", "calling"])
+async def test_cancelled_probe_does_not_stick_half_open(stub_server, stage):
+    clock = _Clock()
+    stub_server.status = 503
+    gateway = _gateway(stub_server, timer=clock, failure_threshold=1, max_concurrency=1)
+    with pytest.raises(openai.InternalServerError):
+        await _chat(gateway)
+    clock.now += 31
+
+    hold = asyncio.Event()
+    if stage == "queued":
+        await gateway._get_limiter().acquire()  # The probe waits for a slot
+    probe = asyncio.create_task(gateway.call("chat", hold.wait))
+    await asyncio.sleep(0.05)
+    assert gateway.state == HALF_OPEN
+    probe.cancel()  # Client disconnected
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    if stage == "queued":
+        gateway._get_limiter().release()
+
+    stub_server.status = 200
+    await _chat(gateway)  # The next call is admitted as the probe
+    assert gateway.state == CLOSED
+    assert gateway.in_flight == 0
+    await gateway.client.close()
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_open_breaker(stub_server):
+    stub_server.status = 400
+    gateway = _gateway(stub_server, failure_threshold=1)
+
+    with pytest.raises(openai.BadRequestError):
+        await _chat(gateway)
+    assert gateway.state == CLOSED
+    await gateway.client.close()
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_falls_back_to_keywords(service, stub_server):
+    service.gateway.state = OPEN
+    service.gateway.opened_at = time.monotonic()
+
+    result = await service.parse_take_intent("ya me tomé las de la mañana")
+
+    assert result == {"intent": "confirm_take", "franja": "morning", "confidence": "high"}
+    assert stub_server.requests == 0
+
+
+def test_audio_endpoint_returns_503_while_breaker_is_open(monkeypatch):
+    svc = VoiceParsingService()
+    svc.client = MagicMock()
+    svc.gateway = OpenAIGateway(svc.client, 4, 1.0, 5.0, 1, 30.0)
+    svc.gateway.state = OPEN
+    svc.gateway.opened_at = time.monotonic()
+    monkeypatch.setattr(voice_routes, "get_voice_parsing_service", lambda: svc)
+    monkeypatch.setattr(voice_parsing.audio_pool, "run", AsyncMock())
+    db.connect = MagicMock()
+    app.dependency_overrides[get_database] = lambda: MagicMock()
+    app.dependency_overrides[verify_token_jwt] = lambda: "patient-1"
+    try:
+        response = TestClient(app).post(
+            "/health/parse-bp-audio",
+            files={"audio": ("rec.m4a", b"\0\0\0\x18ftypM4A " + b"\0" * 2000, "audio/mp4")},
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    voice_parsing.audio_pool.run.assert_not_awaited()  # Upload not preprocessed
@@ -0,0 +1,123 @@
+"""
+Tests for the read-through response cache (src/core/cache.py).
+"""
+import pytest
+from unittest.mock import AsyncMock
+
+from src.core.cache import ResponseCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(max_bytes=10_000, ttl=60.0, clock=None):
+    return ResponseCache(max_bytes=max_bytes, ttl_seconds=ttl, timer=clock or _Clock())
+
+
+@pytest.mark.asyncio
+async def test_hit_after_miss_and_params_are_part_of_key():
+    cache = _cache()
+    compute = AsyncMock(return_value={"records": [1, 2, 3]})
+
+    first = await cache.get_or_compute("steps", "p1", (30,), compute)
+    second = await cache.get_or_compute("steps", "p1", (30,), compute)
+    await cache.get_or_compute("steps", "p1", (7,), compute)
+    await cache.get_or_compute("sleep", "p1", (30,), compute)
+
+    assert first is second
+    assert compute.await_count == 3
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+
+
+@pytest.mark.asyncio
+async def test_invalidate_only_affects_that_patient():
+    cache = _cache()
+    compute = AsyncMock(return_value={"v": 1})
+    await cache.get_or_compute("summary", "p1", (), compute)
+    await cache.get_or_compute("summary", "p2", (), compute)
+
+    cache.invalidate("p1")
+    await cache.get_or_compute("summary", "p1", (), compute)
+    await cache.get_or_compute("summary", "p2", (), compute)
+
+    assert compute.await_count == 3  # p1 recomputed, p2 served from cache
+    assert cache.stats()["invalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_ttl_expiry():
+    clock = _Clock()
+    cache = _cache(ttl=10, clock=clock)
+    compute = AsyncMock(return_value={"v": 1})
+
+    await cache.get_or_compute("summary", "p1", (), compute)
+    clock.now = 11
+    await cache.get_or_compute("summary", "p1", (), compute)
+
+    assert compute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_versions_are_forgotten_after_the_ttl_without_resurrecting_entries():
+    clock = _Clock()
+    cache = _cache(ttl=10, clock=clock)
+    old = AsyncMock(return_value={"v": "old"})
+    new = AsyncMock(return_value={"v": "new"})
+
+    cache.invalidate("p1")
+    clock.now = 9
+    await cache.get_or_compute("summary", "p1", (), old)  # Stored under the bumped version
+    clock.now = 11  # Version forgotten, entry still live
+    assert cache.stats()["versions"] == 0
+    cache.invalidate("p1")  # Never reuses the old value
+
+    assert await cache.get_or_compute("summary", "p1", (), new) == {"v": "new"}
+
+
+@pytest.mark.asyncio
+async def test_version_table_is_bounded_and_eviction_orphans_entries():
+    cache = ResponseCache(max_bytes=10_000, ttl_seconds=60, timer=_Clock(), max_versions=2)
+    compute = AsyncMock(return_value={"v": 1})
+    await cache.get_or_compute("summary", "p1", (), compute)
+
+    for patient in ("p1", "p2", "p3", "p4"):
+        cache.invalidate(patient)
+    await cache.get_or_compute("summary", "p1", (), compute)  # p1's version was evicted
+    await cache.get_or_compute("summary", "p1", (), compute)
+
+    assert cache.stats()["versions"] == 2
+    assert compute.await_count == 2  # Recomputed once, then cached again
+
+
+@pytest.mark.asyncio
+async def test_memory_bound_evicts_and_skips_oversized_values():
+    cache = _cache(max_bytes=100)
+    payload = {"data": "x" * 30}  # ~42 bytes serialized
+
+    for patient in ("p1", "p2", "p3"):
+        await cache.get_or_compute("summary", patient, (), AsyncMock(return_value=payload))
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 100
+    assert stats["evictions"] == 1
+
+    huge = {"data": "x" * 500}
+    result = await cache.get_or_compute("summary", "p4", (), AsyncMock(return_value=huge))
+    assert result == huge
+    assert cache.stats()["bytes"] <= 100
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache_always_computes():
+    cache = ResponseCache(max_bytes=10_000, ttl_seconds=60, enabled=False)
+    compute = AsyncMock(return_value={"v": 1})
+    await cache.get_or_compute("summary", "p1", (), compute)
+    await cache.get_or_compute("summary", "p1", (), compute)
+    assert compute.await_count == 2
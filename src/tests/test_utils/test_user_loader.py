@@ -0,0 +1,81 @@
+"""
+Tests for the request-scoped user identity map (src/core/user_loader.py).
+"""
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from bson import ObjectId
+
+from src.core.user_loader import UserLoader, USER_FIELDS
+
+
+ANA = str(ObjectId())
+LUIS = str(ObjectId())
+MISSING = str(ObjectId())
+
+
+def _db(*docs):
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=list(docs))
+    db = MagicMock()
+    db.users.find = MagicMock(return_value=cursor)
+    return db
+
+
+@pytest.mark.asyncio
+async def test_loads_in_same_tick_share_one_projected_query():
+    db = _db({"_id": ObjectId(ANA), "name": "Ana"}, {"_id": ObjectId(LUIS), "name": "Luis"})
+    loader = UserLoader(db)
+
+    ana, luis, ana_again = await asyncio.gather(
+        loader.load(ANA), loader.load(LUIS), loader.load(ANA)
+    )
+
+    assert ana["name"] == "Ana" and luis["name"] == "Luis"
+    assert ana_again is ana
+    db.users.find.assert_called_once()
+    query, projection = db.users.find.call_args.args
+    assert sorted(query["_id"]["$in"]) == sorted([ObjectId(ANA), ObjectId(LUIS)])
+    assert projection == USER_FIELDS
+    assert "password" not in projection
+
+
+@pytest.mark.asyncio
+async def test_results_and_misses_are_memoized_for_the_request():
+    db = _db({"_id": ObjectId(ANA), "name": "Ana"})
+    loader = UserLoader(db)
+
+    assert (await loader.load(ANA))["name"] == "Ana"
+    assert await loader.load(MISSING) is None
+    assert (await loader.load(ANA))["name"] == "Ana"
+    assert await loader.load(MISSING) is None
+
+    assert db.users.find.call_count == 2
+    assert loader.loads == 4
+    assert loader.queries == 2
+
+
+@pytest.mark.asyncio
+async def test_load_many_keeps_order_and_skips_invalid_ids():
+    db = _db({"_id": ObjectId(LUIS), "name": "Luis"}, {"_id": ObjectId(ANA), "name": "Ana"})
+    loader = UserLoader(db)
+
+    docs = await loader.load_many([ANA, None, "not-an-objectid", LUIS, MISSING])
+
+    assert [d["name"] if d else None for d in docs] == ["Ana", None, None, "Luis", None]
+    db.users.find.assert_called_once()
+    assert len(db.users.find.call_args.args[0]["_id"]["$in"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_query_error_reaches_every_waiter_and_is_not_memoized():
+    db = _db()
+    db.users.find.return_value.to_list = AsyncMock(side_effect=RuntimeError("mongo down"))
+    loader = UserLoader(db)
+
+    results = await asyncio.gather(loader.load(ANA), loader.load(LUIS), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    db.users.find.return_value.to_list = AsyncMock(return_value=[{"_id": ObjectId(ANA), "name": "Ana"}])
+    assert (await loader.load(ANA))["name"] == "Ana"
@@ -11,6 +11,7 @@ Environment variables required:
   OR
 - FIREBASE_SERVICE_ACCOUNT_JSON: Base64-encoded service account JSON
 """
+import asyncio
 import os
 import json
 import base64
@@ -137,8 +138,8 @@ async def send_push_notification(
             token=fcm_token
         )
         
-        # Send
-        response = _messaging.send(message)
+        # Send (blocking HTTP call in the SDK: keep it off the event loop)
+        response = await asyncio.to_thread(_messaging.send, message)
         logger.info(f"Push notification sent successfully: {response}")
         return True
         
@@ -0,0 +1,314 @@
+"""
+Process-wide gateway for OpenAI calls (Whisper and chat completions).
+
+Every call from the voice endpoints goes through `openai_gateway.call()`,
+which adds what the SDK does not provide across requests:
+
+- Concurrency limit: at most OPENAI_MAX_CONCURRENCY calls in flight per
+  process. A caller that cannot get a slot within
+  OPENAI_QUEUE_TIMEOUT_SECONDS gets ServiceBusyException.
+- Deadlines: `with openai_gateway.deadline(seconds):` sets a total budget for
+  everything inside it (queueing, SDK retries, every call). Nested deadlines
+  keep the earliest one. A call is cancelled when the budget runs out and
+  ServiceBusyException is raised.
+- Circuit breaker: OPENAI_BREAKER_FAILURE_THRESHOLD consecutive provider
+  failures (timeouts, connection errors, 429, 5xx) open the breaker; calls
+  then fail immediately with ServiceBusyException for
+  OPENAI_BREAKER_RESET_SECONDS, after which a single probe call is let
+  through (half-open). Its success closes the breaker, its failure opens it
+  again. Client errors (4xx other than 429) do not count.
+
+Callers that have a local fallback (regex/keyword parsing) catch the
+exception and use it; the audio endpoints return 503 with Retry-After.
+
+`stats()` (in-flight calls, latency percentiles per operation, breaker state)
+is exposed under "openai_gateway" at GET /metrics/cache.
+"""
+import asyncio
+import contextvars
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+import openai
+from openai import AsyncOpenAI
+
+from src._config.logger import get_logger
+from src._config.settings import settings
+from src.core.cache import register_cache_stats
+from src.core.exceptions import ServiceBusyException
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Absolute deadline (gateway timer) of the current request, if any
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "openai_deadline", default=None
+)
+
+
+def _is_provider_failure(exc: BaseException) -> bool:
+    """Errors that say the provider is degraded (as opposed to a bad request)."""
+    if isinstance(exc, (asyncio.TimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True  # APITimeoutError is an APIConnectionError
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code >= 500
+    return False
+
+
+def _percentile(ordered, pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+class OpenAIGateway:
+    """Concurrency limit, deadlines and circuit breaker around a shared AsyncOpenAI client."""
+
+    def __init__(
+        self,
+        client: Optional[AsyncOpenAI],
+        max_concurrency: int,
+        queue_timeout_seconds: float,
+        call_timeout_seconds: float,
+        failure_threshold: int,
+        reset_timeout_seconds: float,
+        timer: Callable[[], float] = time.monotonic,
+        latency_window: int = 200,
+    ):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.call_timeout_seconds = call_timeout_seconds
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self._timer = timer
+        self._latency_window = latency_window
+        self._limiter: Optional[asyncio.Semaphore] = None
+        self._limiter_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Close the breaker and zero the counters."""
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected_open = 0
+        self.rejected_busy = 0
+        self.deadline_exceeded = 0
+        self.times_opened = 0
+        self._latencies: Dict[str, Deque[float]] = {}
+
+    # -- deadlines ---------------------------------------------------------
+
+    @contextmanager
+    def deadline(self, seconds: float) -> Iterator[None]:
+        """Total time budget for the OpenAI calls made inside the block."""
+        current = _deadline.get()
+        new = self._timer() + seconds
+        token = _deadline.set(new if current is None else min(current, new))
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+
+    def _remaining(self) -> Optional[float]:
+        current = _deadline.get()
+        return None if current is None else current - self._timer()
+
+    # -- circuit breaker ---------------------------------------------------
+
+    def _retry_after(self) -> int:
+        remaining = self.opened_at + self.reset_timeout_seconds - self._timer()
+        return max(1, math.ceil(remaining))
+
+    def ensure_available(self) -> None:
+        """Fail fast while the breaker is open (does not use up the half-open probe)."""
+        if self.state == OPEN and self._timer() - self.opened_at < self.reset_timeout_seconds:
+            self.rejected_open += 1
+            raise ServiceBusyException("OpenAI", retry_after_seconds=self._retry_after())
+
+    def _admit(self) -> bool:
+        """Raise if the breaker rejects the call; True when the call is the half-open probe."""
+        if self.state == OPEN:
+            if self._timer() - self.opened_at < self.reset_timeout_seconds:
+                self.rejected_open += 1
+                raise ServiceBusyException("OpenAI", retry_after_seconds=self._retry_after())
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected_open += 1
+                raise ServiceBusyException("OpenAI", retry_after_seconds=1)
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def _record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info("OpenAI circuit breaker closed")
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def _record_failure(self) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+                logger.warning(
+                    f"OpenAI circuit breaker opened after {self.consecutive_failures} failures; "
+                    f"failing fast for {self.reset_timeout_seconds}s"
+                )
+            self.state = OPEN
+            self.opened_at = self._timer()
+
+    # -- calls -------------------------------------------------------------
+
+    def _get_limiter(self) -> asyncio.Semaphore:
+        """Semaphore bound to the running loop (recreated if the loop changes)."""
+        loop = asyncio.get_running_loop()
+        if self._limiter is None or self._limiter_loop is not loop:
+            self._limiter = asyncio.Semaphore(self.max_concurrency)
+            self._limiter_loop = loop
+        return self._limiter
+
+    def _deadline_exceeded(self) -> ServiceBusyException:
+        self.deadline_exceeded += 1
+        return ServiceBusyException("OpenAI", retry_after_seconds=1)
+
+    async def call(self, operation: str, make_call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `make_call()` (an SDK request) under the limiter, the current
+        deadline and the breaker. `operation` labels the latency metrics
+        ("transcription", "chat").
+
+        Raises:
+            ServiceBusyException: breaker open, no slot in time, or deadline exceeded
+        """
+        remaining = self._remaining()
+        if remaining is not None and remaining <= 0:
+            raise self._deadline_exceeded()
+        probe = self._admit()
+        try:
+            return await self._run(operation, make_call, remaining)
+        finally:
+            if probe:
+                # Also when no outcome was recorded (deadline, or the request
+                # was cancelled by a client disconnect): the next call probes
+                self._probe_in_flight = False
+
+    async def _run(
+        self, operation: str, make_call: Callable[[], Awaitable[T]], remaining: Optional[float]
+    ) -> T:
+        limiter = self._get_limiter()
+        queue_bound_by_deadline = remaining is not None and remaining < self.queue_timeout_seconds
+        try:
+            await asyncio.wait_for(
+                limiter.acquire(),
+                timeout=remaining if queue_bound_by_deadline else self.queue_timeout_seconds,
+            )
+        except asyncio.TimeoutError:
+            if queue_bound_by_deadline:
+                raise self._deadline_exceeded()
+            self.rejected_busy += 1
+            raise ServiceBusyException("OpenAI", retry_after_seconds=1)
+
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        started = time.perf_counter()
+        remaining = self._remaining()
+        call_bound_by_deadline = remaining is not None and remaining < self.call_timeout_seconds
+        try:
+            result = await asyncio.wait_for(
+                make_call(),
+                timeout=max(remaining, 0) if call_bound_by_deadline else self.call_timeout_seconds,
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            if call_bound_by_deadline:
+                # The request ran out of budget: not evidence against the provider
+                raise self._deadline_exceeded()
+            self._record_failure()
+            raise ServiceBusyException("OpenAI", retry_after_seconds=1)
+        except Exception as e:
+            if _is_provider_failure(e):
+                self._record_failure()
+            else:
+                self._record_success()
+            raise
+        finally:
+            self.in_flight -= 1
+            limiter.release()
+            self._latencies.setdefault(operation, deque(maxlen=self._latency_window)).append(
+                (time.perf_counter() - started) * 1000
+            )
+        self._record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        latency = {}
+        for operation, samples in self._latencies.items():
+            ordered = sorted(samples)
+            latency[operation] = {
+                "samples": len(ordered),
+                "p50_ms": round(_percentile(ordered, 0.5), 1),
+                "p95_ms": round(_percentile(ordered, 0.95), 1),
+            }
+        return {
+            "configured": self.client is not None,
+            "breaker_state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "max_concurrency": self.max_concurrency,
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "rejected_open": self.rejected_open,
+            "rejected_busy": self.rejected_busy,
+            "deadline_exceeded": self.deadline_exceeded,
+            "latency": latency,
+        }
+
+
+def build_client(
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+) -> Optional[AsyncOpenAI]:
+    """Shared SDK client; None when no API key is configured."""
+    api_key = api_key or settings.OPENAI_API_KEY
+    if not api_key:
+        return None
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url or settings.OPENAI_BASE_URL,
+        timeout=settings.OPENAI_CALL_TIMEOUT_SECONDS,
+        max_retries=settings.OPENAI_MAX_RETRIES,
+    )
+
+
+openai_gateway = OpenAIGateway(
+    client=build_client(),
+    max_concurrency=settings.OPENAI_MAX_CONCURRENCY,
+    queue_timeout_seconds=settings.OPENAI_QUEUE_TIMEOUT_SECONDS,
+    call_timeout_seconds=settings.OPENAI_CALL_TIMEOUT_SECONDS,
+    failure_threshold=settings.OPENAI_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout_seconds=settings.OPENAI_BREAKER_RESET_SECONDS,
+)
+register_cache_stats("openai_gateway", openai_gateway.stats)